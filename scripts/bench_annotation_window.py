@@ -0,0 +1,99 @@
+"""
+基准测试：窗口模式 vs 逐 segment 模式
+
+对同一组 segments（默认取 ASR JSON 的前 N 个）分别以 ANNOTATION_WINDOW_SEGMENTS=1 与 =K 运行
+短语 + 单词标注（纯文本缓存，与生产路径一致），比较：
+- 吞吐：总耗时与 segments/分钟
+- 配额：Gemini 请求数（含工具轮次）与 prompt / output token
+- 窗口内验证失败而单独重试的 segment 比例
+- 产出的 annotation 数
+
+默认需要真实的数据库（semantic.fine_unit）与 Vertex AI 配置（.env）；不发送 Lark 通知，不写入 occurrence。
+--offline 使用本地假 Gemini 与内存词库（见 bench_common），只有请求数、token 与固定延迟下的耗时有意义；
+不传 --asr-json 时使用 bench_common.SITCOM_LINES 中的短台词。
+
+运行：python scripts/bench_annotation_window.py --asr-json asr.json --segments 60 --window 6 [--offline --delay 0.5]
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import asyncio
+import dataclasses
+import json
+import time
+
+from ingestion_worker.config import Config
+from ingestion_worker.infrastructure.vertex import VertexClient
+from ingestion_worker.domain.agentic.orchestrators import AgenticOrchestrator, WINDOW_OUTCOME
+from bench_common import SilentLark, add_backend_args, bench_backend, sample_segments, usage, usage_delta
+
+KINDS = ("phrase_sense", "word_sense")
+
+
+def load_segments(path: str, limit: int) -> list[dict]:
+    """读取 WhisperX 输出（{"segments": [{start, end, text}, ...]}）"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [
+        {"start": s["start"], "end": s["end"], "text": s["text"].strip()}
+        for s in data["segments"][:limit]
+    ]
+
+
+def window_usage() -> dict:
+    """当前累计的请求数、token 与窗口重试数"""
+    return {
+        **usage(KINDS),
+        "retried": sum(WINDOW_OUTCOME.get({"annotator": kind, "outcome": "retried"}) for kind in KINDS),
+    }
+
+
+async def run(config: Config, vertex: VertexClient, db, segments: list[dict], window: int) -> dict:
+    run_config = dataclasses.replace(config, annotation_window_segments=window)
+    orchestrator = AgenticOrchestrator(vertex, db, SilentLark(), run_config)
+    if orchestrator.mcp.lexicon is not None:
+        await orchestrator.mcp.lexicon.ensure_fresh()
+
+    candidate_modes = {orchestrator._candidate_mode(a) for a in orchestrator._annotators("split")}
+    caches, method = await orchestrator._create_cached_content_with_fallback(None, segments, candidate_modes)
+    before = window_usage()
+    start = time.perf_counter()
+    annotations = await orchestrator._process_segments_concurrent(caches, segments, "bench-window")
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": elapsed,
+        "method": method,
+        "annotations": len(annotations),
+        **usage_delta(before, window_usage()),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="窗口模式基准测试")
+    parser.add_argument("--asr-json", help="WhisperX 输出的 JSON 文件（离线模式可省略）")
+    parser.add_argument("--segments", type=int, default=60)
+    parser.add_argument("--window", type=int, default=6, help="窗口模式的 ANNOTATION_WINDOW_SEGMENTS")
+    add_backend_args(parser)
+    args = parser.parse_args()
+    if not args.asr_json and not args.offline:
+        parser.error("未使用 --offline 时必须提供 --asr-json")
+
+    segments = load_segments(args.asr_json, args.segments) if args.asr_json else sample_segments(args.segments)
+    n = len(segments)
+
+    async with bench_backend(args, segments) as (config, db, vertex):
+        print(f"\nsegments={n}, window={args.window}, window tokens={config.annotation_window_tokens}")
+        for window in (1, args.window):
+            r = await run(config, vertex, db, segments, window)
+            print(
+                f"  window={window:2d} ({r['method']}): 耗时={r['elapsed']:7.1f}s "
+                f"({n / r['elapsed'] * 60:6.1f} segments/min)  请求={r['requests']:5.0f}  "
+                f"prompt tokens={r['prompt']:8.0f}  output tokens={r['output']:7.0f}  "
+                f"单独重试={r['retried']:.0f}/{n * len(KINDS)}  annotations={r['annotations']}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+基准测试：候选获取方式（Function Calling vs 预查询注入）
+
+对同一组 segments 分别用两种模式运行短语 / 单词标注器（默认与生产路径一致使用纯文本缓存：
+tools 模式的缓存带工具定义，injected 模式的不带；--no-cache 时两种模式都不用缓存），比较：
+- 延迟：每次标注的端到端耗时（中位数 / p95）
+- 请求数：每次标注的 Gemini 请求次数（tools 模式包含工具轮次）
+- Token：usage_metadata 中的 prompt / output token
+- 一致性：两种模式选出的 fine_id 集合的 Jaccard 相似度与完全一致比例
+
+默认需要真实的数据库（semantic.fine_unit）与 Vertex AI 配置（.env）；不发送 Lark 通知，不写入 occurrence。
+--offline 使用本地假 Gemini 与内存词库（见 bench_common），只有请求数、token 与固定延迟下的耗时有意义。
+
+运行：python scripts/bench_candidate_injection.py [--text-file segments.txt] [--no-cache] [--offline --delay 0.5]
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import asyncio
+import dataclasses
+import statistics
+import time
+
+from ingestion_worker.domain.agentic.orchestrators import AgenticOrchestrator
+from bench_common import SilentLark, add_backend_args, bench_backend, usage, usage_delta
+
+DEFAULT_TEXTS = [
+    "I want to give up learning English",
+    "The cat is running very fast",
+    "She made a big mistake yesterday",
+    "We ran out of milk, so I went to the store",
+    "He looked after his little brother all weekend",
+    "Don't worry, it's a piece of cake",
+]
+
+MODES = ("tools", "injected")
+
+
+def load_segments(path: str | None) -> list[dict]:
+    texts = DEFAULT_TEXTS
+    if path:
+        with open(path, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    return [{"start": i * 4.0, "end": i * 4.0 + 3.5, "text": text} for i, text in enumerate(texts)]
+
+
+async def run_mode(orchestrator: AgenticOrchestrator, mode: str, segments: list[dict], use_cache: bool) -> dict:
+    """单个模式：逐个 segment 顺序运行两个标注器"""
+    caches, method = None, "gemini_nocache"
+    if use_cache:
+        caches, method = await orchestrator._create_cached_content_with_fallback(None, segments, {mode})
+    results = {"method": method}
+    for annotator in (orchestrator.phrase_annotator, orchestrator.word_annotator):
+        kind = annotator.get_kind()
+        before = usage((kind,), (mode,))
+        latencies, chosen = [], []
+        for idx, segment in enumerate(segments):
+            start = time.perf_counter()
+            anns = await orchestrator._process_segment(caches, segment, idx, annotator, "bench-candidates")
+            latencies.append(time.perf_counter() - start)
+            chosen.append({a["fine_id"] for a in anns})
+        results[kind] = {
+            "latencies": latencies,
+            "chosen": chosen,
+            **usage_delta(before, usage((kind,), (mode,))),
+        }
+    return results
+
+
+def report(results: dict, segments: list[dict], offline: bool) -> None:
+    n = len(segments)
+    for kind in ("phrase_sense", "word_sense"):
+        print(f"\n[{kind}] segments={n}")
+        for mode in MODES:
+            r = results[mode][kind]
+            lat = sorted(r["latencies"])
+            p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+            print(
+                f"  {mode:9s} ({results[mode]['method']}) 延迟 p50={statistics.median(lat):6.2f}s p95={p95:6.2f}s  "
+                f"请求/segment={r['requests'] / n:4.1f}  "
+                f"prompt tokens/segment={r['prompt'] / n:7.0f}  output tokens/segment={r['output'] / n:6.0f}"
+            )
+
+        if offline:
+            print("  一致性: 离线模式不评估（假 Gemini 不做标注）")
+            continue
+        jaccards, exact = [], 0
+        for a, b in zip(results["tools"][kind]["chosen"], results["injected"][kind]["chosen"]):
+            union = a | b
+            jaccards.append(len(a & b) / len(union) if union else 1.0)
+            exact += a == b
+        print(f"  一致性: Jaccard 平均={statistics.mean(jaccards):.2f}, 完全一致={exact}/{n}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="候选获取方式基准测试")
+    parser.add_argument("--text-file", help="每行一个 segment 文本（默认使用内置样例）")
+    parser.add_argument("--no-cache", action="store_true", help="不创建 Context Cache（无缓存模式）")
+    add_backend_args(parser)
+    args = parser.parse_args()
+    segments = load_segments(args.text_file)
+
+    async with bench_backend(args, segments) as (config, db, vertex):
+        results = {}
+        for mode in MODES:
+            mode_config = dataclasses.replace(config, word_candidate_mode=mode, phrase_candidate_mode=mode)
+            orchestrator = AgenticOrchestrator(vertex, db, SilentLark(), mode_config)
+            if orchestrator.mcp.lexicon is not None:
+                await orchestrator.mcp.lexicon.ensure_fresh()  # 索引加载不计入标注延迟
+            results[mode] = await run_mode(orchestrator, mode, segments, use_cache=not args.no_cache)
+        report(results, segments, args.offline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
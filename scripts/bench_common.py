@@ -0,0 +1,292 @@
+"""
+基准测试 / 评估脚本的共享部分
+
+- SilentLark：不发送 Lark 通知
+- SITCOM_LINES / sample_segments(n)：离线模式的默认输入（短台词，循环使用）
+- usage(annotator_kinds, modes) / usage_delta(before, after)：从进程内指标读取累计的 Gemini 请求数与 token，
+  两次读数的差值即一次运行的开销
+- FakePredictionService / connect_to_fake：本地假 PredictionService（grpc.aio），VertexClient 的模型连接到它
+- add_backend_args(parser) / bench_backend(args, segments)：--offline / --delay 参数，
+  以及对应的 (config, db, vertex)（默认读取 .env、连接真实的数据库与 Vertex AI）
+
+离线模式：
+- OfflineDB 是内存中的 fine_unit 表（segment 中的单词各有名词 / 动词两个义项，外加 OFFLINE_PHRASES）
+- CachedContent.create 换成本地假实现（记录缓存是否带 tools 与缓存前缀的 token 数）
+- 请求仍由 SDK 组装并校验（例如缓存与 tools / tool_config 同时出现会照常报错）
+- 假服务端按固定延迟回复：有工具可用且还没有工具结果时，为 prompt 中每个 segment 的每个词调用一次
+  query_fine_units（一轮），否则返回空 annotations；prompt token 按 estimate_tokens 估算
+- 只用来比较请求数、prompt 大小与固定单次延迟下的耗时；标注质量与一致性需要真实的 Gemini
+"""
+import argparse
+import asyncio
+import dataclasses
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import AsyncIterator, Callable, Optional
+
+import grpc
+from google.cloud.aiplatform_v1.services.prediction_service import (
+    PredictionServiceAsyncClient,
+    PredictionServiceClient,
+)
+from google.cloud.aiplatform_v1.services.prediction_service.transports import (
+    PredictionServiceGrpcAsyncIOTransport,
+    PredictionServiceGrpcTransport,
+)
+from google.cloud.aiplatform_v1.types import GenerateContentRequest, GenerateContentResponse
+from vertexai.preview.caching import CachedContent
+
+from ingestion_worker.config import Config
+from ingestion_worker.domain.agentic.candidates import tokenize
+from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.infrastructure.vertex import VertexClient, GEMINI_REQUEST, GEMINI_TOKENS
+from ingestion_worker.utils.tokens import estimate_tokens
+
+PHASES = ("initial", "tool_response", "single")
+CANDIDATE_MODES = ("tools", "injected")
+
+# 与 scripts/eval_annotation_mode.py 评估集中的短语一致
+OFFLINE_PHRASES = (
+    "give up", "make a mistake", "run out of", "look after", "piece of cake",
+    "turn off", "look forward to", "make it",
+)
+
+# 情景喜剧风格的短台词（窗口模式针对的就是这类 segment）
+SITCOM_LINES = (
+    "Okay.", "What are you doing here?", "I can't believe you did that!", "Oh my God.",
+    "We ran out of coffee again.", "Hmm.", "Could you turn off the TV?", "Yeah, totally.",
+    "She gave up on him last week.", "No way!", "It's a piece of cake.", "Let's go.",
+    "I'm looking forward to the party.", "Right.", "He always looks after the kids.", "Wait, what?",
+)
+
+EMPTY_RESPONSE = GenerateContentResponse(
+    candidates=[{
+        "content": {"role": "model", "parts": [{"text": '{"annotations": []}'}]},
+        "finish_reason": "STOP",
+    }],
+    usage_metadata={"prompt_token_count": 100, "candidates_token_count": 5},
+)
+
+
+class SilentLark:
+    """基准测试不发送通知"""
+
+    def __getattr__(self, name):
+        async def noop(*args, **kwargs):
+            return True
+        return noop
+
+
+def sample_segments(n: int) -> list[dict]:
+    """n 个 segment（循环使用 SITCOM_LINES，每句 2 秒）"""
+    return [
+        {"start": i * 2.0, "end": i * 2.0 + 1.8, "text": SITCOM_LINES[i % len(SITCOM_LINES)]}
+        for i in range(n)
+    ]
+
+
+def usage(annotator_kinds: tuple[str, ...], modes: tuple[str, ...] = CANDIDATE_MODES) -> dict:
+    """当前累计的 Gemini 请求数（含工具轮次）与 prompt / output token"""
+    totals = {"requests": 0.0, "prompt": 0.0, "output": 0.0}
+    for kind in annotator_kinds:
+        for mode in modes:
+            tags = {"annotator": kind, "mode": mode}
+            totals["requests"] += sum(GEMINI_REQUEST.count({**tags, "phase": phase}) for phase in PHASES)
+            totals["prompt"] += GEMINI_TOKENS.get({**tags, "type": "prompt"})
+            totals["output"] += GEMINI_TOKENS.get({**tags, "type": "output"})
+    return totals
+
+
+def usage_delta(before: dict, after: dict) -> dict:
+    """两次读数的差值"""
+    return {key: after[key] - before[key] for key in after}
+
+
+class FakePredictionService:
+    """只实现 GenerateContent 的假服务端，记录峰值在途请求数"""
+
+    def __init__(
+        self,
+        delay: float,
+        respond: Optional[Callable[[GenerateContentRequest], GenerateContentResponse]] = None
+    ):
+        self.delay = delay
+        self.respond = respond or (lambda request: EMPTY_RESPONSE)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def generate_content(self, request: GenerateContentRequest, context) -> GenerateContentResponse:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return self.respond(request)
+        finally:
+            self.in_flight -= 1
+
+    def reset(self) -> None:
+        self.in_flight = 0
+        self.peak = 0
+
+    async def start(self) -> tuple[grpc.aio.Server, str]:
+        handler = grpc.method_handlers_generic_handler(
+            "google.cloud.aiplatform.v1.PredictionService",
+            {
+                "GenerateContent": grpc.unary_unary_rpc_method_handler(
+                    self.generate_content,
+                    request_deserializer=GenerateContentRequest.deserialize,
+                    response_serializer=GenerateContentResponse.serialize,
+                )
+            },
+        )
+        server = grpc.aio.server()
+        server.add_generic_rpc_handlers((handler,))
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        return server, f"127.0.0.1:{port}"
+
+
+def connect_to_fake(vertex: VertexClient, address: str) -> None:
+    """让 VertexClient 创建的模型使用连接到假服务端的客户端（仅基准测试使用）"""
+    sync_client = PredictionServiceClient(
+        transport=PredictionServiceGrpcTransport(channel=grpc.insecure_channel(address))
+    )
+    async_client = PredictionServiceAsyncClient(
+        transport=PredictionServiceGrpcAsyncIOTransport(channel=grpc.aio.insecure_channel(address))
+    )
+    build_model = vertex._build_model
+
+    def build_fake_model(*args, **kwargs):
+        model = build_model(*args, **kwargs)
+        model._prediction_client = sync_client
+        model._prediction_async_client = async_client
+        return model
+
+    vertex._build_model = build_fake_model
+
+
+class OfflineDB:
+    """内存中的 fine_unit 表：lexicon 快照 / 增量刷新返回全部行，按 id 查询返回存在的 id"""
+
+    def __init__(self, segments: list[dict]):
+        words = sorted({token.text.lower() for s in segments for token in tokenize(s["text"])})
+        self.rows = []
+        for label, kind, pos in (
+            [(word, "word_sense", pos) for word in words for pos in ("n", "v")]
+            + [(phrase, "phrase_sense", None) for phrase in OFFLINE_PHRASES]
+        ):
+            self.rows.append({
+                "id": len(self.rows) + 1, "kind": kind, "label": label, "lang": "en", "pos": pos,
+                "def": f"{label} ({pos or 'phrase'})", "status": "active", "updated_at": None,
+            })
+
+    async def fetch_all(self, query, *args):
+        if "id = ANY" in query:
+            known = {row["id"] for row in self.rows}
+            return [{"id": fine_id} for fine_id in args[0] if fine_id in known]
+        return self.rows
+
+    async def fetch_one(self, query, *args):
+        return None
+
+    async def execute(self, query, *args):
+        return "OK"
+
+
+class OfflineGemini:
+    """假 CachedContent.create 与脚本化的 GenerateContent 回复（见模块说明）"""
+
+    def __init__(self, segments: list[dict]):
+        self.segments = segments
+        self.caches: dict[str, dict] = {}
+
+    def create_cache(self, model_name, contents, tools=None, **kwargs) -> SimpleNamespace:
+        name = f"projects/bench/locations/us-central1/cachedContents/{len(self.caches) + 1}"
+        text = " ".join(part.text for content in contents for part in content.parts if part.text)
+        self.caches[name] = {"tools": bool(tools), "tokens": estimate_tokens(text)}
+        return SimpleNamespace(name=name, resource_name=name, model_name=model_name)
+
+    def respond(self, request: GenerateContentRequest) -> GenerateContentResponse:
+        cache = self.caches.get(request.cached_content, {"tools": False, "tokens": 0})
+        sent = "\n".join(part.text for content in request.contents for part in content.parts if part.text)
+        cached_tokens = cache["tokens"]
+        answered = any(part.function_response.name for part in request.contents[-1].parts)
+        calls = []
+        if (cache["tools"] or len(request.tools) > 0) and not answered:
+            kind = "phrase_sense" if "phrase_sense" in sent and "word_sense" not in sent else "word_sense"
+            for segment in self.segments:
+                if segment["text"] in sent:
+                    calls.extend(
+                        {"function_call": {"name": "query_fine_units", "args": {"lemma": t.text.lower(), "kind": kind}}}
+                        for t in tokenize(segment["text"])
+                    )
+        parts = calls or [{"text": '{"annotations": []}'}]
+        return GenerateContentResponse(
+            candidates=[{"content": {"role": "model", "parts": parts}, "finish_reason": "STOP"}],
+            usage_metadata={
+                "prompt_token_count": cached_tokens + estimate_tokens(sent) + 50 * len(request.contents),
+                "cached_content_token_count": cached_tokens,
+                "candidates_token_count": 10 * len(calls) or 5,
+            },
+        )
+
+
+def add_backend_args(parser: argparse.ArgumentParser) -> None:
+    """离线模式参数"""
+    parser.add_argument("--offline", action="store_true", help="使用本地假 Gemini 与内存词库（不需要 .env）")
+    parser.add_argument("--delay", type=float, default=0.5, help="离线模式下每个 Gemini 请求的延迟（秒）")
+
+
+@asynccontextmanager
+async def bench_backend(
+    args: argparse.Namespace,
+    segments: list[dict]
+) -> AsyncIterator[tuple[Config, Database | OfflineDB, VertexClient]]:
+    """
+    基准测试的 (config, db, vertex)：默认读取 .env 并连接真实服务；--offline 时使用本地假实现
+
+    标注结果缓存关闭：重复的台词不应让某一种模式少调用 Gemini
+    """
+    if args.offline:
+        config = offline_config(gemini_model="gemini-bench", response_cache_enabled=False)
+        vertex = VertexClient(config)
+        gemini = OfflineGemini(segments)
+        fake = FakePredictionService(args.delay, gemini.respond)
+        server, address = await fake.start()
+        connect_to_fake(vertex, address)
+        create = CachedContent.create
+        CachedContent.create = gemini.create_cache
+        try:
+            yield config, OfflineDB(segments), vertex
+        finally:
+            CachedContent.create = create
+            vertex.close()
+            await server.stop(None)
+        return
+
+    config = dataclasses.replace(Config.from_env(), response_cache_enabled=False)
+    db = Database(config.db_url, pool_size=5)
+    await db.connect()
+    vertex = VertexClient(config)
+    try:
+        yield config, db, vertex
+    finally:
+        vertex.close()
+        await db.close()
+
+
+def offline_config(**overrides) -> Config:
+    """离线模式的配置（只有必需字段，其余使用 Config 的默认值）"""
+    return Config(
+        gcp_project="bench-project",
+        gcp_region="us-central1",
+        raw_bucket="raw",
+        hls_bucket="hls",
+        transcript_bucket="transcripts",
+        subscription_path="projects/bench-project/subscriptions/bench",
+        transcoder_template_id="bench",
+        replicate_api_token="bench",
+        db_url="postgresql://localhost/bench",
+        error_webhook_url="https://example.com/hook",
+        **overrides,
+    )
@@ -0,0 +1,76 @@
+"""
+基准测试：segment meta / occurrence evidence 的 JSON 序列化（标准库 json vs json_codec）
+
+模拟 WhisperX 输出（每个 segment 带逐词时间戳），分别测量序列化与反序列化耗时。
+不需要数据库。
+
+运行：python scripts/bench_json.py --segments 1000 --words 15 --runs 5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from ingestion_worker.utils import json_codec
+
+
+def make_metas(segments: int, words: int) -> list[dict]:
+    """生成 segments 个 meta（与 ASRService._parse_segments 的结构一致）"""
+    rng = random.Random(0)
+    metas = []
+    t = 0.0
+    for _ in range(segments):
+        word_list = []
+        for _ in range(words):
+            duration = rng.uniform(0.1, 0.6)
+            word_list.append({
+                "word": rng.choice(["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog"]),
+                "start": round(t, 3),
+                "end": round(t + duration, 3),
+                "score": round(rng.random(), 3),
+            })
+            t += duration
+        metas.append({"words": word_list, "avg_logprob": rng.uniform(-1, 0)})
+    return metas
+
+
+def timed(func, items, runs: int) -> float:
+    """多次运行取中位数（秒）"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 序列化基准测试")
+    parser.add_argument("--segments", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    metas = make_metas(args.segments, args.words)
+    encoded = [json.dumps(m) for m in metas]
+    size_kb = sum(len(e) for e in encoded) / 1024
+
+    print(f"\nsegments={args.segments}, words/segment={args.words}, 总大小={size_kb:.0f} KB, "
+          f"json_codec 后端={json_codec.BACKEND}")
+
+    results = {
+        "dumps": (timed(json.dumps, metas, args.runs), timed(json_codec.dumps, metas, args.runs)),
+        "loads": (timed(json.loads, encoded, args.runs), timed(json_codec.loads, encoded, args.runs)),
+    }
+    for name, (baseline, fast) in results.items():
+        print(
+            f"  {name}: json={baseline * 1000:7.1f} ms  json_codec={fast * 1000:7.1f} ms  "
+            f"节省={(baseline - fast) * 1000:7.1f} ms ({baseline / fast:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+基准测试：Persistence 写入路径（逐行 vs 批量）
+
+在一个事务内创建与 segment 同结构的临时表（临时 schema 优先于 public，
+未加 schema 前缀的 segment 会解析到临时表），测完回滚，不写入真实数据。
+
+运行：python scripts/bench_persistence.py --segments 300 --runs 5
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import asyncio
+import statistics
+import time
+
+from ingestion_worker.config import Config
+from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.domain.persistence import PersistenceService
+
+
+# 改为批量写入之前的逐行 upsert（基准对照）
+PER_ROW_INSERT_SEGMENT_SQL = """
+    INSERT INTO segment (video_id, t_start, t_end, text, lang, meta)
+    VALUES ($1, $2, $3, $4, $5, $6)
+    ON CONFLICT (video_id, t_start, text)
+    DO UPDATE SET
+        t_end = EXCLUDED.t_end,
+        updated_at = NOW()
+    RETURNING id
+"""
+
+
+async def insert_segments_per_row(conn, video_id: int, segments: list[dict]) -> list[int]:
+    """逐行插入 segments（每个 segment 一次往返）"""
+    segment_ids = []
+    for seg in segments:
+        result = await conn.fetchrow(
+            PER_ROW_INSERT_SEGMENT_SQL,
+            video_id,
+            seg["start"],
+            seg["end"],
+            seg["text"],
+            seg.get("lang", "en"),
+            seg.get("meta", {})
+        )
+        segment_ids.append(result["id"])
+    return segment_ids
+
+
+def make_segments(count: int, run: int) -> list[dict]:
+    """生成 count 个 segment（每轮文本不同，避免命中上一轮的冲突行）"""
+    return [
+        {
+            "start": i * 2.5,
+            "end": i * 2.5 + 2.4,
+            "text": f"benchmark run {run} segment {i}",
+            "lang": "en",
+            "meta": {"words": [{"word": "benchmark", "start": i * 2.5, "end": i * 2.5 + 0.4}]},
+        }
+        for i in range(count)
+    ]
+
+
+async def bench(db: Database, persistence: PersistenceService, video_id: int, count: int, runs: int) -> None:
+    results = {"per_row": [], "bulk": []}
+    methods = {
+        "per_row": insert_segments_per_row,
+        "bulk": persistence._insert_segments,
+    }
+
+    for run in range(runs):
+        for name, method in methods.items():
+            segments = make_segments(count, run * 2 + (name == "bulk"))
+            async with db.pool.acquire() as conn:
+                tx = conn.transaction()
+                await tx.start()
+                try:
+                    await conn.execute(
+                        "CREATE TEMP TABLE segment (LIKE public.segment INCLUDING ALL) ON COMMIT DROP"
+                    )
+                    start = time.perf_counter()
+                    ids = await method(conn, video_id, segments)
+                    results[name].append(time.perf_counter() - start)
+                    assert len(ids) == count
+                finally:
+                    await tx.rollback()
+
+    print(f"\nsegments={count}, runs={runs}")
+    for name, timings in results.items():
+        print(
+            f"  {name:8s} median={statistics.median(timings) * 1000:8.1f} ms  "
+            f"min={min(timings) * 1000:8.1f} ms"
+        )
+    speedup = statistics.median(results["per_row"]) / statistics.median(results["bulk"])
+    print(f"  bulk 加速: {speedup:.1f}x")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Persistence 写入基准测试")
+    parser.add_argument("--segments", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--video-id", type=int, default=1, help="写入的 video_id（临时表不复制外键）")
+    args = parser.parse_args()
+
+    config = Config.from_env()
+    db = Database(config.db_url, pool_size=2)
+    await db.connect()
+    try:
+        await bench(db, PersistenceService(db), args.video_id, args.segments, args.runs)
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
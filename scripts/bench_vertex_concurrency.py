@@ -0,0 +1,89 @@
+"""
+基准测试：Gemini 调用的实际并发（asyncio.to_thread + 同步 SDK vs SDK 原生异步接口）
+
+在本地启动一个假的 PredictionService（grpc.aio，GenerateContent 固定延迟后返回空 annotations），
+让 VertexClient 的模型连接到它，然后以 GEMINI_MAX_CONCURRENCY 为上限并发发出请求，比较：
+- 服务端观察到的峰值在途请求数（应达到配置的并发上限）
+- 总耗时与吞吐（请求/秒）
+
+to_thread 模式受默认线程池大小（min(32, CPU 数 + 4)）限制，峰值通常远低于配置的并发上限；
+async 模式走 grpc.aio，不占用线程。
+
+不需要数据库与 GCP 凭据（假服务端使用不加密的本地端口）。
+
+运行：python scripts/bench_vertex_concurrency.py --requests 200 --concurrency 20 --delay 0.5
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import asyncio
+import time
+
+from vertexai.generative_models import GenerationConfig
+
+from ingestion_worker.infrastructure.vertex import VertexClient
+from bench_common import FakePredictionService, connect_to_fake, offline_config
+
+
+async def call_to_thread(vertex: VertexClient, prompt: str) -> None:
+    """基线：同步 SDK + asyncio.to_thread（改造前的调用方式）"""
+    model = vertex._build_model(None, "bench", tools=None)
+    await asyncio.to_thread(
+        model.generate_content,
+        prompt,
+        generation_config=GenerationConfig(temperature=0.0),
+    )
+
+
+async def call_async(vertex: VertexClient, prompt: str) -> None:
+    """当前实现：VertexClient.generate_json（SDK 原生异步接口）"""
+    await vertex.generate_json(
+        None, prompt, system_instruction="bench",
+        trace_context={"annotator_kind": "bench", "video_uid": "bench-concurrency"},
+    )
+
+
+async def run(call, vertex: VertexClient, server: FakePredictionService, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)  # 与 orchestrator 相同的并发控制方式
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await call(vertex, f"segment #{i}")
+
+    server.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {"elapsed": time.perf_counter() - start, "peak": server.peak}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Gemini 调用并发基准测试（本地假服务端）")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20, help="并发上限（对应 GEMINI_MAX_CONCURRENCY）")
+    parser.add_argument("--delay", type=float, default=0.5, help="假服务端每个请求的延迟（秒）")
+    args = parser.parse_args()
+
+    fake = FakePredictionService(args.delay)
+    server, address = await fake.start()
+    vertex = VertexClient(offline_config(
+        gemini_max_concurrency=args.concurrency, gemini_max_retries=0, gemini_model="gemini-2.5-flash"
+    ))
+    connect_to_fake(vertex, address)
+
+    try:
+        ideal = args.requests / args.concurrency * args.delay
+        print(f"\nrequests={args.requests}, concurrency={args.concurrency}, delay={args.delay}s, 理想耗时≈{ideal:.1f}s")
+        for name, call in (("to_thread", call_to_thread), ("async", call_async)):
+            r = await run(call, vertex, fake, args.requests, args.concurrency)
+            print(
+                f"  {name:9s} 峰值在途={r['peak']:3d}/{args.concurrency}  耗时={r['elapsed']:6.2f}s  "
+                f"吞吐={args.requests / r['elapsed']:6.1f} 请求/s"
+            )
+    finally:
+        vertex.close()
+        await server.stop(None)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""
+评估：split（短语、单词分两次调用）vs combined（合并标注器一次调用）vs rule（本地规则标注，基线）
+
+在固定的评估集上分别运行三种模式（Gemini 模式使用纯文本缓存，与生产路径一致），报告：
+- Prompt / output token 与 Gemini 请求数（含工具轮次）
+- 每个 segment 的标注延迟（中位数 / p95）
+- 标注质量：按 (kind, label) 对比评估集中的期望标注，计算 precision / recall
+- combined / rule 与 split 选出的 fine_id 集合的 Jaccard 相似度（rule 一行即 Gemini 消歧带来的差异）
+
+默认需要真实的数据库（semantic.fine_unit）与 Vertex AI 配置（.env）；不发送 Lark 通知，不写入 occurrence。
+--offline 使用本地假 Gemini 与内存词库（见 bench_common），只报告请求数、token 与固定延迟下的耗时。
+
+运行：python scripts/eval_annotation_mode.py [--offline --delay 0.5]
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import asyncio
+import statistics
+import time
+
+from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.domain.agentic.orchestrators import AgenticOrchestrator
+from bench_common import SilentLark, add_backend_args, bench_backend, usage, usage_delta
+
+# 固定评估集：文本 + 期望的 (kind, label)（label 为 fine_unit.label 的小写形式）
+EVAL_SET = [
+    ("I want to give up learning English", {
+        ("phrase_sense", "give up"), ("word_sense", "want"), ("word_sense", "learn"),
+    }),
+    ("The cat is running very fast", {
+        ("word_sense", "cat"), ("word_sense", "run"), ("word_sense", "fast"),
+    }),
+    ("She made a big mistake yesterday", {
+        ("phrase_sense", "make a mistake"), ("word_sense", "big"), ("word_sense", "yesterday"),
+    }),
+    ("We ran out of milk, so I went to the store", {
+        ("phrase_sense", "run out of"), ("word_sense", "milk"), ("word_sense", "store"),
+    }),
+    ("He looked after his little brother all weekend", {
+        ("phrase_sense", "look after"), ("word_sense", "little"), ("word_sense", "brother"), ("word_sense", "weekend"),
+    }),
+    ("Don't worry, it's a piece of cake", {
+        ("phrase_sense", "piece of cake"), ("word_sense", "worry"),
+    }),
+    ("It was raining heavily when we got home", {
+        ("word_sense", "rain"), ("word_sense", "heavily"), ("word_sense", "home"),
+    }),
+    ("Could you turn off the lights before you leave?", {
+        ("phrase_sense", "turn off"), ("word_sense", "light"), ("word_sense", "leave"),
+    }),
+    ("I'm looking forward to seeing you again", {
+        ("phrase_sense", "look forward to"), ("word_sense", "see"),
+    }),
+    ("Sorry, I can't make it tonight", {
+        ("phrase_sense", "make it"), ("word_sense", "tonight"),
+    }),
+]
+
+MODES = {"split": ("phrase_sense", "word_sense"), "combined": ("combined",), "rule": ()}
+
+
+async def run_mode(orchestrator: AgenticOrchestrator, caches, segments: list[dict], mode: str) -> dict:
+    """逐个 segment 运行（单独计时），返回每个 segment 的 annotations"""
+    before = usage(MODES[mode])
+    latencies, per_segment = [], []
+    for idx in range(len(segments)):
+        start = time.perf_counter()
+        skip_segments = set(range(len(segments))) - {idx}
+        if mode == "rule":
+            anns = await orchestrator._process_segments_rule(
+                segments, "eval-annotation-mode", skip_segments=skip_segments
+            )
+        else:
+            anns = await orchestrator._process_segments_concurrent(
+                caches, segments, "eval-annotation-mode",
+                skip_segments=skip_segments,
+                annotation_mode=mode,
+            )
+        latencies.append(time.perf_counter() - start)
+        per_segment.append(anns)
+    return {"latencies": latencies, "annotations": per_segment, **usage_delta(before, usage(MODES[mode]))}
+
+
+async def fine_unit_labels(db: Database, fine_ids: set[int]) -> dict[int, tuple[str, str]]:
+    rows = await db.fetch_all(
+        "SELECT id, kind, LOWER(label) AS label FROM semantic.fine_unit WHERE id = ANY($1::bigint[])",
+        sorted(fine_ids),
+    )
+    return {row["id"]: (row["kind"], row["label"]) for row in rows}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="标注方式评估（split / combined / rule）")
+    add_backend_args(parser)
+    args = parser.parse_args()
+    segments = [
+        {"start": i * 4.0, "end": i * 4.0 + 3.5, "text": text} for i, (text, _) in enumerate(EVAL_SET)
+    ]
+
+    async with bench_backend(args, segments) as (config, db, vertex):
+        orchestrator = AgenticOrchestrator(vertex, db, SilentLark(), config)
+        if orchestrator.mcp.lexicon is not None:
+            await orchestrator.mcp.lexicon.ensure_fresh()
+        candidate_modes = {
+            orchestrator._candidate_mode(a)
+            for mode in ("split", "combined") for a in orchestrator._annotators(mode)
+        }
+        caches, method = await orchestrator._create_cached_content_with_fallback(None, segments, candidate_modes)
+
+        results = {mode: await run_mode(orchestrator, caches, segments, mode) for mode in MODES}
+
+        all_ids = {a["fine_id"] for r in results.values() for anns in r["annotations"] for a in anns}
+        labels = {} if args.offline else await fine_unit_labels(db, all_ids)
+
+        n = len(segments)
+        print(f"\n评估集: {n} segments, method={method}")
+        for mode, r in results.items():
+            lat = sorted(r["latencies"])
+            line = (
+                f"  {mode:8s} prompt tokens/segment={r['prompt'] / n:7.0f}  output tokens/segment={r['output'] / n:6.0f}  "
+                f"请求/segment={r['requests'] / n:4.1f}  延迟 p50={statistics.median(lat):5.2f}s "
+                f"p95={lat[min(n - 1, int(n * 0.95))]:5.2f}s"
+            )
+            if not args.offline:
+                found = [{labels[a["fine_id"]] for a in anns if a["fine_id"] in labels} for anns in r["annotations"]]
+                expected = [gold for _, gold in EVAL_SET]
+                hits = sum(len(f & g) for f, g in zip(found, expected))
+                precision = hits / max(1, sum(len(f) for f in found))
+                recall = hits / max(1, sum(len(g) for g in expected))
+                line += f"  precision={precision:.2f} recall={recall:.2f}"
+            print(line)
+
+        if args.offline:
+            print("  质量与一致性: 离线模式不评估（假 Gemini 不做标注）")
+            return
+        for mode in ("combined", "rule"):
+            jaccards = []
+            for split_anns, mode_anns in zip(results["split"]["annotations"], results[mode]["annotations"]):
+                a, b = {x["fine_id"] for x in split_anns}, {x["fine_id"] for x in mode_anns}
+                jaccards.append(len(a & b) / len(a | b) if a | b else 1.0)
+            print(f"  fine_id 一致性 split vs {mode}（Jaccard 平均）: {statistics.mean(jaccards):.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -70,7 +70,9 @@ async def run_queries():
             concepts = {}
             for row in occurrences:
                 try:
-                    evidence = json.loads(row['evidence'])
+                    evidence = row['evidence']
+                    if isinstance(evidence, str):  # 未注册 JSONB 编解码器时为字符串
+                        evidence = json.loads(evidence)
                     rationale = evidence.get('rationale', '')
                     words = rationale.split()
                     for w in words:
@@ -15,7 +15,9 @@ setup(
         "google-cloud-videointelligence>=2.11.0",
         "google-cloud-aiplatform>=1.60.0",
         "google-cloud-video-transcoder>=1.10.0",
+        "google-cloud-pubsub>=2.18.0",
         "asyncpg>=0.29.0",
+        "orjson>=3.9.0",
         "aiohttp>=3.9.0",
         "tenacity>=8.2.0",
         "fastapi>=0.66.0",
@@ -0,0 +1,5 @@
+-- 每个 Stage 的持久化输出（asr_prediction_id / asr_json_uri / vtt_uri /
+-- transcoder_job_name / hls_path / annotations / persist_stats），
+-- 重试时跳过已完成的 Stage，并重新挂接仍在运行的 Replicate / Transcoder 任务。
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS checkpoint JSONB NOT NULL DEFAULT '{}'::jsonb;
@@ -0,0 +1,7 @@
+-- 原子认领（INSERT ... ON CONFLICT）所需的唯一约束。
+-- 如果表上已有等价的主键/唯一约束，可跳过对应语句。
+CREATE UNIQUE INDEX IF NOT EXISTS ingest_jobs_object_key_etag_key
+    ON ingest_jobs (object_key, etag);
+
+CREATE UNIQUE INDEX IF NOT EXISTS video_video_uid_key
+    ON video (video_uid);
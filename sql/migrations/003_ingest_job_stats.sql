@@ -0,0 +1,28 @@
+-- 每个 ingest job 一行处理统计（重试时覆盖为最近一次），用于分析各 Stage 的耗时分位数。
+-- stage_seconds 只包含本次实际运行的 Stage（从 checkpoint 复用的 Stage 记在 resumed_stages）。
+CREATE TABLE IF NOT EXISTS ingest_job_stats (
+    object_key TEXT NOT NULL,
+    etag TEXT NOT NULL,
+    video_uid TEXT NOT NULL,
+    status TEXT NOT NULL,
+    retry_count INT NOT NULL DEFAULT 0,
+    processing_time_seconds DOUBLE PRECISION NOT NULL,
+    asr_wall_seconds DOUBLE PRECISION,
+    transcoder_wall_seconds DOUBLE PRECISION,
+    agentic_wall_seconds DOUBLE PRECISION,
+    persist_wall_seconds DOUBLE PRECISION,
+    video_duration_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    segments_count INT NOT NULL DEFAULT 0,
+    occurrences_count INT NOT NULL DEFAULT 0,
+    fine_units_matched INT NOT NULL DEFAULT 0,
+    method TEXT,
+    ontology_ver TEXT,
+    stage_seconds JSONB NOT NULL DEFAULT '{}',
+    resumed_stages JSONB NOT NULL DEFAULT '[]',
+    error_message TEXT,
+    recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (object_key, etag)
+);
+
+CREATE INDEX IF NOT EXISTS ingest_job_stats_recorded_at_idx
+    ON ingest_job_stats (recorded_at);
@@ -0,0 +1,15 @@
+-- WhisperX 逐词时间戳从 segment.meta（每个词一个 JSON 对象）移到列式的旁表。
+-- starts / ends / scores 为 little-endian float32 数组（每个词 4 字节，未对齐的词为 NaN），
+-- tokens 与之一一对应。读取见 PersistenceService.load_word_timings。
+CREATE TABLE IF NOT EXISTS segment_word_timing (
+    segment_id BIGINT PRIMARY KEY REFERENCES segment(id) ON DELETE CASCADE,
+    word_count INT NOT NULL,
+    tokens JSONB NOT NULL,
+    starts BYTEA NOT NULL,
+    ends BYTEA NOT NULL,
+    scores BYTEA NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 已有数据：把 meta 中的 words / chars 去掉（需要时间戳的旧视频重新跑 ASR 解析即可写入旁表）
+-- UPDATE segment SET meta = meta - 'words' - 'chars' WHERE meta ? 'words' OR meta ? 'chars';
@@ -0,0 +1,19 @@
+-- fine_unit 进程内索引（FineUnitLexicon）按 updated_at 水位增量刷新：
+-- 每次 UPDATE 由触发器刷新 updated_at，下线（status 改为非 active）的条目同样会被拉取并移出索引。
+ALTER TABLE semantic.fine_unit
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION semantic.touch_fine_unit_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS fine_unit_touch_updated_at ON semantic.fine_unit;
+CREATE TRIGGER fine_unit_touch_updated_at
+    BEFORE UPDATE ON semantic.fine_unit
+    FOR EACH ROW EXECUTE FUNCTION semantic.touch_fine_unit_updated_at();
+
+CREATE INDEX IF NOT EXISTS fine_unit_updated_at_idx
+    ON semantic.fine_unit (updated_at);
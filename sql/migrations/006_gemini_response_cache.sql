@@ -0,0 +1,15 @@
+-- Gemini 标注结果缓存的持久层（RESPONSE_CACHE_PERSISTENT=true 时使用，见 ResponseCache）。
+-- cache_key = sha256(模型, 标注器, prompt 模板版本, 规范化的 segment 文本)；
+-- annotations 不含 segment_index，span 以去掉首部空白后的 segment 文本为基准。
+-- 命中后由编排器检查 fine_id 仍为 active，失效的条目会被删除。
+CREATE TABLE IF NOT EXISTS gemini_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    annotator TEXT NOT NULL,
+    annotations JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 按模型清理旧条目（换模型后旧 key 不会再被命中）
+CREATE INDEX IF NOT EXISTS gemini_response_cache_model_idx
+    ON gemini_response_cache (model, created_at);
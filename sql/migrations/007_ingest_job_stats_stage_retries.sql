@@ -0,0 +1,4 @@
+-- 每个 Stage 内部的重试次数（ASR / 转码的重试循环、Gemini 限流器的退避重试），
+-- 与 stage_seconds 一样只包含本次实际运行的 Stage；没有重试的 Stage 不记录。
+ALTER TABLE ingest_job_stats
+    ADD COLUMN IF NOT EXISTS stage_retries JSONB NOT NULL DEFAULT '{}';
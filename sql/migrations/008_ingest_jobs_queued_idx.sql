@@ -0,0 +1,4 @@
+-- QueuedJobPoller 按租约（started_at）取出 queued 任务：只索引 queued 的行，表变大后轮询仍然很便宜。
+CREATE INDEX IF NOT EXISTS ingest_jobs_queued_idx
+    ON ingest_jobs (started_at NULLS FIRST)
+    WHERE status = 'queued';
@@ -0,0 +1,4 @@
+-- ResponseCache.prune 按 created_at 删除超过 RESPONSE_CACHE_MAX_AGE_SECONDS 的条目（不区分模型），
+-- 006 的 (model, created_at) 索引用不上。
+CREATE INDEX IF NOT EXISTS gemini_response_cache_created_idx
+    ON gemini_response_cache (created_at);
@@ -4,25 +4,23 @@ Ingestion Worker 主入口（Push 模式）
 启动 FastAPI 服务，接收 Pub/Sub Push 请求
 """
 
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 from ingestion_worker.config import Config
-from ingestion_worker.infrastructure.database import Database
-from ingestion_worker.infrastructure.gcs import GCSClient
-from ingestion_worker.infrastructure.lark import LarkClient
-from ingestion_worker.infrastructure.vertex import VertexClient
-from ingestion_worker.infrastructure.transcoder import TranscoderClient
-from ingestion_worker.infrastructure.replicate import ReplicateClient
-from ingestion_worker.domain.agentic.orchestrators import AgenticOrchestrator
-from ingestion_worker.domain.persistence import PersistenceService
-from ingestion_worker.application.workflow import IngestVideoWorkflow
+from ingestion_worker.bootstrap import build_workflow
+from ingestion_worker.infrastructure.http import HttpClient
+from ingestion_worker.application.admission import IngestJobQueue
+from ingestion_worker.application.requeue import QueuedJobPoller
 from ingestion_worker.api.webhooks import router
 from ingestion_worker.utils.logging import setup_logging, get_logger
+from ingestion_worker.utils.metrics import render_prometheus
 
 logger = get_logger(__name__)
 
@@ -36,47 +34,62 @@ async def lifespan(app: FastAPI):
     # 1. 加载配置
     config = Config.from_env()
     config.validate()
+    config = config.per_process()
     setup_logging()
 
-    # 2. 初始化基础设施
-    db = Database(config.db_url)
-    await db.connect()
-
-    gcs = GCSClient(config)
-    lark = LarkClient(config)
-    vertex = VertexClient(config)
-    transcoder = TranscoderClient(config)
-    replicate = ReplicateClient(config)
-
-    # 3. 初始化 Agentic
-    agentic = AgenticOrchestrator(vertex, db, lark, config)
-
-    # 4. 初始化持久化服务
-    persistence = PersistenceService(db)
-
-    # 5. 初始化 Workflow
-    workflow = IngestVideoWorkflow(
-        config=config,
-        db=db,
-        gcs=gcs,
-        lark=lark,
-        transcoder=transcoder,
-        replicate=replicate,
-        agentic=agentic,
-        persistence=persistence,
+    # 2. 初始化共享 HTTP 连接池、基础设施与 Workflow（与 Pull 模式共用装配）
+    http = HttpClient(config)
+    await http.start()
+    workflow = await build_workflow(config, http)
+
+    # 3. 初始化准入队列（限制并发视频数与等待队列长度）
+    job_queue = IngestJobQueue(
+        handler=workflow.process_message,
+        max_concurrency=config.max_concurrent_videos,
+        max_backlog=config.ingest_queue_max_backlog,
+    )
+    job_queue.start()
+
+    # 4. queued 任务轮询（其他副本关闭时写回 / 释放的任务，Push 模式不会重投）
+    poller = QueuedJobPoller(
+        db=workflow.db,
+        job_queue=job_queue,
+        raw_bucket=config.raw_bucket,
+        poll_seconds=config.queued_job_poll_seconds,
+        lease_seconds=config.queued_job_lease_seconds,
     )
+    if config.queued_job_poll_seconds > 0:
+        poller.start()
 
-    # 6. 注入到 App State（供 Dependency Injection 使用）
+    # 5. 注入到 App State（供 Dependency Injection 使用）
     app.state.workflow = workflow
+    app.state.http = http
+    app.state.job_queue = job_queue
+    app.state.queued_job_poller = poller
 
     logger.info("✓ Ingestion Worker 启动完成")
 
     yield  # Application runs here
 
-    # Shutdown
+    # Shutdown（uvicorn 收到 SIGTERM 后停止接收新连接，再执行这里）
     logger.info("正在关闭 Ingestion Worker...")
+    if hasattr(app.state, 'job_queue'):
+        # 等待处理中的任务；超时的任务会被取消并释放为 queued（需在关闭 DB 之前）
+        await app.state.queued_job_poller.stop()
+        leftover = await app.state.job_queue.drain(timeout=config.shutdown_drain_seconds)
+        # 未开始的消息已返回 200，Pub/Sub 不会重投：写回 ingest_jobs，由其他副本轮询认领
+        try:
+            requeued = await app.state.queued_job_poller.requeue(leftover)
+            if requeued:
+                logger.info(f"✓ {requeued} 个未开始的任务已写回 ingest_jobs（queued）")
+        except Exception as e:
+            for message in leftover:
+                logger.error(f"✗ 未开始的任务写回失败（需手动重新提交）: {message.video_uid}: {e}")
     if hasattr(app.state, 'workflow'):
         await app.state.workflow.db.close()
+        app.state.workflow.agentic_service.vertex.close()
+    if hasattr(app.state, 'http'):
+        await app.state.http.close()
 
 
 # Create FastAPI app with lifespan
@@ -89,7 +102,35 @@ app.include_router(router)
 # 健康检查端点
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    # pid：多进程（supervisor）部署时区分响应的进程
+    if hasattr(app.state, 'job_queue'):
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "queue": app.state.job_queue.stats(),
+            "http": app.state.http.stats(),
+        }
+    return {"status": "ok", "pid": os.getpid()}
+
+
+# Prometheus 指标
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+# 各 Stage 耗时分位数（来自 ingest_job_stats）
+@app.get("/stats/latency")
+async def stats_latency(hours: int = 24):
+    """p50/p95/p99 per stage over the last `hours` hours"""
+    if not hasattr(app.state, 'workflow'):
+        return {"error": "Workflow not initialized"}
+
+    try:
+        stages = await app.state.workflow.persistence_service.get_stage_latency_percentiles(hours)
+        return {"status": "ok", "hours": hours, "stages": stages}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 
 # 测试数据库连接端点
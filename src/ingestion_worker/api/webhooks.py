@@ -3,32 +3,31 @@ Webhook API 端点
 
 职责：
 - 接收 Pub/Sub Push 请求
-- 调用 Workflow 异步处理
+- 提交到准入队列异步处理（队列满时返回 503，由 Pub/Sub 重投）
 """
 
-import asyncio
 from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse
 
 from ingestion_worker.infrastructure.webhook import parse_pubsub_push, WebhookError
-from ingestion_worker.application.workflow import IngestVideoWorkflow
+from ingestion_worker.application.admission import IngestJobQueue, QueueFullError
 from ingestion_worker.utils.logging import get_logger, set_correlation_id
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
-def get_workflow(request: Request) -> IngestVideoWorkflow:
-    """Get workflow from app state (dependency injection)"""
-    if not hasattr(request.app.state, 'workflow'):
-        raise HTTPException(status_code=500, detail="Workflow not initialized")
-    return request.app.state.workflow
+def get_job_queue(request: Request) -> IngestJobQueue:
+    """Get ingest job queue from app state (dependency injection)"""
+    if not hasattr(request.app.state, 'job_queue'):
+        raise HTTPException(status_code=500, detail="Job queue not initialized")
+    return request.app.state.job_queue
 
 
 @router.post("/webhooks/video-ingestion")
 async def handle_video_ingestion(
     request: Request,
-    workflow: IngestVideoWorkflow = Depends(get_workflow)
+    job_queue: IngestJobQueue = Depends(get_job_queue)
 ):
     """
     处理 Pub/Sub Push 请求
@@ -56,10 +55,19 @@ async def handle_video_ingestion(
             f"object={message.object_name}"
         )
 
-        # 3. 异步处理（不阻塞响应）
-        asyncio.create_task(_process_async(message, workflow))
-
-        # 4. 立即返回 200（告诉 Pub/Sub 消息已接收）
+        # 3. 提交到准入队列（不阻塞响应）
+        try:
+            job_queue.submit(message)
+        except QueueFullError as e:
+            # 队列满：返回 503，Pub/Sub 会按退避策略重投
+            logger.warning(f"⚠️  准入队列已满，拒绝: {message.video_uid} ({e})")
+            return JSONResponse(
+                status_code=503,
+                content={"status": "busy", "video_uid": message.video_uid},
+                headers={"Retry-After": "30"}
+            )
+
+        # 4. 返回 200（告诉 Pub/Sub 消息已接收）
         return JSONResponse(
             status_code=200,
             content={"status": "accepted", "video_uid": message.video_uid}
@@ -72,15 +80,3 @@ async def handle_video_ingestion(
     except Exception as e:
         logger.error(f"✗ Webhook 处理失败: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
-
-
-async def _process_async(message, workflow: IngestVideoWorkflow):
-    """异步处理视频（后台任务）"""
-    try:
-        await workflow.process_message(message)
-        logger.info(f"✓ 视频处理完成: {message.video_uid}")
-
-    except Exception as e:
-        logger.error(f"✗ 视频处理失败: {e}", exc_info=True)
-        # 注意：Push 模式下，失败不会自动重试
-        # 需要在 Workflow 内部实现重试逻辑
\ No newline at end of file
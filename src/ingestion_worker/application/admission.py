@@ -0,0 +1,198 @@
+"""
+进程内任务准入队列（Push 模式的背压控制）
+
+职责：
+- 限制同时处理的视频数（max_concurrency）
+- 限制等待队列长度（max_backlog），队列满时拒绝新任务
+- 导出队列深度、处理中数量、等待时间指标
+
+对外接口：
+- IngestJobQueue.start()
+- IngestJobQueue.submit(message)  # 队列满时抛 QueueFullError
+- async IngestJobQueue.drain(timeout) -> list[PubSubMessage]
+- async IngestJobQueue.stop()
+- IngestJobQueue.stats() -> dict
+
+设计：
+- Push 端点拿到 QueueFullError 后返回 503，让 Pub/Sub 稍后重投
+- 固定数量的 worker 协程消费 asyncio.Queue，避免无限制 create_task
+- 关闭时先 drain：停止接收，等待处理中的任务到截止时间，
+  超时后取消（workflow 会把被取消的任务标记回 queued）；
+  Push 模式不会重投已返回 200 的消息，未开始的消息由调用方写回 ingest_jobs（见 application.requeue）
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from ingestion_worker.types import PubSubMessage
+from ingestion_worker.errors import IdempotencyError
+from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, gauge, histogram
+
+QUEUE_DEPTH = gauge("ingest_queue_depth", "Messages waiting in the admission queue")
+IN_FLIGHT = gauge("ingest_in_flight", "Videos currently being processed")
+QUEUE_WAIT = histogram("ingest_queue_wait_seconds", "Time a message waited in the admission queue")
+QUEUE_REJECTED = counter("ingest_queue_rejected_total", "Messages rejected because the queue was full")
+
+
+class QueueFullError(Exception):
+    """准入队列已满（或已停止接收）"""
+    pass
+
+
+class IngestJobQueue:
+    """有界的视频处理队列"""
+
+    def __init__(
+        self,
+        handler: Callable[[PubSubMessage], Awaitable[Any]],
+        max_concurrency: int,
+        max_backlog: int,
+    ):
+        """
+        初始化队列
+
+        Args:
+            handler: 处理单条消息的协程函数（通常是 workflow.process_message）
+            max_concurrency: 最大并发处理视频数
+            max_backlog: 最大等待任务数（不含处理中）
+        """
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.max_backlog = max_backlog
+        self.logger = get_logger(__name__)
+
+        self._queue: asyncio.Queue[tuple[PubSubMessage, float]] = asyncio.Queue(maxsize=max_backlog)
+        self._workers: list[asyncio.Task] = []
+        self._in_flight = 0
+        self._accepting = False
+
+    def start(self) -> None:
+        """启动 worker 协程（需在事件循环中调用）"""
+        if self._workers:
+            return
+
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"ingest-worker-{i}")
+            for i in range(self.max_concurrency)
+        ]
+        self.logger.info(
+            f"✓ 准入队列已启动 (concurrency={self.max_concurrency}, backlog={self.max_backlog})"
+        )
+
+    def submit(self, message: PubSubMessage) -> None:
+        """
+        提交任务（不阻塞）
+
+        Args:
+            message: Pub/Sub 消息
+
+        Raises:
+            QueueFullError: 队列已满或已停止接收
+        """
+        if not self._accepting:
+            raise QueueFullError("Ingest queue is not accepting new jobs")
+
+        try:
+            self._queue.put_nowait((message, time.monotonic()))
+        except asyncio.QueueFull:
+            QUEUE_REJECTED.inc()
+            raise QueueFullError(
+                f"Ingest queue is full ({self.max_backlog} waiting, {self._in_flight} in flight)"
+            )
+
+        QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def drain(self, timeout: float) -> list[PubSubMessage]:
+        """
+        优雅关闭：停止接收新任务，等待已接收的任务完成（最多 timeout 秒）
+
+        截止时间到达后：
+        - 还在等待队列中的消息不再处理，直接返回给调用方（尚未认领，无 DB 记录，由调用方写回）
+        - 处理中的任务被取消（workflow 负责把任务标记回 queued，保留 checkpoint）
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            未开始处理的消息列表
+        """
+        self._accepting = False
+        self.logger.info(
+            f"开始 drain: {self._in_flight} 处理中, {self._queue.qsize()} 等待中 "
+            f"(截止 {timeout:.0f}s)"
+        )
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            self.logger.info("✓ 所有任务已完成")
+        except asyncio.TimeoutError:
+            self.logger.warning(
+                f"⚠️  drain 超时: {self._in_flight} 个任务将被取消并释放, "
+                f"{self._queue.qsize()} 个任务未开始"
+            )
+
+        leftover = []
+        while not self._queue.empty():
+            message, _ = self._queue.get_nowait()
+            self._queue.task_done()
+            leftover.append(message)
+
+        await self.stop()
+        return leftover
+
+    async def stop(self) -> None:
+        """停止接收并取消所有 worker（处理中的任务会被取消）"""
+        self._accepting = False
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        """
+        当前队列状态
+
+        Returns:
+            {depth, in_flight, max_backlog, max_concurrency, accepting}
+        """
+        return {
+            "depth": self._queue.qsize(),
+            "in_flight": self._in_flight,
+            "max_backlog": self.max_backlog,
+            "max_concurrency": self.max_concurrency,
+            "accepting": self._accepting,
+        }
+
+    async def _worker(self, worker_id: int) -> None:
+        """从队列中取任务并处理（循环直到被取消）"""
+        while True:
+            message, enqueued_at = await self._queue.get()
+            wait_seconds = time.monotonic() - enqueued_at
+
+            self._in_flight += 1
+            QUEUE_WAIT.observe(wait_seconds)
+            QUEUE_DEPTH.set(self._queue.qsize())
+            IN_FLIGHT.set(self._in_flight)
+
+            try:
+                self.logger.info(
+                    f"开始处理: video_uid={message.video_uid} "
+                    f"(排队 {wait_seconds:.1f}s, worker={worker_id})"
+                )
+                await self.handler(message)
+                self.logger.info(f"✓ 视频处理完成: {message.video_uid}")
+
+            except IdempotencyError as e:
+                self.logger.info(f"跳过重复任务: {message.video_uid} ({e.message})")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 注意：Push 模式下已返回 200，失败不会自动重投
+                self.logger.error(f"✗ 视频处理失败: {message.video_uid}: {e}", exc_info=True)
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+                IN_FLIGHT.set(self._in_flight)
@@ -0,0 +1,174 @@
+"""
+Push 模式下被中断任务的回收
+
+Push 端点收到消息即返回 200，Pub/Sub 不会重投；关闭时没处理完的任务只能留在 ingest_jobs 中，
+由仍在运行的副本从数据库重新认领。
+
+职责：
+- 关闭时把准入队列中未开始的消息写回 ingest_jobs（status='queued'）
+- 定期取出 queued 任务（上述消息 + 关闭时被取消、由 workflow 释放的任务），提交到本副本的准入队列
+
+对外接口：
+- QueuedJobPoller(db, job_queue, raw_bucket, poll_seconds, lease_seconds)
+- QueuedJobPoller.start()
+- async QueuedJobPoller.stop()
+- async QueuedJobPoller.poll_once() -> int
+- async QueuedJobPoller.requeue(messages) -> int
+
+设计：
+- 取出时把 started_at 设为当前时间作为租约：lease_seconds 内其他副本（及本副本的下一轮）不会重复提交
+- 真正的认领仍由 workflow 的认领 SQL 原子完成（对 queued 任务不做超时判断），重复提交只会被幂等跳过
+- 每轮最多取出准入队列的空余名额，不会因队列满而丢弃
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from ingestion_worker.application.admission import IngestJobQueue, QueueFullError
+from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.types import PubSubMessage
+from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter
+
+REQUEUED = counter("ingest_jobs_requeued_total", "Unstarted messages written back as queued ingest_jobs on shutdown")
+RESUBMITTED = counter("ingest_jobs_resubmitted_total", "Queued ingest_jobs picked up by the poller")
+
+
+class QueuedJobPoller:
+    """把 queued 状态的 ingest_jobs 重新提交到准入队列"""
+
+    # 已有记录：queued / error 的任务改为 queued 并清除租约；处理中或已完成的任务不变
+    REQUEUE_SQL = """
+        INSERT INTO ingest_jobs (object_key, etag, video_uid, status)
+        SELECT object_key, etag, video_uid, 'queued'
+        FROM unnest($1::text[], $2::text[], $3::text[]) AS i(object_key, etag, video_uid)
+        ON CONFLICT (object_key, etag) DO UPDATE SET
+            status = 'queued',
+            started_at = NULL,
+            finished_at = NULL
+        WHERE ingest_jobs.status IN ('queued', 'error')
+    """
+
+    # 租约过期（或从未被取出）的 queued 任务，SKIP LOCKED 避免多个副本互相等待
+    LEASE_QUEUED_SQL = """
+        WITH picked AS (
+            SELECT object_key, etag
+            FROM ingest_jobs
+            WHERE status = 'queued'
+              AND (started_at IS NULL OR started_at < NOW() - make_interval(secs => $2))
+            ORDER BY started_at NULLS FIRST
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE ingest_jobs j
+        SET started_at = NOW()
+        FROM picked
+        WHERE j.object_key = picked.object_key AND j.etag = picked.etag
+        RETURNING j.object_key, j.etag, j.video_uid
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        job_queue: IngestJobQueue,
+        raw_bucket: str,
+        poll_seconds: float,
+        lease_seconds: float,
+    ):
+        """
+        Args:
+            db: 数据库客户端
+            job_queue: 本副本的准入队列
+            raw_bucket: 原始视频 bucket（重建 PubSubMessage 用）
+            poll_seconds: 轮询间隔（秒）
+            lease_seconds: 取出后多久内不再重复提交（秒）
+        """
+        self.db = db
+        self.job_queue = job_queue
+        self.raw_bucket = raw_bucket
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.logger = get_logger(__name__)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """启动轮询协程（需在事件循环中调用）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll_periodically(), name="queued-job-poller")
+            self.logger.info(f"✓ queued 任务轮询已启动 (每 {self.poll_seconds:.0f}s)")
+
+    async def stop(self) -> None:
+        """停止轮询（关闭时在 drain 之前调用）"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def poll_once(self) -> int:
+        """
+        取出 queued 任务并提交到准入队列（最多填满空余名额）
+
+        Returns:
+            提交的任务数
+        """
+        stats = self.job_queue.stats()
+        free = stats["max_backlog"] - stats["depth"]
+        if not stats["accepting"] or free <= 0:
+            return 0
+
+        rows = await self.db.fetch_all(self.LEASE_QUEUED_SQL, free, float(self.lease_seconds))
+        submitted = 0
+        for row in rows:
+            message = PubSubMessage(
+                bucket=self.raw_bucket,
+                object_name=row["object_key"],
+                video_uid=row["video_uid"],
+                etag=row["etag"],
+                generation="",
+                event_time=datetime.now(timezone.utc),
+                attributes={"source": "queued_job"},
+            )
+            try:
+                self.job_queue.submit(message)
+            except QueueFullError:
+                # 租约到期后由任意副本重新取出
+                self.logger.info(f"准入队列已满，queued 任务稍后重试: {message.video_uid}")
+                break
+            submitted += 1
+            self.logger.info(f"♻️ 重新提交 queued 任务: {message.video_uid}")
+
+        RESUBMITTED.inc(submitted)
+        return submitted
+
+    async def requeue(self, messages: list[PubSubMessage]) -> int:
+        """
+        把未开始处理的消息写回 ingest_jobs（status='queued'），由其他副本的轮询认领
+
+        Args:
+            messages: 准入队列 drain 后剩余的消息
+
+        Returns:
+            写回的消息数
+        """
+        if not messages:
+            return 0
+
+        await self.db.execute(
+            self.REQUEUE_SQL,
+            [m.object_name for m in messages],
+            [m.etag for m in messages],
+            [m.video_uid for m in messages],
+        )
+        REQUEUED.inc(len(messages))
+        return len(messages)
+
+    async def _poll_periodically(self) -> None:
+        """按间隔轮询（单轮失败只记录警告）"""
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"轮询 queued 任务失败（忽略）: {e}")
+            await asyncio.sleep(self.poll_seconds)
@@ -0,0 +1,199 @@
+"""
+Stage 依赖图调度器
+
+职责：
+- 按依赖关系调度工作流 Stage（依赖就绪即启动，不等待无关 Stage）
+- 记录每个 Stage 的开始/结束时间与内部重试次数（utils.retry.record_retry）
+- 任一 Stage 失败时取消其余 Stage 并抛出根因异常
+
+对外接口：
+- StageGraph.add_stage(name, func, depends_on)
+- async StageGraph.run() -> dict[str, Any]  # stage name → 结果
+- StageGraph.timings -> dict[str, StageTiming]
+- StageGraph.results() -> dict[str, Any]  # 已完成 Stage 的结果
+
+用法：
+    graph = StageGraph()
+    graph.add_stage("asr", run_asr)
+    graph.add_stage("agentic", lambda asr: run_agentic(asr), depends_on=["asr"])
+    results = await graph.run()
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from ingestion_worker.types import StageTiming
+from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import histogram
+from ingestion_worker.utils.retry import count_retries_into
+
+STAGE_DURATION = histogram("ingest_stage_duration_seconds", "Wall time of each workflow stage")
+
+
+class StageGraphError(Exception):
+    """Stage 图定义错误"""
+    pass
+
+
+class StageGraph:
+    """依赖感知的 Stage 调度器（单次运行）"""
+
+    def __init__(self):
+        self._funcs: dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._timings: dict[str, StageTiming] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._root_error: Optional[BaseException] = None
+        self.logger = get_logger(__name__)
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        depends_on: Sequence[str] = (),
+    ) -> None:
+        """
+        注册 Stage
+
+        Args:
+            name: Stage 名称（唯一）
+            func: 异步函数，依赖 Stage 的结果以关键字参数传入（参数名 = 依赖名）
+            depends_on: 依赖的 Stage 名称（必须已注册，因此不会出现环）
+
+        Raises:
+            StageGraphError: 名称重复或依赖未注册
+        """
+        if name in self._funcs:
+            raise StageGraphError(f"Duplicate stage: {name}")
+
+        for dep in depends_on:
+            if dep not in self._funcs:
+                raise StageGraphError(f"Stage '{name}' depends on unknown stage '{dep}'")
+
+        self._funcs[name] = func
+        self._timings[name] = StageTiming(name=name, depends_on=list(depends_on))
+
+    @property
+    def timings(self) -> dict[str, StageTiming]:
+        """每个 Stage 的开始/结束时间（按注册顺序）"""
+        return self._timings
+
+    def results(self) -> dict[str, Any]:
+        """
+        已成功完成的 Stage 的结果（失败后也可用于收集部分统计）
+
+        Returns:
+            stage name → 结果
+        """
+        return {
+            name: task.result()
+            for name, task in self._tasks.items()
+            if task.done() and not task.cancelled() and task.exception() is None
+        }
+
+    async def run(self) -> dict[str, Any]:
+        """
+        运行所有 Stage
+
+        Returns:
+            stage name → 结果
+
+        Raises:
+            第一个失败 Stage 的原始异常
+        """
+        if self._tasks:
+            raise StageGraphError("StageGraph can only run once")
+
+        for name in self._funcs:
+            self._tasks[name] = asyncio.create_task(self._run_stage(name), name=f"stage:{name}")
+
+        try:
+            done, pending = await asyncio.wait(
+                self._tasks.values(), return_when=asyncio.FIRST_EXCEPTION
+            )
+
+            if pending:
+                # 有 Stage 失败，取消其余 Stage
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+            if self._root_error is not None:
+                raise self._root_error
+
+            return {name: task.result() for name, task in self._tasks.items()}
+
+        finally:
+            # 外部取消（如超时）时，确保没有遗留的 Stage 任务
+            unfinished = [t for t in self._tasks.values() if not t.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+            # 依赖失败而连带失败的 Stage 也标记为已读取，避免 "exception was never retrieved"
+            for task in self._tasks.values():
+                if task.done() and not task.cancelled():
+                    task.exception()
+
+    async def _run_stage(self, name: str) -> Any:
+        """等待依赖完成后执行单个 Stage"""
+        timing = self._timings[name]
+
+        try:
+            # 等待依赖（依赖失败时异常会直接向上传播）
+            kwargs = {dep: await self._tasks[dep] for dep in timing.depends_on}
+        except BaseException:
+            timing.status = "cancelled"
+            raise
+
+        timing.status = "running"
+        timing.started_at = time.time()
+
+        def count_retry() -> None:
+            timing.retries += 1
+
+        count_retries_into(count_retry)  # 只影响本 Stage 的任务（及其子任务）
+        self.logger.debug(f"Stage 开始: {name}")
+
+        try:
+            result = await self._funcs[name](**kwargs)
+        except asyncio.CancelledError:
+            timing.status = "cancelled"
+            raise
+        except BaseException as e:
+            timing.status = "failed"
+            if self._root_error is None:
+                self._root_error = e
+            raise
+        finally:
+            timing.finished_at = time.time()
+            outcome = "done" if timing.status == "running" else timing.status
+            STAGE_DURATION.observe(timing.duration_seconds, {"stage": name, "status": outcome})
+
+        timing.status = "done"
+        self.logger.debug(f"Stage 完成: {name} ({timing.duration_seconds:.1f}s)")
+        return result
+
+    def format_timeline(self) -> str:
+        """
+        格式化 Stage 时间线（相对于最早开始的 Stage）
+
+        Returns:
+            如 "asr=+0.1s→+42.3s transcode=+0.1s→+95.0s ..."
+        """
+        starts = [t.started_at for t in self._timings.values() if t.started_at is not None]
+        if not starts:
+            return ""
+
+        origin = min(starts)
+        parts = []
+        for timing in self._timings.values():
+            if timing.started_at is None:
+                parts.append(f"{timing.name}={timing.status}")
+                continue
+            end = timing.finished_at if timing.finished_at is not None else time.time()
+            parts.append(
+                f"{timing.name}=+{timing.started_at - origin:.1f}s→+{end - origin:.1f}s"
+                f"({timing.status})"
+            )
+        return " ".join(parts)
@@ -8,6 +8,7 @@ Ingestion Workflow - 视频预处理编排器
 - 错误处理与通知
 """
 import asyncio
+import json
 import time
 from datetime import datetime, timezone
 from typing import Optional
@@ -22,6 +23,7 @@ from ingestion_worker.types import (
     ASRResult,
     TranscodeResult,
     AgenticResult,
+    StageTiming,
 )
 from ingestion_worker.errors import (
     WorkflowError,
@@ -31,11 +33,10 @@ from ingestion_worker.errors import (
     AgenticError,
     PersistenceError,
 )
+from ingestion_worker.application.stages import StageGraph
+from ingestion_worker.domain.persistence import AnnotationStreamWriter
 from ingestion_worker.utils.logging import get_logger, set_correlation_id, clear_correlation_id
 
-# 业务配置
-PROCESSING_TIMEOUT_SECONDS = 3600  # 1 hour
-
 
 class IngestVideoWorkflow:
     """视频预处理工作流"""
@@ -79,13 +80,24 @@ class IngestVideoWorkflow:
         self.agentic_service = agentic
         self.persistence_service = persistence
 
-    async def process_message(self, message: PubSubMessage) -> None:
+    async def process_message(self, message: PubSubMessage) -> dict[str, StageTiming]:
         """
         处理 Pub/Sub 消息的入口
 
+        Stage 依赖图（每个 Stage 在依赖就绪后立即启动）：
+
+            idempotency ─┬─> transcode ──────────────────────┐
+                         └─> asr ─> segments ─> agentic ───────┴─> finalize
+
+        转码只阻塞 finalize。segments 在 ASR 完成后立即写入，
+        agentic 在每个 segment 完成后按微批写入 occurrences（处理中即可在数据库看到进度）。
+
         Args:
             message: 解析后的 Pub/Sub 消息
 
+        Returns:
+            每个 Stage 的开始/结束时间（stage name → StageTiming）
+
         Raises:
             WorkflowError: 任何业务异常
         """
@@ -94,361 +106,491 @@ class IngestVideoWorkflow:
         # 设置 correlation_id（所有后续日志都会带上）
         set_correlation_id(message.video_uid)
 
+        graph = self._build_stage_graph(message)
+
         try:
             self.logger.info("开始处理视频")
 
-            # Step 0: 幂等检查
-            self.logger.info("Step 0: 幂等性检查")
-            job = await self._check_idempotency(message)
-
-            # Step 1-2: 并行转码与 ASR
-            self.logger.info("Step 1-2: 并行转码与 ASR")
-            hls_result, asr_result = await self._parallel_transcode_and_asr(
-                message.video_uid, message.object_name
-            )
-
-            # Step 3: Agentic workflow
-            self.logger.info("Step 3: Agentic workflow")
-            agentic_result = await self._run_agentic(
-                video_uid=message.video_uid,
-                video_object_name=message.object_name,
-                asr_result=asr_result,
-            )
-
-            # Step 4: 持久化
-            self.logger.info("Step 4: 持久化数据")
-            stats = await self._persist_data(
-                video_uid=message.video_uid,
-                job=job,
-                asr_result=asr_result,
-                agentic_result=agentic_result,
-            )
-
-            # Step 5-6: 更新路径与状态
-            self.logger.info("Step 5-6: 更新路径与状态")
-            await self._finalize(
-                job=job,
-                hls_result=hls_result,
-                asr_result=asr_result,
-                stats=stats,
-            )
+            await graph.run()
 
             elapsed = time.time() - start_time
             self.logger.info(f"✓ 处理完成，耗时 {elapsed:.1f}s")
+            self.logger.info(f"Stage 时间线: {graph.format_timeline()}")
+            await self._record_stats(graph, elapsed, status="done")
+
+            return graph.timings
 
+        except IdempotencyError:
+            # 重复投递：任务属于其他 worker（或已完成），不能标记为 error
+            raise
+        except asyncio.CancelledError:
+            # 关闭时 drain 超时：任务已认领则释放回 queued，其他副本可立即重新认领
+            self.logger.warning("工作流被取消（服务关闭中）")
+            self.logger.info(f"Stage 时间线: {graph.format_timeline()}")
+            if graph.timings["idempotency"].status == "done":
+                await self._release_job(message)
+            raise
         except WorkflowError as e:
             self.logger.error(f"工作流错误: {e.message}")
+            self.logger.info(f"Stage 时间线: {graph.format_timeline()}")
             await self._handle_error(message.video_uid, e)
+            await self._record_stats(graph, time.time() - start_time, status="error", error_message=e.message)
             raise
         except Exception as e:
             self.logger.error(f"未预期异常: {e}", exc_info=True)
             await self._handle_error(message.video_uid, WorkflowError(str(e)))
+            await self._record_stats(graph, time.time() - start_time, status="error", error_message=str(e))
             raise
         finally:
             clear_correlation_id()
 
-    async def _get_or_create_video(self, video_uid: str, object_name: str) -> int:
+    def _build_stage_graph(self, message: PubSubMessage) -> StageGraph:
         """
-        获取或创建 video 记录
+        构建单条消息的 Stage 依赖图
 
         Args:
-            video_uid: 视频 UID
-            object_name: GCS 对象名称
+            message: Pub/Sub 消息
 
         Returns:
-            video_id: 视频 ID
+            StageGraph（未运行）
         """
-        # 1. 尝试获取已存在的 video
-        row = await self.db.fetch_one(
-            "SELECT id FROM video WHERE video_uid = $1",
-            video_uid
+        graph = StageGraph()
+
+        # Step 0: 幂等检查
+        graph.add_stage(
+            "idempotency",
+            lambda: self._check_idempotency(message),
         )
 
-        if row:
-            return row["id"]
+        # Step 1: 转码（与 ASR 链并行，只有 finalize 等待它）
+        graph.add_stage(
+            "transcode",
+            lambda idempotency: self._run_transcode(idempotency, message.object_name),
+            depends_on=["idempotency"],
+        )
 
-        # 2. 创建新 video
-        storage_path = f"gs://{self.config.raw_bucket}/{object_name}"
+        # Step 2: ASR
+        graph.add_stage(
+            "asr",
+            lambda idempotency: self._run_asr(idempotency, message.object_name),
+            depends_on=["idempotency"],
+        )
 
-        row = await self.db.fetch_one(
-            """
+        # Step 3: ASR 完成后立即写入 segments
+        graph.add_stage(
+            "segments",
+            lambda idempotency, asr: self._persist_segments(
+                job=idempotency,
+                asr_result=asr,
+            ),
+            depends_on=["idempotency", "asr"],
+        )
+
+        # Step 4: Agentic workflow（occurrences 按微批流式写入）
+        graph.add_stage(
+            "agentic",
+            lambda idempotency, asr, segments: self._run_agentic(
+                job=idempotency,
+                video_object_name=message.object_name,
+                asr_result=asr,
+                segment_ids=segments,
+            ),
+            depends_on=["idempotency", "asr", "segments"],
+        )
+
+        # Step 5-6: 更新路径与状态（唯一等待 HLS 结果的 Stage）
+        graph.add_stage(
+            "finalize",
+            lambda idempotency, transcode, asr, agentic: self._finalize(
+                job=idempotency,
+                hls_result=transcode,
+                asr_result=asr,
+                agentic_result=agentic,
+            ),
+            depends_on=["idempotency", "transcode", "asr", "agentic"],
+        )
+
+        return graph
+
+    # 单条语句完成认领：获取/创建 video + 插入或重新认领 ingest_job
+    # - 新任务 → INSERT
+    # - queued / error / 处理超时 → ON CONFLICT DO UPDATE（超时计为一次重试）
+    # - done / 处理中未超时 → 不返回 claimed 行，previous_* 说明原因
+    CLAIM_JOB_SQL = """
+        WITH existing_video AS (
+            SELECT id FROM video WHERE video_uid = $3
+        ),
+        new_video AS (
             INSERT INTO video (video_uid, status, storage_path)
-            VALUES ($1, 'PROCESSING', $2)
+            SELECT $3, 'PROCESSING', $4
+            WHERE NOT EXISTS (SELECT 1 FROM existing_video)
+            ON CONFLICT (video_uid) DO UPDATE SET video_uid = EXCLUDED.video_uid
             RETURNING id
-            """,
-            video_uid,
-            storage_path
+        ),
+        target_video AS (
+            SELECT id FROM existing_video
+            UNION ALL
+            SELECT id FROM new_video
+        ),
+        previous AS (
+            SELECT status, started_at
+            FROM ingest_jobs
+            WHERE object_key = $1 AND etag = $2
+        ),
+        claimed AS (
+            INSERT INTO ingest_jobs (object_key, etag, video_uid, video_id, status, started_at)
+            VALUES ($1, $2, $3, (SELECT id FROM target_video LIMIT 1), 'processing', NOW())
+            ON CONFLICT (object_key, etag) DO UPDATE SET
+                status = 'processing',
+                started_at = NOW(),
+                finished_at = NULL,
+                video_id = COALESCE(ingest_jobs.video_id, EXCLUDED.video_id),
+                retry_count = ingest_jobs.retry_count
+                    + CASE WHEN ingest_jobs.status = 'processing' THEN 1 ELSE 0 END
+            WHERE ingest_jobs.status IN ('queued', 'error')
+               OR (ingest_jobs.status = 'processing'
+                   AND (ingest_jobs.started_at IS NULL
+                        OR ingest_jobs.started_at < NOW() - make_interval(secs => $5)))
+            RETURNING object_key, etag, video_uid, video_id, status, retry_count, checkpoint
         )
-
-        return row["id"]
+        SELECT c.object_key, c.etag, c.video_uid, c.video_id, c.status,
+               c.retry_count, c.checkpoint,
+               p.status AS previous_status, p.started_at AS previous_started_at
+        FROM (SELECT 1) AS one
+        LEFT JOIN claimed c ON TRUE
+        LEFT JOIN previous p ON TRUE
+    """
 
     async def _check_idempotency(self, message: PubSubMessage) -> IngestJob:
         """
-        Step 0: 幂等性检查
+        Step 0: 幂等性检查（单次往返的原子认领）
 
         Args:
             message: Pub/Sub 消息
 
         Returns:
-            IngestJob: 任务记录
+            IngestJob: 任务记录（含 video_id 与 checkpoint）
 
         Raises:
             IdempotencyError: 任务已完成或正在处理中
 
         Business Logic:
-        - 查询 ingest_jobs 表（以 object_key + etag 为主键）
+        - 以 object_key + etag 为主键，INSERT ... ON CONFLICT 原子认领
         - 如果已完成 → 跳过
         - 如果正在处理且未超时 → 跳过（让原任务继续）
-        - 如果超时 → 重置为 queued
-        - 否则 → 创建新任务
+        - 如果超时 / queued / error → 重新认领，保留 checkpoint
+        - 否则 → 创建新任务（同一语句中获取或创建 video）
+        - 并发 worker 之间只有一个能认领成功
         """
         self.logger.info(f"检查任务状态: {message.object_name}")
 
-        # 1. 查询是否已存在
-        query = """
-            SELECT object_key, etag, video_uid, video_id, status, 
-                   started_at, retry_count
-            FROM ingest_jobs
-            WHERE object_key = $1 AND etag = $2
-        """
+        storage_path = f"gs://{self.config.raw_bucket}/{message.object_name}"
 
-        row = await self.db.fetch_one(query, message.object_name, message.etag)
+        row = await self.db.fetch_one(
+            self.CLAIM_JOB_SQL,
+            message.object_name,
+            message.etag,
+            message.video_uid,
+            storage_path,
+            float(self.config.processing_timeout_seconds)
+        )
 
-        if row:
-            # 任务已存在
-            status = row["status"]
-            started_at = row["started_at"]
+        if row["object_key"] is None:
+            # 未认领成功
+            previous_status = row["previous_status"]
 
-            if status == "done":
+            if previous_status == "done":
                 self.logger.info(f"✓ 任务已完成，跳过: {message.video_uid}")
                 raise IdempotencyError("Task already completed")
 
-            if status == "processing":
-                # 检查是否超时
-                if started_at:
-                    elapsed = (datetime.now(timezone.utc) - started_at).total_seconds()
-                    if elapsed < PROCESSING_TIMEOUT_SECONDS:
-                        self.logger.info(
-                            f"✓ 任务正在处理中（{elapsed:.0f}s），跳过: {message.video_uid}"
-                        )
-                        raise IdempotencyError("Task already processing")
-                    else:
-                        # 超时，重置状态
-                        self.logger.warning(
-                            f"任务超时（{elapsed:.0f}s），重置为 queued: {message.video_uid}"
-                        )
-                        await self.db.execute(
-                            """
-                            UPDATE ingest_jobs
-                            SET status = 'queued', started_at = NULL, 
-                                retry_count = retry_count + 1
-                            WHERE object_key = $1 AND etag = $2
-                            """,
-                            message.object_name,
-                            message.etag
-                        )
-
-            # 返回已存在的任务
-            return IngestJob(
-                object_key=row["object_key"],
-                etag=row["etag"],
-                video_uid=row["video_uid"],
-                video_id=row["video_id"],
-                status=row["status"],
-                retry_count=row["retry_count"]
+            started_at = row["previous_started_at"]
+            if started_at:
+                elapsed = (datetime.now(timezone.utc) - started_at).total_seconds()
+                self.logger.info(
+                    f"✓ 任务正在处理中（{elapsed:.0f}s），跳过: {message.video_uid}"
+                )
+            else:
+                self.logger.info(f"✓ 任务已被其他 worker 认领，跳过: {message.video_uid}")
+            raise IdempotencyError("Task already processing")
+
+        if row["previous_status"] is None:
+            self.logger.info(f"✓ 创建新任务: {message.video_uid} (video_id={row['video_id']})")
+        elif row["previous_status"] == "processing":
+            self.logger.warning(f"任务超时，重新认领并从 checkpoint 恢复: {message.video_uid}")
+        else:
+            self.logger.info(
+                f"✓ 重新认领任务（原状态 {row['previous_status']}）: {message.video_uid}"
             )
 
-        # 2. 获取或创建 video 记录
-        video_id = await self._get_or_create_video(message.video_uid, message.object_name)
-
-        # 3. 创建新任务
-        await self.db.execute(
-            """
-            INSERT INTO ingest_jobs (object_key, etag, video_uid, video_id, status, started_at)
-            VALUES ($1, $2, $3, $4, 'processing', NOW())
-            """,
-            message.object_name,
-            message.etag,
-            message.video_uid,
-            video_id
-        )
-
-        self.logger.info(f"✓ 创建新任务: {message.video_uid} (video_id={video_id})")
+        checkpoint = _decode_checkpoint(row["checkpoint"])
+        if checkpoint:
+            self.logger.info(f"✓ 发现 checkpoint，已完成: {sorted(checkpoint.keys())}")
 
         return IngestJob(
-            object_key=message.object_name,
-            etag=message.etag,
-            video_uid=message.video_uid,
-            video_id=video_id,
-            status="processing",
-            retry_count=0
+            object_key=row["object_key"],
+            etag=row["etag"],
+            video_uid=row["video_uid"],
+            video_id=row["video_id"],
+            status=row["status"],
+            retry_count=row["retry_count"],
+            checkpoint=checkpoint
         )
 
-    async def _parallel_transcode_and_asr(
-        self, video_uid: str, object_name: str
-    ) -> tuple[TranscodeResult, ASRResult]:
+    async def _run_transcode(self, job: IngestJob, object_name: str) -> TranscodeResult:
         """
-        Step 1 & 2: 并行执行转码与 ASR
+        Step 1: 转码（MP4 → HLS）
+
+        Checkpoint：
+        - hls_path 已记录 → 直接复用
+        - transcoder_job_name 已记录 → 重新挂接到该任务，不重复提交
 
         Args:
-            video_uid: 视频唯一标识
+            job: 任务记录（含 checkpoint）
             object_name: GCS 对象名称
 
         Returns:
-            (TranscodeResult, ASRResult)
+            TranscodeResult
 
-        Raises:
-            ASRError: ASR 失败（致命）
-            Note: 转码失败不抛异常，返回 failed 状态
+        Note: 转码失败不抛异常，返回 failed 状态
         """
-        self.logger.info("启动并行任务：转码 + ASR")
-
-        # 并行执行两个任务
-        transcode_task = asyncio.create_task(
-            self.transcoding_service.transcode_video(video_uid, object_name)
-        )
-        asr_task = asyncio.create_task(
-            self.asr_service.run_whisperx(video_uid, object_name)
+        self.logger.info("Step 1: 转码")
+
+        hls_path = job.checkpoint.get("hls_path")
+        if hls_path:
+            self.logger.info(f"✓ 转码已完成（checkpoint）: {hls_path}")
+            job.resumed_stages.append("transcode")
+            return TranscodeResult(hls_path=hls_path, status="success")
+
+        async def on_job_created(job_name: str) -> None:
+            await self._save_checkpoint(job, {"transcoder_job_name": job_name})
+
+        transcode_result = await self.transcoding_service.transcode_video(
+            job.video_uid,
+            object_name,
+            resume_job_name=job.checkpoint.get("transcoder_job_name"),
+            on_job_created=on_job_created,
         )
 
-        # 等待两个任务都完成
-        transcode_result, asr_result = await asyncio.gather(
-            transcode_task,
-            asr_task,
-            return_exceptions=False  # ASR 失败会抛异常
-        )
-
-        # 记录结果
         if transcode_result.status == "success":
             self.logger.info(f"✓ 转码成功: {transcode_result.hls_path}")
+            await self._save_checkpoint(job, {"hls_path": transcode_result.hls_path})
         else:
             self.logger.warning(
                 f"⚠️  转码失败（非致命）: {transcode_result.error_message}"
             )
 
+        return transcode_result
+
+    async def _run_asr(self, job: IngestJob, object_name: str) -> ASRResult:
+        """
+        Step 2: ASR（WhisperX）
+
+        Checkpoint：
+        - asr_json_uri 已记录 → 从 GCS 读取结果，不再调用 Replicate
+        - asr_prediction_id 已记录 → 重新挂接到该 prediction，不重复提交
+
+        Args:
+            job: 任务记录（含 checkpoint）
+            object_name: GCS 对象名称
+
+        Returns:
+            ASRResult
+
+        Raises:
+            ASRError: ASR 失败（致命）
+        """
+        self.logger.info("Step 2: ASR")
+
+        asr_json_uri = job.checkpoint.get("asr_json_uri")
+        if asr_json_uri:
+            try:
+                asr_result = await self.asr_service.load_result(
+                    asr_json_uri, job.checkpoint.get("vtt_uri")
+                )
+                self.logger.info(
+                    f"✓ ASR 已完成（checkpoint）: {len(asr_result.segments)} segments"
+                )
+                job.resumed_stages.append("asr")
+                return asr_result
+            except ASRError as e:
+                self.logger.warning(f"读取 ASR checkpoint 失败，重新运行 ASR: {e}")
+
+        async def on_prediction_submitted(prediction_id: str) -> None:
+            await self._save_checkpoint(job, {"asr_prediction_id": prediction_id})
+
+        asr_result = await self.asr_service.run_whisperx(
+            job.video_uid,
+            object_name,
+            resume_prediction_id=job.checkpoint.get("asr_prediction_id"),
+            on_prediction_submitted=on_prediction_submitted,
+        )
+
+        await self._save_checkpoint(job, {
+            "asr_json_uri": asr_result.asr_json_uri,
+            "vtt_uri": asr_result.vtt_uri,
+        })
+
         self.logger.info(
             f"✓ ASR 成功: {len(asr_result.segments)} segments, "
             f"{asr_result.duration_seconds:.1f}s"
         )
 
-        return transcode_result, asr_result
+        return asr_result
 
-    async def _run_agentic(
-        self,
-        video_uid: str,
-        video_object_name: str,
-        asr_result: ASRResult,
-    ) -> AgenticResult:
+    async def _persist_segments(self, job: IngestJob, asr_result: ASRResult) -> list[int]:
         """
-        Step 3: Agentic workflow
+        Step 3: 写入 segments（不等待 Agentic）
+
+        Checkpoint：segment_ids 已记录 → 直接复用
 
         Args:
-            video_uid: 视频唯一标识
-            video_object_name: 视频对象名称
+            job: 任务记录（含 checkpoint）
             asr_result: ASR 结果
 
         Returns:
-            AgenticResult
+            segment_id 列表（顺序对应 asr_result.segments）
 
         Raises:
-            AgenticError: Agentic workflow 失败
+            PersistenceError: 写入失败
         """
-        self.logger.info("运行 Agentic workflow...")
-
-        # 构建视频 URI
-        video_uri = f"gs://{self.config.raw_bucket}/{video_object_name}"
+        if "segment_ids" in job.checkpoint:
+            self.logger.info(
+                f"✓ Segments 已写入（checkpoint）: {len(job.checkpoint['segment_ids'])} segments"
+            )
+            job.resumed_stages.append("segments")
+            return job.checkpoint["segment_ids"]
 
-        # 准备 segments 数据（转换为 dict 格式）
         segments = [
             {
                 "start": seg.t_start,
                 "end": seg.t_end,
                 "text": seg.text,
                 "lang": seg.lang,
-                "speaker": seg.speaker,
-                "meta": seg.meta
+                "meta": seg.meta,
+                "word_timings": seg.word_timings
             }
             for seg in asr_result.segments
         ]
 
-        # 调用 Agentic Orchestrator
-        annotations, method, ontology_ver = await self.agentic_service.process_video(
-            video_uid=video_uid,
-            video_uri=video_uri,
-            segments=segments
-        )
+        segment_ids = await self.persistence_service.save_segments(job.video_id, segments)
 
-        self.logger.info(
-            f"✓ Agentic workflow 完成: {len(annotations)} annotations, "
-            f"method={method}"
-        )
+        await self._save_checkpoint(job, {"segment_ids": segment_ids})
 
-        return AgenticResult(
-            annotations=annotations,
-            method=method,
-            ontology_ver=ontology_ver
-        )
+        return segment_ids
 
-    async def _persist_data(
+    async def _run_agentic(
         self,
-        video_uid: str,
         job: IngestJob,
+        video_object_name: str,
         asr_result: ASRResult,
-        agentic_result: AgenticResult,
-    ) -> dict:
+        segment_ids: list[int],
+    ) -> AgenticResult:
         """
-        Step 4: 持久化数据
+        Step 4: Agentic workflow（occurrences 流式写入）
+
+        每个 segment 完成后交给 AnnotationStreamWriter，按数量/时间微批写入，
+        每批写入后在 checkpoint 中记录已完成的 segment 索引。
+
+        Checkpoint：
+        - annotation_stats 已记录 → 整个 Stage 已完成，直接复用
+        - annotated_segments → 续跑时跳过这些 segments（其 occurrences 已写入）
 
         Args:
-            video_uid: 视频 UID
-            job: 任务记录
+            job: 任务记录（含 checkpoint）
+            video_object_name: 视频对象名称
             asr_result: ASR 结果
-            agentic_result: Agentic 结果
+            segment_ids: 已写入的 segment_id 列表
 
         Returns:
-            统计信息
+            AgenticResult（annotations 为空，写入统计在 persist_stats）
 
         Raises:
-            PersistenceError: 持久化失败
+            AgenticError: Agentic workflow 失败
         """
-        self.logger.info("写入数据库...")
+        if "annotation_stats" in job.checkpoint:
+            self.logger.info(
+                f"✓ Agentic 已完成（checkpoint）: "
+                f"{job.checkpoint['annotation_stats'].get('occurrences_inserted', 0)} occurrences"
+            )
+            job.resumed_stages.append("agentic")
+            return AgenticResult(
+                annotations=[],
+                method=job.checkpoint["agentic_method"],
+                ontology_ver=job.checkpoint["ontology_ver"],
+                persist_stats=job.checkpoint["annotation_stats"],
+            )
+
+        done_segments = set(job.checkpoint.get("annotated_segments", []))
+        self.logger.info(
+            "运行 Agentic workflow..."
+            + (f"（续跑，已完成 {len(done_segments)} segments）" if done_segments else "")
+        )
 
-        # 准备 segments 数据
+        # 构建视频 URI
+        video_uri = f"gs://{self.config.raw_bucket}/{video_object_name}"
+
+        # 准备 segments 数据（转换为 dict 格式）
         segments = [
             {
                 "start": seg.t_start,
                 "end": seg.t_end,
                 "text": seg.text,
                 "lang": seg.lang,
+                "speaker": seg.speaker,
                 "meta": seg.meta
             }
             for seg in asr_result.segments
         ]
 
-        # 调用持久化服务
-        stats = await self.persistence_service.save_video_analysis(
-            video_id=job.video_id,
-            segments=segments,
-            annotations=agentic_result.annotations,
-            method=agentic_result.method,
-            ontology_ver=agentic_result.ontology_ver
+        async def on_flush(flushed_segments: list[int]) -> None:
+            await self._save_checkpoint(
+                job, {"annotated_segments": sorted(done_segments.union(flushed_segments))}
+            )
+
+        writer = AnnotationStreamWriter(
+            persistence=self.persistence_service,
+            segment_ids=segment_ids,
+            ontology_ver=self.config.gemini_model,  # 规则标注时由 on_segment_done 传入的版本覆盖
+            batch_size=self.config.persist_flush_annotations,
+            flush_interval=self.config.persist_flush_seconds,
+            on_flush=on_flush,
         )
 
+        # 调用 Agentic Orchestrator（annotations 交给 writer，不在内存中聚合）
+        async with writer:
+            _, method, ontology_ver = await self.agentic_service.process_video(
+                video_uid=job.video_uid,
+                video_uri=video_uri,
+                segments=segments,
+                on_segment_done=writer.add,
+                skip_segments=done_segments,
+            )
+
+        stats = writer.stats()
         self.logger.info(
-            f"✓ 数据持久化完成: "
-            f"{stats['segments_inserted']} segments, "
-            f"{stats['occurrences_inserted']} occurrences "
-            f"({stats['occurrences_skipped']} skipped)"
+            f"✓ Agentic workflow 完成: {stats['occurrences_inserted']} occurrences "
+            f"({stats['occurrences_skipped']} skipped, {stats['batches']} 批), method={method}"
         )
 
-        return stats
+        await self._save_checkpoint(job, {
+            "agentic_method": method,
+            "ontology_ver": ontology_ver,
+            "annotation_stats": stats,
+        })
+
+        return AgenticResult(
+            annotations=[],
+            method=method,
+            ontology_ver=ontology_ver,
+            persist_stats=stats,
+        )
 
     async def _finalize(
         self,
         job: IngestJob,
         hls_result: TranscodeResult,
         asr_result: ASRResult,
-        stats: dict,
+        agentic_result: AgenticResult,
     ) -> None:
         """
         Step 5-6: 更新路径与状态
@@ -457,7 +599,7 @@ class IngestVideoWorkflow:
             job: 任务记录
             hls_result: 转码结果
             asr_result: ASR 结果
-            stats: 持久化统计
+            agentic_result: Agentic 结果（occurrences 已写入）
         """
         self.logger.info("更新 video 与 ingest_job 状态...")
 
@@ -482,6 +624,137 @@ class IngestVideoWorkflow:
 
         self.logger.info("✓ 状态更新完成")
 
+    async def _save_checkpoint(self, job: IngestJob, updates: dict) -> None:
+        """
+        记录 Stage 的持久化输出到 ingest_jobs.checkpoint（JSONB 合并）
+
+        失败只记录日志：checkpoint 丢失只会让重试多做一次工作，不影响本次处理。
+
+        Args:
+            job: 任务记录（内存中的 checkpoint 同步更新）
+            updates: 要合并的键值
+        """
+        job.checkpoint.update(updates)
+
+        try:
+            await self.db.execute(
+                """
+                UPDATE ingest_jobs
+                SET checkpoint = COALESCE(checkpoint, '{}'::jsonb) || $3::jsonb
+                WHERE object_key = $1 AND etag = $2
+                """,
+                job.object_key,
+                job.etag,
+                updates
+            )
+            self.logger.debug(f"Checkpoint 已保存: {sorted(updates.keys())}")
+        except Exception as e:
+            self.logger.warning(f"保存 checkpoint 失败（忽略）: {e}")
+
+    def _build_stats(
+        self,
+        graph: StageGraph,
+        elapsed: float,
+        status: str,
+        error_message: Optional[str] = None,
+    ) -> Optional[ProcessingStats]:
+        """
+        根据 Stage 耗时与结果汇总处理统计
+
+        Args:
+            graph: 已运行的 Stage 图（失败时只有部分结果）
+            elapsed: 总耗时（秒）
+            status: 'done' | 'error'
+            error_message: 失败原因
+
+        Returns:
+            ProcessingStats；任务未认领成功时返回 None
+        """
+        results = graph.results()
+        job: Optional[IngestJob] = results.get("idempotency")
+        if job is None:
+            return None
+
+        # 失败的 Stage 也记录耗时（如 ASR 超时），从 checkpoint 复用的 Stage 不计入
+        stage_seconds = {
+            name: timing.duration_seconds
+            for name, timing in graph.timings.items()
+            if timing.status in ("done", "failed")
+            and timing.duration_seconds is not None
+            and name not in job.resumed_stages
+        }
+        # Stage 内部的重试（ASR / 转码的重试循环、Gemini 限流器的退避重试），被取消的 Stage 也计入
+        stage_retries = {name: timing.retries for name, timing in graph.timings.items() if timing.retries}
+
+        asr_result: Optional[ASRResult] = results.get("asr")
+        agentic_result: Optional[AgenticResult] = results.get("agentic")
+        persist_stats: dict = agentic_result.persist_stats if agentic_result else {}
+
+        # 持久化耗时 = segments Stage + Agentic 期间各批 occurrences 的写入时间
+        flush_seconds = None if "agentic" in job.resumed_stages else persist_stats.get("flush_seconds")
+        persist_seconds = [
+            seconds for seconds in (stage_seconds.get("segments"), flush_seconds)
+            if seconds is not None
+        ]
+
+        return ProcessingStats(
+            video_uid=job.video_uid,
+            object_key=job.object_key,
+            etag=job.etag,
+            status=status,
+            processing_time_seconds=elapsed,
+            asr_wall_seconds=stage_seconds.get("asr"),
+            transcoder_wall_seconds=stage_seconds.get("transcode"),
+            agentic_wall_seconds=stage_seconds.get("agentic"),
+            persist_wall_seconds=sum(persist_seconds) if persist_seconds else None,
+            video_duration_seconds=asr_result.duration_seconds if asr_result else 0.0,
+            segments_count=len(asr_result.segments) if asr_result else 0,
+            occurrences_count=persist_stats.get("occurrences_inserted", 0),
+            fine_units_matched=persist_stats.get("fine_units_matched", 0),
+            method=agentic_result.method if agentic_result else None,
+            ontology_ver=agentic_result.ontology_ver if agentic_result else None,
+            retry_count=job.retry_count,
+            stage_seconds=stage_seconds,
+            stage_retries=stage_retries,
+            resumed_stages=list(job.resumed_stages),
+            error_message=error_message,
+        )
+
+    async def _record_stats(
+        self,
+        graph: StageGraph,
+        elapsed: float,
+        status: str,
+        error_message: Optional[str] = None,
+    ) -> Optional[ProcessingStats]:
+        """
+        记录耗时分解日志并写入 ingest_job_stats（失败只记录警告）
+
+        Returns:
+            ProcessingStats；任务未认领成功时返回 None
+        """
+        try:
+            stats = self._build_stats(graph, elapsed, status, error_message)
+            if stats is None:
+                return None
+
+            breakdown = " ".join(
+                f"{name}={seconds:.1f}s" for name, seconds in stats.stage_seconds.items()
+            )
+            resumed = f" (checkpoint: {','.join(stats.resumed_stages)})" if stats.resumed_stages else ""
+            retries = (
+                " 重试: " + " ".join(f"{name}={count}" for name, count in stats.stage_retries.items())
+                if stats.stage_retries else ""
+            )
+            self.logger.info(f"📊 耗时分解: total={elapsed:.1f}s {breakdown}{resumed}{retries}")
+
+            await self.persistence_service.save_processing_stats(stats)
+            return stats
+
+        except Exception as e:
+            self.logger.warning(f"记录处理统计失败（忽略）: {e}")
+            return None
+
     async def _handle_error(self, video_uid: str, error: WorkflowError) -> None:
         """
         处理工作流错误
@@ -532,4 +805,38 @@ class IngestVideoWorkflow:
             )
 
         except Exception as e:
-            self.logger.error(f"错误处理失败: {e}", exc_info=True)
\ No newline at end of file
+            self.logger.error(f"错误处理失败: {e}", exc_info=True)
+
+    async def _release_job(self, message: PubSubMessage) -> None:
+        """
+        释放被中断的任务（状态改回 queued，checkpoint 保留）
+
+        认领 SQL 对 queued 任务不做超时判断，可立即续跑，不必等待 processing_timeout_seconds：
+        Pull 模式由 nack 后的重投认领，Push 模式由其他副本的 QueuedJobPoller 认领
+        （started_at 清空 = 没有租约，下一轮轮询即可取出）。
+
+        Args:
+            message: Pub/Sub 消息
+        """
+        try:
+            await self.db.execute(
+                """
+                UPDATE ingest_jobs
+                SET status = 'queued', started_at = NULL, finished_at = NULL
+                WHERE object_key = $1 AND etag = $2 AND status = 'processing'
+                """,
+                message.object_name,
+                message.etag
+            )
+            self.logger.info(f"✓ 任务已释放为 queued: {message.video_uid}")
+        except Exception as e:
+            self.logger.error(f"释放任务失败（将等待超时回收）: {e}")
+
+
+def _decode_checkpoint(value) -> dict:
+    """解析 ingest_jobs.checkpoint（已注册 JSONB 编解码器时为 dict，否则为字符串）"""
+    if not value:
+        return {}
+    if isinstance(value, str):
+        return json.loads(value)
+    return dict(value)
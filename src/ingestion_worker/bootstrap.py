@@ -0,0 +1,73 @@
+"""
+应用装配（Push / Pull 模式共用）
+
+职责：
+- 根据 Config 创建基础设施客户端
+- 组装 Agentic、持久化服务与 IngestVideoWorkflow
+- 预热 fine_unit 进程内索引
+
+对外接口：
+- async build_workflow(config, http) -> IngestVideoWorkflow
+
+调用方负责在退出时关闭 workflow.db 与共享的 HttpClient
+"""
+
+from ingestion_worker.config import Config
+from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.infrastructure.http import HttpClient
+from ingestion_worker.infrastructure.gcs import GCSClient
+from ingestion_worker.infrastructure.lark import LarkClient
+from ingestion_worker.infrastructure.vertex import VertexClient
+from ingestion_worker.infrastructure.transcoder import TranscoderClient
+from ingestion_worker.infrastructure.replicate import ReplicateClient
+from ingestion_worker.domain.agentic.orchestrators import AgenticOrchestrator
+from ingestion_worker.domain.persistence import PersistenceService
+from ingestion_worker.application.workflow import IngestVideoWorkflow
+from ingestion_worker.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+async def build_workflow(config: Config, http: HttpClient) -> IngestVideoWorkflow:
+    """
+    初始化基础设施并组装 Workflow
+
+    Args:
+        config: 已验证的配置
+        http: 共享 HTTP 连接池（注入到 GCS / Lark / Replicate 客户端）
+
+    Returns:
+        IngestVideoWorkflow（数据库连接池已建立）
+    """
+    # 1. 初始化基础设施
+    db = Database(config.db_url, pool_size=config.db_pool_size)
+    await db.connect()
+
+    gcs = GCSClient(config, http)
+    lark = LarkClient(config, http)
+    vertex = VertexClient(config)
+    transcoder = TranscoderClient(config)
+    replicate = ReplicateClient(config, http)
+
+    # 2. 初始化 Agentic
+    agentic = AgenticOrchestrator(vertex, db, lark, config)
+    if agentic.mcp.lexicon is not None:
+        try:
+            await agentic.mcp.lexicon.ensure_fresh()  # 预热，避免第一个视频承担全量加载
+        except Exception as e:
+            logger.warning(f"⚠️ fine_unit 索引预热失败，首次查询时重试: {e}")
+
+    # 3. 初始化持久化服务
+    persistence = PersistenceService(db)
+
+    # 4. 初始化 Workflow
+    return IngestVideoWorkflow(
+        config=config,
+        db=db,
+        gcs=gcs,
+        lark=lark,
+        transcoder=transcoder,
+        replicate=replicate,
+        agentic=agentic,
+        persistence=persistence,
+    )
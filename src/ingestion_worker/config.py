@@ -69,7 +69,10 @@ class Config:
     whisperx_language_detection_max_tries: int = 5
 
     # Database
-    db_pool_size: int = 10
+    db_pool_size: int = 10  # 整个 Pod 的连接预算（多进程时按进程数拆分）
+
+    # 多进程（supervisor）
+    worker_processes: int = 1  # 同一 Pod 内的 worker 进程数
 
     # Retry & Timeout
     max_retries: int = 3
@@ -78,9 +81,71 @@ class Config:
     processing_timeout_seconds: int = 3600  # 1 hour
     gemini_timeout_seconds: int = 180
 
+    # Push 模式准入队列（背压）
+    max_concurrent_videos: int = 4  # 同时处理的视频数
+    ingest_queue_max_backlog: int = 50  # 等待队列上限，满时返回 503 让 Pub/Sub 重投
+    # Push 模式不会重投已返回 200 的消息：关闭时未完成的任务写回 ingest_jobs（queued），由各副本轮询认领
+    queued_job_poll_seconds: int = 15  # 0 表示不轮询
+    queued_job_lease_seconds: int = 300  # 取出后多久内不再重复提交
+    # Pull 模式流控（未 ack 的消息上限，即同时处理的视频数）
+    pull_max_messages: int = 4
+    pull_max_bytes: int = 10 * 1024 * 1024  # 10 MB
+
+    shutdown_drain_seconds: int = 25  # SIGTERM 后等待处理中任务的时间（需小于平台强制终止的宽限期）
+
+    # Agentic 期间 occurrences 微批写入
+    persist_flush_annotations: int = 200  # 累计多少个 annotation 写入一批
+    persist_flush_seconds: int = 5  # 最长多少秒写入一次
+
+    # 共享 HTTP 连接池（Replicate / Lark / GCS Signed URL）
+    http_max_connections: int = 100  # 连接池总连接数
+    http_max_connections_per_host: int = 20  # 每个 host 的连接数上限
+    http_keepalive_seconds: int = 30  # 空闲连接保持时间
+    http_dns_cache_seconds: int = 300  # DNS 缓存 TTL
+
     # Gemini 并发配置
-    gemini_max_concurrency: int = 20  # 最大并发任务数
+    gemini_max_concurrency: int = 20  # 最大并发请求数（进程内共享，429 时自适应下调，成功后回升到该值）
+    gemini_min_concurrency: int = 1  # 自适应并发的下限
+    gemini_rpm_limit: int = 0  # 每分钟请求数上限（0 = 不限制）
+    gemini_tpm_limit: int = 0  # 每分钟 token 数上限（0 = 不限制）
+    gemini_max_retries: int = 4  # ResourceExhausted / ServiceUnavailable 的最大重试次数
+    gemini_retry_base_seconds: float = 1.0  # 重试退避基数（指数退避 + 随机抖动）
+    gemini_retry_max_seconds: float = 30.0  # 单次退避上限
     gemini_cache_ttl_seconds: int = 3600  # Cached Content TTL (1 hour)
+    gemini_tool_concurrency: int = 8  # 同一轮 function calls 的并发上限
+    gemini_cache_create_threads: int = 4  # CachedContent.create（同步 SDK）专用线程数
+
+    # fine_unit 进程内索引（query_fine_units 不访问数据库）
+    lexicon_enabled: bool = True
+    lexicon_refresh_seconds: int = 60  # 按 updated_at 增量刷新的间隔
+
+    # 候选获取方式（按标注器）：tools = Gemini 调用 query_fine_units；injected = 本地预查询后注入 prompt
+    word_candidate_mode: str = "tools"
+    phrase_candidate_mode: str = "tools"
+
+    # 标注方式：split = 短语、单词分两次调用；combined = 合并标注器一次调用（短语优先作为后处理）；
+    # rule = 只用本地词库的规则标注（不调用 Gemini，用于批量回填）
+    annotation_mode: str = "split"
+
+    # 多模态、纯文本缓存都创建失败时的降级：gemini_nocache = 不使用缓存继续调用 Gemini；
+    # rule_fallback = 改用本地规则标注（Gemini 不可用时视频仍能完成）
+    agentic_outage_fallback: str = "gemini_nocache"
+
+    # 本地预过滤：fine_unit 索引中的内容命中数低于 prefilter_min_hits 的 segment
+    # off = 不过滤；skip = 不调用 Gemini；word_only = 只调用单词标注器
+    prefilter_mode: str = "off"
+    prefilter_min_hits: int = 1
+
+    # 标注结果缓存：按 (模型, 标注器, prompt 模板版本, 规范化的 segment 文本) 复用 Gemini 的标注
+    response_cache_enabled: bool = True
+    response_cache_entries: int = 20000  # 进程内 LRU 条目上限
+    response_cache_persistent: bool = False  # 同时写入 Postgres（gemini_response_cache 表，多进程 / 重跑共享）
+    response_cache_multimodal: bool = False  # 多模态调用也使用缓存（默认不使用：画面会影响消歧与评分）
+    response_cache_max_age_seconds: int = 7 * 24 * 3600  # 条目最长使用时间；持久层中过期的条目定期删除
+
+    # 窗口模式：一次调用标注多个连续 segment（1 = 逐个 segment）
+    annotation_window_segments: int = 1
+    annotation_window_tokens: int = 300  # 每个窗口的 segment 文本 token 预算（估算）
 
     # agent tool use
     mcp_endpoint: Optional[str] = None  # For future remote MCP server
@@ -180,11 +245,35 @@ class Config:
             gemini_timeout_seconds=optional_int("GEMINI_TIMEOUT_SECONDS", "gemini_timeout_seconds"),
             gemini_max_concurrency=optional_int("GEMINI_MAX_CONCURRENCY", "gemini_max_concurrency"),
             gemini_cache_ttl_seconds=optional_int("GEMINI_CACHE_TTL_SECONDS", "gemini_cache_ttl_seconds"),
+            gemini_min_concurrency=optional_int("GEMINI_MIN_CONCURRENCY", "gemini_min_concurrency"),
+            gemini_rpm_limit=optional_int("GEMINI_RPM_LIMIT", "gemini_rpm_limit"),
+            gemini_tpm_limit=optional_int("GEMINI_TPM_LIMIT", "gemini_tpm_limit"),
+            gemini_max_retries=optional_int("GEMINI_MAX_RETRIES", "gemini_max_retries"),
+            gemini_retry_base_seconds=optional_float("GEMINI_RETRY_BASE_SECONDS", "gemini_retry_base_seconds"),
+            gemini_retry_max_seconds=optional_float("GEMINI_RETRY_MAX_SECONDS", "gemini_retry_max_seconds"),
+            gemini_tool_concurrency=optional_int("GEMINI_TOOL_CONCURRENCY", "gemini_tool_concurrency"),
+            gemini_cache_create_threads=optional_int("GEMINI_CACHE_CREATE_THREADS", "gemini_cache_create_threads"),
             mcp_endpoint=optional("MCP_ENDPOINT", "mcp_endpoint"),
+            lexicon_enabled=optional_bool("LEXICON_ENABLED", "lexicon_enabled"),
+            lexicon_refresh_seconds=optional_int("LEXICON_REFRESH_SECONDS", "lexicon_refresh_seconds"),
+            word_candidate_mode=optional("WORD_CANDIDATE_MODE", "word_candidate_mode"),
+            phrase_candidate_mode=optional("PHRASE_CANDIDATE_MODE", "phrase_candidate_mode"),
+            annotation_mode=optional("ANNOTATION_MODE", "annotation_mode"),
+            agentic_outage_fallback=optional("AGENTIC_OUTAGE_FALLBACK", "agentic_outage_fallback"),
+            prefilter_mode=optional("PREFILTER_MODE", "prefilter_mode"),
+            prefilter_min_hits=optional_int("PREFILTER_MIN_HITS", "prefilter_min_hits"),
+            response_cache_enabled=optional_bool("RESPONSE_CACHE_ENABLED", "response_cache_enabled"),
+            response_cache_entries=optional_int("RESPONSE_CACHE_ENTRIES", "response_cache_entries"),
+            response_cache_persistent=optional_bool("RESPONSE_CACHE_PERSISTENT", "response_cache_persistent"),
+            response_cache_multimodal=optional_bool("RESPONSE_CACHE_MULTIMODAL", "response_cache_multimodal"),
+            response_cache_max_age_seconds=optional_int("RESPONSE_CACHE_MAX_AGE_SECONDS", "response_cache_max_age_seconds"),
+            annotation_window_segments=optional_int("ANNOTATION_WINDOW_SEGMENTS", "annotation_window_segments"),
+            annotation_window_tokens=optional_int("ANNOTATION_WINDOW_TOKENS", "annotation_window_tokens"),
 
             # Database
             db_url=require("DATABASE_URL"),
             db_pool_size=optional_int("DB_POOL_SIZE", "db_pool_size"),
+            worker_processes=optional_int("WORKER_PROCESSES", "worker_processes"),
 
             # Retry
             max_retries=optional_int("MAX_RETRIES", "max_retries"),
@@ -192,6 +281,25 @@ class Config:
             signed_url_ttl_seconds=optional_int("SIGNED_URL_TTL_SECONDS", "signed_url_ttl_seconds"),
             processing_timeout_seconds=optional_int("PROCESSING_TIMEOUT_SECONDS", "processing_timeout_seconds"),
 
+            # 准入队列
+            max_concurrent_videos=optional_int("MAX_CONCURRENT_VIDEOS", "max_concurrent_videos"),
+            ingest_queue_max_backlog=optional_int("INGEST_QUEUE_MAX_BACKLOG", "ingest_queue_max_backlog"),
+            queued_job_poll_seconds=optional_int("QUEUED_JOB_POLL_SECONDS", "queued_job_poll_seconds"),
+            queued_job_lease_seconds=optional_int("QUEUED_JOB_LEASE_SECONDS", "queued_job_lease_seconds"),
+            pull_max_messages=optional_int("PULL_MAX_MESSAGES", "pull_max_messages"),
+            pull_max_bytes=optional_int("PULL_MAX_BYTES", "pull_max_bytes"),
+            shutdown_drain_seconds=optional_int("SHUTDOWN_DRAIN_SECONDS", "shutdown_drain_seconds"),
+
+            # 微批写入
+            persist_flush_annotations=optional_int("PERSIST_FLUSH_ANNOTATIONS", "persist_flush_annotations"),
+            persist_flush_seconds=optional_int("PERSIST_FLUSH_SECONDS", "persist_flush_seconds"),
+
+            # HTTP 连接池
+            http_max_connections=optional_int("HTTP_MAX_CONNECTIONS", "http_max_connections"),
+            http_max_connections_per_host=optional_int("HTTP_MAX_CONNECTIONS_PER_HOST", "http_max_connections_per_host"),
+            http_keepalive_seconds=optional_int("HTTP_KEEPALIVE_SECONDS", "http_keepalive_seconds"),
+            http_dns_cache_seconds=optional_int("HTTP_DNS_CACHE_SECONDS", "http_dns_cache_seconds"),
+
             # Webhook
             error_webhook_url=require("WEBHOOK_URL"),
         )
@@ -204,12 +312,108 @@ class Config:
         if self.gemini_max_concurrency <= 0:
             raise ConfigError("GEMINI_MAX_CONCURRENCY must be positive")
 
+        if not 0 < self.gemini_min_concurrency <= self.gemini_max_concurrency:
+            raise ConfigError("GEMINI_MIN_CONCURRENCY must be between 1 and GEMINI_MAX_CONCURRENCY")
+
+        if self.gemini_rpm_limit < 0 or self.gemini_tpm_limit < 0:
+            raise ConfigError("GEMINI_RPM_LIMIT and GEMINI_TPM_LIMIT must be non-negative (0 = unlimited)")
+
+        if self.gemini_max_retries < 0:
+            raise ConfigError("GEMINI_MAX_RETRIES must be non-negative")
+
+        if not 0 < self.gemini_retry_base_seconds <= self.gemini_retry_max_seconds:
+            raise ConfigError("GEMINI_RETRY_BASE_SECONDS must be positive and not exceed GEMINI_RETRY_MAX_SECONDS")
+
         if self.gemini_cache_ttl_seconds <= 0:
             raise ConfigError("GEMINI_CACHE_TTL_SECONDS must be positive")
 
+        if self.gemini_tool_concurrency <= 0:
+            raise ConfigError("GEMINI_TOOL_CONCURRENCY must be positive")
+
+        if self.gemini_cache_create_threads <= 0:
+            raise ConfigError("GEMINI_CACHE_CREATE_THREADS must be positive")
+
+        if self.lexicon_refresh_seconds <= 0:
+            raise ConfigError("LEXICON_REFRESH_SECONDS must be positive")
+
+        if self.word_candidate_mode not in ("tools", "injected"):
+            raise ConfigError("WORD_CANDIDATE_MODE must be 'tools' or 'injected'")
+
+        if self.phrase_candidate_mode not in ("tools", "injected"):
+            raise ConfigError("PHRASE_CANDIDATE_MODE must be 'tools' or 'injected'")
+
+        if self.annotation_mode not in ("split", "combined", "rule"):
+            raise ConfigError("ANNOTATION_MODE must be 'split', 'combined' or 'rule'")
+
+        if self.agentic_outage_fallback not in ("gemini_nocache", "rule_fallback"):
+            raise ConfigError("AGENTIC_OUTAGE_FALLBACK must be 'gemini_nocache' or 'rule_fallback'")
+
+        if self.prefilter_mode not in ("off", "skip", "word_only"):
+            raise ConfigError("PREFILTER_MODE must be 'off', 'skip' or 'word_only'")
+
+        if self.prefilter_min_hits <= 0:
+            raise ConfigError("PREFILTER_MIN_HITS must be positive")
+
+        if self.response_cache_entries <= 0:
+            raise ConfigError("RESPONSE_CACHE_ENTRIES must be positive")
+
+        if self.response_cache_max_age_seconds <= 0:
+            raise ConfigError("RESPONSE_CACHE_MAX_AGE_SECONDS must be positive")
+
+        if self.annotation_window_segments <= 0:
+            raise ConfigError("ANNOTATION_WINDOW_SEGMENTS must be positive")
+
+        if self.annotation_window_tokens <= 0:
+            raise ConfigError("ANNOTATION_WINDOW_TOKENS must be positive")
+
         if self.db_pool_size <= 0:
             raise ConfigError("DB_POOL_SIZE must be positive")
 
+        if self.worker_processes <= 0:
+            raise ConfigError("WORKER_PROCESSES must be positive")
+
+        if self.db_pool_size < self.worker_processes:
+            raise ConfigError("DB_POOL_SIZE must be at least WORKER_PROCESSES (one connection per process)")
+
+        if self.max_concurrent_videos <= 0:
+            raise ConfigError("MAX_CONCURRENT_VIDEOS must be positive")
+
+        if self.ingest_queue_max_backlog <= 0:
+            raise ConfigError("INGEST_QUEUE_MAX_BACKLOG must be positive")
+
+        if self.queued_job_poll_seconds < 0:
+            raise ConfigError("QUEUED_JOB_POLL_SECONDS must be non-negative")
+
+        if self.queued_job_lease_seconds <= 0:
+            raise ConfigError("QUEUED_JOB_LEASE_SECONDS must be positive")
+
+        if self.pull_max_messages <= 0:
+            raise ConfigError("PULL_MAX_MESSAGES must be positive")
+
+        if self.pull_max_bytes <= 0:
+            raise ConfigError("PULL_MAX_BYTES must be positive")
+
+        if self.shutdown_drain_seconds < 0:
+            raise ConfigError("SHUTDOWN_DRAIN_SECONDS must be non-negative")
+
+        if self.persist_flush_annotations <= 0:
+            raise ConfigError("PERSIST_FLUSH_ANNOTATIONS must be positive")
+
+        if self.persist_flush_seconds <= 0:
+            raise ConfigError("PERSIST_FLUSH_SECONDS must be positive")
+
+        if self.http_max_connections <= 0:
+            raise ConfigError("HTTP_MAX_CONNECTIONS must be positive")
+
+        if self.http_max_connections_per_host <= 0:
+            raise ConfigError("HTTP_MAX_CONNECTIONS_PER_HOST must be positive")
+
+        if self.http_keepalive_seconds <= 0:
+            raise ConfigError("HTTP_KEEPALIVE_SECONDS must be positive")
+
+        if self.http_dns_cache_seconds < 0:
+            raise ConfigError("HTTP_DNS_CACHE_SECONDS must be non-negative")
+
         if self.max_retries < 0:
             raise ConfigError("MAX_RETRIES must be non-negative")
 
@@ -229,6 +433,36 @@ class Config:
         if not (0 <= self.whisperx_vad_offset <= 1):
             raise ConfigError("WHISPERX_VAD_OFFSET must be between 0 and 1")
 
+    def per_process(self) -> "Config":
+        """
+        按 worker_processes 拆分 Pod 级别的资源预算
+
+        DB 连接、并发视频数、Pull 流控与 Gemini 并发 / RPM / TPM 都是整个 Pod 的上限，
+        每个进程分到 1/N（至少 1），N 个进程加起来不超过 Postgres 连接预算。
+
+        Returns:
+            单个进程使用的 Config（worker_processes == 1 时返回自身）
+        """
+        n = self.worker_processes
+        if n == 1:
+            return self
+
+        def share(total: int) -> int:
+            return max(1, total // n)
+
+        return dataclasses.replace(
+            self,
+            db_pool_size=share(self.db_pool_size),
+            max_concurrent_videos=share(self.max_concurrent_videos),
+            ingest_queue_max_backlog=share(self.ingest_queue_max_backlog),
+            pull_max_messages=share(self.pull_max_messages),
+            pull_max_bytes=share(self.pull_max_bytes),
+            gemini_max_concurrency=share(self.gemini_max_concurrency),
+            gemini_min_concurrency=min(self.gemini_min_concurrency, share(self.gemini_max_concurrency)),
+            gemini_rpm_limit=share(self.gemini_rpm_limit) if self.gemini_rpm_limit else 0,
+            gemini_tpm_limit=share(self.gemini_tpm_limit) if self.gemini_tpm_limit else 0,
+        )
+
 
 # 业务配置常量（不从环境变量读取，直接硬编码）
 MAX_TEXT_TOKENS = 8000
\ No newline at end of file
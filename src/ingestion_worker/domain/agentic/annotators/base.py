@@ -4,11 +4,15 @@
 定义标注器的统一接口
 """
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class BaseAnnotator(ABC):
     """标注器基类"""
 
+    TASK: str = ""  # 任务描述（窗口模式的 prompt 使用）
+    PROMPT_VERSION: int = 1  # prompt / 输出格式有语义变化时递增（响应缓存随之失效）
+
     @abstractmethod
     def build_prompt(self, segment: dict, segment_index: int) -> str:
         """
@@ -55,4 +59,100 @@ class BaseAnnotator(ABC):
         Returns:
             'sense' | 'phrase_sense' | 'grammar_rule'
         """
-        pass
\ No newline at end of file
+        pass
+
+    def postprocess(self, annotations: list[dict]) -> list[dict]:
+        """
+        单个 segment 验证后的后处理（默认不处理）
+
+        Args:
+            annotations: 该 segment 的有效 annotations
+
+        Returns:
+            处理后的 annotations
+        """
+        return annotations
+
+    def build_candidate_prompt(self, segment: dict, segment_index: int, candidates_text: str) -> str:
+        """
+        构建候选注入模式的 prompt（标准 prompt + 预查询的候选，不调用工具）
+
+        Args:
+            segment: Segment 数据
+            segment_index: Segment 索引
+            candidates_text: 渲染后的候选列表（candidates.render_candidates）
+
+        Returns:
+            Prompt 字符串
+        """
+        return self.build_prompt(segment, segment_index) + f"""
+候选注入模式（替代上面工作流程中"调用 query_fine_units 工具"的步骤）：
+- 本次**不要调用任何工具**，候选已按文本位置预先查询，列在下方
+- fine_id 必须从下列候选中选择；列表中没有的词/短语跳过
+- 列表中的 span 是该词/短语在 segment 文本中的字符偏移，可直接使用
+
+预查询的候选：
+{candidates_text}
+"""
+
+    def build_guidelines(self, example_index: int, scope_rule: str) -> str:
+        """
+        构建与具体 segment 无关的 prompt 片段（窗口模式需要，子类按需实现）
+
+        Args:
+            example_index: 输出格式示例中的 segment_index
+            scope_rule: 标注范围规则
+
+        Returns:
+            Prompt 片段
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持窗口模式")
+
+    def build_window_prompt(
+        self,
+        window: list[tuple[int, dict]],
+        candidates_text: Optional[dict[int, str]] = None
+    ) -> str:
+        """
+        构建窗口模式的 prompt（一次标注多个连续 segment）
+
+        Args:
+            window: [(segment_index, segment), ...]
+            candidates_text: 候选注入模式下每个 segment 渲染后的候选（None 表示使用工具）
+
+        Returns:
+            Prompt 字符串
+        """
+        indices = [idx for idx, _ in window]
+        listing = []
+        for idx, segment in window:
+            listing.append(
+                f"Segment #{idx}（{segment['start']:.1f}s - {segment['end']:.1f}s）：{segment['text']}"
+            )
+            if candidates_text is not None:
+                listing.append(f"预查询的候选：\n{candidates_text.get(idx, '（无）')}")
+        segments_text = "\n\n".join(listing)
+        index_list = ", ".join(f"#{idx}" for idx in indices)
+
+        prompt = f"""
+一次处理 {len(window)} 个连续的 segment（{index_list}）：
+
+{segments_text}
+
+任务：对上面每个 segment 分别执行：{self.TASK}
+每个 segment 单独分析；下面的规则对每个 segment 都适用。
+
+""" + self.build_guidelines(
+            example_index=indices[0],
+            scope_rule=(
+                f"只标注上面列出的 segment（{index_list}），每个 annotation 的 segment_index "
+                f"必须是它所在 segment 的编号，span 相对于该 segment 自己的文本"
+            )
+        )
+        if candidates_text is not None:
+            prompt += """
+候选注入模式（替代上面工作流程中"调用 query_fine_units 工具"的步骤）：
+- 本次**不要调用任何工具**，每个 segment 的候选已预先查询并列在该 segment 下方
+- fine_id 必须从该 segment 的候选中选择；列表中没有的词/短语跳过
+"""
+        return prompt
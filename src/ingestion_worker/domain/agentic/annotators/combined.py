@@ -0,0 +1,187 @@
+"""
+短语 + 单词合并标注器（一次调用同时输出 phrase_sense 与 word_sense）
+
+职责：
+- 构建合并标注的 prompt（先短语后单词）
+- 输出 schema 在单词标注的基础上增加 kind 字段
+- 验证标注结果（字段规则与单词 / 短语标注器一致）
+- 后处理：短语优先（落在短语 span 内的单词标注被丢弃）
+"""
+from ingestion_worker.domain.agentic.annotators.base import BaseAnnotator
+from ingestion_worker.domain.agentic.annotators.word import WordAnnotator
+from ingestion_worker.utils.logging import get_logger
+
+KINDS = ("phrase_sense", "word_sense")
+
+
+def apply_phrase_precedence(annotations: list[dict]) -> list[dict]:
+    """
+    短语优先：同一 segment 中，span 被某个短语 span 覆盖的单词标注被丢弃
+
+    Args:
+        annotations: 合并标注器的输出（带 kind）
+
+    Returns:
+        过滤后的 annotations（保持原顺序）
+    """
+    phrase_spans = [
+        (ann["segment_index"], ann["span"]["start"], ann["span"]["end"])
+        for ann in annotations
+        if ann.get("kind") == "phrase_sense"
+    ]
+
+    def covered(ann: dict) -> bool:
+        idx, start, end = ann["segment_index"], ann["span"]["start"], ann["span"]["end"]
+        return any(p_idx == idx and p_start <= start and end <= p_end for p_idx, p_start, p_end in phrase_spans)
+
+    return [ann for ann in annotations if ann.get("kind") != "word_sense" or not covered(ann)]
+
+
+class CombinedAnnotator(BaseAnnotator):
+    """短语 + 单词合并标注器"""
+
+    TASK = "识别该 segment 中的**短语**与**单词**（名词、动词、形容词、副词），并分别标注含义。"
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self._fields = WordAnnotator()  # 字段验证规则与单词 / 短语标注器相同
+
+    def get_kind(self) -> str:
+        """返回标注类型"""
+        return "combined"
+
+    def build_prompt(self, segment: dict, segment_index: int) -> str:
+        """
+        构建合并标注的 prompt
+
+        Args:
+            segment: Segment 数据
+            segment_index: Segment 索引
+
+        Returns:
+            Prompt 字符串
+        """
+        return f"""
+专注处理 Segment #{segment_index}：
+
+时间: {segment['start']:.1f}s - {segment['end']:.1f}s
+文本: {segment['text']}
+
+任务：{self.TASK}
+
+""" + self.build_guidelines(
+            example_index=segment_index,
+            scope_rule=f"只标注 segment #{segment_index}，segment_index 必须是 {segment_index}"
+        )
+
+    def build_guidelines(self, example_index: int, scope_rule: str) -> str:
+        """
+        构建与具体 segment 无关的工作流程、评分标准、输出格式与规则（单 segment / 窗口模式共用）
+
+        Args:
+            example_index: 输出格式示例中的 segment_index
+            scope_rule: 标注范围规则（"重要规则"的第一条）
+
+        Returns:
+            Prompt 片段
+        """
+        return f"""工作流程：
+1. 先识别**短语**（phrasal verbs 如 give up / run out of，collocations 如 heavy rain，idioms 如 piece of cake）
+   - **调用 query_fine_units 工具**：query_fine_units(lemma="give up", kind="phrase_sense")
+2. 再识别短语之外的**单词**（名词、动词、形容词、副词），还原成原型（"running" → "run"）
+   - **调用 query_fine_units 工具**：query_fine_units(lemma="run", kind="word_sense", pos="v")
+   - 同一轮可以同时发出多个查询
+3. 从工具返回的候选中选择最合适的 fine_id
+   - **fine_id 必须是工具返回的候选之一，不能自己编造**
+   - 如果工具返回空列表，跳过该词/短语，不输出 annotation
+4. 每个 annotation 标明 kind（phrase_sense / word_sense），并评估两个 comprehensibility 分数（0.0-1.0）
+
+Comprehensibility 评分标准（短语按整体含义评估）：
+
+**visual_comprehensibility**: 视频画面的提示强度
+- 1.0: 画面直接展示含义
+- 0.8: 画面清晰展示相关场景
+- 0.6: 画面提供间接线索
+- 0.4: 画面相关但不明确
+- 0.2: 画面弱相关
+- 0.0: 画面无关或无画面
+
+**textual_comprehensibility**: 文本上下文的提示强度
+- 1.0: 上下文明确定义或解释
+- 0.8: 上下文提供丰富的语义线索
+- 0.6: 提供语义线索（因果/对比/搭配关系）
+- 0.4: 提供基本搭配或词性信息
+- 0.2: 上下文弱相关
+- 0.0: 上下文无帮助
+
+输出格式：
+{{
+  "annotations": [
+    {{
+      "segment_index": {example_index},
+      "kind": "phrase_sense",
+      "fine_id": 23456,
+      "span": {{"start": 5, "end": 12}},
+      "rationale": "表示放弃，视频中看到人停止尝试",
+      "visual_comprehensibility": 0.85,
+      "textual_comprehensibility": 0.7
+    }},
+    {{
+      "segment_index": {example_index},
+      "kind": "word_sense",
+      "fine_id": 12345,
+      "span": {{"start": 13, "end": 21}},
+      "rationale": "指学习的动作",
+      "visual_comprehensibility": 0.2,
+      "textual_comprehensibility": 0.6
+    }}
+  ]
+}}
+
+重要规则：
+- {scope_rule}
+- **短语优先**：短语内的单词不再单独标注（如 "give up" 标注为短语，不标注 "give"）
+- 候选为空 → 跳过（不输出 annotation）
+- 评分要客观，从语言学习者角度考虑
+- Span 是相对于该 segment 文本的字符偏移，短语的 span 覆盖整个短语
+"""
+
+    def validate_annotation(self, ann: dict, segment: dict) -> bool:
+        """
+        验证合并标注（kind + 与单词标注器相同的字段规则）
+
+        Args:
+            ann: Annotation 数据
+            segment: Segment 数据
+
+        Returns:
+            True 如果有效，否则 False
+        """
+        if ann.get("kind") not in KINDS:
+            self.logger.warning(f"kind 无效: {ann.get('kind')}")
+            return False
+        return self._fields.validate_annotation(ann, segment)
+
+    def postprocess(self, annotations: list[dict]) -> list[dict]:
+        """短语优先（见 apply_phrase_precedence）"""
+        return apply_phrase_precedence(annotations)
+
+    def get_output_schema(self) -> dict:
+        """
+        返回输出 schema（单词标注 schema + kind）
+
+        Returns:
+            JSON schema dict
+        """
+        schema = self._fields.get_output_schema()
+        item = schema["properties"]["annotations"]["items"]
+        item["properties"] = {
+            "kind": {
+                "type": "string",
+                "enum": list(KINDS),
+                "description": "标注类型：phrase_sense(短语义项)/word_sense(单词义项)"
+            },
+            **item["properties"]
+        }
+        item["required"] = ["kind", *item["required"]]
+        return schema
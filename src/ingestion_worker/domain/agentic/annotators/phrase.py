@@ -20,6 +20,8 @@ class PhraseAnnotator(BaseAnnotator):
         "idioms (如 piece of cake)"
     ]
 
+    TASK = "识别该 segment 中的**短语**，并标注含义。"
+
     def __init__(self):
         self.logger = get_logger(__name__)
 
@@ -38,17 +40,33 @@ class PhraseAnnotator(BaseAnnotator):
         Returns:
             Prompt 字符串
         """
-        phrase_types = "\n".join([f"  - {t}" for t in self.COMMON_PHRASE_TYPES])
-
         return f"""
 专注处理 Segment #{segment_index}：
 
 时间: {segment['start']:.1f}s - {segment['end']:.1f}s
 文本: {segment['text']}
 
-任务：识别该 segment 中的**短语**，并标注含义。
+任务：{self.TASK}
+
+""" + self.build_guidelines(
+            example_index=segment_index,
+            scope_rule=f"只标注 segment #{segment_index}，segment_index 必须是 {segment_index}"
+        )
+
+    def build_guidelines(self, example_index: int, scope_rule: str) -> str:
+        """
+        构建与具体 segment 无关的工作流程、评分标准、输出格式与规则（单 segment / 窗口模式共用）
+
+        Args:
+            example_index: 输出格式示例中的 segment_index
+            scope_rule: 标注范围规则（"重要规则"的第一条）
+
+        Returns:
+            Prompt 片段
+        """
+        phrase_types = "\n".join([f"  - {t}" for t in self.COMMON_PHRASE_TYPES])
 
-常见短语类型：
+        return f"""常见短语类型：
 {phrase_types}
 
 工作流程：
@@ -83,7 +101,7 @@ Comprehensibility 评分标准（关注短语的整体含义）：
 {{
   "annotations": [
     {{
-      "segment_index": {segment_index},
+      "segment_index": {example_index},
       "fine_id": 23456,
       "span": {{"start": 5, "end": 12}},
       "rationale": "表示放弃，视频中看到人停止尝试",
@@ -94,7 +112,7 @@ Comprehensibility 评分标准（关注短语的整体含义）：
 }}
 
 重要规则：
-- 只标注 segment #{segment_index}，segment_index 必须是 {segment_index}
+- {scope_rule}
 - **短语优先**：优先识别短语，而非单独的单词
   - 如 "give up" 应标注为短语，而非单独的 "give"
   - 如 "run out of" 应标注为短语，而非 "run"
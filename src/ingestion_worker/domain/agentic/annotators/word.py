@@ -16,6 +16,8 @@ class WordAnnotator(BaseAnnotator):
     # 业务配置
     TARGET_POS = ["n", "v", "a", "r"]  # 目标词性：名词、动词、形容词、副词
 
+    TASK = "识别该 segment 中的**单词**（名词、动词、形容词、副词），并标注含义。"
+
     def __init__(self):
         self.logger = get_logger(__name__)
 
@@ -40,9 +42,25 @@ class WordAnnotator(BaseAnnotator):
 时间: {segment['start']:.1f}s - {segment['end']:.1f}s
 文本: {segment['text']}
 
-任务：识别该 segment 中的**单词**（名词、动词、形容词、副词），并标注含义。
+任务：{self.TASK}
+
+""" + self.build_guidelines(
+            example_index=segment_index,
+            scope_rule=f"只标注 segment #{segment_index}，segment_index 必须是 {segment_index}"
+        )
+
+    def build_guidelines(self, example_index: int, scope_rule: str) -> str:
+        """
+        构建与具体 segment 无关的工作流程、评分标准、输出格式与规则（单 segment / 窗口模式共用）
+
+        Args:
+            example_index: 输出格式示例中的 segment_index
+            scope_rule: 标注范围规则（"重要规则"的第一条）
 
-工作流程：
+        Returns:
+            Prompt 片段
+        """
+        return f"""工作流程：
 1. 识别需要标注的单词（如 "running"）
 2. 还原成原型（"run"）
 3. **调用 query_fine_units 工具**获取候选列表
@@ -75,7 +93,7 @@ Comprehensibility 评分标准：
 {{
   "annotations": [
     {{
-      "segment_index": {segment_index},
+      "segment_index": {example_index},
       "fine_id": 12345,
       "span": {{"start": 11, "end": 18}},
       "rationale": "指快速移动的动作，视频中人在奔跑",
@@ -86,7 +104,7 @@ Comprehensibility 评分标准：
 }}
 
 重要规则：
-- 只标注 segment #{segment_index}，segment_index 必须是 {segment_index}
+- {scope_rule}
 - 候选为空 → 跳过该词（不输出 annotation）
 - 评分要客观，从语言学习者角度考虑
 - 高分 = 更适合作为学习素材
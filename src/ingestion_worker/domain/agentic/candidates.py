@@ -0,0 +1,241 @@
+"""
+候选预解析（候选注入模式）
+
+职责：
+- 本地分词（带字符偏移）与基于规则的词形还原（不依赖外部 NLP 库）
+- 为 segment 中所有可能的单词原型 / n-gram 短语预先查询 fine_unit 候选
+- 把候选渲染进 prompt，让 Gemini 一次生成即可完成标注（不需要 Function Calling 往返）
+
+对外接口：
+- tokenize(text) -> list[Token]
+- lemma_variants(word) -> list[str]          # 可能的原型（宽松生成，由词库过滤）
+- CandidateResolver(mcp, max_phrase_words)
+- async CandidateResolver.resolve(text, kind, lang, allowed_pos) -> list[dict]
+- render_candidates(resolved) -> str
+
+设计：
+- 词形还原故意"多猜"：不存在的原型在词库中查不到，不会进入 prompt
+- 所有原型一次批量查询（MCPTools.lookup_many，有进程内索引时不访问数据库）
+"""
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from ingestion_worker.domain.agentic.mcp_tools import MCPTools
+
+TOKEN_RE = re.compile(r"[A-Za-z]+(?:['’][A-Za-z]+)*")
+
+# 不规则变化（词形 → 原型）
+IRREGULAR = {
+    "am": "be", "is": "be", "are": "be", "was": "be", "were": "be", "been": "be", "being": "be",
+    "has": "have", "had": "have", "does": "do", "did": "do", "done": "do",
+    "went": "go", "gone": "go", "goes": "go", "got": "get", "gotten": "get",
+    "made": "make", "said": "say", "saw": "see", "seen": "see", "took": "take", "taken": "take",
+    "came": "come", "gave": "give", "given": "give", "knew": "know", "known": "know",
+    "thought": "think", "told": "tell", "found": "find", "felt": "feel", "left": "leave",
+    "kept": "keep", "brought": "bring", "bought": "buy", "began": "begin", "begun": "begin",
+    "ran": "run", "sat": "sit", "stood": "stand", "heard": "hear", "meant": "mean", "met": "meet",
+    "paid": "pay", "sent": "send", "spent": "spend", "built": "build", "lost": "lose",
+    "held": "hold", "wrote": "write", "written": "write", "ate": "eat", "eaten": "eat",
+    "drove": "drive", "driven": "drive", "spoke": "speak", "spoken": "speak", "broke": "break",
+    "broken": "break", "chose": "choose", "chosen": "choose", "fell": "fall", "fallen": "fall",
+    "forgot": "forget", "forgotten": "forget", "understood": "understand", "taught": "teach",
+    "caught": "catch", "fought": "fight", "sold": "sell", "slept": "sleep", "won": "win",
+    "wore": "wear", "worn": "wear", "threw": "throw", "thrown": "throw", "grew": "grow",
+    "grown": "grow", "flew": "fly", "flown": "fly", "drew": "draw", "drawn": "draw",
+    "lay": "lie", "lying": "lie", "dying": "die", "tying": "tie",
+    "children": "child", "men": "man", "women": "woman", "people": "person", "feet": "foot",
+    "teeth": "tooth", "mice": "mouse", "better": "good", "best": "good", "worse": "bad",
+    "worst": "bad", "further": "far", "won't": "will", "can't": "can", "shan't": "shall",
+}
+
+# 缩写后缀（'s 也可能是所有格，两种情况都交给词库判断）
+CLITICS = ("n't", "'s", "'re", "'ve", "'ll", "'m", "'d")
+
+
+@dataclass
+class Token:
+    """带字符偏移的词"""
+    text: str
+    start: int
+    end: int
+
+
+def tokenize(text: str) -> list[Token]:
+    """
+    分词（字母与撇号组成的词，偏移相对于原文本）
+
+    Args:
+        text: segment 文本
+
+    Returns:
+        Token 列表
+    """
+    return [Token(m.group(), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+
+
+def lemma_variants(word: str) -> list[str]:
+    """
+    生成可能的原型（第一个为小写原词）
+
+    Args:
+        word: 单词
+
+    Returns:
+        去重后的候选原型列表
+    """
+    w = word.lower().replace("’", "'")
+    variants = [w]
+
+    if w in IRREGULAR:
+        variants.append(IRREGULAR[w])
+    for clitic in CLITICS:
+        if w.endswith(clitic) and len(w) > len(clitic):
+            w = w[: -len(clitic)]
+            variants.append(w)
+            if w in IRREGULAR:
+                variants.append(IRREGULAR[w])
+            break
+
+    def doubled(stem: str) -> bool:
+        return len(stem) >= 3 and stem[-1] == stem[-2] and stem[-1] not in "aeiouls"
+
+    if w.endswith("ies") and len(w) > 4:
+        variants.append(w[:-3] + "y")
+    if w.endswith("es") and len(w) > 3:
+        variants.append(w[:-2])
+    if w.endswith("s") and not w.endswith("ss") and len(w) > 2:
+        variants.append(w[:-1])
+    if w.endswith("ied") and len(w) > 4:
+        variants.append(w[:-3] + "y")
+    if w.endswith("ed") and len(w) > 3:
+        stem = w[:-2]
+        variants.extend([stem, stem + "e"])
+        if doubled(stem):
+            variants.append(stem[:-1])
+    if w.endswith("ing") and len(w) > 4:
+        stem = w[:-3]
+        variants.extend([stem, stem + "e"])
+        if doubled(stem):
+            variants.append(stem[:-1])
+    for suffix in ("est", "er"):
+        if w.endswith("i" + suffix) and len(w) > len(suffix) + 2:
+            variants.append(w[: -len(suffix) - 1] + "y")
+        elif w.endswith(suffix) and len(w) > len(suffix) + 2:
+            stem = w[: -len(suffix)]
+            variants.extend([stem, stem + "e"])
+            if doubled(stem):
+                variants.append(stem[:-1])
+            break
+
+    return list(dict.fromkeys(v for v in variants if len(v) >= 2 or v == variants[0]))
+
+
+def phrase_variants(tokens: list[Token]) -> list[str]:
+    """
+    n-gram 的候选短语原型：原样小写 + 首词替换为各个原型（如 "gave up" → "give up"）
+
+    Args:
+        tokens: 连续的词
+
+    Returns:
+        去重后的候选短语列表
+    """
+    rest = " ".join(t.text.lower() for t in tokens[1:])
+    return list(dict.fromkeys(f"{head} {rest}" for head in lemma_variants(tokens[0].text)))
+
+
+class CandidateResolver:
+    """segment 文本 → 预查询的 fine_unit 候选"""
+
+    def __init__(self, mcp: MCPTools, max_phrase_words: int = 4):
+        """
+        初始化
+
+        Args:
+            mcp: MCP 工具（提供批量查询）
+            max_phrase_words: 短语 n-gram 的最大词数
+        """
+        self.mcp = mcp
+        self.max_phrase_words = max_phrase_words
+
+    async def resolve(
+        self,
+        text: str,
+        kind: str,
+        lang: str = "en",
+        allowed_pos: Optional[set[str]] = None
+    ) -> list[dict]:
+        """
+        查询 segment 中所有可能的单词 / 短语的候选
+
+        Args:
+            text: segment 文本
+            kind: word_sense（单词原型）/ phrase_sense（2..max_phrase_words 的 n-gram）
+            lang: 语言代码
+            allowed_pos: 只保留这些词性（数据库缩写）的单词候选，None 表示不过滤
+
+        Returns:
+            按出现位置排列的列表 [{"text", "span": {"start", "end"}, "lemma", "candidates"}]，
+            只包含查到候选的词 / 短语
+        """
+        tokens = tokenize(text)
+        if kind == "word_sense":
+            spans = [[t] for t in tokens]
+        else:
+            spans = [
+                tokens[i:i + n]
+                for n in range(self.max_phrase_words, 1, -1)
+                for i in range(len(tokens) - n + 1)
+            ]
+
+        probes = [
+            (span, lemma_variants(span[0].text) if kind == "word_sense" else phrase_variants(span))
+            for span in spans
+        ]
+        found = await self.mcp.lookup_many(
+            kind, list({label for _, labels in probes for label in labels}), lang
+        )
+
+        resolved = []
+        for span, labels in probes:
+            for label in labels:
+                candidates = [
+                    c for c in found.get(label, [])
+                    if allowed_pos is None or c.get("pos") in allowed_pos
+                ]
+                if candidates:
+                    start, end = span[0].start, span[-1].end
+                    resolved.append({
+                        "text": text[start:end],
+                        "span": {"start": start, "end": end},
+                        "lemma": label,
+                        "candidates": candidates,
+                    })
+                    break  # 取第一个查到的原型（原词优先）
+
+        resolved.sort(key=lambda r: (r["span"]["start"], -r["span"]["end"]))
+        return resolved
+
+
+def render_candidates(resolved: list[dict]) -> str:
+    """
+    渲染为 prompt 中的候选列表
+
+    Args:
+        resolved: CandidateResolver.resolve 的结果
+
+    Returns:
+        多行文本（没有候选时返回"（无）"）
+    """
+    if not resolved:
+        return "（无）"
+
+    lines = []
+    for item in resolved:
+        span = item["span"]
+        lines.append(f"- \"{item['text']}\" span=[{span['start']}, {span['end']}) → \"{item['lemma']}\"")
+        for cand in item["candidates"]:
+            pos = f" ({cand['pos']})" if cand.get("pos") else ""
+            lines.append(f"    fine_id={cand['fine_id']}{pos}: {cand['definition']}")
+    return "\n".join(lines)
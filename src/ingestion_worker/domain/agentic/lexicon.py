@@ -0,0 +1,213 @@
+"""
+fine_unit 词库的进程内索引
+
+职责：
+- 加载 semantic.fine_unit 中 active 的 word_sense / phrase_sense 快照
+- 按 updated_at 水位增量刷新（新增、修改、下线的条目）
+- 为 MCPTools.query_fine_units 提供无数据库往返的查询
+
+对外接口：
+- FineUnitLexicon(db, refresh_seconds)
+- async ensure_fresh() -> None       # 首次全量加载，之后超过 refresh_seconds 才增量刷新
+- lookup(kind, label, lang, pos) -> list[dict]  # 候选（按 id 排序，最多 MAX_CANDIDATES 个）
+- contains(fine_id) -> bool
+- stats() -> dict
+
+设计：
+- 索引 key 为 (kind, lower(label), lang, pos)，短语的 pos 为 None；
+  另维护 (kind, lower(label), lang) → {pos} 以支持不带 pos 的单词查询
+- 只索引 active 条目，与 SQL 查询（LEXICON_ENABLED=false）的语义一致：
+  create_fine_unit 新建的 pending 条目（待人工审核）在任何进程中都不是候选，
+  审核通过（变为 active）后由增量刷新加入；同一 fine_unit 的重复创建由 create_fine_unit
+  按 external_key 查询数据库判断，不经过索引
+- 增量刷新的水位回退 REFRESH_OVERLAP_SECONDS，避免漏掉提交晚于水位的事务（重复应用是幂等的）
+- 单个事件循环内使用，不需要线程锁；刷新用 asyncio.Lock 防止并发的工具调用同时触发
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, gauge
+
+LEXICON_SIZE = gauge("fine_unit_lexicon_entries", "fine_unit rows held in the in-process lexicon index")
+LEXICON_REFRESH = counter("fine_unit_lexicon_refresh_total", "Lexicon snapshot loads and incremental refreshes")
+
+MAX_CANDIDATES = 50  # 与原 SQL 查询的 LIMIT 一致
+REFRESH_OVERLAP_SECONDS = 5
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+LexiconKey = tuple[str, str, str, Optional[str]]
+
+SNAPSHOT_SQL = """
+SELECT id, kind, label, lang, pos, def, updated_at
+FROM semantic.fine_unit
+WHERE kind IN ('word_sense', 'phrase_sense')
+  AND status = 'active'
+"""
+
+CHANGES_SQL = """
+SELECT id, kind, label, lang, pos, def, status, updated_at
+FROM semantic.fine_unit
+WHERE kind IN ('word_sense', 'phrase_sense')
+  AND updated_at > $1
+"""
+
+
+class FineUnitLexicon:
+    """fine_unit 进程内索引"""
+
+    def __init__(self, db: Database, refresh_seconds: int = 60):
+        """
+        初始化索引（不立即加载）
+
+        Args:
+            db: 数据库客户端
+            refresh_seconds: 增量刷新间隔（秒）
+        """
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self.logger = get_logger(__name__)
+
+        self._index: dict[LexiconKey, dict[int, dict]] = {}
+        self._pos_by_label: dict[tuple[str, str, str], set[Optional[str]]] = {}
+        self._key_by_id: dict[int, LexiconKey] = {}
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._refreshed_at is not None
+
+    @staticmethod
+    def _key(kind: str, label: str, lang: str, pos: Optional[str]) -> LexiconKey:
+        return kind, label.lower(), lang, pos if kind == "word_sense" else None
+
+    async def ensure_fresh(self) -> None:
+        """
+        确保索引可用：首次调用全量加载，之后超过 refresh_seconds 增量刷新
+
+        Raises:
+            DatabaseError: 首次加载失败（增量刷新失败只记录日志，继续使用旧快照）
+        """
+        if self.loaded and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+
+        async with self._lock:
+            if not self.loaded:
+                await self._load_snapshot()
+            elif time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+                try:
+                    await self._refresh()
+                except Exception as e:
+                    self._refreshed_at = time.monotonic()  # 下一个间隔再试，不要每次查询都打数据库
+                    self.logger.warning(f"⚠️ fine_unit 索引增量刷新失败，继续使用旧快照: {e}")
+
+    async def _load_snapshot(self) -> None:
+        """全量加载 active 的词 / 短语义项"""
+        start = time.monotonic()
+        rows = await self.db.fetch_all(SNAPSHOT_SQL)
+
+        self._index.clear()
+        self._pos_by_label.clear()
+        self._key_by_id.clear()
+        for row in rows:
+            self._put(row)
+            self._advance_watermark(row["updated_at"])
+
+        self._refreshed_at = time.monotonic()
+        LEXICON_REFRESH.inc(tags={"kind": "snapshot"})
+        LEXICON_SIZE.set(len(self._key_by_id))
+        self.logger.info(
+            f"✓ fine_unit 索引已加载: {len(self._key_by_id)} 条, "
+            f"耗时 {self._refreshed_at - start:.2f}s"
+        )
+
+    async def _refresh(self) -> None:
+        """按 updated_at 水位拉取变更：active 的写入索引，其余状态从索引移除"""
+        since = (self._watermark or EPOCH) - timedelta(seconds=REFRESH_OVERLAP_SECONDS)
+        rows = await self.db.fetch_all(CHANGES_SQL, since)
+
+        for row in rows:
+            if row["status"] == "active":
+                self._put(row)
+            else:
+                self._remove(row["id"])
+            self._advance_watermark(row["updated_at"])
+
+        self._refreshed_at = time.monotonic()
+        LEXICON_REFRESH.inc(tags={"kind": "incremental"})
+        LEXICON_SIZE.set(len(self._key_by_id))
+        if rows:
+            self.logger.info(f"📥 fine_unit 索引增量刷新: {len(rows)} 条变更")
+
+    def _advance_watermark(self, updated_at: Optional[datetime]) -> None:
+        if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def _put(self, row) -> None:
+        """写入一条（label / kind / pos 改变时先移除旧 key）"""
+        fine_id = row["id"]
+        key = self._key(row["kind"], row["label"], row["lang"], row["pos"])
+        if self._key_by_id.get(fine_id) != key:
+            self._remove(fine_id)
+
+        entry = {"fine_id": fine_id, "label": row["label"], "definition": row["def"]}
+        if row["kind"] == "word_sense":
+            entry["pos"] = row["pos"]
+        self._index.setdefault(key, {})[fine_id] = entry
+        self._pos_by_label.setdefault(key[:3], set()).add(key[3])
+        self._key_by_id[fine_id] = key
+
+    def _remove(self, fine_id: int) -> None:
+        key = self._key_by_id.pop(fine_id, None)
+        if key is None:
+            return
+        bucket = self._index.get(key, {})
+        bucket.pop(fine_id, None)
+        if not bucket:
+            self._index.pop(key, None)
+            pos_set = self._pos_by_label.get(key[:3], set())
+            pos_set.discard(key[3])
+            if not pos_set:
+                self._pos_by_label.pop(key[:3], None)
+
+    def lookup(self, kind: str, label: str, lang: str, pos: Optional[str] = None) -> list[dict]:
+        """
+        查询候选（语义与原 SQL 查询一致：label 不区分大小写，word_sense 可选按 pos 过滤）
+
+        Args:
+            kind: word_sense / phrase_sense
+            label: 词的原型或短语
+            lang: 语言代码
+            pos: 数据库中的词性缩写（仅 word_sense 使用，None 表示不过滤）
+
+        Returns:
+            候选列表（按 fine_id 排序，最多 MAX_CANDIDATES 个）
+        """
+        if kind == "word_sense" and pos is None:
+            label_key = (kind, label.lower(), lang)
+            buckets = [self._index[label_key + (p,)] for p in self._pos_by_label.get(label_key, ())]
+        else:
+            buckets = [self._index.get(self._key(kind, label, lang, pos), {})]
+
+        entries = sorted(
+            (entry for bucket in buckets for entry in bucket.values()),
+            key=lambda entry: entry["fine_id"],
+        )
+        return [dict(entry) for entry in entries[:MAX_CANDIDATES]]
+
+    def contains(self, fine_id: int) -> bool:
+        """fine_id 是否在索引中（即 active）"""
+        return fine_id in self._key_by_id
+
+    def stats(self) -> dict:
+        """索引规模与水位（用于 /health）"""
+        return {
+            "entries": len(self._key_by_id),
+            "keys": len(self._index),
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
@@ -5,18 +5,18 @@ MCP 工具定义和实现
 - 定义 query_fine_units 的 schema
 - 定义 create_fine_unit 的 schema
 - 给LLM提供能查询数据库表的工具，使用vertaxAI原生的FunctionDeclaration而非专门的 MCP Server
-- 实现数据库查询逻辑（单词、短语、语法）
+- 实现数据库查询逻辑（单词、短语、语法）；有进程内索引时直接查索引，不访问数据库
 - 实现创建 fine_unit 的业务逻辑（Gemini生成的条目）
 - 返回候选列表
 """
 from typing import Optional
 import hashlib
-import json
 from datetime import datetime
 
 from vertexai.generative_models import Tool, FunctionDeclaration
 
 from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.domain.agentic.lexicon import FineUnitLexicon
 from ingestion_worker.utils.logging import get_logger
 
 # POS 映射：完整名称 → 数据库单字符缩写
@@ -52,16 +52,18 @@ class MCPQueryResult:
 class MCPTools:
     """MCP 工具集"""
 
-    def __init__(self, db: Database, gemini_model: str):
+    def __init__(self, db: Database, gemini_model: str, lexicon: Optional[FineUnitLexicon] = None):
         """
         初始化 MCP 工具
 
         Args:
             db: 数据库客户端
             gemini_model: Gemini 模型名称（用于 external_key）
+            lexicon: fine_unit 进程内索引（None 表示每次查询都访问数据库）
         """
         self.db = db
         self.gemini_model = gemini_model
+        self.lexicon = lexicon
         self.logger = get_logger(__name__)
 
     @staticmethod
@@ -180,7 +182,10 @@ class MCPTools:
             "lang": lang
         }
 
-        if kind == "word_sense":
+        if kind in ("word_sense", "phrase_sense") and await self._lexicon_ready():
+            db_pos = POS_TO_DB.get(pos, pos) if pos and kind == "word_sense" else None
+            candidates = self.lexicon.lookup(kind, lemma, lang, db_pos)
+        elif kind == "word_sense":
             candidates = await self._query_word_senses(lemma, pos, lang)
         elif kind == "phrase_sense":
             candidates = await self._query_phrase_senses(lemma, lang)
@@ -195,6 +200,92 @@ class MCPTools:
             query_params=query_params
         )
 
+    async def lookup_many(self, kind: str, labels: list[str], lang: str = "en") -> dict[str, list[dict]]:
+        """
+        批量查询多个原型 / 短语的候选（候选注入模式使用）
+
+        Args:
+            kind: 类型（word_sense / phrase_sense）
+            labels: 小写的原型或短语
+            lang: 语言代码
+
+        Returns:
+            {label: 候选列表}（只包含查到候选的 label；候选格式与 query_fine_units 一致）
+        """
+        if not labels:
+            return {}
+
+        if await self._lexicon_ready():
+            found = {label: self.lexicon.lookup(kind, label, lang) for label in labels}
+            return {label: candidates for label, candidates in found.items() if candidates}
+
+        try:
+            rows = await self.db.fetch_all(
+                """
+                SELECT id, LOWER(label) AS key, label, pos, def
+                FROM semantic.fine_unit
+                WHERE kind = $1
+                  AND LOWER(label) = ANY($2::text[])
+                  AND lang = $3
+                  AND status = 'active'
+                ORDER BY id
+                """,
+                kind, labels, lang
+            )
+        except Exception as e:
+            self.logger.error(f"批量查询 fine_unit 失败: {e}")
+            return {}
+
+        found: dict[str, list[dict]] = {}
+        for row in rows:
+            candidate = {"fine_id": row["id"], "label": row["label"], "definition": row["def"]}
+            if kind == "word_sense":
+                candidate["pos"] = row["pos"]
+            found.setdefault(row["key"], []).append(candidate)
+        return found
+
+    async def active_fine_ids(self, fine_ids: set[int]) -> set[int]:
+        """
+        过滤出仍然有效的 fine_id（响应缓存命中后使用前检查）
+
+        Args:
+            fine_ids: 待检查的 fine_id
+
+        Returns:
+            仍然有效的 fine_id 子集（查询失败时为空集，调用方按失效处理）
+        """
+        if not fine_ids:
+            return set()
+
+        if await self._lexicon_ready():
+            return {fine_id for fine_id in fine_ids if self.lexicon.contains(fine_id)}
+
+        try:
+            rows = await self.db.fetch_all(
+                """
+                SELECT id
+                FROM semantic.fine_unit
+                WHERE id = ANY($1::bigint[])
+                  AND status = 'active'
+                """,
+                sorted(fine_ids)
+            )
+        except Exception as e:
+            self.logger.error(f"检查 fine_id 失败: {e}")
+            return set()
+        return {row["id"] for row in rows}
+
+    async def _lexicon_ready(self) -> bool:
+        """索引可用时返回 True（首次加载失败时退回数据库查询）"""
+        if self.lexicon is None:
+            return False
+        try:
+            await self.lexicon.ensure_fresh()
+            return True
+        except Exception as e:
+            self.logger.warning(f"⚠️ fine_unit 索引不可用，退回数据库查询: {e}")
+            return False
+
     async def _query_word_senses(
             self,
             lemma: str,
@@ -366,11 +457,12 @@ class MCPTools:
                 lang,
                 db_pos,  # 使用数据库缩写
                 definition,
-                json.dumps(meta),
+                meta,
                 "pending",  # 需要人工审核
                 external_key
             )
 
+            # pending 条目不加入索引（与 SQL 查询一致，审核通过后由增量刷新加入）
             self.logger.info(
                 f"💎 创建新 fine_unit: {lemma} (fine_id={row['id']}, status=pending, external_key={external_key})"
             )
@@ -5,6 +5,10 @@ Agentic Workflow 编排器
 - 创建 Cached Content
 - 并发处理 segments
 - 降级策略（多模态 → 纯文本）
+- 按标注器选择候选获取方式（Function Calling / 预查询注入）
+- 本地预过滤：没有可学习内容的 segment 跳过 Gemini（或只调用单词标注器）
+- 按 segment 文本缓存标注结果（命中时检查 fine_id 仍有效；多模态调用默认不使用缓存）
+- 本地规则标注（rule_fallback）：批量回填，或 Gemini 不可用时的降级
 - 聚合结果
 - 决定何时发送通知
 
@@ -16,7 +20,10 @@ Agentic Workflow 编排器
 - Annotators (Domain)
 """
 import asyncio
-from typing import Optional
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Collection, Optional
 
 from vertexai.preview.caching import CachedContent
 
@@ -25,10 +32,42 @@ from ingestion_worker.infrastructure.vertex import VertexClient, VertexError
 from ingestion_worker.infrastructure.database import Database
 from ingestion_worker.infrastructure.lark import LarkClient
 from ingestion_worker.domain.agentic.mcp_tools import MCPTools
+from ingestion_worker.domain.agentic.lexicon import FineUnitLexicon
+from ingestion_worker.domain.agentic.candidates import CandidateResolver, render_candidates
+from ingestion_worker.domain.agentic.windows import plan_windows, split_by_segment
+from ingestion_worker.domain.agentic.prefilter import PrefilterReport, SegmentPrefilter
+from ingestion_worker.domain.agentic.response_cache import ResponseCache
+from ingestion_worker.domain.agentic.rule_fallback import RuleBasedAnnotator
 from ingestion_worker.domain.agentic.annotators.base import BaseAnnotator
 from ingestion_worker.domain.agentic.annotators.word import WordAnnotator
 from ingestion_worker.domain.agentic.annotators.phrase import PhraseAnnotator
+from ingestion_worker.domain.agentic.annotators.combined import CombinedAnnotator
 from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, histogram
+from ingestion_worker.utils.tokens import estimate_tokens
+
+WINDOW_SIZE = histogram(
+    "annotation_window_segments", "Segments per windowed Gemini call", buckets=(1, 2, 3, 4, 6, 8, 12, 16)
+)
+WINDOW_OUTCOME = counter(
+    "annotation_window_segment_total", "Segments annotated in a window, by outcome (ok / retried alone)"
+)
+
+
+@dataclass(frozen=True)
+class VideoCaches:
+    """
+    一个视频的 CachedContent（按候选获取方式区分）
+
+    SDK 不允许 cached_content 与 tools / tool_config 同时传入请求：Function Calling 模式使用带 tools 的缓存，
+    候选注入模式使用不带 tools 的缓存（模型看不到工具，也就不需要 tool_config 禁止调用）。
+    """
+    tools: Optional[CachedContent] = None
+    injected: Optional[CachedContent] = None
+
+    def for_mode(self, candidate_mode: str) -> Optional[CachedContent]:
+        """候选获取方式对应的缓存（没有时为 None，按无缓存模式调用）"""
+        return self.injected if candidate_mode == "injected" else self.tools
 
 
 class AgenticOrchestrator:
@@ -75,18 +114,53 @@ class AgenticOrchestrator:
         self.config = config
         self.logger = get_logger(__name__)
 
-        # 初始化 MCP 工具
-        self.mcp = MCPTools(db, config.gemini_model)
+        # 初始化 MCP 工具（进程内只有一个编排器，索引随之在进程内共享）
+        lexicon = FineUnitLexicon(db, config.lexicon_refresh_seconds) if config.lexicon_enabled else None
+        self.mcp = MCPTools(db, config.gemini_model, lexicon=lexicon)
 
         # 初始化标注器
         self.word_annotator = WordAnnotator()
         self.phrase_annotator = PhraseAnnotator()
+        self.combined_annotator = CombinedAnnotator()
+
+        # 候选获取方式（tools / injected）
+        self.candidate_resolver = CandidateResolver(self.mcp)
+        self.candidate_modes = {
+            self.word_annotator.get_kind(): config.word_candidate_mode,
+            self.phrase_annotator.get_kind(): config.phrase_candidate_mode,
+        }
+
+        # 本地预过滤（off 表示所有 segment 都调用 Gemini）
+        self.prefilter = (
+            SegmentPrefilter(self.candidate_resolver, config.prefilter_mode, config.prefilter_min_hits)
+            if config.prefilter_mode != "off" else None
+        )
+
+        # 本地规则标注器（ANNOTATION_MODE=rule 或 AGENTIC_OUTAGE_FALLBACK=rule_fallback 时使用）
+        self.rule_annotator = RuleBasedAnnotator(self.candidate_resolver)
+
+        # 标注结果缓存（key 中的模板版本包含系统指令与标注规则的摘要，修改 prompt 后自动失效）
+        self.response_cache = (
+            ResponseCache(
+                config.response_cache_entries,
+                db if config.response_cache_persistent else None,
+                config.response_cache_max_age_seconds
+            )
+            if config.response_cache_enabled else None
+        )
+        self._template_versions = {
+            annotator.get_kind(): self._template_version(annotator)
+            for annotator in (self.word_annotator, self.phrase_annotator, self.combined_annotator)
+        }
 
     async def process_video(
         self,
         video_uid: str,
         video_uri: Optional[str],
-        segments: list[dict]
+        segments: list[dict],
+        on_segment_done: Optional[Callable[[int, list[dict], str, str], Awaitable[None]]] = None,
+        skip_segments: Optional[set[int]] = None,
+        annotation_mode: Optional[str] = None
     ) -> tuple[list[dict], str, str]:
         """
         处理整个视频（主入口）
@@ -95,12 +169,17 @@ class AgenticOrchestrator:
             video_uid: 视频唯一标识
             video_uri: GCS 视频 URI（或 None 表示纯文本模式）
             segments: WhisperX 的 segments 列表
+            on_segment_done: 每个 segment 完成后回调 (segment_index, annotations, method, ontology_ver)；
+                传入时 annotations 交给回调（如微批写入），不在内存中聚合
+            skip_segments: 跳过的 segment 索引（续跑时已写入的 segments）
+            annotation_mode: split（短语、单词分两次调用）/ combined（一次调用）/
+                rule（本地规则标注，不调用 Gemini），None 使用配置
 
         Returns:
             (annotations, method, ontology_ver) 元组
-            - annotations: 标注列表
-            - method: 使用的方法（'gemini_video' | 'gemini_text' | 'gemini_nocache'）
-            - ontology_ver: 本体版本
+            - annotations: 标注列表（传入 on_segment_done 时为空）
+            - method: 使用的方法（'gemini_video' | 'gemini_text' | 'gemini_nocache' | 'rule_fallback'）
+            - ontology_ver: 本体版本（Gemini 模型名；规则标注为 RuleBasedAnnotator.ONTOLOGY_VER）
 
         Raises:
             VertexError: Gemini API 完全不可用时
@@ -111,19 +190,39 @@ class AgenticOrchestrator:
             f"has_video={video_uri is not None}"
         )
 
-        # 1. 创建缓存内容（带降级）
-        cached_content, method = await self._create_cached_content_with_fallback(
-            video_uri, segments
-        )
-
-        # 2. 并发处理所有 segments
-        annotations = await self._process_segments_concurrent(
-            cached_content, segments, video_uid
+        # 1. 创建缓存内容（带降级；规则标注不需要）
+        annotation_mode = annotation_mode or self.config.annotation_mode
+        if annotation_mode == "rule":
+            caches, method = None, RuleBasedAnnotator.METHOD
+        else:
+            caches, method = await self._create_cached_content_with_fallback(
+                video_uri, segments,
+                {self._candidate_mode(annotator) for annotator in self._annotators(annotation_mode)}
+            )
+        # 本体版本：Gemini 标注使用当前模型名，规则标注使用规则版本
+        if method == RuleBasedAnnotator.METHOD:
+            ontology_ver = RuleBasedAnnotator.ONTOLOGY_VER
+        else:
+            ontology_ver = self.config.gemini_model
+        segment_done = (
+            (lambda idx, anns: on_segment_done(idx, anns, method, ontology_ver)) if on_segment_done else None
         )
 
-        # 3. 返回结果（使用当前 Gemini 模型版本作为 ontology_ver）
-        ontology_ver = self.config.gemini_model
+        # 2. 处理所有 segments（规则标注顺序处理，Gemini 并发处理）
+        if method == RuleBasedAnnotator.METHOD:
+            annotations = await self._process_segments_rule(
+                segments, video_uid, on_segment_done=segment_done, skip_segments=skip_segments
+            )
+        else:
+            annotations = await self._process_segments_concurrent(
+                caches, segments, video_uid,
+                on_segment_done=segment_done,
+                skip_segments=skip_segments,
+                annotation_mode=annotation_mode,
+                use_response_cache=method != "gemini_video" or self.config.response_cache_multimodal,
+            )
 
+        # 3. 返回结果
         self.logger.info(
             f"✓ 视频处理完成: {video_uid}, "
             f"annotations={len(annotations)}, "
@@ -136,31 +235,33 @@ class AgenticOrchestrator:
     async def _create_cached_content_with_fallback(
         self,
         video_uri: Optional[str],
-        segments: list[dict]
-    ) -> tuple[Optional[CachedContent], str]:
+        segments: list[dict],
+        candidate_modes: Collection[str] = ("tools",)
+    ) -> tuple[Optional[VideoCaches], str]:
         """
         创建缓存内容（带降级策略）
 
         降级顺序：
         1. 多模态缓存（视频 + 文本）
         2. 纯文本缓存（仅文本）
-        3. 无缓存模式
+        3. 无缓存模式（AGENTIC_OUTAGE_FALLBACK=rule_fallback 时改为本地规则标注）
 
         Args:
             video_uri: GCS 视频 URI（或 None）
             segments: Segments 列表
+            candidate_modes: 本次用到的候选获取方式（tools / injected），每种方式各创建一个缓存
 
         Returns:
-            (cached_content, method) 元组
+            (caches, method) 元组（无缓存模式和规则标注时 caches 为 None）
         """
         # 尝试 1: 多模态缓存
         if video_uri:
             try:
                 self.logger.info("尝试创建多模态缓存...")
-                cached_content = await self._create_cached_content(
-                    video_uri, segments, multimodal=True
+                caches = await self._create_video_caches(
+                    video_uri, segments, candidate_modes, multimodal=True
                 )
-                return cached_content, "gemini_video"
+                return caches, "gemini_video"
             except VertexError as e:
                 self.logger.warning(f"多模态缓存创建失败: {e}")
                 # 继续降级
@@ -168,23 +269,49 @@ class AgenticOrchestrator:
         # 尝试 2: 纯文本缓存
         try:
             self.logger.info("创建纯文本缓存...")
-            cached_content = await self._create_cached_content(
-                None, segments, multimodal=False
+            caches = await self._create_video_caches(
+                None, segments, candidate_modes, multimodal=False
             )
-            return cached_content, "gemini_text"
+            return caches, "gemini_text"
         except VertexError as e:
             self.logger.error(f"纯文本缓存也失败: {e}")
             # 继续降级
 
-        # 尝试 3: 无缓存模式
+        # 尝试 3: 无缓存模式；配置为 rule_fallback 时改用本地规则标注
+        # （两种缓存都失败时 Gemini 很可能不可用，逐个 segment 无缓存调用大概率也会失败）
+        if self.config.agentic_outage_fallback == RuleBasedAnnotator.METHOD:
+            self.logger.warning("降级到本地规则标注")
+            return None, RuleBasedAnnotator.METHOD
+
         self.logger.warning("降级到无缓存模式")
         return None, "gemini_nocache"
 
-    async def _create_cached_content(
+    async def _create_video_caches(
         self,
         video_uri: Optional[str],
         segments: list[dict],
+        candidate_modes: Collection[str],
         multimodal: bool
+    ) -> VideoCaches:
+        """
+        并发创建每种候选获取方式的缓存（任一失败视为这一级缓存失败，已创建的缓存随 TTL 过期）
+
+        Raises:
+            VertexError: 创建失败
+        """
+        modes = sorted(set(candidate_modes))
+        created = await asyncio.gather(*(
+            self._create_cached_content(video_uri, segments, multimodal, with_tools=mode != "injected")
+            for mode in modes
+        ))
+        return VideoCaches(**dict(zip(modes, created)))
+
+    async def _create_cached_content(
+        self,
+        video_uri: Optional[str],
+        segments: list[dict],
+        multimodal: bool,
+        with_tools: bool = True
     ) -> CachedContent:
         """
         创建缓存内容（包含视频、文本和tools）
@@ -193,6 +320,7 @@ class AgenticOrchestrator:
             video_uri: GCS 视频 URI（或 None）
             segments: Segments 列表
             multimodal: 是否多模态
+            with_tools: 是否包含工具定义（候选注入模式的缓存不包含）
 
         Returns:
             CachedContent 对象
@@ -206,8 +334,8 @@ class AgenticOrchestrator:
             for i, s in enumerate(segments)
         ])
 
-        # 获取工具定义（需要包含在缓存中）
-        tools = self.mcp.get_tool_definitions()
+        # 获取工具定义（Function Calling 模式需要包含在缓存中）
+        tools = self.mcp.get_tool_definitions() if with_tools else None
 
         # 创建缓存（包含 tools 和 system_instruction）
         return await self.vertex.create_cached_content(
@@ -220,75 +348,122 @@ class AgenticOrchestrator:
 
     async def _process_segments_concurrent(
         self,
-        cached_content: Optional[CachedContent],
+        caches: Optional[VideoCaches],
         segments: list[dict],
-        video_uid: str
+        video_uid: str,
+        on_segment_done: Optional[Callable[[int, list[dict]], Awaitable[None]]] = None,
+        skip_segments: Optional[set[int]] = None,
+        annotation_mode: str = "split",
+        use_response_cache: bool = True
     ) -> list[dict]:
         """
-        并发处理所有 segments
+        并发处理所有 segments（annotation_window_segments > 1 时连续的短 segment 合并为一次调用）
 
         Args:
-            cached_content: 缓存内容（或 None）
+            caches: 缓存内容（或 None）
             segments: Segments 列表
             video_uid: 视频 UID
+            on_segment_done: 每个 segment 完成后回调（回调异常会中止整个视频）
+            skip_segments: 跳过的 segment 索引
+            annotation_mode: split（先短语后单词两次调用）/ combined（合并标注器一次调用）
+            use_response_cache: 是否使用标注结果缓存（多模态调用默认不使用：画面会影响消歧与评分）
 
         Returns:
-            所有 annotations 的聚合列表
+            所有 annotations 的聚合列表（有回调时为空）
         """
+        # 每个视频同时进行中的窗口数（Gemini 请求的实际并发、RPM / TPM 由 VertexClient 的进程级 limiter 控制）
         semaphore = asyncio.Semaphore(self.config.gemini_max_concurrency)
+        skip_segments = skip_segments or set()
+        annotators = self._annotators(annotation_mode)
 
-        async def process_one(idx: int, segment: dict):
-            """处理单个 segment（先短语后单词）"""
+        async def process_unit(window: list[int]):
+            """处理一个窗口（单 segment 模式下窗口只有一个 segment），按顺序交给回调"""
             async with semaphore:
-                try:
-                    all_anns = []
-
-                    # 1. 处理短语
-                    phrase_anns = await self._process_segment(
-                        cached_content=cached_content,
-                        segment=segment,
-                        segment_index=idx,
-                        annotator=self.phrase_annotator,
-                        video_uid=video_uid
-                    )
-                    all_anns.extend(phrase_anns)
-
-                    # 2. 处理单词
-                    word_anns = await self._process_segment(
-                        cached_content=cached_content,
-                        segment=segment,
-                        segment_index=idx,
-                        annotator=self.word_annotator,
-                        video_uid=video_uid
-                    )
-                    all_anns.extend(word_anns)
-
-                    return all_anns
-
-                except Exception as e:
-                    self.logger.error(f"Segment {idx} 处理失败: {e}")
-
-                    # 发送错误通知
-                    await self.lark.send_error(
-                        error_type="Segment 处理失败",
-                        error_message=str(e),
-                        context={
-                            "视频 UID": video_uid,
-                            "Segment #": idx,
-                            "Segment 文本": segment.get("text", "")[:100]
-                        }
-                    )
+                results = await annotate_unit(window)
+                if on_segment_done is None:
+                    return [ann for idx in window for ann in results[idx]]
+                for idx in window:
+                    await on_segment_done(idx, results[idx])
+                return []
+
+        async def annotate_unit(window: list[int]) -> dict[int, list[dict]]:
+            """标注一个窗口（split 模式先短语后单词）"""
+            results = {idx: [] for idx in window}
+            try:
+                for annotator in annotators:
+                    targets = [idx for idx in window if annotator in plan[idx]]
+                    if not targets:
+                        continue
+                    if len(targets) == 1:
+                        idx = targets[0]
+                        anns = {idx: await self._process_segment(
+                            caches=caches,
+                            segment=segments[idx],
+                            segment_index=idx,
+                            annotator=annotator,
+                            video_uid=video_uid,
+                            use_cache=use_response_cache
+                        )}
+                    else:
+                        anns = await self._process_window(
+                            caches, [(idx, segments[idx]) for idx in targets], annotator, video_uid,
+                            use_cache=use_response_cache
+                        )
+                    for idx in targets:
+                        results[idx].extend(annotator.postprocess(anns[idx]))
+
+                return results
+
+            except Exception as e:
+                self.logger.error(f"Segment {window} 处理失败: {e}")
+
+                # 发送错误通知
+                await self.lark.send_error(
+                    error_type="Segment 处理失败",
+                    error_message=str(e),
+                    context={
+                        "视频 UID": video_uid,
+                        "Segment #": ", ".join(str(idx) for idx in window),
+                        "Segment 文本": segments[window[0]].get("text", "")[:100]
+                    }
+                )
 
-                    return []
+                return {idx: [] for idx in window}
+
+        # 本地预过滤：决定每个 segment 需要的标注器（没有可学习内容的 segment 不调用 Gemini）
+        pending = [idx for idx in range(len(segments)) if idx not in skip_segments]
+        plan = {idx: annotators for idx in pending}
+        if self.prefilter is not None:
+            plan = await self._prefilter_segments(segments, pending, annotators, video_uid)
+            for idx in pending:
+                if not plan[idx] and on_segment_done is not None:
+                    await on_segment_done(idx, [])
+            pending = [idx for idx in pending if plan[idx]]
+
+        # 切分窗口（跳过续跑前已完成的 segments）
+        if self.config.annotation_window_segments > 1:
+            windows = plan_windows(
+                segments, pending,
+                self.config.annotation_window_segments,
+                self.config.annotation_window_tokens
+            )
+            self.logger.info(f"窗口模式: {len(pending)} segments → {len(windows)} 个窗口")
+        else:
+            windows = [[idx] for idx in pending]
 
         # 创建所有任务
-        tasks = [
-            process_one(idx, seg)
-            for idx, seg in enumerate(segments)
-        ]
+        tasks = [asyncio.create_task(process_unit(window)) for window in windows]
+        if skip_segments:
+            self.logger.info(f"跳过已完成的 {len(segments) - len(pending)} 个 segments")
 
-        # 并发执行
-        results = await asyncio.gather(*tasks)
+        # 并发执行（回调失败时取消其余 segments）
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
 
         # 合并结果
         all_annotations = []
@@ -296,22 +471,170 @@ class AgenticOrchestrator:
             all_annotations.extend(batch)
 
         self.logger.info(
-            f"并发处理完成: {len(segments)} segments, "
+            f"并发处理完成: {len(pending)} segments, "
             f"{len(all_annotations)} annotations"
         )
 
         return all_annotations
 
+    async def _process_segments_rule(
+        self,
+        segments: list[dict],
+        video_uid: str,
+        on_segment_done: Optional[Callable[[int, list[dict]], Awaitable[None]]] = None,
+        skip_segments: Optional[set[int]] = None
+    ) -> list[dict]:
+        """
+        用本地规则标注所有 segments（不调用 Gemini）
+
+        只有 fine_unit 索引的查询，按顺序处理即可；输出与合并标注器的格式相同，
+        按合并标注器的规则验证与后处理。
+
+        Args:
+            segments: Segments 列表
+            video_uid: 视频 UID
+            on_segment_done: 每个 segment 完成后回调（回调异常会中止整个视频）
+            skip_segments: 跳过的 segment 索引
+
+        Returns:
+            所有 annotations 的聚合列表（有回调时为空）
+        """
+        skip_segments = skip_segments or set()
+        pending = [idx for idx in range(len(segments)) if idx not in skip_segments]
+        start = time.perf_counter()
+        all_annotations = []
+        total = 0
+
+        for idx in pending:
+            anns = await self.rule_annotator.annotate(segments[idx], idx)
+            anns = self.combined_annotator.postprocess(
+                self._validate_annotations(anns, self.combined_annotator, segments[idx], idx)
+            )
+            total += len(anns)
+            if on_segment_done is not None:
+                await on_segment_done(idx, anns)
+            else:
+                all_annotations.extend(anns)
+
+        self.logger.info(
+            f"规则标注完成: {video_uid}, {len(pending)} segments, "
+            f"{total} annotations, {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+
+        return all_annotations
+
+    async def _prefilter_segments(
+        self,
+        segments: list[dict],
+        pending: list[int],
+        annotators: tuple[BaseAnnotator, ...],
+        video_uid: str
+    ) -> dict[int, tuple[BaseAnnotator, ...]]:
+        """
+        预过滤待处理的 segments，并记录本视频跳过的 segment 数与估算节省的调用 / token
+
+        Args:
+            segments: 全部 segments
+            pending: 待处理的 segment 索引
+            annotators: 本次使用的标注器（split 模式为短语 + 单词，combined 模式为合并标注器）
+            video_uid: 视频 UID
+
+        Returns:
+            {segment_index: 需要调用的标注器}（空 tuple 表示跳过）
+        """
+        report = PrefilterReport()
+        plan = {}
+        for idx in pending:
+            decision = await self.prefilter.assess(segments[idx]["text"])
+            if decision.route == "skip":
+                needed = ()
+            elif decision.route == "word_only" and self.word_annotator in annotators:
+                needed = (self.word_annotator,)
+            else:
+                needed = annotators  # combined 模式下 word_only 仍需要合并标注器
+            saved = [annotator for annotator in annotators if annotator not in needed]
+            report.add(
+                decision.route,
+                saved_calls=len(saved),
+                saved_tokens=sum(
+                    estimate_tokens(
+                        self._task_instruction(segments[idx], idx, annotator)
+                        + annotator.build_prompt(segments[idx], idx)
+                    )
+                    for annotator in saved
+                )
+            )
+            plan[idx] = needed
+
+        summary = report.summary()
+        self.logger.info(
+            f"📊 预过滤 {video_uid}: full={summary['full']}, word_only={summary['word_only']}, "
+            f"skip={summary['skip']}, 估算节省 {summary['saved_calls']} 次调用 / "
+            f"~{summary['saved_prompt_tokens']} prompt tokens"
+        )
+        return plan
+
     async def _process_segment(
+        self,
+        caches: Optional[VideoCaches],
+        segment: dict,
+        segment_index: int,
+        annotator: BaseAnnotator,
+        video_uid: str,
+        use_cache: bool = True
+    ) -> list[dict]:
+        """
+        处理单个 segment（使用指定的标注器；先查标注结果缓存）
+
+        Args:
+            caches: 缓存内容（或 None）
+            segment: Segment 数据
+            segment_index: Segment 索引
+            annotator: 标注器实例
+            video_uid: 视频 UID
+            use_cache: 是否使用标注结果缓存
+
+        Returns:
+            该 segment 的 annotations 列表
+        """
+        cache_key = self._response_cache_key(annotator, segment) if use_cache else None
+        if cache_key is not None:
+            cached = await self._cached_annotations(cache_key, segment, segment_index, annotator)
+            if cached is not None:
+                return cached
+
+        candidate_mode = self._candidate_mode(annotator)
+        cached_content = caches.for_mode(candidate_mode) if caches else None
+        try:
+            if candidate_mode == "injected":
+                annotations, complete = await self._process_segment_injected(
+                    cached_content, segment, segment_index, annotator, video_uid
+                )
+            else:
+                annotations, complete = await self._process_segment_with_tools(
+                    cached_content, segment, segment_index, annotator, video_uid
+                )
+        except VertexError as e:
+            await self._handle_gemini_error(e, video_uid, segment_index, annotator)
+            return []
+
+        # 只缓存完整的结果：空响应（被拦截 / 截断）或丢弃了无效 annotation 的结果下次重新调用
+        if cache_key is not None and complete:
+            await self.response_cache.put(
+                cache_key, segment, annotations, self.config.gemini_model, annotator.get_kind()
+            )
+        return annotations
+
+    async def _process_segment_with_tools(
         self,
         cached_content: Optional[CachedContent],
         segment: dict,
         segment_index: int,
         annotator: BaseAnnotator,
         video_uid: str
-    ) -> list[dict]:
+    ) -> tuple[list[dict], bool]:
         """
-        处理单个 segment（使用指定的标注器）
+        Function Calling 模式：Gemini 调用 query_fine_units 获取候选
 
         Args:
             cached_content: 缓存内容（或 None）
@@ -321,18 +644,15 @@ class AgenticOrchestrator:
             video_uid: 视频 UID
 
         Returns:
-            该 segment 的 annotations 列表
+            (有效 annotations, 是否完整) 元组：响应有内容且全部 annotation 有效时才算完整（可以缓存）
+
+        Raises:
+            VertexError: Gemini 调用失败
         """
         # [修改] 移除了原有的 system_instruction 定义，现在已经在 Cache 里了
 
         # 构建具体的任务指令
-        task_instruction = f"""
-现在请处理 Segment #{segment_index}：
-时间: {segment['start']:.1f}s - {segment['end']:.1f}s
-文本: {segment['text']}
-
-请使用 **{annotator.get_kind()}** 模式进行分析。
-"""
+        task_instruction = self._task_instruction(segment, segment_index, annotator)
 
         # 构建完整 prompt（任务指令 + 标注器特定 Prompt）
         prompt = task_instruction + "\n\n" + annotator.build_prompt(segment, segment_index)
@@ -344,6 +664,50 @@ class AgenticOrchestrator:
         trace_id = f"[{video_uid}|Seg#{segment_index}|{annotator.get_kind()}]"
 
         # 创建 tool_handler（带通知逻辑和详细日志）
+        tool_handler_with_notification = self._build_tool_handler(video_uid, segment_index, segment)
+
+        # 调用 Gemini
+        response = await self.vertex.call_with_tools(
+            cached_content=cached_content,
+            prompt=prompt,
+            tools=tools,
+            tool_handler=tool_handler_with_notification,
+            # [新增] 仅当没有 Cache 时，手动传入 system_instruction
+            system_instruction=self.SYSTEM_INSTRUCTION if not cached_content else None,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": annotator.get_output_schema()
+            },
+            # [新增] 传入追踪上下文（仅用于日志，LLM看不到）
+            trace_context={
+                "video_uid": video_uid,
+                "segment_index": segment_index,
+                "segment_text": segment["text"],
+                "annotator_kind": annotator.get_kind()
+            }
+        )
+
+        annotations = response.get("annotations", [])
+        valid = self._validate_annotations(annotations, annotator, segment, segment_index)
+        return valid, not response.get("empty") and len(valid) == len(annotations)
+
+    def _build_tool_handler(
+        self,
+        video_uid: str,
+        segment_index: int,
+        segment: dict
+    ) -> Callable[[str, dict], Awaitable[dict]]:
+        """
+        创建 MCP 工具调用处理器（未找到候选时按 segment 发送通知）
+
+        Args:
+            video_uid: 视频 UID
+            segment_index: Segment 索引（窗口模式为窗口的第一个 segment）
+            segment: Segment 数据（窗口模式为拼接后的窗口）
+
+        Returns:
+            tool_handler(function_name, args) -> dict
+        """
         async def tool_handler_with_notification(function_name: str, args: dict) -> dict:
             """
             MCP 工具调用处理器（带通知逻辑）
@@ -433,65 +797,352 @@ class AgenticOrchestrator:
             else:
                 raise ValueError(f"Unknown function: {function_name}")
 
-        # 调用 Gemini
-        try:
-            response = await self.vertex.call_with_tools(
-                cached_content=cached_content,
-                prompt=prompt,
-                tools=tools,
-                tool_handler=tool_handler_with_notification,
-                # [新增] 仅当没有 Cache 时，手动传入 system_instruction
-                system_instruction=self.SYSTEM_INSTRUCTION if not cached_content else None,
-                generation_config={
-                    "response_mime_type": "application/json",
-                    "response_schema": annotator.get_output_schema()
-                },
-                # [新增] 传入追踪上下文（仅用于日志，LLM看不到）
-                trace_context={
-                    "video_uid": video_uid,
-                    "segment_index": segment_index,
-                    "segment_text": segment["text"],
-                    "annotator_kind": annotator.get_kind()
-                }
-            )
+        return tool_handler_with_notification
+
+    async def _process_segment_injected(
+        self,
+        cached_content: Optional[CachedContent],
+        segment: dict,
+        segment_index: int,
+        annotator: BaseAnnotator,
+        video_uid: str
+    ) -> tuple[list[dict], bool]:
+        """
+        候选注入模式：本地预查询候选并写入 prompt，Gemini 单次生成（不调用工具）
+
+        Args:
+            cached_content: 缓存内容（或 None）
+            segment: Segment 数据
+            segment_index: Segment 索引
+            annotator: 标注器实例
+            video_uid: 视频 UID
+
+        Returns:
+            (有效 annotations, 是否完整) 元组（fine_id 必须在注入的候选中）；
+            没有预查询到候选时不算完整（词库更新后可能有候选，不缓存）
+
+        Raises:
+            VertexError: Gemini 调用失败
+        """
+        kind = annotator.get_kind()
+        resolved = await self.candidate_resolver.resolve(
+            segment["text"],
+            kind,
+            allowed_pos=set(WordAnnotator.TARGET_POS) if kind == "word_sense" else None
+        )
+        if not resolved:
+            self.logger.debug(f"Segment {segment_index} ({kind}): 没有预查询到候选，跳过 Gemini")
+            return [], False
+
+        prompt = (
+            self._task_instruction(segment, segment_index, annotator)
+            + "\n\n"
+            + annotator.build_candidate_prompt(segment, segment_index, render_candidates(resolved))
+        )
+
+        response = await self.vertex.generate_json(
+            cached_content=cached_content,
+            prompt=prompt,
+            system_instruction=self.SYSTEM_INSTRUCTION if not cached_content else None,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": annotator.get_output_schema()
+            },
+            trace_context={
+                "video_uid": video_uid,
+                "segment_index": segment_index,
+                "segment_text": segment["text"],
+                "annotator_kind": kind,
+                "candidate_mode": "injected"
+            }
+        )
+
+        offered = {c["fine_id"] for item in resolved for c in item["candidates"]}
+        returned = response.get("annotations", [])
+        annotations = []
+        for ann in returned:
+            if ann.get("fine_id") in offered:
+                annotations.append(ann)
+            else:
+                self.logger.warning(f"Segment {segment_index} 的 fine_id 不在注入的候选中: {ann}")
+
+        valid = self._validate_annotations(annotations, annotator, segment, segment_index)
+        return valid, not response.get("empty") and len(valid) == len(returned)
+
+    async def _process_window(
+        self,
+        caches: Optional[VideoCaches],
+        window: list[tuple[int, dict]],
+        annotator: BaseAnnotator,
+        video_uid: str,
+        use_cache: bool = True
+    ) -> dict[int, list[dict]]:
+        """
+        窗口模式：一次调用标注多个连续 segment，按 segment_index 拆分后逐个验证
+
+        缓存命中的 segment 不进入调用；某个 segment 的任一 annotation 验证失败（或整个调用失败、
+        返回空响应）时，该 segment 单独重试。
 
-            annotations = response.get("annotations", [])
+        Args:
+            caches: 缓存内容（或 None）
+            window: [(segment_index, segment), ...]
+            annotator: 标注器实例
+            video_uid: 视频 UID
+            use_cache: 是否使用标注结果缓存
 
-            # 验证和过滤
-            valid_anns = []
-            for ann in annotations:
-                if annotator.validate_annotation(ann, segment):
-                    valid_anns.append(ann)
+        Returns:
+            {segment_index: 有效 annotations}
+        """
+        kind = annotator.get_kind()
+        cache_keys: dict[int, str] = {}
+        hits: dict[int, list[dict]] = {}
+        if use_cache and self.response_cache is not None:
+            for idx, segment in window:
+                key = self._response_cache_key(annotator, segment)
+                if key is None:
+                    continue
+                cached = await self._cached_annotations(key, segment, idx, annotator)
+                if cached is None:
+                    cache_keys[idx] = key
                 else:
-                    self.logger.warning(
-                        f"Segment {segment_index} 的 annotation 验证失败: {ann}"
+                    hits[idx] = cached
+            window = [(idx, segment) for idx, segment in window if idx not in hits]
+            if not window:
+                return hits
+
+        indices = [idx for idx, _ in window]
+        segments = dict(window)
+        candidate_mode = self._candidate_mode(annotator)
+        injected = candidate_mode == "injected"
+        cached_content = caches.for_mode(candidate_mode) if caches else None
+        WINDOW_SIZE.observe(len(window), {"annotator": kind})
+
+        trace_context = {
+            "video_uid": video_uid,
+            "segment_index": f"{indices[0]}-{indices[-1]}",
+            "segment_text": " / ".join(seg["text"] for _, seg in window),
+            "annotator_kind": kind,
+            "candidate_mode": "injected" if injected else "tools"
+        }
+        generation_config = {
+            "response_mime_type": "application/json",
+            "response_schema": annotator.get_output_schema()
+        }
+
+        offered: dict[int, set] = {}
+        try:
+            if injected:
+                candidates_text = {}
+                for idx, segment in window:
+                    resolved = await self.candidate_resolver.resolve(
+                        segment["text"],
+                        kind,
+                        allowed_pos=set(WordAnnotator.TARGET_POS) if kind == "word_sense" else None
                     )
+                    offered[idx] = {c["fine_id"] for item in resolved for c in item["candidates"]}
+                    candidates_text[idx] = render_candidates(resolved)
+                if not any(offered.values()):
+                    return {**hits, **{idx: [] for idx in indices}}
+
+                response = await self.vertex.generate_json(
+                    cached_content=cached_content,
+                    prompt=annotator.build_window_prompt(window, candidates_text),
+                    system_instruction=self.SYSTEM_INSTRUCTION if not cached_content else None,
+                    generation_config=generation_config,
+                    trace_context=trace_context
+                )
+            else:
+                # 未找到候选的通知以窗口为单位（第一个 segment 的索引 + 窗口文本）
+                window_segment = {
+                    "start": window[0][1]["start"],
+                    "end": window[-1][1]["end"],
+                    "text": trace_context["segment_text"]
+                }
+                response = await self.vertex.call_with_tools(
+                    cached_content=cached_content,
+                    prompt=annotator.build_window_prompt(window),
+                    tools=self.mcp.get_tool_definitions(),
+                    tool_handler=self._build_tool_handler(video_uid, indices[0], window_segment),
+                    system_instruction=self.SYSTEM_INSTRUCTION if not cached_content else None,
+                    generation_config=generation_config,
+                    trace_context=trace_context
+                )
+        except VertexError as e:
+            self.logger.warning(f"窗口 {indices} ({kind}) 调用失败，逐个重试: {e}")
+            WINDOW_OUTCOME.inc(len(window), {"annotator": kind, "outcome": "retried"})
+            return {**hits, **await self._retry_alone(caches, window, indices, annotator, video_uid, use_cache)}
+
+        if response.get("empty"):
+            # 整个窗口被拦截或截断：逐个重试（问题通常只出在其中一个 segment 或输出长度上）
+            self.logger.warning(f"窗口 {indices} ({kind}) 返回空响应，逐个重试")
+            WINDOW_OUTCOME.inc(len(window), {"annotator": kind, "outcome": "retried"})
+            return {**hits, **await self._retry_alone(caches, window, indices, annotator, video_uid, use_cache)}
+
+        by_segment, stray = split_by_segment(response.get("annotations", []), indices)
+        if stray:
+            self.logger.warning(f"窗口 {indices} ({kind}) 有 {len(stray)} 个 annotation 不属于窗口，已丢弃")
+
+        results, failed = {}, []
+        for idx in indices:
+            anns = by_segment[idx]
+            valid = [
+                ann for ann in anns
+                if annotator.validate_annotation(ann, segments[idx])
+                and (not injected or ann.get("fine_id") in offered.get(idx, set()))
+            ]
+            if len(valid) == len(anns):
+                results[idx] = valid
+            else:
+                self.logger.warning(
+                    f"Segment {idx} ({kind}) 在窗口中 {len(anns) - len(valid)} 个 annotation 无效，单独重试"
+                )
+                failed.append(idx)
+
+        WINDOW_OUTCOME.inc(len(indices) - len(failed), {"annotator": kind, "outcome": "ok"})
+        for idx, anns in results.items():
+            # 注入模式下没有预查询到候选的 segment 不缓存（与单 segment 模式一致）
+            if idx in cache_keys and (not injected or offered.get(idx)):
+                await self.response_cache.put(cache_keys[idx], segments[idx], anns, self.config.gemini_model, kind)
+        if failed:
+            WINDOW_OUTCOME.inc(len(failed), {"annotator": kind, "outcome": "retried"})
+            results.update(await self._retry_alone(caches, window, failed, annotator, video_uid, use_cache))
+        return {**hits, **results}
+
+    async def _retry_alone(
+        self,
+        caches: Optional[VideoCaches],
+        window: list[tuple[int, dict]],
+        indices: list[int],
+        annotator: BaseAnnotator,
+        video_uid: str,
+        use_cache: bool = True
+    ) -> dict[int, list[dict]]:
+        """窗口中失败的 segments 按单 segment 模式并发重试"""
+        segments = dict(window)
+        retried = await asyncio.gather(*(
+            self._process_segment(caches, segments[idx], idx, annotator, video_uid, use_cache)
+            for idx in indices
+        ))
+        return dict(zip(indices, retried))
+
+    def _annotators(self, annotation_mode: str) -> tuple[BaseAnnotator, ...]:
+        """标注方式使用的标注器（split 先短语后单词；combined 一次调用）"""
+        if annotation_mode == "combined":
+            return (self.combined_annotator,)
+        return (self.phrase_annotator, self.word_annotator)
+
+    def _candidate_mode(self, annotator: BaseAnnotator) -> str:
+        """标注器的候选获取方式（合并标注器只支持 Function Calling）"""
+        return self.candidate_modes.get(annotator.get_kind(), "tools")
+
+    def _template_version(self, annotator: BaseAnnotator) -> str:
+        """prompt 模板版本：PROMPT_VERSION + 候选获取方式 + 系统指令与标注规则的摘要"""
+        mode = self._candidate_mode(annotator)
+        template = self.SYSTEM_INSTRUCTION + annotator.build_guidelines(example_index=0, scope_rule="")
+        digest = hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+        return f"v{annotator.PROMPT_VERSION}:{mode}:{digest}"
+
+    def _response_cache_key(self, annotator: BaseAnnotator, segment: dict) -> Optional[str]:
+        """标注结果缓存 key（缓存关闭或文本不能规范化时为 None）"""
+        if self.response_cache is None:
+            return None
+        kind = annotator.get_kind()
+        return ResponseCache.key(self.config.gemini_model, kind, self._template_versions[kind], segment["text"])
+
+    async def _cached_annotations(
+        self,
+        key: str,
+        segment: dict,
+        segment_index: int,
+        annotator: BaseAnnotator
+    ) -> Optional[list[dict]]:
+        """
+        读取缓存的标注结果，并在使用前重新验证
 
-            self.logger.debug(
-                f"Segment {segment_index} ({annotator.get_kind()}): "
-                f"{len(valid_anns)}/{len(annotations)} annotations 有效"
-            )
+        引用的 fine_unit 已下线、或 annotation 不再通过标注器验证时，条目作废（按未命中处理）。
 
-            return valid_anns
+        Args:
+            key: 缓存 key
+            segment: 当前 segment
+            segment_index: 当前 segment 索引
+            annotator: 标注器实例
 
-        except VertexError as e:
-            self.logger.error(
-                f"Segment {segment_index} ({annotator.get_kind()}) "
-                f"Gemini 调用失败: {e}"
-            )
+        Returns:
+            有效的 annotations；未命中或已作废时为 None
+        """
+        kind = annotator.get_kind()
+        annotations = await self.response_cache.get(key, segment, segment_index, kind)
+        if annotations is None:
+            return None
+
+        fine_ids = {ann.get("fine_id") for ann in annotations}
+        active = await self.mcp.active_fine_ids(fine_ids)
+        if fine_ids - active or not all(annotator.validate_annotation(ann, segment) for ann in annotations):
+            self.logger.info(f"Segment {segment_index} ({kind}) 的缓存结果已失效，重新调用 Gemini")
+            await self.response_cache.invalidate(key, kind)
+            return None
+
+        self.logger.debug(f"Segment {segment_index} ({kind}): 命中标注结果缓存 ({len(annotations)} annotations)")
+        return annotations
+
+    @staticmethod
+    def _task_instruction(segment: dict, segment_index: int, annotator: BaseAnnotator) -> str:
+        """单个 segment 的任务指令（两种候选模式共用）"""
+        return f"""
+现在请处理 Segment #{segment_index}：
+时间: {segment['start']:.1f}s - {segment['end']:.1f}s
+文本: {segment['text']}
 
-            # 发送错误通知
-            await self.lark.send_error(
-                error_type="Gemini API 调用失败",
-                error_message=str(e),
-                context={
-                    "视频 UID": video_uid,
-                    "Segment #": segment_index,
-                    "标注器": annotator.get_kind()
-                }
-            )
+请使用 **{annotator.get_kind()}** 模式进行分析。
+"""
 
-            return []
+    def _validate_annotations(
+        self,
+        annotations: list[dict],
+        annotator: BaseAnnotator,
+        segment: dict,
+        segment_index: int
+    ) -> list[dict]:
+        """用标注器验证并过滤 annotations"""
+        valid_anns = []
+        for ann in annotations:
+            if annotator.validate_annotation(ann, segment):
+                valid_anns.append(ann)
+            else:
+                self.logger.warning(
+                    f"Segment {segment_index} 的 annotation 验证失败: {ann}"
+                )
+
+        self.logger.debug(
+            f"Segment {segment_index} ({annotator.get_kind()}): "
+            f"{len(valid_anns)}/{len(annotations)} annotations 有效"
+        )
+
+        return valid_anns
+
+    async def _handle_gemini_error(
+        self,
+        error: VertexError,
+        video_uid: str,
+        segment_index: int,
+        annotator: BaseAnnotator
+    ):
+        """记录 Gemini 调用失败并发送通知"""
+        self.logger.error(
+            f"Segment {segment_index} ({annotator.get_kind()}) "
+            f"Gemini 调用失败: {error}"
+        )
+
+        # 发送错误通知
+        await self.lark.send_error(
+            error_type="Gemini API 调用失败",
+            error_message=str(error),
+            context={
+                "视频 UID": video_uid,
+                "Segment #": segment_index,
+                "标注器": annotator.get_kind()
+            }
+        )
 
     async def _handle_not_found(
         self,
@@ -0,0 +1,109 @@
+"""
+本地预过滤：跳过没有可学习内容的 segment（不调用 Gemini）
+
+职责：
+- 去掉非语音标记（[laughs]、(music)、♪ ... ♪），分词、词形还原后在 fine_unit 索引中查找
+- 统计内容命中数（实词的 word_sense 候选 + n-gram 的 phrase_sense 候选，语气词 / 助动词不计）
+- 命中数低于阈值的 segment：跳过（skip 模式）或只交给单词标注器（word_only 模式）
+- 汇总每个视频跳过的 segment 数与估算节省的调用次数 / prompt token
+
+对外接口：
+- SegmentPrefilter(resolver, mode, min_hits)
+- async assess(text) -> PrefilterDecision
+- PrefilterReport.add(route, saved_calls, saved_tokens) / .summary()
+
+设计：
+- 复用候选注入模式的 CandidateResolver（有进程内索引时不访问数据库）
+- 只决定"哪些标注器需要调用"，不产生 annotation；被跳过的 segment 视为已完成（空结果）
+- 节省的 token 只按首轮 prompt 估算（不含缓存内容与工具轮次），是下限
+"""
+import re
+from dataclasses import dataclass, field
+
+from ingestion_worker.domain.agentic.candidates import CandidateResolver
+from ingestion_worker.domain.agentic.annotators.word import WordAnnotator
+from ingestion_worker.utils.metrics import counter
+
+PREFILTER_SEGMENTS = counter("prefilter_segments_total", "Segments routed by the local pre-filter (full / word_only / skip)")
+PREFILTER_SAVED_CALLS = counter("prefilter_saved_calls_total", "Annotator calls avoided by the local pre-filter")
+PREFILTER_SAVED_TOKENS = counter(
+    "prefilter_saved_prompt_tokens_total", "Estimated first-round prompt tokens avoided by the local pre-filter"
+)
+
+# 字幕中的非语音标记
+NON_SPEECH_RE = re.compile(r"\[[^\]]*\]|\([^)]*\)|♪[^♪]*♪?")
+
+# 词库中可能有条目、但不算可学习内容的词（语气词、应答词、助动词）
+FILLER_LEMMAS = frozenset({
+    "oh", "ah", "uh", "um", "hmm", "huh", "wow", "hey", "hi", "yeah", "yes", "no", "okay", "ok",
+    "well", "right", "so", "just", "really", "very", "be", "have", "do",
+})
+
+ROUTES = ("full", "word_only", "skip")
+
+
+@dataclass
+class PrefilterDecision:
+    """单个 segment 的预过滤结果"""
+    route: str  # full / word_only / skip
+    word_hits: int
+    phrase_hits: int
+
+
+@dataclass
+class PrefilterReport:
+    """单个视频的预过滤汇总"""
+    segments: dict[str, int] = field(default_factory=lambda: {route: 0 for route in ROUTES})
+    saved_calls: int = 0
+    saved_tokens: int = 0
+
+    def add(self, route: str, saved_calls: int = 0, saved_tokens: int = 0) -> None:
+        self.segments[route] += 1
+        self.saved_calls += saved_calls
+        self.saved_tokens += saved_tokens
+        PREFILTER_SEGMENTS.inc(tags={"route": route})
+        if saved_calls:
+            PREFILTER_SAVED_CALLS.inc(saved_calls)
+            PREFILTER_SAVED_TOKENS.inc(saved_tokens)
+
+    def summary(self) -> dict:
+        return {**self.segments, "saved_calls": self.saved_calls, "saved_prompt_tokens": self.saved_tokens}
+
+
+class SegmentPrefilter:
+    """按 fine_unit 索引命中数决定 segment 需要哪些标注器"""
+
+    def __init__(self, resolver: CandidateResolver, mode: str, min_hits: int = 1):
+        """
+        Args:
+            resolver: 候选预解析器
+            mode: 低于阈值的 segment 的处理方式：skip（不调用 Gemini）/ word_only（只调用单词标注器）
+            min_hits: 内容命中数阈值
+        """
+        self.resolver = resolver
+        self.mode = mode
+        self.min_hits = min_hits
+
+    async def assess(self, text: str, lang: str = "en") -> PrefilterDecision:
+        """
+        评估 segment 的可学习内容
+
+        Args:
+            text: segment 文本
+            lang: 语言代码
+
+        Returns:
+            PrefilterDecision（命中数达到阈值时 route 为 full）
+        """
+        speech = NON_SPEECH_RE.sub(lambda m: " " * len(m.group()), text)
+        words = await self.resolver.resolve(
+            speech, "word_sense", lang, allowed_pos=set(WordAnnotator.TARGET_POS)
+        )
+        word_hits = len({
+            (item["span"]["start"], item["span"]["end"])
+            for item in words if item["lemma"] not in FILLER_LEMMAS
+        })
+        phrase_hits = len(await self.resolver.resolve(speech, "phrase_sense", lang))
+
+        route = "full" if word_hits + phrase_hits >= self.min_hits else self.mode
+        return PrefilterDecision(route=route, word_hits=word_hits, phrase_hits=phrase_hits)
@@ -0,0 +1,257 @@
+"""
+Gemini 标注结果的内容寻址缓存（按 segment 文本）
+
+职责：
+- 按 (模型, 标注器, prompt 模板版本, 规范化的 segment 文本) 计算缓存 key
+- 进程内 LRU；可选的 Postgres 持久层（gemini_response_cache 表，多进程 / 重跑共享）
+- 条目超过 max_age_seconds 后不再使用；持久层中过期的条目在写入时顺带删除（每个进程最多每小时一次）
+- 命中率指标
+
+对外接口：
+- normalize_text(text) -> (normalized, leading_offset)
+- ResponseCache(max_entries, db=None, max_age_seconds=7 天)
+- ResponseCache.key(model, annotator_kind, template_version, text) -> str
+- async get(key, segment, segment_index, annotator_kind) -> list[dict] | None
+- async put(key, segment, annotations, model, annotator_kind) -> None
+- async invalidate(key, annotator_kind) -> None
+- async prune() -> int
+- stats() -> dict
+
+设计：
+- 只缓存完整的结果：响应有内容且每个 annotation 都通过验证（由调用方判断）；
+  空列表也缓存（"Okay." 之类的台词没有可标注的内容），被拦截 / 截断的空响应不缓存
+- 空列表无法通过 fine_id 检查发现过期（词库新增了可标注的词），依靠 max_age_seconds 限制使用时间
+- 规范化只做去首尾空白 + 小写（保持字符偏移不变），span 以去掉首部空白后的文本为基准保存，
+  命中时按当前文本的首部空白平移；小写会改变长度的文本（少数 Unicode 字符）不缓存
+- 缓存内容不含 segment_index，命中时按当前 segment 填入
+- fine_id 是否仍有效、annotation 是否通过验证由调用方（编排器）在使用前检查
+- 持久层读写失败只记录警告，不影响标注
+"""
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ingestion_worker.infrastructure.database import Database
+from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, gauge
+
+RESPONSE_CACHE = counter(
+    "gemini_response_cache_total", "Response cache lookups by annotator and outcome (hit / miss / stale) and tier"
+)
+RESPONSE_CACHE_SIZE = gauge("gemini_response_cache_entries", "Entries held in the in-process response cache")
+
+SELECT_SQL = """
+SELECT annotations FROM gemini_response_cache
+WHERE cache_key = $1 AND created_at > NOW() - make_interval(secs => $2)
+"""
+UPSERT_SQL = """
+INSERT INTO gemini_response_cache (cache_key, model, annotator, annotations)
+VALUES ($1, $2, $3, $4)
+ON CONFLICT (cache_key) DO UPDATE
+SET annotations = EXCLUDED.annotations, created_at = NOW()
+"""
+DELETE_SQL = "DELETE FROM gemini_response_cache WHERE cache_key = $1"
+PRUNE_SQL = "DELETE FROM gemini_response_cache WHERE created_at <= NOW() - make_interval(secs => $1)"
+
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def normalize_text(text: str) -> tuple[Optional[str], int]:
+    """
+    规范化 segment 文本（保持字符偏移）
+
+    Args:
+        text: segment 文本
+
+    Returns:
+        (规范化文本, 首部空白长度)；不能保持偏移时规范化文本为 None（不缓存）
+    """
+    stripped = text.strip()
+    normalized = stripped.lower()
+    if len(normalized) != len(stripped):
+        return None, 0
+    return normalized, len(text) - len(text.lstrip())
+
+
+def _shift_spans(annotations: list[dict], offset: int) -> list[dict]:
+    """复制 annotations 并平移 span"""
+    shifted = copy.deepcopy(annotations)
+    for ann in shifted:
+        span = ann.get("span")
+        if isinstance(span, dict):
+            span["start"] = span.get("start", 0) + offset
+            span["end"] = span.get("end", 0) + offset
+    return shifted
+
+
+class ResponseCache:
+    """Gemini 标注结果缓存（LRU + 可选 Postgres 持久层）"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        db: Optional[Database] = None,
+        max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS
+    ):
+        """
+        Args:
+            max_entries: 进程内 LRU 的条目上限
+            db: 持久层使用的数据库（None 表示只用进程内缓存）
+            max_age_seconds: 条目写入后可以使用的时间（秒）
+        """
+        self.max_entries = max_entries
+        self.db = db
+        self.max_age_seconds = max_age_seconds
+        # key -> (写入时间 monotonic, annotations)
+        self._entries: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self._pruned_at: Optional[float] = None
+        self.logger = get_logger(__name__)
+
+    @staticmethod
+    def key(model: str, annotator_kind: str, template_version: str, text: str) -> Optional[str]:
+        """
+        计算缓存 key
+
+        Args:
+            model: Gemini 模型名
+            annotator_kind: 标注器类型
+            template_version: prompt 模板版本（包含候选获取方式）
+            text: segment 原文
+
+        Returns:
+            sha256 十六进制 key；文本不能规范化时为 None
+        """
+        normalized, _ = normalize_text(text)
+        if normalized is None:
+            return None
+        raw = "\x1f".join((model, annotator_kind, template_version, normalized))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(
+        self,
+        key: str,
+        segment: dict,
+        segment_index: int,
+        annotator_kind: str
+    ) -> Optional[list[dict]]:
+        """
+        查询缓存（先内存后持久层，持久层命中后写回内存）
+
+        Args:
+            key: 缓存 key
+            segment: 当前 segment（用于平移 span）
+            segment_index: 当前 segment 索引
+            annotator_kind: 标注器类型（指标标签）
+
+        Returns:
+            annotations（已填入 segment_index、已平移 span）；未命中时为 None
+        """
+        annotations = None
+        tier = "memory"
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, annotations = entry
+            if time.monotonic() - stored_at < self.max_age_seconds:
+                self._entries.move_to_end(key)
+            else:
+                annotations = None
+                self._entries.pop(key)
+                RESPONSE_CACHE_SIZE.set(len(self._entries))
+        if annotations is None and self.db is not None:
+            tier = "postgres"
+            try:
+                row = await self.db.fetch_one(SELECT_SQL, key, self.max_age_seconds)
+            except Exception as e:
+                self.logger.warning(f"⚠️ 响应缓存持久层读取失败: {e}")
+                row = None
+            if row is not None:
+                annotations = row["annotations"]
+                # 持久层条目的剩余时间未知：按本进程读取的时间计时（最多多用 max_age_seconds）
+                self._remember(key, annotations)
+
+        if annotations is None:
+            RESPONSE_CACHE.inc(tags={"annotator": annotator_kind, "outcome": "miss", "tier": tier})
+            return None
+
+        RESPONSE_CACHE.inc(tags={"annotator": annotator_kind, "outcome": "hit", "tier": tier})
+        _, offset = normalize_text(segment["text"])
+        result = _shift_spans(annotations, offset)
+        for ann in result:
+            ann["segment_index"] = segment_index
+        return result
+
+    async def put(self, key: str, segment: dict, annotations: list[dict], model: str, annotator_kind: str) -> None:
+        """
+        写入缓存（span 转换为去掉首部空白后的偏移）
+
+        Args:
+            key: 缓存 key
+            segment: 产生这些 annotations 的 segment
+            annotations: 完整的结果（响应有内容且全部通过验证）
+            model: Gemini 模型名（持久层记录）
+            annotator_kind: 标注器类型（持久层记录）
+        """
+        _, offset = normalize_text(segment["text"])
+        stored = _shift_spans(annotations, -offset)
+        for ann in stored:
+            ann.pop("segment_index", None)
+        self._remember(key, stored)
+
+        if self.db is not None:
+            try:
+                await self.db.execute(UPSERT_SQL, key, model, annotator_kind, stored)
+            except Exception as e:
+                self.logger.warning(f"⚠️ 响应缓存持久层写入失败: {e}")
+            if self._pruned_at is None or time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+                await self.prune()
+
+    async def invalidate(self, key: str, annotator_kind: str) -> None:
+        """
+        删除失效的条目（引用的 fine_unit 已下线或不再通过验证）
+
+        Args:
+            key: 缓存 key
+            annotator_kind: 标注器类型（指标标签）
+        """
+        RESPONSE_CACHE.inc(tags={"annotator": annotator_kind, "outcome": "stale", "tier": "all"})
+        self._entries.pop(key, None)
+        RESPONSE_CACHE_SIZE.set(len(self._entries))
+        if self.db is not None:
+            try:
+                await self.db.execute(DELETE_SQL, key)
+            except Exception as e:
+                self.logger.warning(f"⚠️ 响应缓存持久层删除失败: {e}")
+
+    async def prune(self) -> int:
+        """
+        删除持久层中超过 max_age_seconds 的条目（失败只记录警告）
+
+        Returns:
+            删除的条目数
+        """
+        self._pruned_at = time.monotonic()  # 失败时也等到下一个间隔再试
+        if self.db is None:
+            return 0
+        try:
+            status = await self.db.execute(PRUNE_SQL, self.max_age_seconds)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 响应缓存持久层清理失败: {e}")
+            return 0
+        deleted = int(status.split()[-1]) if status else 0
+        if deleted:
+            self.logger.info(f"响应缓存持久层清理了 {deleted} 个过期条目")
+        return deleted
+
+    def _remember(self, key: str, annotations: list[dict]) -> None:
+        self._entries[key] = (time.monotonic(), annotations)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        RESPONSE_CACHE_SIZE.set(len(self._entries))
+
+    def stats(self) -> dict:
+        """缓存规模"""
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "persistent": self.db is not None}
@@ -0,0 +1,136 @@
+"""
+规则标注器（rule_fallback）：只用本地词库，不调用 Gemini
+
+职责：
+- 在 fine_unit 索引中匹配 segment 的短语 n-gram 与单词原型（复用候选注入模式的 CandidateResolver）
+- 按启发式选择义项：优先与词形推断的词性一致的候选，其次取 fine_id 最小的候选
+  （词库按义项顺序导入时即第一义项 / 最常用义项）
+- 输出与 Gemini 标注格式一致、可直接写入 occurrence 的 annotations（短语优先）
+
+用途：
+- Gemini 不可用时的降级（两种缓存都创建失败，AGENTIC_OUTAGE_FALLBACK=rule_fallback）
+- 批量回填（ANNOTATION_MODE=rule）
+- 基线：衡量 Gemini 消歧与评分带来的增益（scripts/eval_annotation_mode.py）
+
+对外接口：
+- RuleBasedAnnotator(resolver)
+- async annotate(segment, segment_index) -> list[dict]
+
+设计：
+- 确定性：同样的文本与词库总是得到同样的结果
+- 不评估画面与上下文：visual_comprehensibility 为 0，textual_comprehensibility 为中性分
+- 语气词 / 助动词（预过滤的 FILLER_LEMMAS）不标注
+"""
+from typing import Optional
+
+from ingestion_worker.domain.agentic.candidates import CandidateResolver
+from ingestion_worker.domain.agentic.annotators.combined import apply_phrase_precedence
+from ingestion_worker.domain.agentic.annotators.word import WordAnnotator
+from ingestion_worker.domain.agentic.prefilter import FILLER_LEMMAS
+
+TEXTUAL_SCORE = 0.5  # 规则方法不评估上下文，给中性分
+
+
+def guess_pos(surface: str, lemma: str) -> Optional[str]:
+    """
+    从词形推断词性（数据库缩写），推断不出时返回 None
+
+    Args:
+        surface: 原文中的词
+        lemma: 查到候选的原型
+
+    Returns:
+        'v' / 'r' / None
+    """
+    word = surface.lower()
+    if word != lemma and word.endswith(("ing", "ed")):
+        return "v"
+    if word == lemma and word.endswith("ly"):
+        return "r"
+    return None
+
+
+def pick_sense(candidates: list[dict], pos: Optional[str] = None) -> dict:
+    """
+    选择义项：优先词性一致的候选，其次第一个候选（候选按 fine_id 排序）
+
+    Args:
+        candidates: 候选列表（非空）
+        pos: 推断的词性（None 表示不限制）
+
+    Returns:
+        选中的候选
+    """
+    if pos is not None:
+        for candidate in candidates:
+            if candidate.get("pos") == pos:
+                return candidate
+    return candidates[0]
+
+
+class RuleBasedAnnotator:
+    """基于本地词库的确定性标注器"""
+
+    METHOD = "rule_fallback"
+    VERSION = 1  # 匹配 / 选义规则变化时递增
+    ONTOLOGY_VER = f"{METHOD}-v{VERSION}"  # 写入 occurrence.ontology_ver（没有 Gemini 模型参与）
+
+    def __init__(self, resolver: CandidateResolver):
+        """
+        Args:
+            resolver: 候选预解析器（有进程内索引时不访问数据库）
+        """
+        self.resolver = resolver
+
+    async def annotate(self, segment: dict, segment_index: int, lang: str = "en") -> list[dict]:
+        """
+        标注单个 segment
+
+        Args:
+            segment: Segment 数据
+            segment_index: Segment 索引
+            lang: 语言代码
+
+        Returns:
+            annotations（带 kind，按出现位置排列；短语内的单词不单独标注）
+        """
+        text = segment["text"]
+        annotations = []
+
+        # 短语：重叠时保留较长（其次较早）的短语
+        phrases = await self.resolver.resolve(text, "phrase_sense", lang)
+        taken: list[tuple[int, int]] = []
+        for item in sorted(phrases, key=lambda p: (p["span"]["start"] - p["span"]["end"], p["span"]["start"])):
+            start, end = item["span"]["start"], item["span"]["end"]
+            if any(start < t_end and t_start < end for t_start, t_end in taken):
+                continue
+            taken.append((start, end))
+            annotations.append(self._annotation(segment_index, "phrase_sense", item, pick_sense(item["candidates"])))
+
+        # 单词：实词（名词、动词、形容词、副词）
+        words = await self.resolver.resolve(
+            text, "word_sense", lang, allowed_pos=set(WordAnnotator.TARGET_POS)
+        )
+        for item in words:
+            if item["lemma"] in FILLER_LEMMAS:
+                continue
+            chosen = pick_sense(item["candidates"], guess_pos(item["text"], item["lemma"]))
+            annotations.append(self._annotation(segment_index, "word_sense", item, chosen))
+
+        annotations.sort(key=lambda ann: (ann["span"]["start"], -ann["span"]["end"]))
+        return apply_phrase_precedence(annotations)
+
+    @staticmethod
+    def _annotation(segment_index: int, kind: str, item: dict, chosen: dict) -> dict:
+        return {
+            "segment_index": segment_index,
+            "kind": kind,
+            "fine_id": chosen["fine_id"],
+            "span": dict(item["span"]),
+            "rationale": (
+                f"规则匹配：'{item['text']}' → {item['lemma']}"
+                f"（{len(item['candidates'])} 个候选中选择 fine_id={chosen['fine_id']}）"
+            ),
+            "visual_comprehensibility": 0.0,
+            "textual_comprehensibility": TEXTUAL_SCORE,
+        }
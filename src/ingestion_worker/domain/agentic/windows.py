@@ -0,0 +1,77 @@
+"""
+窗口模式：把连续的短 segment 合并为一次 Gemini 调用
+
+职责：
+- 按 segment 数与 token 预算（utils.tokens.estimate_tokens 估算）把待处理的 segments 切分为连续窗口
+- 按 segment_index 拆分窗口的输出
+
+对外接口：
+- plan_windows(segments, indices, max_segments, max_tokens) -> list[list[int]]
+- split_by_segment(annotations, window) -> (dict[int, list[dict]], list[dict])
+"""
+from typing import Iterable
+
+from ingestion_worker.utils.tokens import estimate_tokens
+
+
+def plan_windows(
+    segments: list[dict],
+    indices: Iterable[int],
+    max_segments: int,
+    max_tokens: int
+) -> list[list[int]]:
+    """
+    贪心切分窗口：窗口内的 segment 连续，数量不超过 max_segments，估算 token 不超过 max_tokens
+
+    超过 max_tokens 的单个 segment 单独成为一个窗口；索引不连续（如续跑时跳过的 segment）处断开。
+
+    Args:
+        segments: 全部 segments
+        indices: 待处理的 segment 索引（升序）
+        max_segments: 每个窗口的最大 segment 数
+        max_tokens: 每个窗口的 token 预算
+
+    Returns:
+        窗口列表（每个窗口为 segment 索引列表）
+    """
+    windows: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+
+    for idx in indices:
+        tokens = estimate_tokens(segments[idx]["text"])
+        if current and (
+            len(current) >= max_segments
+            or current_tokens + tokens > max_tokens
+            or idx != current[-1] + 1
+        ):
+            windows.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+
+    if current:
+        windows.append(current)
+    return windows
+
+
+def split_by_segment(annotations: list[dict], window: list[int]) -> tuple[dict[int, list[dict]], list[dict]]:
+    """
+    按 segment_index 拆分窗口输出
+
+    Args:
+        annotations: 窗口调用返回的 annotations
+        window: 窗口内的 segment 索引
+
+    Returns:
+        ({segment_index: annotations}, 不属于窗口的 annotations)
+    """
+    by_segment: dict[int, list[dict]] = {idx: [] for idx in window}
+    stray = []
+    for ann in annotations:
+        idx = ann.get("segment_index") if isinstance(ann, dict) else None
+        if isinstance(idx, int) and idx in by_segment:
+            by_segment[idx].append(ann)
+        else:
+            stray.append(ann)
+    return by_segment, stray
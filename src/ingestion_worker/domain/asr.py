@@ -9,6 +9,7 @@
     video_uid: str,
     input_object_name: str
   ) -> ASRResult  # {segments, asr_json_uri, vtt_uri}
+- async def load_result(asr_json_uri, vtt_uri) -> ASRResult  # 续跑时从 GCS 读取
 
 业务逻辑：
 - 生成 Signed GET URL（输入）
@@ -22,15 +23,16 @@
 
 import asyncio
 import json
-import aiohttp
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 from ingestion_worker.config import Config
 from ingestion_worker.infrastructure.gcs import GCSClient, GCSError
 from ingestion_worker.infrastructure.replicate import ReplicateClient, ReplicateError
+from ingestion_worker.domain.word_timings import WordTimings
 from ingestion_worker.types import ASRResult, Segment
 from ingestion_worker.errors import ASRError
 from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.retry import record_retry
 
 
 class ASRService:
@@ -58,7 +60,9 @@ class ASRService:
     async def run_whisperx(
         self,
         video_uid: str,
-        input_object_name: str
+        input_object_name: str,
+        resume_prediction_id: Optional[str] = None,
+        on_prediction_submitted: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> ASRResult:
         """
         运行 WhisperX ASR
@@ -73,6 +77,8 @@ class ASRService:
         Args:
             video_uid: 视频唯一标识
             input_object_name: 输入对象名称（相对于 RAW_BUCKET）
+            resume_prediction_id: 之前提交过的 prediction（续跑时重新挂接，不重复提交）
+            on_prediction_submitted: 新 prediction 提交后的回调（用于记录 checkpoint）
 
         Returns:
             ASRResult: ASR 结果（包含 segments 列表）
@@ -89,24 +95,33 @@ class ASRService:
                     f"ASR 尝试 {attempt}/{self.config.max_retries}: {video_uid}"
                 )
 
-                # 1. 生成输入 URL（GET）
-                audio_get_url = self.gcs.generate_signed_url(
-                    bucket=self.config.raw_bucket,
-                    object_name=input_object_name,
-                    method="GET",
-                    ttl_seconds=self.config.signed_url_ttl_seconds
-                )
-
-                self.logger.debug(f"已生成 Signed GET URL")
-
-                # 2. 提交 Replicate 任务（不传 PUT URLs）
-                prediction_id = await self.replicate.submit_whisperx(
-                    audio_url=audio_get_url,
-                    language="en",  # TODO: 支持语言检测
-                    align_output=self.config.whisperx_align_output
-                )
-
-                self.logger.info(f"WhisperX 任务已提交: {prediction_id}")
+                if resume_prediction_id:
+                    # 续跑：重新挂接到已提交的 prediction（只尝试一次）
+                    prediction_id = resume_prediction_id
+                    resume_prediction_id = None
+                    self.logger.info(f"重新挂接 WhisperX 任务: {prediction_id}")
+                else:
+                    # 1. 生成输入 URL（GET）
+                    audio_get_url = self.gcs.generate_signed_url(
+                        bucket=self.config.raw_bucket,
+                        object_name=input_object_name,
+                        method="GET",
+                        ttl_seconds=self.config.signed_url_ttl_seconds
+                    )
+
+                    self.logger.debug(f"已生成 Signed GET URL")
+
+                    # 2. 提交 Replicate 任务（不传 PUT URLs）
+                    prediction_id = await self.replicate.submit_whisperx(
+                        audio_url=audio_get_url,
+                        language="en",  # TODO: 支持语言检测
+                        align_output=self.config.whisperx_align_output
+                    )
+
+                    self.logger.info(f"WhisperX 任务已提交: {prediction_id}")
+
+                    if on_prediction_submitted:
+                        await on_prediction_submitted(prediction_id)
 
                 # 3. 等待完成（最多 30 分钟）
                 prediction = await self.replicate.wait_for_prediction(
@@ -159,6 +174,7 @@ class ASRService:
                 if attempt < self.config.max_retries:
                     backoff = self.config.retry_backoff_seconds * (2 ** (attempt - 1))
                     self.logger.info(f"等待 {backoff}s 后重试...")
+                    record_retry()
                     await asyncio.sleep(backoff)
                     continue
 
@@ -174,6 +190,34 @@ class ASRService:
         # 理论上不会到这里
         raise ASRError(f"Max retries exceeded: {self.config.max_retries}")
 
+    async def load_result(self, asr_json_uri: str, vtt_uri: Optional[str] = None) -> ASRResult:
+        """
+        从已上传的 WhisperX JSON 重建 ASRResult（续跑时跳过 Replicate）
+
+        Args:
+            asr_json_uri: ASR JSON 的 GCS URI
+            vtt_uri: VTT 字幕的 GCS URI
+
+        Returns:
+            ASRResult
+
+        Raises:
+            ASRError: 读取或解析失败
+        """
+        try:
+            output = await self.gcs.read_json(asr_json_uri)
+        except GCSError as e:
+            raise ASRError(f"Failed to load ASR output {asr_json_uri}: {e}")
+
+        segments = self._parse_segments(output)
+
+        return ASRResult(
+            segments=segments,
+            asr_json_uri=asr_json_uri,
+            vtt_uri=vtt_uri or asr_json_uri.rsplit("/", 1)[0] + "/subs.vtt",
+            duration_seconds=segments[-1].t_end if segments else 0.0
+        )
+
     async def _upload_json_to_gcs(self, uri: str, data: dict):
         """
         上传 JSON 到 GCS
@@ -185,41 +229,9 @@ class ASRService:
         Raises:
             GCSError: 上传失败
         """
-        try:
-            bucket, object_name = self.gcs.parse_uri(uri)
-
-            # 生成 PUT URL
-            put_url = self.gcs.generate_signed_url(
-                bucket=bucket,
-                object_name=object_name,
-                method="PUT",
-                ttl_seconds=300,  # 5 分钟足够
-                content_type="application/json"
-            )
-
-            # 上传
-            json_bytes = json.dumps(data, indent=2).encode('utf-8')
-
-            async with aiohttp.ClientSession() as session:
-                async with session.put(
-                    put_url,
-                    data=json_bytes,
-                    headers={"Content-Type": "application/json"}
-                ) as resp:
-                    if resp.status not in (200, 201):
-                        error_text = await resp.text()
-                        raise GCSError(
-                            f"上传 JSON 失败: HTTP {resp.status}, {error_text}"
-                        )
-
-            self.logger.info(f"✓ 已上传 JSON: {uri}")
-
-        except aiohttp.ClientError as e:
-            self.logger.error(f"上传 JSON 网络错误: {e}")
-            raise GCSError(f"Failed to upload JSON: {e}")
-        except Exception as e:
-            self.logger.error(f"上传 JSON 失败: {e}")
-            raise GCSError(f"Failed to upload JSON: {e}")
+        json_bytes = json.dumps(data, indent=2).encode('utf-8')
+        await self.gcs.upload_bytes(uri, json_bytes, content_type="application/json")
+        self.logger.info(f"✓ 已上传 JSON: {uri}")
 
     async def _upload_text_to_gcs(self, uri: str, content: str):
         """
@@ -232,39 +244,8 @@ class ASRService:
         Raises:
             GCSError: 上传失败
         """
-        try:
-            bucket, object_name = self.gcs.parse_uri(uri)
-
-            # 生成 PUT URL
-            put_url = self.gcs.generate_signed_url(
-                bucket=bucket,
-                object_name=object_name,
-                method="PUT",
-                ttl_seconds=300,
-                content_type="text/vtt"
-            )
-
-            # 上传
-            async with aiohttp.ClientSession() as session:
-                async with session.put(
-                    put_url,
-                    data=content.encode('utf-8'),
-                    headers={"Content-Type": "text/vtt"}
-                ) as resp:
-                    if resp.status not in (200, 201):
-                        error_text = await resp.text()
-                        raise GCSError(
-                            f"上传 VTT 失败: HTTP {resp.status}, {error_text}"
-                        )
-
-            self.logger.info(f"✓ 已上传 VTT: {uri}")
-
-        except aiohttp.ClientError as e:
-            self.logger.error(f"上传 VTT 网络错误: {e}")
-            raise GCSError(f"Failed to upload VTT: {e}")
-        except Exception as e:
-            self.logger.error(f"上传 VTT 失败: {e}")
-            raise GCSError(f"Failed to upload VTT: {e}")
+        await self.gcs.upload_bytes(uri, content.encode('utf-8'), content_type="text/vtt")
+        self.logger.info(f"✓ 已上传 VTT: {uri}")
 
     def _generate_vtt(self, segments: list) -> str:
         """
@@ -342,10 +323,10 @@ class ASRService:
                     lang=seg_data.get("language", "en"),
                     speaker=seg_data.get("speaker"),
                     meta={
-                        "words": seg_data.get("words", []),
-                        "chars": seg_data.get("chars", []),
                         "confidence": seg_data.get("confidence")
-                    }
+                    },
+                    # 逐词时间戳以列式保存（chars 不再保留，需要时从 asr.json 读取）
+                    word_timings=WordTimings.from_whisperx(seg_data.get("words", []))
                 )
                 segments.append(segment)
 
@@ -11,14 +11,22 @@
 
 对外接口：
 - save_video_analysis(video_id, segments, annotations, method, ontology_ver) -> dict
+- save_segments(video_id, segments) -> list[int]  # ASR 完成后立即写入（含逐词时间戳）
+- load_word_timings(segment_ids) -> dict[int, WordTimings]  # NumPy 数组，供播放 / 卡拉 OK 使用
+- load_video_word_timings(video_id) -> list[tuple[int, WordTimings]]
+- save_occurrences(segment_ids, annotations, method, ontology_ver) -> (inserted, skipped, inserted_fine_ids)
+- AnnotationStreamWriter  # Agentic 期间按数量/时间微批写入 occurrences
+- save_processing_stats(stats) -> None
+- get_stage_latency_percentiles(hours) -> list[dict]
 """
 
-import json
-from typing import Optional
-import asyncpg
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
 
 from ingestion_worker.infrastructure.database import Database, DatabaseError
-from ingestion_worker.types import Segment, Annotation
+from ingestion_worker.domain.word_timings import WordTimings
+from ingestion_worker.types import Segment, Annotation, ProcessingStats
 from ingestion_worker.utils.logging import get_logger
 
 
@@ -39,6 +47,7 @@ class PersistenceService:
         """
         self.db = db
         self.logger = get_logger(__name__)
+        self._bulk_insert_segments_sql_cache: Optional[str] = None
 
     async def save_video_analysis(
         self,
@@ -55,7 +64,7 @@ class PersistenceService:
             video_id: 视频 ID
             segments: Segment 列表（WhisperX 输出）
             annotations: Annotation 列表（Agentic 输出）
-            method: 方法标记（'gemini_video' | 'gemini_text' | 'gemini_nocache'）
+            method: 方法标记（'gemini_video' | 'gemini_text' | 'gemini_nocache' | 'rule_fallback'）
             ontology_ver: 本体版本（如 'gemini-2.0-20250110'）
 
         Returns:
@@ -78,9 +87,10 @@ class PersistenceService:
             async with self.db.transaction() as conn:
                 # 1. 批量插入 segments
                 segment_ids = await self._insert_segments(conn, video_id, segments)
+                await self._insert_word_timings(conn, segment_ids, segments)
 
                 # 2. 批量插入 occurrences
-                occ_inserted, occ_skipped = await self._insert_occurrences(
+                occ_inserted, occ_skipped, _ = await self._insert_occurrences(
                     conn, segment_ids, annotations, method, ontology_ver
                 )
 
@@ -105,6 +115,113 @@ class PersistenceService:
             self.logger.error(f"保存失败（未预期错误）: {e}")
             raise PersistenceError(f"Unexpected error: {e}") from e
 
+    async def save_segments(self, video_id: int, segments: list[dict]) -> list[int]:
+        """
+        写入 segments（ASR 完成后立即调用，不等待 Agentic）
+
+        Args:
+            video_id: 视频 ID
+            segments: Segment 列表
+
+        Returns:
+            segment_id 列表（顺序对应输入）
+
+        Raises:
+            PersistenceError: 写入失败
+        """
+        try:
+            async with self.db.transaction() as conn:
+                segment_ids = await self._insert_segments(conn, video_id, segments)
+                await self._insert_word_timings(conn, segment_ids, segments)
+            self.logger.info(f"✓ 已写入 {len(segment_ids)} segments (video_id={video_id})")
+            return segment_ids
+        except Exception as e:
+            self.logger.error(f"写入 segments 失败: {e}")
+            raise PersistenceError(f"Failed to save segments: {e}") from e
+
+    async def save_occurrences(
+        self,
+        segment_ids: list[int],
+        annotations: list[dict],
+        method: str,
+        ontology_ver: str
+    ) -> tuple[int, int, set[int]]:
+        """
+        写入一批 occurrences（短事务，供微批写入调用）
+
+        Args:
+            segment_ids: Segment ID 列表（annotation.segment_index 的索引对象）
+            annotations: Annotation 列表
+            method: 方法标记
+            ontology_ver: 本体版本
+
+        Returns:
+            (插入数量, 跳过数量, 实际插入的 fine_id 集合) 元组
+
+        Raises:
+            PersistenceError: 写入失败
+        """
+        try:
+            async with self.db.transaction() as conn:
+                return await self._insert_occurrences(
+                    conn, segment_ids, annotations, method, ontology_ver
+                )
+        except Exception as e:
+            self.logger.error(f"写入 occurrences 失败: {e}")
+            raise PersistenceError(f"Failed to save occurrences: {e}") from e
+
+    # 一条语句写入所有 segments：unnest 展开数组，WITH ORDINALITY 保留输入顺序。
+    # t_start 先转换为 segment.t_start 列的实际类型（{t_start_type}），批内去重与关联 RETURNING 的行
+    # 都使用存储后的值：精度不同（numeric / real）时舍入到同一值的 start 按同一行处理
+    BULK_INSERT_SEGMENTS_SQL = """
+        WITH input AS (
+            SELECT t_start::{t_start_type} AS t_start, t_end, text, lang, meta, ord
+            FROM unnest($2::float8[], $3::float8[], $4::text[], $5::text[], $6::jsonb[])
+                WITH ORDINALITY AS i(t_start, t_end, text, lang, meta, ord)
+        ),
+        deduped AS (
+            -- ON CONFLICT DO UPDATE 不能在一条语句中更新同一行两次：批内重复先合并，
+            -- 与逐行写入一致：lang / meta 取第一次出现，t_end 取最后一次
+            SELECT DISTINCT ON (t_start, text)
+                t_start, text, lang, meta, ord,
+                last_value(t_end) OVER (
+                    PARTITION BY t_start, text ORDER BY ord
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                ) AS t_end
+            FROM input
+            ORDER BY t_start, text, ord
+        ),
+        upserted AS (
+            INSERT INTO segment (video_id, t_start, t_end, text, lang, meta)
+            SELECT $1, t_start, t_end, text, lang, meta
+            FROM deduped
+            ORDER BY ord
+            ON CONFLICT (video_id, t_start, text)
+            DO UPDATE SET
+                t_end = EXCLUDED.t_end,
+                updated_at = NOW()
+            RETURNING id, t_start, text
+        )
+        SELECT input.ord, upserted.id
+        FROM input
+        JOIN upserted ON upserted.t_start = input.t_start AND upserted.text = input.text
+        ORDER BY input.ord
+    """
+
+    T_START_TYPE_SQL = """
+        SELECT format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = 'segment'::regclass
+          AND attname = 't_start'
+    """
+
+    async def _bulk_insert_segments_sql(self, conn) -> str:
+        """按 segment.t_start 的列类型生成批量写入语句（每个进程查询一次）"""
+        if self._bulk_insert_segments_sql_cache is None:
+            t_start_type = await conn.fetchval(self.T_START_TYPE_SQL)
+            self._bulk_insert_segments_sql_cache = self.BULK_INSERT_SEGMENTS_SQL.format(t_start_type=t_start_type)
+        return self._bulk_insert_segments_sql_cache
+
     async def _insert_segments(
         self,
         conn,
@@ -112,11 +229,12 @@ class PersistenceService:
         segments: list[dict]
     ) -> list[int]:
         """
-        批量插入 segments（去重）
+        批量插入 segments（去重，一次往返；首次调用另查询一次 t_start 的列类型）
 
         去重策略：基于 (video_id, t_start, text) 唯一约束
         - 如果已存在，更新 t_end（允许修正时间）
         - 返回所有 segment_id（包括已存在的）
+        - 同一批内重复的 (t_start, text) 在 SQL 中按存储精度合并（见 BULK_INSERT_SEGMENTS_SQL）
 
         Args:
             conn: 数据库连接（事务中）
@@ -125,39 +243,152 @@ class PersistenceService:
 
         Returns:
             segment_id 列表（顺序对应输入）
+
+        Raises:
+            PersistenceError: 返回的 id 数与输入不一致
         """
-        query = """
-            INSERT INTO segment (video_id, t_start, t_end, text, lang, meta)
-            VALUES ($1, $2, $3, $4, $5, $6)
-            ON CONFLICT (video_id, t_start, text)
-            DO UPDATE SET
-                t_end = EXCLUDED.t_end,
-                updated_at = NOW()
-            RETURNING id
+        if not segments:
+            return []
+
+        query = await self._bulk_insert_segments_sql(conn)
+        try:
+            records = await conn.fetch(
+                query,
+                video_id,
+                [float(seg["start"]) for seg in segments],
+                [float(seg["end"]) for seg in segments],
+                [seg["text"] for seg in segments],
+                [seg.get("lang", "en") for seg in segments],
+                [seg.get("meta", {}) for seg in segments],
+            )
+        except Exception as e:
+            self.logger.error(f"批量插入 segments 失败: {e} (video_id={video_id}, {len(segments)} 行)")
+            raise
+
+        if len(records) != len(segments):
+            raise PersistenceError(
+                f"Bulk segment insert returned {len(records)} ids for {len(segments)} segments"
+            )
+
+        segment_ids = [record["id"] for record in records]
+
+        self.logger.debug(f"插入 {len(segment_ids)} 个 segments（批量）")
+        return segment_ids
+
+    # 逐词时间戳写入旁表（与 segments 同一事务）
+    UPSERT_WORD_TIMINGS_SQL = """
+        INSERT INTO segment_word_timing (segment_id, word_count, tokens, starts, ends, scores)
+        SELECT segment_id, jsonb_array_length(tokens), tokens, starts, ends, scores
+        FROM unnest($1::bigint[], $2::jsonb[], $3::bytea[], $4::bytea[], $5::bytea[])
+            AS i(segment_id, tokens, starts, ends, scores)
+        ON CONFLICT (segment_id)
+        DO UPDATE SET
+            word_count = EXCLUDED.word_count,
+            tokens = EXCLUDED.tokens,
+            starts = EXCLUDED.starts,
+            ends = EXCLUDED.ends,
+            scores = EXCLUDED.scores,
+            updated_at = NOW()
+    """
+
+    async def _insert_word_timings(
+        self,
+        conn,
+        segment_ids: list[int],
+        segments: list[dict]
+    ) -> int:
         """
+        批量写入逐词时间戳（packed float32，一条语句）
 
-        segment_ids = []
+        Args:
+            conn: 数据库连接（事务中）
+            segment_ids: segment_id 列表（顺序对应 segments）
+            segments: Segment 列表（word_timings 为 WordTimings 或 None）
 
-        for seg in segments:
-            try:
-                result = await conn.fetchrow(
-                    query,
-                    video_id,
-                    seg["start"],  # t_start
-                    seg["end"],    # t_end
-                    seg["text"],
-                    seg.get("lang", "en"),
-                    json.dumps(seg.get("meta", {}))
-                )
+        Returns:
+            写入的行数
+        """
+        rows = {}
+        for segment_id, seg in zip(segment_ids, segments):
+            timings: Optional[WordTimings] = seg.get("word_timings")
+            # 批内重复的 segment 只写第一次出现的时间戳
+            if timings is not None and len(timings) and segment_id not in rows:
+                rows[segment_id] = (timings.tokens, *timings.pack())
 
-                segment_ids.append(result["id"])
+        if not rows:
+            return 0
 
-            except Exception as e:
-                self.logger.error(f"插入 segment 失败: {e}, segment: {seg}")
-                raise
+        columns = list(zip(*rows.values()))
+        await conn.execute(self.UPSERT_WORD_TIMINGS_SQL, list(rows), *map(list, columns))
 
-        self.logger.debug(f"插入 {len(segment_ids)} 个 segments")
-        return segment_ids
+        self.logger.debug(f"写入 {len(rows)} 个 segments 的逐词时间戳")
+        return len(rows)
+
+    async def load_word_timings(self, segment_ids: list[int]) -> dict[int, WordTimings]:
+        """
+        读取逐词时间戳
+
+        Args:
+            segment_ids: segment_id 列表
+
+        Returns:
+            segment_id → WordTimings（没有时间戳的 segment 不在结果中）
+        """
+        rows = await self.db.fetch_all(
+            """
+            SELECT segment_id, tokens, starts, ends, scores
+            FROM segment_word_timing
+            WHERE segment_id = ANY($1::bigint[])
+            """,
+            segment_ids
+        )
+        return {
+            row["segment_id"]: WordTimings.unpack(row["tokens"], row["starts"], row["ends"], row["scores"])
+            for row in rows
+        }
+
+    async def load_video_word_timings(self, video_id: int) -> list[tuple[int, WordTimings]]:
+        """
+        读取整个视频的逐词时间戳（按 segment 时间排序）
+
+        Args:
+            video_id: 视频 ID
+
+        Returns:
+            [(segment_id, WordTimings), ...]
+        """
+        rows = await self.db.fetch_all(
+            """
+            SELECT w.segment_id, w.tokens, w.starts, w.ends, w.scores
+            FROM segment_word_timing w
+            JOIN segment s ON s.id = w.segment_id
+            WHERE s.video_id = $1
+            ORDER BY s.t_start
+            """,
+            video_id
+        )
+        return [
+            (row["segment_id"], WordTimings.unpack(row["tokens"], row["starts"], row["ends"], row["scores"]))
+            for row in rows
+        ]
+
+    # fine_id 外键预检（一次查询，避免外键错误中断整个事务）
+    EXISTING_FINE_IDS_SQL = """
+        SELECT id FROM semantic.fine_unit WHERE id = ANY($1::bigint[])
+    """
+
+    # 一条语句写入所有 occurrences；冲突行不出现在 RETURNING 中
+    BULK_INSERT_OCCURRENCES_SQL = """
+        INSERT INTO occurrence (
+            segment_id, fine_id, reliability_score, detection_method, evidence, ontology_ver
+        )
+        SELECT segment_id, fine_id, score, $4, evidence, $5
+        FROM unnest($1::bigint[], $2::bigint[], $3::float8[], $6::jsonb[])
+            AS i(segment_id, fine_id, score, evidence)
+        ON CONFLICT (segment_id, fine_id, ((evidence->>'span')::jsonb))
+        DO NOTHING
+        RETURNING fine_id
+    """
 
     async def _insert_occurrences(
         self,
@@ -166,16 +397,16 @@ class PersistenceService:
         annotations: list[dict],
         method: str,
         ontology_ver: str
-    ) -> tuple[int, int]:
+    ) -> tuple[int, int, set[int]]:
         """
-        批量插入 occurrences（去重 + 忽略外键错误）
+        批量插入 occurrences（一次外键预检 + 一条 INSERT）
 
         去重策略：基于 (segment_id, fine_id, span) 唯一约束
-        - 如果已存在，跳过（DO NOTHING）
+        - 如果已存在，跳过（DO NOTHING），不计入插入数量
 
-        错误处理：
-        - 外键错误（fine_id 不存在）：跳过并记录警告
-        - 其他错误：抛出异常
+        无效输入在写入前过滤（计入跳过数量）：
+        - segment_index 越界
+        - fine_id 不存在于 semantic.fine_unit
 
         Args:
             conn: 数据库连接（事务中）
@@ -185,150 +416,72 @@ class PersistenceService:
             ontology_ver: 本体版本
 
         Returns:
-            (插入数量, 跳过数量) 元组
-        """
-        query = """
-            INSERT INTO occurrence (
-                segment_id, fine_id, reliability_score, detection_method, evidence, ontology_ver
-            )
-            VALUES ($1, $2, $3, $4, $5, $6)
-            ON CONFLICT (segment_id, fine_id, ((evidence->>'span')::jsonb))
-            DO NOTHING
+            (插入数量, 跳过数量, 实际插入的 fine_id 集合) 元组（跳过的与已存在的不计入）
         """
+        if not annotations:
+            return 0, 0, set()
 
-        inserted = 0
         skipped = 0
-        first_error = None  # Track the first error to identify root cause
-
-        for idx, ann in enumerate(annotations):
-            try:
-                # 获取对应的 segment_id
-                segment_index = ann.get("segment_index")
-                if segment_index is None or segment_index >= len(segment_ids):
-                    self.logger.warning(
-                        f"Invalid segment_index: {segment_index}, "
-                        f"max={len(segment_ids) - 1}"
-                    )
-                    skipped += 1
-                    continue
-
-                segment_id = segment_ids[segment_index]
-
-                # 构造 evidence（包含 span 和其他信息）
-                evidence = {
+        candidates = []
+        for ann in annotations:
+            segment_index = ann.get("segment_index")
+            if segment_index is None or not 0 <= segment_index < len(segment_ids):
+                self.logger.warning(
+                    f"Invalid segment_index: {segment_index}, "
+                    f"max={len(segment_ids) - 1}"
+                )
+                skipped += 1
+                continue
+            if ann.get("fine_id") is None:
+                self.logger.warning(f"Annotation 缺少 fine_id: {ann}")
+                skipped += 1
+                continue
+            candidates.append((segment_ids[segment_index], ann))
+
+        if not candidates:
+            return 0, skipped, set()
+
+        # 1. 外键预检：一次查询过滤不存在的 fine_id
+        fine_ids = sorted({ann["fine_id"] for _, ann in candidates})
+        existing = {
+            record["id"] for record in await conn.fetch(self.EXISTING_FINE_IDS_SQL, fine_ids)
+        }
+        missing = [fine_id for fine_id in fine_ids if fine_id not in existing]
+        if missing:
+            self.logger.warning(f"跳过无效的 fine_id（不存在于 fine_unit）: {missing}")
+
+        rows = [(segment_id, ann) for segment_id, ann in candidates if ann["fine_id"] in existing]
+        skipped += len(candidates) - len(rows)
+        if not rows:
+            return 0, skipped, set()
+
+        # 2. 一条语句写入（evidence 包含 span 和其他信息）
+        records = await conn.fetch(
+            self.BULK_INSERT_OCCURRENCES_SQL,
+            [segment_id for segment_id, _ in rows],
+            [ann["fine_id"] for _, ann in rows],
+            [ann.get("score", 0.5) for _, ann in rows],
+            method,
+            ontology_ver,
+            [
+                {
                     "span": ann.get("span", {}),
                     "rationale": ann.get("rationale", ""),
                     "visual_comprehensibility": ann.get("visual_comprehensibility"),
                     "textual_comprehensibility": ann.get("textual_comprehensibility")
                 }
-
-                # 插入
-                result = await conn.execute(
-                    query,
-                    segment_id,
-                    ann["fine_id"],
-                    ann.get("score", 0.5),
-                    method,
-                    json.dumps(evidence),
-                    ontology_ver
-                )
-
-                # 检查是否插入（INSERT 0 0 表示冲突跳过）
-                if "INSERT 0 1" in result:
-                    inserted += 1
-
-            except asyncpg.PostgresError as e:
-                # Capture detailed PostgreSQL error information
-                error_detail = {
-                    "annotation_index": idx,
-                    "segment_index": ann.get("segment_index"),
-                    "fine_id": ann.get("fine_id"),
-                    "error_code": e.sqlstate if hasattr(e, 'sqlstate') else None,
-                    "error_message": str(e),
-                    "constraint_name": e.constraint_name if hasattr(e, 'constraint_name') else None,
-                    "table_name": e.table_name if hasattr(e, 'table_name') else None,
-                    "column_name": e.column_name if hasattr(e, 'column_name') else None,
-                }
-
-                # Log the first error with full details
-                if first_error is None:
-                    first_error = error_detail
-                    self.logger.error(
-                        f"🔴 FIRST ERROR at annotation #{idx}:\n"
-                        f"  Error Code: {error_detail['error_code']}\n"
-                        f"  Message: {error_detail['error_message']}\n"
-                        f"  Constraint: {error_detail['constraint_name']}\n"
-                        f"  Table: {error_detail['table_name']}\n"
-                        f"  Column: {error_detail['column_name']}\n"
-                        f"  Segment Index: {error_detail['segment_index']}\n"
-                        f"  Fine ID: {error_detail['fine_id']}\n"
-                        f"  Annotation: {json.dumps(ann, indent=2)}"
-                    )
-                else:
-                    # Subsequent errors - log concisely
-                    self.logger.debug(
-                        f"Cascading error at annotation #{idx} "
-                        f"(transaction aborted): {error_detail['error_message'][:100]}"
-                    )
-
-                # Check if it's a foreign key error
-                if isinstance(e, asyncpg.ForeignKeyViolationError):
-                    self.logger.warning(
-                        f"跳过无效的 fine_id: {ann.get('fine_id')} "
-                        f"(违反外键约束: {error_detail['constraint_name']})"
-                    )
-                    skipped += 1
-                else:
-                    # Other database errors - don't swallow them if it's the first error
-                    if first_error == error_detail:
-                        # This is the root cause, raise it
-                        raise
-                    else:
-                        # This is a cascading error, skip it
-                        skipped += 1
-
-            except DatabaseError as e:
-                # Fallback for DatabaseError wrapper
-                if first_error is None:
-                    first_error = {"annotation_index": idx, "error": str(e)}
-                    self.logger.error(
-                        f"🔴 FIRST ERROR (DatabaseError) at annotation #{idx}:\n"
-                        f"  Message: {e}\n"
-                        f"  Annotation: {json.dumps(ann, indent=2)}"
-                    )
-
-                # Check if it's a foreign key error
-                if "foreign key" in str(e).lower() or "violates foreign key" in str(e).lower():
-                    self.logger.warning(
-                        f"跳过无效的 fine_id: {ann.get('fine_id')} "
-                        f"(可能已被删除或不存在)"
-                    )
-                    skipped += 1
-                else:
-                    # Other database errors
-                    if first_error.get("error") == str(e):
-                        raise
-                    else:
-                        skipped += 1
-
-            except Exception as e:
-                if first_error is None:
-                    first_error = {"annotation_index": idx, "error": str(e)}
-                    self.logger.error(
-                        f"🔴 FIRST ERROR (Unexpected) at annotation #{idx}:\n"
-                        f"  Type: {type(e).__name__}\n"
-                        f"  Message: {e}\n"
-                        f"  Annotation: {json.dumps(ann, indent=2)}"
-                    )
-                else:
-                    self.logger.debug(f"Cascading error at annotation #{idx}: {e}")
-                skipped += 1
+                for _, ann in rows
+            ],
+        )
+        inserted = len(records)
+        inserted_fine_ids = {record["fine_id"] for record in records}
 
         self.logger.debug(
-            f"插入 {inserted} 个 occurrences, 跳过 {skipped} 个"
+            f"插入 {inserted} 个 occurrences, 跳过 {skipped} 个, "
+            f"已存在 {len(rows) - inserted} 个"
         )
 
-        return inserted, skipped
+        return inserted, skipped, inserted_fine_ids
 
     async def update_video_status(
         self,
@@ -372,4 +525,277 @@ class PersistenceService:
 
         except DatabaseError as e:
             self.logger.error(f"更新视频状态失败: {e}")
-            raise PersistenceError(f"Failed to update video status: {e}") from e
\ No newline at end of file
+            raise PersistenceError(f"Failed to update video status: {e}") from e
+
+    async def save_processing_stats(self, stats: ProcessingStats) -> None:
+        """
+        写入单个 ingest job 的处理统计（每个 job 一行，重试覆盖为最近一次）
+
+        Args:
+            stats: 处理统计
+
+        Raises:
+            PersistenceError: 写入失败
+        """
+        query = """
+            INSERT INTO ingest_job_stats (
+                object_key, etag, video_uid, status, retry_count,
+                processing_time_seconds, asr_wall_seconds, transcoder_wall_seconds,
+                agentic_wall_seconds, persist_wall_seconds, video_duration_seconds,
+                segments_count, occurrences_count, fine_units_matched,
+                method, ontology_ver, stage_seconds, stage_retries, resumed_stages, error_message
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14,
+                    $15, $16, $17::jsonb, $18::jsonb, $19::jsonb, $20)
+            ON CONFLICT (object_key, etag) DO UPDATE SET
+                status = EXCLUDED.status,
+                retry_count = EXCLUDED.retry_count,
+                processing_time_seconds = EXCLUDED.processing_time_seconds,
+                asr_wall_seconds = EXCLUDED.asr_wall_seconds,
+                transcoder_wall_seconds = EXCLUDED.transcoder_wall_seconds,
+                agentic_wall_seconds = EXCLUDED.agentic_wall_seconds,
+                persist_wall_seconds = EXCLUDED.persist_wall_seconds,
+                video_duration_seconds = EXCLUDED.video_duration_seconds,
+                segments_count = EXCLUDED.segments_count,
+                occurrences_count = EXCLUDED.occurrences_count,
+                fine_units_matched = EXCLUDED.fine_units_matched,
+                method = EXCLUDED.method,
+                ontology_ver = EXCLUDED.ontology_ver,
+                stage_seconds = EXCLUDED.stage_seconds,
+                stage_retries = EXCLUDED.stage_retries,
+                resumed_stages = EXCLUDED.resumed_stages,
+                error_message = EXCLUDED.error_message,
+                recorded_at = NOW()
+        """
+
+        try:
+            await self.db.execute(
+                query,
+                stats.object_key,
+                stats.etag,
+                stats.video_uid,
+                stats.status,
+                stats.retry_count,
+                stats.processing_time_seconds,
+                stats.asr_wall_seconds,
+                stats.transcoder_wall_seconds,
+                stats.agentic_wall_seconds,
+                stats.persist_wall_seconds,
+                stats.video_duration_seconds,
+                stats.segments_count,
+                stats.occurrences_count,
+                stats.fine_units_matched,
+                stats.method,
+                stats.ontology_ver,
+                stats.stage_seconds,
+                stats.stage_retries,
+                stats.resumed_stages,
+                stats.error_message
+            )
+
+        except DatabaseError as e:
+            self.logger.error(f"写入处理统计失败: {e}")
+            raise PersistenceError(f"Failed to save processing stats: {e}") from e
+
+    async def get_stage_latency_percentiles(self, hours: int = 24) -> list[dict]:
+        """
+        最近 N 小时内每个 Stage 耗时的 p50 / p95 / p99（只统计实际运行的 Stage）
+
+        Args:
+            hours: 统计窗口（小时）
+
+        Returns:
+            [{stage, count, p50, p95, p99}, ...]，stage='total' 为整个 job 耗时
+        """
+        query = """
+            WITH samples AS (
+                SELECT s.key AS stage, s.value::float8 AS seconds
+                FROM ingest_job_stats j,
+                     jsonb_each_text(j.stage_seconds) AS s
+                WHERE j.recorded_at >= NOW() - make_interval(hours => $1)
+                UNION ALL
+                SELECT 'total', j.processing_time_seconds
+                FROM ingest_job_stats j
+                WHERE j.recorded_at >= NOW() - make_interval(hours => $1)
+                  AND j.status = 'done'
+            )
+            SELECT stage,
+                   COUNT(*) AS count,
+                   percentile_cont(0.50) WITHIN GROUP (ORDER BY seconds) AS p50,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY seconds) AS p95,
+                   percentile_cont(0.99) WITHIN GROUP (ORDER BY seconds) AS p99
+            FROM samples
+            GROUP BY stage
+            ORDER BY stage
+        """
+
+        try:
+            rows = await self.db.fetch_all(query, hours)
+            return [dict(row) for row in rows]
+
+        except DatabaseError as e:
+            self.logger.error(f"查询耗时分位数失败: {e}")
+            raise PersistenceError(f"Failed to query stage latency percentiles: {e}") from e
+
+
+class AnnotationStreamWriter:
+    """
+    Agentic 期间的 occurrence 微批写入器
+
+    每个 segment 标注完成后调用 add()；待写入的 annotations 达到 batch_size
+    或距上次写入超过 flush_interval 秒时写入一批（每批一个短事务），
+    处理中的视频在数据库中可见进度，失败时只丢失未写入的一批。
+    """
+
+    def __init__(
+        self,
+        persistence: PersistenceService,
+        segment_ids: list[int],
+        ontology_ver: str,
+        batch_size: int,
+        flush_interval: float,
+        on_flush: Optional[Callable[[list[int]], Awaitable[None]]] = None,
+    ):
+        """
+        初始化写入器
+
+        Args:
+            persistence: 持久化服务
+            segment_ids: 已写入的 segment_id 列表（annotation.segment_index 的索引对象）
+            ontology_ver: 本体版本（add() 传入时以 add() 为准）
+            batch_size: 累计多少个 annotation 写入一批
+            flush_interval: 最长多少秒写入一次
+            on_flush: 每批写入后回调，参数为至今已写入的 segment_index 列表（用于 checkpoint）
+        """
+        self.persistence = persistence
+        self.segment_ids = segment_ids
+        self.ontology_ver = ontology_ver
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.logger = get_logger(__name__)
+
+        self.method: Optional[str] = None
+        self._pending: list[dict] = []
+        self._pending_segments: list[int] = []
+        self._flushed_segments: set[int] = set()
+        self._fine_ids: set[int] = set()
+        self._lock = asyncio.Lock()
+        self._ticker: Optional[asyncio.Task] = None
+        self._stats = {
+            "occurrences_inserted": 0,
+            "occurrences_skipped": 0,
+            "batches": 0,
+            "flush_seconds": 0.0,
+        }
+
+    async def __aenter__(self) -> "AnnotationStreamWriter":
+        self._ticker = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._ticker.cancel()
+        await asyncio.gather(self._ticker, return_exceptions=True)
+        if exc_type is None:
+            await self.flush()
+        elif self._pending_segments:
+            # 失败或取消：已完成的 segments 尽量写入，重试时不用重新调用 Gemini
+            try:
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                self.logger.warning(f"失败后写入剩余 annotations 失败（忽略）: {e}")
+
+    async def add(
+        self,
+        segment_index: int,
+        annotations: list[dict],
+        method: str,
+        ontology_ver: Optional[str] = None
+    ) -> None:
+        """
+        加入一个 segment 的 annotations（segment 没有 annotation 也需要调用，用于记录进度）
+
+        Args:
+            segment_index: Segment 索引
+            annotations: 该 segment 的 annotations
+            method: 方法标记（'gemini_video' | 'gemini_text' | 'gemini_nocache' | 'rule_fallback'）
+            ontology_ver: 本体版本（None 表示沿用构造时的版本）
+
+        Raises:
+            PersistenceError: 达到批量阈值后写入失败
+        """
+        self.method = method
+        if ontology_ver is not None:
+            self.ontology_ver = ontology_ver
+        self._pending.extend(annotations)
+        self._pending_segments.append(segment_index)
+
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        写入所有待写入的 annotations
+
+        Raises:
+            PersistenceError: 写入失败（这一批保留在缓冲区，下次重试）
+        """
+        async with self._lock:
+            if not self._pending_segments:
+                return
+
+            batch, segments = self._pending, self._pending_segments
+            self._pending, self._pending_segments = [], []
+
+            start = time.perf_counter()
+            try:
+                if batch:
+                    inserted, skipped, fine_ids = await self.persistence.save_occurrences(
+                        self.segment_ids, batch, self.method, self.ontology_ver
+                    )
+                else:
+                    inserted, skipped, fine_ids = 0, 0, set()
+            except Exception:
+                self._pending = batch + self._pending
+                self._pending_segments = segments + self._pending_segments
+                raise
+            finally:
+                self._stats["flush_seconds"] += time.perf_counter() - start
+
+            self._stats["occurrences_inserted"] += inserted
+            self._stats["occurrences_skipped"] += skipped
+            self._stats["batches"] += 1
+            self._flushed_segments.update(segments)
+            self._fine_ids.update(fine_ids)
+
+            self.logger.info(
+                f"📥 已写入一批 occurrences: +{inserted} ({skipped} skipped), "
+                f"进度 {len(self._flushed_segments)}/{len(self.segment_ids)} segments"
+            )
+
+            if self.on_flush is not None:
+                await self.on_flush(sorted(self._flushed_segments))
+
+    def stats(self) -> dict:
+        """
+        写入统计
+
+        Returns:
+            {occurrences_inserted, occurrences_skipped, fine_units_matched,
+             segments_flushed, batches, flush_seconds}
+        """
+        return {
+            **self._stats,
+            "fine_units_matched": len(self._fine_ids),
+            "segments_flushed": len(self._flushed_segments),
+        }
+
+    async def _flush_periodically(self) -> None:
+        """按时间写入（segment 完成得慢时也能及时看到进度）"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                # 保留在缓冲区，下一次写入（或退出时）重试
+                self.logger.warning(f"定时写入 occurrences 失败，稍后重试: {e}")
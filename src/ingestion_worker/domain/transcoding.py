@@ -21,7 +21,7 @@
 """
 
 import asyncio
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 from ingestion_worker.config import Config
 from ingestion_worker.infrastructure.transcoder import TranscoderClient, TranscoderError
@@ -29,6 +29,7 @@ from ingestion_worker.infrastructure.gcs import GCSClient
 from ingestion_worker.types import TranscodeResult
 from ingestion_worker.errors import TranscodingError
 from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.retry import record_retry
 
 
 class TranscodingService:
@@ -56,7 +57,9 @@ class TranscodingService:
     async def transcode_video(
         self,
         video_uid: str,
-        input_object_name: str
+        input_object_name: str,
+        resume_job_name: Optional[str] = None,
+        on_job_created: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> TranscodeResult:
         """
         转码视频（MP4 → HLS）
@@ -64,6 +67,8 @@ class TranscodingService:
         Args:
             video_uid: 视频唯一标识
             input_object_name: 输入对象名称（相对于 RAW_BUCKET）
+            resume_job_name: 之前创建过的转码任务（续跑时重新挂接，不重复提交）
+            on_job_created: 新任务创建后的回调（用于记录 checkpoint）
 
         Returns:
             TranscodeResult: 转码结果
@@ -95,14 +100,23 @@ class TranscodingService:
                     f"转码尝试 {attempt}/{self.config.max_retries}: {video_uid}"
                 )
 
-                # 1. 创建转码任务
-                job_name = await self.transcoder.create_transcode_job(
-                    input_uri=input_uri,
-                    output_uri=output_uri,
-                    template_id=self.config.transcoder_template_id
-                )
+                if resume_job_name:
+                    # 续跑：重新挂接到已创建的任务（只尝试一次）
+                    job_name = resume_job_name
+                    resume_job_name = None
+                    self.logger.info(f"重新挂接转码任务: {job_name}")
+                else:
+                    # 1. 创建转码任务
+                    job_name = await self.transcoder.create_transcode_job(
+                        input_uri=input_uri,
+                        output_uri=output_uri,
+                        template_id=self.config.transcoder_template_id
+                    )
+
+                    self.logger.info(f"转码任务已创建: {job_name}")
 
-                self.logger.info(f"转码任务已创建: {job_name}")
+                    if on_job_created:
+                        await on_job_created(job_name)
 
                 # 2. 等待完成（最多 30 分钟）
                 job = await self.transcoder.wait_for_job(
@@ -130,6 +144,7 @@ class TranscodingService:
                 if attempt < self.config.max_retries:
                     backoff = self.config.retry_backoff_seconds * (2 ** (attempt - 1))
                     self.logger.info(f"等待 {backoff}s 后重试...")
+                    record_retry()
                     await asyncio.sleep(backoff)
                     continue
 
@@ -0,0 +1,111 @@
+"""
+WhisperX 逐词时间戳的紧凑表示
+
+职责：
+- 把 WhisperX 的 words 列表转换为列式数组（tokens + float32 start / end / score）
+- 打包为 bytes（写入 segment_word_timing 表的 BYTEA 列）与解包为 NumPy 数组
+
+对外接口：
+- WordTimings.from_whisperx(words) -> WordTimings
+- WordTimings.pack() -> (starts, ends, scores)  # little-endian float32 bytes
+- WordTimings.unpack(tokens, starts, ends, scores) -> WordTimings
+- WordTimings.word_at(t) -> int | None  # 播放 / 卡拉 OK 高亮：t 秒时正在读的词
+
+设计：
+- 未对齐的词（WhisperX 对数字、符号等可能不给时间戳）用 NaN 占位，保持与 tokens 一一对应
+- 每个词 12 字节（3 × float32）+ token 文本，而不是每个词一个 JSON 对象
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+DTYPE = np.dtype("<f4")
+
+
+@dataclass
+class WordTimings:
+    """一个 segment 的逐词时间戳（列式）"""
+    tokens: list[str]
+    starts: np.ndarray  # float32，秒
+    ends: np.ndarray  # float32，秒
+    scores: np.ndarray  # float32，对齐置信度
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @classmethod
+    def from_whisperx(cls, words: list[dict]) -> "WordTimings":
+        """
+        从 WhisperX segment 的 words 列表构建
+
+        Args:
+            words: [{"word": "Hello", "start": 0.5, "end": 0.8, "score": 0.97}, ...]
+
+        Returns:
+            WordTimings（缺失的时间戳 / 置信度为 NaN）
+        """
+        def column(key: str) -> np.ndarray:
+            return np.array(
+                [np.nan if w.get(key) is None else w[key] for w in words], dtype=DTYPE
+            )
+
+        return cls(
+            tokens=[w.get("word", "") for w in words],
+            starts=column("start"),
+            ends=column("end"),
+            scores=column("score"),
+        )
+
+    def pack(self) -> tuple[bytes, bytes, bytes]:
+        """
+        打包为 little-endian float32 bytes
+
+        Returns:
+            (starts, ends, scores)
+        """
+        return (
+            self.starts.astype(DTYPE, copy=False).tobytes(),
+            self.ends.astype(DTYPE, copy=False).tobytes(),
+            self.scores.astype(DTYPE, copy=False).tobytes(),
+        )
+
+    @classmethod
+    def unpack(cls, tokens: list[str], starts: bytes, ends: bytes, scores: bytes) -> "WordTimings":
+        """
+        从 pack() 的结果还原（数组为只读视图，不复制）
+
+        Args:
+            tokens: 词列表
+            starts: 开始时间 bytes
+            ends: 结束时间 bytes
+            scores: 置信度 bytes
+
+        Returns:
+            WordTimings
+        """
+        return cls(
+            tokens=list(tokens),
+            starts=np.frombuffer(starts, dtype=DTYPE),
+            ends=np.frombuffer(ends, dtype=DTYPE),
+            scores=np.frombuffer(scores, dtype=DTYPE),
+        )
+
+    def word_at(self, t: float) -> Optional[int]:
+        """
+        查找 t 秒时正在读的词（用于播放高亮）
+
+        Args:
+            t: 时间（秒，与 segment 时间同一时间轴）
+
+        Returns:
+            词索引；t 落在词与词之间或没有时间戳时返回 None
+        """
+        aligned = np.flatnonzero(~np.isnan(self.starts))
+        position = int(np.searchsorted(self.starts[aligned], t, side="right")) - 1
+        if position < 0:
+            return None
+        index = int(aligned[position])
+        if not t <= self.ends[index]:  # 结束时间为 NaN 时同样返回 None
+            return None
+        return index
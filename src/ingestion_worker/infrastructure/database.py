@@ -16,11 +16,24 @@
 - 使用 asyncpg.Pool（在 __main__.py 初始化时创建）
 - 避免 ORM（保持轻量）
 """
+import time
 import asyncpg
 from typing import Any, Optional, AsyncContextManager
 from contextlib import asynccontextmanager
 
 from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import histogram, counter
+from ingestion_worker.utils.json_codec import register_json_codecs
+
+DB_POOL_WAIT = histogram("db_pool_wait_seconds", "Time spent waiting to acquire a pooled connection")
+DB_STATEMENT = histogram("db_statement_seconds", "Database statement latency")
+DB_ERRORS = counter("db_errors_total", "Database statements that raised")
+
+
+def _statement_kind(query: str) -> str:
+    """SQL 语句类型（INSERT / UPDATE / SELECT / WITH ...），作为低基数的指标标签"""
+    parts = query.split(None, 1)
+    return parts[0].upper() if parts else "UNKNOWN"
 
 
 class DatabaseError(Exception):
@@ -62,6 +75,7 @@ class Database:
                 min_size=1,
                 max_size=self.pool_size,
                 command_timeout=60,  # 命令超时 60 秒
+                init=register_json_codecs,  # json / jsonb 直接收发 dict（orjson）
             )
             self.logger.info("✓ 数据库连接池创建成功")
         except Exception as e:
@@ -84,6 +98,14 @@ class Database:
             raise DatabaseError("Database pool not initialized. Call connect() first.")
         return self.pool
 
+    @asynccontextmanager
+    async def _acquire(self, pool: asyncpg.Pool):
+        """从连接池获取连接（记录等待时间）"""
+        start = time.perf_counter()
+        async with pool.acquire() as conn:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+            yield conn
+
     async def execute(self, query: str, *args: Any) -> str:
         """
         执行 INSERT/UPDATE/DELETE 语句
@@ -101,16 +123,20 @@ class Database:
         pool = self._ensure_pool()
 
         try:
-            async with pool.acquire() as conn:
-                result = await conn.execute(query, *args)
+            async with self._acquire(pool) as conn:
+                with DB_STATEMENT.time({"op": "execute", "kind": _statement_kind(query)}):
+                    result = await conn.execute(query, *args)
                 return result
         except asyncpg.UniqueViolationError as e:
+            DB_ERRORS.inc(tags={"op": "execute"})
             self.logger.warning(f"唯一约束冲突: {e}")
             raise DatabaseError(f"Unique constraint violation: {e}") from e
         except asyncpg.ForeignKeyViolationError as e:
+            DB_ERRORS.inc(tags={"op": "execute"})
             self.logger.warning(f"外键约束冲突: {e}")
             raise DatabaseError(f"Foreign key violation: {e}") from e
         except asyncpg.PostgresError as e:
+            DB_ERRORS.inc(tags={"op": "execute"})
             self.logger.error(f"数据库错误: {e}")
             raise DatabaseError(f"Database error: {e}") from e
         except Exception as e:
@@ -134,10 +160,12 @@ class Database:
         pool = self._ensure_pool()
 
         try:
-            async with pool.acquire() as conn:
-                result = await conn.fetchrow(query, *args)
+            async with self._acquire(pool) as conn:
+                with DB_STATEMENT.time({"op": "fetch_one", "kind": _statement_kind(query)}):
+                    result = await conn.fetchrow(query, *args)
                 return result
         except asyncpg.PostgresError as e:
+            DB_ERRORS.inc(tags={"op": "fetch_one"})
             self.logger.error(f"查询错误: {e}")
             raise DatabaseError(f"Query error: {e}") from e
         except Exception as e:
@@ -161,10 +189,12 @@ class Database:
         pool = self._ensure_pool()
 
         try:
-            async with pool.acquire() as conn:
-                results = await conn.fetch(query, *args)
+            async with self._acquire(pool) as conn:
+                with DB_STATEMENT.time({"op": "fetch_all", "kind": _statement_kind(query)}):
+                    results = await conn.fetch(query, *args)
                 return results
         except asyncpg.PostgresError as e:
+            DB_ERRORS.inc(tags={"op": "fetch_all"})
             self.logger.error(f"查询错误: {e}")
             raise DatabaseError(f"Query error: {e}") from e
         except Exception as e:
@@ -190,10 +220,12 @@ class Database:
         """
         pool = self._ensure_pool()
 
-        async with pool.acquire() as conn:
+        async with self._acquire(pool) as conn:
             async with conn.transaction():
                 try:
-                    yield conn
+                    with DB_STATEMENT.time({"op": "transaction", "kind": "TRANSACTION"}):
+                        yield conn
                 except Exception as e:
+                    DB_ERRORS.inc(tags={"op": "transaction"})
                     self.logger.error(f"事务回滚: {e}")
                     raise DatabaseError(f"Transaction failed: {e}") from e
\ No newline at end of file
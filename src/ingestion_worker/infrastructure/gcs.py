@@ -10,11 +10,12 @@
 - generate_signed_url(bucket, object_name, method, ttl, content_type) -> str
 - read_text(uri: str) -> str
 - read_json(uri: str) -> dict
+- upload_bytes(uri, data, content_type) -> None
 - exists(uri: str) -> bool
 
 注意：
 - google-cloud-storage 是同步库，但生成签名 URL 很快，可在 async 函数中直接调用
-- 读取大文件时用 aiohttp 读 Signed URL 更好（避免阻塞）
+- 读写对象内容用 aiohttp 访问 Signed URL（避免阻塞），复用共享 HTTP 连接池
 """
 import json
 from datetime import timedelta
@@ -23,6 +24,7 @@ from google.cloud import storage
 import aiohttp
 
 from ingestion_worker.config import Config
+from ingestion_worker.infrastructure.http import HttpClient
 from ingestion_worker.utils.logging import get_logger
 
 
@@ -34,14 +36,16 @@ class GCSError(Exception):
 class GCSClient:
     """Google Cloud Storage 客户端"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, http: Optional[HttpClient] = None):
         """
         初始化 GCS 客户端
 
         Args:
             config: 系统配置
+            http: 共享 HTTP 连接池（未传入时自建，由本客户端独占）
         """
         self.config = config
+        self.http = http or HttpClient(config)
         self.logger = get_logger(__name__)
 
         # 创建同步客户端（用于生成签名 URL，操作很快不会阻塞）
@@ -126,16 +130,16 @@ class GCSClient:
             signed_url = self.generate_signed_url(bucket, object_name, method="GET", ttl_seconds=300)
 
             # 用 aiohttp 异步下载
-            async with aiohttp.ClientSession() as session:
-                async with session.get(signed_url, timeout=aiohttp.ClientTimeout(total=60)) as resp:
-                    if resp.status == 404:
-                        raise GCSError(f"Object not found: {uri}")
-                    elif resp.status != 200:
-                        raise GCSError(f"Failed to read object: HTTP {resp.status}")
+            session = self.http.session
+            async with session.get(signed_url, timeout=aiohttp.ClientTimeout(total=60)) as resp:
+                if resp.status == 404:
+                    raise GCSError(f"Object not found: {uri}")
+                elif resp.status != 200:
+                    raise GCSError(f"Failed to read object: HTTP {resp.status}")
 
-                    content = await resp.text()
-                    self.logger.debug(f"读取对象成功: {uri} ({len(content)} 字符)")
-                    return content
+                content = await resp.text()
+                self.logger.debug(f"读取对象成功: {uri} ({len(content)} 字符)")
+                return content
 
         except aiohttp.ClientError as e:
             self.logger.error(f"读取对象失败: {e}")
@@ -166,6 +170,43 @@ class GCSClient:
             self.logger.error(f"JSON 解析失败: {e}")
             raise GCSError(f"Invalid JSON content: {e}") from e
 
+    async def upload_bytes(self, uri: str, data: bytes, content_type: str) -> None:
+        """
+        上传对象内容（Signed PUT URL + 共享连接池）
+
+        Args:
+            uri: 目标 GCS URI (gs://bucket/path/to/object)
+            data: 对象内容
+            content_type: Content-Type（需与签名时一致）
+
+        Raises:
+            GCSError: 上传失败
+        """
+        bucket, object_name = self.parse_uri(uri)
+
+        try:
+            put_url = self.generate_signed_url(
+                bucket, object_name, method="PUT", ttl_seconds=300, content_type=content_type
+            )
+
+            async with self.http.session.put(
+                put_url,
+                data=data,
+                headers={"Content-Type": content_type},
+                timeout=aiohttp.ClientTimeout(total=120)
+            ) as resp:
+                if resp.status not in (200, 201):
+                    error_text = await resp.text()
+                    raise GCSError(f"Failed to upload object: HTTP {resp.status}, {error_text}")
+
+            self.logger.debug(f"上传对象成功: {uri} ({len(data)} 字节)")
+
+        except GCSError:
+            raise
+        except Exception as e:
+            self.logger.error(f"上传对象失败: {e}")
+            raise GCSError(f"Failed to upload object: {e}") from e
+
     async def exists(self, uri: str) -> bool:
         """
         检查对象是否存在
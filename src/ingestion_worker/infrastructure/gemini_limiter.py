@@ -0,0 +1,267 @@
+"""
+Gemini 进程级自适应限流
+
+职责：
+- 令牌桶：按每分钟请求数（RPM）与每分钟 token 数（TPM）放行请求
+- AIMD 并发控制：上限从 GEMINI_MAX_CONCURRENCY 开始，429 / ResourceExhausted 时减半
+  （不低于 GEMINI_MIN_CONCURRENCY，同一波 429 只减一次），每个成功请求 +1/上限，逐步回升
+- 重试：ResourceExhausted / ServiceUnavailable 最多重试 GEMINI_MAX_RETRIES 次，
+  按指数退避 + 随机抖动（full jitter）等待，每次重试重新经过令牌桶与并发控制（不绕过配额）
+- 指标：当前上限、限流事件、等待时间与重试次数
+
+对外接口：
+- TokenBucket(per_minute).reserve(amount) -> float / .settle(delta)
+- GeminiLimiter.from_config(config)
+- await limiter.run(send, estimated_tokens, tags) -> response
+
+设计：
+- VertexClient 在进程内只有一个，limiter 随之在进程内共享，所有视频 / 标注器的 Gemini 请求都经过它
+- 以单次请求（send_message / generate_content）为单位，而不是整个 function calling 循环：
+  工具执行期间不占用并发名额
+- 令牌桶采用预约方式：请求立即扣除额度（余额可为负），按欠额计算需要等待的时间，
+  先到先得，不需要加锁；响应后按 usage_metadata 的实际 token 数补扣或退还
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from google.api_core import exceptions as gcp_exceptions
+
+from ingestion_worker.config import Config
+from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, gauge, histogram
+from ingestion_worker.utils.retry import record_retry
+
+LIMITER_LIMIT = gauge(
+    "gemini_limiter_limit", "Current Gemini limits (concurrency is adaptive; rpm / tpm are configured, 0 = unlimited)"
+)
+LIMITER_THROTTLE = counter(
+    "gemini_limiter_throttle_total", "Gemini throttle events by reason (rpm / tpm / concurrency / resource_exhausted)"
+)
+LIMITER_WAIT = histogram("gemini_limiter_wait_seconds", "Time a Gemini request waited for rate budget and a concurrency slot")
+LIMITER_RETRY = counter("gemini_retry_total", "Gemini requests retried after a retryable error")
+
+# 可重试的错误：429（ResourceExhausted 是 TooManyRequests 的子类）会触发 AIMD 减半，503 只重试
+THROTTLE_ERRORS = (gcp_exceptions.TooManyRequests,)
+RETRYABLE_ERRORS = THROTTLE_ERRORS + (gcp_exceptions.ServiceUnavailable,)
+
+DECREASE_FACTOR = 0.5  # 429 时并发上限乘以该系数
+DECREASE_COOLDOWN_SECONDS = 5.0  # 同一波 429 只减半一次
+
+
+class TokenBucket:
+    """每分钟额度的令牌桶（容量 = 一分钟的额度）"""
+
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            per_minute: 每分钟额度（> 0）
+            clock: 单调时钟（测试可注入）
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        预约额度（立即扣除，余额可为负）
+
+        超过容量的请求按容量扣除，避免永远等不到。
+
+        Args:
+            amount: 需要的额度
+
+        Returns:
+            需要等待的秒数（0 表示立即可用）
+        """
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    def settle(self, delta: float) -> None:
+        """按实际用量修正（delta > 0 补扣，< 0 退还）"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class GeminiLimiter:
+    """进程级 Gemini 限流器（令牌桶 + AIMD 并发 + 抖动重试）"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        rpm: int = 0,
+        tpm: int = 0,
+        max_retries: int = 4,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_concurrency: 并发上限（AIMD 的上界，也是初始值）
+            min_concurrency: AIMD 的下界
+            rpm: 每分钟请求数上限（0 = 不限制）
+            tpm: 每分钟 token 数上限（0 = 不限制）
+            max_retries: 可重试错误的最大重试次数
+            retry_base_seconds: 退避基数（第 n 次重试最多等待 base * 2^n 秒）
+            retry_max_seconds: 单次退避的上限
+            clock: 单调时钟（测试可注入）
+        """
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._clock = clock
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = float("-inf")
+        self._rpm = TokenBucket(rpm, clock) if rpm > 0 else None
+        self._tpm = TokenBucket(tpm, clock) if tpm > 0 else None
+        self.logger = get_logger(__name__)
+
+        LIMITER_LIMIT.set(self.limit, {"kind": "concurrency"})
+        LIMITER_LIMIT.set(rpm, {"kind": "rpm"})
+        LIMITER_LIMIT.set(tpm, {"kind": "tpm"})
+
+    @classmethod
+    def from_config(cls, config: Config) -> "GeminiLimiter":
+        """按配置创建（gemini_max_concurrency 等已按进程数拆分）"""
+        return cls(
+            max_concurrency=config.gemini_max_concurrency,
+            min_concurrency=config.gemini_min_concurrency,
+            rpm=config.gemini_rpm_limit,
+            tpm=config.gemini_tpm_limit,
+            max_retries=config.gemini_max_retries,
+            retry_base_seconds=config.gemini_retry_base_seconds,
+            retry_max_seconds=config.gemini_retry_max_seconds,
+        )
+
+    async def run(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        tags: Optional[dict] = None
+    ) -> Any:
+        """
+        在限流下发送一次 Gemini 请求（可重试错误按抖动退避重试）
+
+        Args:
+            send: 发送请求的协程工厂（每次重试重新调用；失败的请求不会写入 chat 历史）
+            estimated_tokens: 估算的 token 数（用于 TPM 预约，响应后按实际用量修正）
+            tags: 指标标签（annotator / mode）
+
+        Returns:
+            send() 的返回值
+
+        Raises:
+            send() 抛出的异常（可重试错误在重试次数用完后抛出）
+        """
+        tags = tags or {}
+        attempt = 0
+        while True:
+            await self._acquire(estimated_tokens, tags)
+            try:
+                response = await send()
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, THROTTLE_ERRORS):
+                    LIMITER_THROTTLE.inc(tags={**tags, "reason": "resource_exhausted"})
+                    self._decrease()
+                if attempt >= self.max_retries:
+                    raise
+                error = e
+            else:
+                self._increase()
+                actual = getattr(getattr(response, "usage_metadata", None), "total_token_count", 0) or 0
+                if self._tpm is not None and actual:
+                    self._tpm.settle(actual - min(estimated_tokens, self._tpm.capacity))
+                return response
+            finally:
+                self._release()
+
+            # 退避期间不占用并发名额
+            delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+            attempt += 1
+            LIMITER_RETRY.inc(tags={**tags, "error": type(error).__name__})
+            record_retry()  # 计入调用方所在的 Stage（agentic）
+            self.logger.warning(
+                f"⚠️ Gemini {type(error).__name__}，{delay:.1f}s 后第 {attempt}/{self.max_retries} 次重试"
+                f"（并发上限 {self.limit:.1f}）"
+            )
+            await asyncio.sleep(delay)
+
+    async def _acquire(self, estimated_tokens: int, tags: dict) -> None:
+        """等待 RPM / TPM 额度，再等待并发名额"""
+        start = self._clock()
+        delay = 0.0
+        if self._rpm is not None:
+            wait = self._rpm.reserve(1)
+            if wait > 0:
+                LIMITER_THROTTLE.inc(tags={**tags, "reason": "rpm"})
+            delay = max(delay, wait)
+        if self._tpm is not None:
+            wait = self._tpm.reserve(estimated_tokens)
+            if wait > 0:
+                LIMITER_THROTTLE.inc(tags={**tags, "reason": "tpm"})
+            delay = max(delay, wait)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._waiters or self.in_flight >= int(self.limit):
+            LIMITER_THROTTLE.inc(tags={**tags, "reason": "concurrency"})
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()  # 已分到名额但被取消：归还
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+        else:
+            self.in_flight += 1
+        LIMITER_WAIT.observe(self._clock() - start, tags)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """按先来后到把空出的名额交给等待者"""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _increase(self) -> None:
+        """加性增：每个成功请求 +1/limit（约每轮满并发 +1）"""
+        if self.limit < self.max_concurrency:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            LIMITER_LIMIT.set(self.limit, {"kind": "concurrency"})
+            self._wake()
+
+    def _decrease(self) -> None:
+        """乘性减：冷却时间内的多次 429 只减半一次"""
+        now = self._clock()
+        if now - self._last_decrease < DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit * DECREASE_FACTOR)
+        LIMITER_LIMIT.set(self.limit, {"kind": "concurrency"})
+        self.logger.warning(f"⚠️ Gemini 配额受限，并发上限降为 {self.limit:.1f}")
@@ -0,0 +1,137 @@
+"""
+职责：
+- 进程内共享的 HTTP 客户端（一个长期存在的 aiohttp.ClientSession）
+- 连接池：总连接数 / 每个 host 的连接数上限、keep-alive、DNS 缓存
+- 统计连接复用情况（新建连接 vs 复用连接）
+
+依赖：aiohttp
+
+对外接口：
+- HttpClient(config)
+- async start() / async close()
+- session -> aiohttp.ClientSession  # 首次访问时自动创建
+- stats() -> dict
+
+设计：
+- 由 app lifespan（或 Pull worker 的 main）创建并关闭，注入到 Replicate / Lark / GCS 客户端
+- 请求级超时仍由调用方通过 ClientTimeout 指定
+- 未注入时各客户端会自建一个 HttpClient（脚本场景）
+"""
+from typing import Optional
+
+import aiohttp
+
+from ingestion_worker.config import Config
+from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter
+
+HTTP_REQUESTS = counter("http_requests_total", "Outgoing HTTP requests by host")
+HTTP_CONNECTIONS = counter("http_connections_total", "Outgoing HTTP connections by kind (created / reused)")
+HTTP_DNS = counter("http_dns_cache_total", "DNS cache lookups by result (hit / miss)")
+
+
+class HttpClient:
+    """共享的 aiohttp 连接池"""
+
+    def __init__(self, config: Config):
+        """
+        初始化 HTTP 客户端（不创建连接，start() 或首次访问 session 时创建）
+
+        Args:
+            config: 系统配置
+        """
+        self.config = config
+        self.logger = get_logger(__name__)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    async def start(self) -> None:
+        """创建连接池（需在事件循环中调用）"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            self.logger.info(
+                f"✓ HTTP 连接池已创建 (limit={self.config.http_max_connections}, "
+                f"per_host={self.config.http_max_connections_per_host}, "
+                f"keepalive={self.config.http_keepalive_seconds}s)"
+            )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """共享的 ClientSession（不要在 async with 中使用，由 HttpClient 负责关闭）"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    async def close(self) -> None:
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            self.logger.info(f"✓ HTTP 连接池已关闭 ({self._format_stats()})")
+        self._session = None
+
+    def stats(self) -> dict:
+        """
+        连接复用统计
+
+        Returns:
+            {requests, connections_created, connections_reused, reuse_ratio,
+             dns_cache_hits, dns_cache_misses}
+        """
+        stats = dict(self._stats)
+        acquired = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_ratio"] = stats["connections_reused"] / acquired if acquired else 0.0
+        return stats
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.config.http_max_connections,
+            limit_per_host=self.config.http_max_connections_per_host,
+            keepalive_timeout=self.config.http_keepalive_seconds,
+            ttl_dns_cache=self.config.http_dns_cache_seconds,
+            use_dns_cache=True,
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """连接复用 / DNS 缓存统计"""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._stats["requests"] += 1
+            HTTP_REQUESTS.inc(tags={"host": params.url.host})
+
+        async def on_connection_create_end(session, ctx, params):
+            self._stats["connections_created"] += 1
+            HTTP_CONNECTIONS.inc(tags={"kind": "created"})
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._stats["connections_reused"] += 1
+            HTTP_CONNECTIONS.inc(tags={"kind": "reused"})
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self._stats["dns_cache_hits"] += 1
+            HTTP_DNS.inc(tags={"result": "hit"})
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self._stats["dns_cache_misses"] += 1
+            HTTP_DNS.inc(tags={"result": "miss"})
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    def _format_stats(self) -> str:
+        stats = self.stats()
+        return (
+            f"requests={stats['requests']}, created={stats['connections_created']}, "
+            f"reused={stats['connections_reused']}, reuse_ratio={stats['reuse_ratio']:.0%}"
+        )
@@ -17,6 +17,7 @@ from datetime import datetime
 from enum import Enum
 
 from ingestion_worker.config import Config
+from ingestion_worker.infrastructure.http import HttpClient
 from ingestion_worker.utils.logging import get_logger
 
 
@@ -36,14 +37,16 @@ class LarkError(Exception):
 class LarkClient:
     """Lark Webhook 客户端"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, http: Optional[HttpClient] = None):
         """
         初始化 Lark 客户端
 
         Args:
             config: 系统配置
+            http: 共享 HTTP 连接池（未传入时自建，由本客户端独占）
         """
         self.config = config
+        self.http = http or HttpClient(config)
         self.webhook_url = config.error_webhook_url
         self.logger = get_logger(__name__)
 
@@ -90,21 +93,21 @@ class LarkClient:
             card = self._build_card(message_type, title, content, metadata)
 
             # 发送请求
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.webhook_url,
-                    json={"msg_type": "interactive", "card": card},
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    if resp.status == 200:
-                        self.logger.debug(f"✓ Lark 通知已发送: {title}")
-                        return True
-                    else:
-                        error_text = await resp.text()
-                        self.logger.error(
-                            f"✗ Lark 通知发送失败: HTTP {resp.status}, {error_text}"
-                        )
-                        return False
+            session = self.http.session
+            async with session.post(
+                self.webhook_url,
+                json={"msg_type": "interactive", "card": card},
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as resp:
+                if resp.status == 200:
+                    self.logger.debug(f"✓ Lark 通知已发送: {title}")
+                    return True
+                else:
+                    error_text = await resp.text()
+                    self.logger.error(
+                        f"✗ Lark 通知发送失败: HTTP {resp.status}, {error_text}"
+                    )
+                    return False
 
         except aiohttp.ClientError as e:
             self.logger.error(f"Lark Webhook 请求失败: {e}")
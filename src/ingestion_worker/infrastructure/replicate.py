@@ -19,7 +19,12 @@ from typing import Optional, Any
 from datetime import datetime
 
 from ingestion_worker.config import Config
+from ingestion_worker.infrastructure.http import HttpClient
 from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, histogram
+
+REPLICATE_POLLS = counter("replicate_polls_total", "Replicate prediction status polls")
+REPLICATE_WAIT = histogram("replicate_prediction_wait_seconds", "Time from first poll to a final prediction status")
 
 
 class ReplicateError(Exception):
@@ -33,14 +38,16 @@ class ReplicateClient:
     # WhisperX 模型
     DEFAULT_MODEL = "victor-upmeet/whisperx:84d2ad2d6194fe98a17d2b60bef1c7f910c46b2f6fd38996ca457afd9c8abfcb"
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, http: Optional[HttpClient] = None):
         """
         初始化 Replicate 客户端
 
         Args:
             config: 系统配置
+            http: 共享 HTTP 连接池（未传入时自建，由本客户端独占）
         """
         self.config = config
+        self.http = http or HttpClient(config)
         self.api_token = config.replicate_api_token
         self.base_url = "https://api.replicate.com/v1"
         self.logger = get_logger(__name__)
@@ -84,29 +91,29 @@ class ReplicateClient:
             payload["webhook_events_filter"] = ["completed"]
 
         try:
-            async with aiohttp.ClientSession() as session:
-                self.logger.info(f"提交 Replicate 任务: {model}")
-                self.logger.debug(f"输入参数: {input_data}")
-
-                async with session.post(
-                        url,
-                        headers=headers,
-                        json=payload,
-                        timeout=aiohttp.ClientTimeout(total=30)
-                ) as resp:
-                    if resp.status == 401:
-                        raise ReplicateError("Replicate API token 无效")
-                    elif resp.status == 402:
-                        raise ReplicateError("Replicate 账户余额不足")
-                    elif resp.status != 201:
-                        error_text = await resp.text()
-                        raise ReplicateError(f"提交任务失败: HTTP {resp.status}, {error_text}")
-
-                    data = await resp.json()
-                    prediction_id = data["id"]
-
-                    self.logger.info(f"✓ 任务已提交: {prediction_id}")
-                    return prediction_id
+            session = self.http.session
+            self.logger.info(f"提交 Replicate 任务: {model}")
+            self.logger.debug(f"输入参数: {input_data}")
+
+            async with session.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=30)
+            ) as resp:
+                if resp.status == 401:
+                    raise ReplicateError("Replicate API token 无效")
+                elif resp.status == 402:
+                    raise ReplicateError("Replicate 账户余额不足")
+                elif resp.status != 201:
+                    error_text = await resp.text()
+                    raise ReplicateError(f"提交任务失败: HTTP {resp.status}, {error_text}")
+
+                data = await resp.json()
+                prediction_id = data["id"]
+
+                self.logger.info(f"✓ 任务已提交: {prediction_id}")
+                return prediction_id
 
         except aiohttp.ClientError as e:
             self.logger.error(f"网络错误: {e}")
@@ -134,20 +141,20 @@ class ReplicateClient:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                        url,
-                        headers=headers,
-                        timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    if resp.status == 404:
-                        raise ReplicateError(f"预测任务不存在: {prediction_id}")
-                    elif resp.status != 200:
-                        error_text = await resp.text()
-                        raise ReplicateError(f"查询任务失败: HTTP {resp.status}, {error_text}")
-
-                    data = await resp.json()
-                    return data
+            session = self.http.session
+            async with session.get(
+                    url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=10)
+            ) as resp:
+                if resp.status == 404:
+                    raise ReplicateError(f"预测任务不存在: {prediction_id}")
+                elif resp.status != 200:
+                    error_text = await resp.text()
+                    raise ReplicateError(f"查询任务失败: HTTP {resp.status}, {error_text}")
+
+                data = await resp.json()
+                return data
 
         except aiohttp.ClientError as e:
             self.logger.error(f"网络错误: {e}")
@@ -191,14 +198,17 @@ class ReplicateClient:
             # 查询状态
             prediction = await self.get_prediction(prediction_id)
             status = prediction.get("status")
+            REPLICATE_POLLS.inc(tags={"status": status})
 
             self.logger.debug(f"轮询 #{poll_count}: status={status}, elapsed={elapsed:.1f}s")
 
             if status == "succeeded":
                 self.logger.info(f"✓ 任务完成: {prediction_id} (耗时 {elapsed:.1f}s)")
+                REPLICATE_WAIT.observe(elapsed, {"status": status})
                 return prediction
 
             elif status == "failed":
+                REPLICATE_WAIT.observe(elapsed, {"status": status})
                 error = prediction.get("error", "Unknown error")
                 self.logger.error(f"✗ 任务失败: {error}")
                 raise ReplicateError(f"Prediction failed: {error}")
@@ -22,6 +22,10 @@ from google.api_core import exceptions as gcp_exceptions
 
 from ingestion_worker.config import Config
 from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, histogram
+
+TRANSCODER_POLLS = counter("transcoder_polls_total", "Transcoder job status polls")
+TRANSCODER_WAIT = histogram("transcoder_job_wait_seconds", "Time from first poll to a final Transcoder job state")
 
 
 class TranscoderError(Exception):
@@ -176,14 +180,17 @@ class TranscoderClient:
             # 查询状态
             job = await self.get_job(job_name)
             state = job.state
+            TRANSCODER_POLLS.inc(tags={"state": state.name})
 
             self.logger.debug(f"轮询 #{poll_count}: state={state.name}, elapsed={elapsed:.1f}s")
 
             if state == transcoder_v1.Job.ProcessingState.SUCCEEDED:
                 self.logger.info(f"✓ 转码任务完成: {job_name} (耗时 {elapsed:.1f}s)")
+                TRANSCODER_WAIT.observe(elapsed, {"state": state.name})
                 return job
 
             elif state == transcoder_v1.Job.ProcessingState.FAILED:
+                TRANSCODER_WAIT.observe(elapsed, {"state": state.name})
                 error_msg = job.error.message if job.error else "Unknown error"
                 self.logger.error(f"✗ 转码任务失败: {error_msg}")
                 raise TranscoderError(f"Transcode job failed: {error_msg}")
@@ -2,14 +2,26 @@
 职责：
 - 调用 Gemini API（支持 Function Calling）
 - 处理 function_call/function_response 循环
+- 单次生成（不调用工具，用于候选注入模式）
+
+并发模型：
+- send_message / generate_content 使用 SDK 的原生异步接口（grpc.aio），不占用线程，
+  并发只受 gemini_max_concurrency 限制
+- CachedContent.create 没有异步接口，在专用线程池（gemini_cache_create_threads）中执行，
+  不与默认 executor 上的其他 to_thread 调用争抢线程
+- 每次请求都经过进程内共享的 GeminiLimiter（RPM / TPM 令牌桶、AIMD 并发、429 抖动重试）
 
 依赖：google-cloud-aiplatform
 """
 import asyncio
+import functools
 import json
 import re
 import os
-from typing import Callable, Awaitable, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Awaitable, Any, Iterator, Optional
 from datetime import timedelta
 
 from vertexai.generative_models import (
@@ -27,7 +39,25 @@ from vertexai.preview.caching import CachedContent
 from google.api_core import exceptions as gcp_exceptions
 
 from ingestion_worker.config import Config
+from ingestion_worker.infrastructure.gemini_limiter import GeminiLimiter
 from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.utils.metrics import counter, gauge, histogram
+from ingestion_worker.utils.tokens import estimate_tokens
+
+GEMINI_CALL = histogram("gemini_call_seconds", "End-to-end call_with_tools latency including tool rounds")
+GEMINI_REQUEST = histogram("gemini_request_seconds", "Latency of a single send_message round trip")
+GEMINI_TOOL_ROUNDS = histogram(
+    "gemini_tool_rounds", "Function-calling rounds per call_with_tools", buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10)
+)
+GEMINI_TOOL_CALL = histogram("gemini_tool_call_seconds", "Latency of a single tool_handler invocation")
+GEMINI_TOOL_ROUND = histogram("gemini_tool_round_seconds", "Wall time of one function-calling round (calls run concurrently)")
+GEMINI_TOOL_FANOUT = histogram(
+    "gemini_tool_round_calls", "Function calls per round", buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+)
+GEMINI_ERRORS = counter("gemini_errors_total", "Gemini calls that raised")
+GEMINI_CACHE_CREATE = histogram("gemini_cache_create_seconds", "CachedContent.create latency")
+GEMINI_IN_FLIGHT = gauge("gemini_requests_in_flight", "Gemini requests currently awaiting a response")
+GEMINI_TOKENS = counter("gemini_tokens_total", "Tokens reported in Gemini usage metadata (prompt / cached / output)")
 
 
 class VertexError(Exception):
@@ -35,6 +65,21 @@ class VertexError(Exception):
     pass
 
 
+def _total_tokens(response) -> int:
+    """响应 usage_metadata 中的总 token 数（没有时为 0）"""
+    return getattr(getattr(response, "usage_metadata", None), "total_token_count", 0) or 0
+
+
+@contextmanager
+def _in_flight() -> Iterator[None]:
+    """统计正在等待响应的 Gemini 请求数"""
+    GEMINI_IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        GEMINI_IN_FLIGHT.dec()
+
+
 class VertexClient:
     """Gemini API 客户端（纯技术封装）"""
 
@@ -47,6 +92,11 @@ class VertexClient:
         """
         self.config = config
         self.logger = get_logger(__name__)
+        self.limiter = GeminiLimiter.from_config(config)
+        self._cache_executor = ThreadPoolExecutor(
+            max_workers=config.gemini_cache_create_threads,
+            thread_name_prefix="gemini-cache"
+        )
 
         try:
             # 初始化 Vertex AI
@@ -63,6 +113,10 @@ class VertexClient:
             self.logger.error(f"✗ Vertex AI 初始化失败: {e}")
             raise VertexError(f"Failed to initialize Vertex AI: {e}") from e
 
+    def close(self) -> None:
+        """关闭 CachedContent.create 的线程池（不等待进行中的创建）"""
+        self._cache_executor.shutdown(wait=False)
+
     async def create_cached_content(
         self,
         video_uri: Optional[str],
@@ -90,15 +144,20 @@ class VertexClient:
             # 添加文本内容
             contents.append(Part.from_text(text_content))
 
-            # 在 asyncio 中运行同步代码
-            cached_content = await asyncio.to_thread(
-                CachedContent.create,
-                model_name=self.config.gemini_model,
-                contents=[Content(role="user", parts=contents)],
-                tools=tools,  # Include tools in cache
-                system_instruction=system_instruction,  # [保持] 注入系统指令到 Cache
-                ttl=timedelta(seconds=ttl_seconds)
-            )
+            # SDK 没有异步接口：在专用线程池中运行同步代码
+            loop = asyncio.get_running_loop()
+            with GEMINI_CACHE_CREATE.time({"video": bool(video_uri)}):
+                cached_content = await loop.run_in_executor(
+                    self._cache_executor,
+                    functools.partial(
+                        CachedContent.create,
+                        model_name=self.config.gemini_model,
+                        contents=[Content(role="user", parts=contents)],
+                        tools=tools,  # Include tools in cache
+                        system_instruction=system_instruction,  # [保持] 注入系统指令到 Cache
+                        ttl=timedelta(seconds=ttl_seconds)
+                    )
+                )
 
             self.logger.info(
                 f"✓ 缓存已创建: {cached_content.name}, TTL={ttl_seconds}s"
@@ -116,6 +175,58 @@ class VertexClient:
             self.logger.error(f"创建缓存失败: {e}")
             raise VertexError(f"Failed to create cached content: {e}") from e
 
+    def _build_model(
+        self,
+        cached_content: Optional[CachedContent],
+        system_instruction: Optional[str],
+        tools: Optional[list[Tool]]
+    ) -> GenerativeModel:
+        """
+        创建模型（缓存模式 / 无缓存模式）
+
+        Args:
+            cached_content: 缓存内容（或 None）
+            system_instruction: 无缓存模式的系统指令
+            tools: 无缓存模式的工具定义（None 表示不提供工具）
+
+        Returns:
+            GenerativeModel
+        """
+        if cached_content:
+            # 缓存模式：system_instruction 和 tools 已经在 cached_content 中
+            model = GenerativeModel.from_cached_content(cached_content)
+        else:
+            # 无缓存模式：显式传入 system_instruction 和 tools
+            # Configure safety settings to be permissive
+            safety_settings = [
+                SafetySetting(
+                    category=HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+                    threshold=HarmBlockThreshold.BLOCK_NONE,
+                ),
+                SafetySetting(
+                    category=HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+                    threshold=HarmBlockThreshold.BLOCK_NONE,
+                ),
+                SafetySetting(
+                    category=HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+                    threshold=HarmBlockThreshold.BLOCK_NONE,
+                ),
+                SafetySetting(
+                    category=HarmCategory.HARM_CATEGORY_HARASSMENT,
+                    threshold=HarmBlockThreshold.BLOCK_NONE,
+                ),
+            ]
+
+            # 实例化模型
+            model = GenerativeModel(
+                model_name=self.config.gemini_model,
+                system_instruction=system_instruction,
+                tools=tools,
+                safety_settings=safety_settings
+            )
+
+        return model
+
     async def call_with_tools(
         self,
         cached_content: Optional[CachedContent],
@@ -132,6 +243,13 @@ class VertexClient:
         Args:
             trace_context: 追踪上下文 {segment_index, segment_text, annotator_kind, video_uid}
         """
+        call_start = time.perf_counter()
+        metric_tags = {
+            "annotator": (trace_context or {}).get("annotator_kind", "unknown"),
+            "mode": (trace_context or {}).get("candidate_mode", "tools"),
+        }
+        outcome = "error"
+
         try:
             config = GenerationConfig(
                 temperature=0.0,
@@ -139,39 +257,7 @@ class VertexClient:
                 **(generation_config or {})
             )
 
-            # 创建模型
-            if cached_content:
-                # 缓存模式：system_instruction 和 tools 已经在 cached_content 中
-                model = GenerativeModel.from_cached_content(cached_content)
-            else:
-                # 无缓存模式：显式传入 system_instruction 和 tools
-                # Configure safety settings to be permissive
-                safety_settings = [
-                    SafetySetting(
-                        category=HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-                        threshold=HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    SafetySetting(
-                        category=HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                        threshold=HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    SafetySetting(
-                        category=HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-                        threshold=HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    SafetySetting(
-                        category=HarmCategory.HARM_CATEGORY_HARASSMENT,
-                        threshold=HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                ]
-
-                # 实例化模型
-                model = GenerativeModel(
-                    model_name=self.config.gemini_model,
-                    system_instruction=system_instruction,
-                    tools=tools,
-                    safety_settings=safety_settings
-                )
+            model = self._build_model(cached_content, system_instruction, tools)
 
             chat = model.start_chat(response_validation=False)
 
@@ -194,10 +280,11 @@ class VertexClient:
             # 第一次调用
             # 如果使用 cached_content，tools 已在 cache 中，不能再传
             # 如果不用 cache，传 tools (无缓存模式下 tools 已在 model 初始化时传入)
-            response = await asyncio.to_thread(
-                chat.send_message,
-                prompt,
-                generation_config=config
+            response = await self._request(
+                lambda: chat.send_message_async(prompt, generation_config=config),
+                estimated_tokens=estimate_tokens(prompt),
+                metric_tags=metric_tags,
+                phase="initial"
             )
 
             # ========== 位置 1: 第一次响应后 ==========
@@ -238,6 +325,8 @@ class VertexClient:
                             f"   [{ann_idx+1}] \"{lemma}\" → fine_id={fine_id} | "
                             f"rationale: {ann.get('rationale', '')[:120]}"
                         )
+                    GEMINI_TOOL_ROUNDS.observe(iteration - 1, metric_tags)
+                    outcome = "ok"
                     return final_result
 
                 self.logger.info("=" * 80)
@@ -248,51 +337,23 @@ class VertexClient:
                     self.logger.info(f"   [{idx+1}] {fc.name}({dict(fc.args)})")
                 self.logger.info("=" * 80)
 
-                # 执行所有 function calls
-                function_responses = []
-                for idx, fc in enumerate(function_calls):
-                    name = fc.name
-                    args = dict(fc.args)
-
-                    self.logger.debug(f"调用工具: {name}({args})")
-
-                    try:
-                        # ========== 位置 3: 执行工具调用 ==========
-                        result = await tool_handler(name, args)
-
-                        # 提取 lemma 并建立 fine_id → lemma 映射
-                        if isinstance(result, dict) and "lemma" in result and "candidates" in result:
-                            lemma = result["lemma"]
-                            candidates = result["candidates"]
-                            for cand in candidates:
-                                if isinstance(cand, dict) and "fine_id" in cand:
-                                    fine_id_to_lemma[cand["fine_id"]] = lemma
-
-                        self.logger.info(f"  ✓ 工具调用成功 [{idx+1}]: {name}")
-                        function_responses.append(
-                            Part.from_function_response(
-                                name=name,
-                                response={"result": result}
-                            )
-                        )
-                    except Exception as e:
-                        self.logger.error(f"  ✗ 工具调用失败 [{idx+1}]: {name}, 错误: {e}")
-                        function_responses.append(
-                            Part.from_function_response(
-                                name=name,
-                                response={"error": str(e)}
-                            )
-                        )
+                # 并发执行本轮所有 function calls（结果按原顺序返回）
+                with GEMINI_TOOL_ROUND.time(metric_tags):
+                    function_responses = await self._run_tool_round(
+                        function_calls, tool_handler, fine_id_to_lemma
+                    )
 
                 # ========== 位置 4: 发送 function_responses 前 ==========
                 self.logger.info(f"📤 {trace_id} 发送工具结果给 LLM（第{iteration}轮）")
                 self.logger.info(f"   Segment: \"{seg_text}\"")
 
                 # 发送 function responses
-                response = await asyncio.to_thread(
-                    chat.send_message,
-                    function_responses,
-                    generation_config=config
+                # 对话历史随轮次增长：以上一轮的实际 token 数作为估算
+                response = await self._request(
+                    lambda: chat.send_message_async(function_responses, generation_config=config),
+                    estimated_tokens=_total_tokens(response) or estimate_tokens(prompt),
+                    metric_tags=metric_tags,
+                    phase="tool_response"
                 )
 
                 # ========== 位置 4: 收到 Gemini 响应后 ==========
@@ -305,17 +366,199 @@ class VertexClient:
             self.logger.warning(
                 f"Function calling 达到最大迭代次数 ({max_iterations})"
             )
-            return self._parse_response(response, ctx)
+            GEMINI_TOOL_ROUNDS.observe(max_iterations, metric_tags)
+            final_result = self._parse_response(response, ctx)
+            outcome = "max_iterations"
+            return final_result
 
         except gcp_exceptions.DeadlineExceeded as e:
+            GEMINI_ERRORS.inc(tags={**metric_tags, "error": "deadline_exceeded"})
             self.logger.error(f"请求超时: {e}")
             raise VertexError(f"Request timeout: {e}") from e
         except gcp_exceptions.ResourceExhausted as e:
+            GEMINI_ERRORS.inc(tags={**metric_tags, "error": "resource_exhausted"})
             self.logger.error(f"配额耗尽: {e}")
             raise VertexError(f"Quota exceeded: {e}") from e
         except Exception as e:
+            GEMINI_ERRORS.inc(tags={**metric_tags, "error": type(e).__name__})
             self.logger.error(f"Gemini 调用失败: {e}")
             raise VertexError(f"Failed to call Gemini: {e}") from e
+        finally:
+            GEMINI_CALL.observe(time.perf_counter() - call_start, {**metric_tags, "outcome": outcome})
+
+    async def _run_tool_round(
+        self,
+        function_calls: list,
+        tool_handler: Callable[[str, dict], Awaitable[dict]],
+        fine_id_to_lemma: dict
+    ) -> list[Part]:
+        """
+        并发执行一轮 function calls（最多 gemini_tool_concurrency 个同时执行）
+
+        Args:
+            function_calls: 本轮的 FunctionCall 列表
+            tool_handler: 工具处理器
+            fine_id_to_lemma: fine_id → lemma 映射（用于日志，原地更新）
+
+        Returns:
+            function_response Part 列表（与 function_calls 顺序一致；单个调用失败时返回 error，不影响其他调用）
+        """
+        semaphore = asyncio.Semaphore(self.config.gemini_tool_concurrency)
+        GEMINI_TOOL_FANOUT.observe(len(function_calls))
+
+        async def run_one(idx: int, fc) -> Part:
+            name = fc.name
+            args = dict(fc.args)
+
+            self.logger.debug(f"调用工具: {name}({args})")
+
+            try:
+                # ========== 位置 3: 执行工具调用 ==========
+                async with semaphore:
+                    with GEMINI_TOOL_CALL.time({"tool": name}):
+                        result = await tool_handler(name, args)
+
+                # 提取 lemma 并建立 fine_id → lemma 映射
+                if isinstance(result, dict) and "lemma" in result and "candidates" in result:
+                    lemma = result["lemma"]
+                    candidates = result["candidates"]
+                    for cand in candidates:
+                        if isinstance(cand, dict) and "fine_id" in cand:
+                            fine_id_to_lemma[cand["fine_id"]] = lemma
+
+                self.logger.info(f"  ✓ 工具调用成功 [{idx+1}]: {name}")
+                return Part.from_function_response(
+                    name=name,
+                    response={"result": result}
+                )
+            except Exception as e:
+                self.logger.error(f"  ✗ 工具调用失败 [{idx+1}]: {name}, 错误: {e}")
+                return Part.from_function_response(
+                    name=name,
+                    response={"error": str(e)}
+                )
+
+        return list(await asyncio.gather(
+            *(run_one(idx, fc) for idx, fc in enumerate(function_calls))
+        ))
+
+    async def generate_json(
+        self,
+        cached_content: Optional[CachedContent],
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        trace_context: Optional[dict] = None
+    ) -> dict:
+        """
+        单次生成 JSON（不提供工具，用于候选已注入 prompt 的模式）
+
+        SDK 不允许 cached_content 与 tool_config 同时使用，因此不通过 tool_config 禁止调用工具，
+        而是要求缓存本身不包含 tools（见 create_cached_content 的 tools 参数）。
+
+        Args:
+            cached_content: 不含 tools 的缓存内容（或 None）
+            prompt: 完整 prompt（包含候选列表）
+            system_instruction: 无缓存模式的系统指令
+            generation_config: 额外的生成配置（如 response_schema）
+            trace_context: 追踪上下文 {segment_index, segment_text, annotator_kind, video_uid}
+
+        Returns:
+            解析后的 JSON 对象
+
+        Raises:
+            VertexError: 调用或解析失败
+        """
+        call_start = time.perf_counter()
+        ctx = trace_context or {}
+        metric_tags = {
+            "annotator": ctx.get("annotator_kind", "unknown"),
+            "mode": ctx.get("candidate_mode", "injected"),
+        }
+        outcome = "error"
+        trace_id = f"[{ctx.get('video_uid', 'N/A')}|Seg#{ctx.get('segment_index', 'N/A')}|{metric_tags['annotator']}]"
+
+        try:
+            config = GenerationConfig(
+                temperature=0.0,
+                max_output_tokens=8192,
+                **(generation_config or {})
+            )
+            model = self._build_model(cached_content, system_instruction, tools=None)
+
+            self.logger.info(f"📤 {trace_id} Gemini 单次生成（候选已注入），Prompt 长度: {len(prompt)} 字符")
+            response = await self._request(
+                lambda: model.generate_content_async(prompt, generation_config=config),
+                estimated_tokens=estimate_tokens(prompt),
+                metric_tags=metric_tags,
+                phase="single"
+            )
+
+            result = self._parse_response(response, ctx)
+            GEMINI_TOOL_ROUNDS.observe(0, metric_tags)
+            self.logger.info(f"✅ {trace_id} 标注数量: {len(result.get('annotations', []))}")
+            outcome = "ok"
+            return result
+
+        except VertexError:
+            GEMINI_ERRORS.inc(tags={**metric_tags, "error": "invalid_response"})
+            raise
+        except gcp_exceptions.DeadlineExceeded as e:
+            GEMINI_ERRORS.inc(tags={**metric_tags, "error": "deadline_exceeded"})
+            self.logger.error(f"请求超时: {e}")
+            raise VertexError(f"Request timeout: {e}") from e
+        except gcp_exceptions.ResourceExhausted as e:
+            GEMINI_ERRORS.inc(tags={**metric_tags, "error": "resource_exhausted"})
+            self.logger.error(f"配额耗尽: {e}")
+            raise VertexError(f"Quota exceeded: {e}") from e
+        except Exception as e:
+            GEMINI_ERRORS.inc(tags={**metric_tags, "error": type(e).__name__})
+            self.logger.error(f"Gemini 调用失败: {e}")
+            raise VertexError(f"Failed to call Gemini: {e}") from e
+        finally:
+            GEMINI_CALL.observe(time.perf_counter() - call_start, {**metric_tags, "outcome": outcome})
+
+    async def _request(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        metric_tags: dict,
+        phase: str
+    ) -> Any:
+        """
+        经过进程级限流发送一次请求（每次尝试单独计时），并记录 token 用量
+
+        Args:
+            send: 发送请求的协程工厂（重试时重新调用）
+            estimated_tokens: 估算的 token 数
+            metric_tags: 指标标签
+            phase: 请求阶段（initial / tool_response / single）
+
+        Returns:
+            GenerationResponse
+        """
+        async def attempt():
+            with GEMINI_REQUEST.time({**metric_tags, "phase": phase}), _in_flight():
+                return await send()
+
+        response = await self.limiter.run(attempt, estimated_tokens, metric_tags)
+        self._record_usage(response, metric_tags)
+        return response
+
+    @staticmethod
+    def _record_usage(response, metric_tags: dict) -> None:
+        """累计 usage_metadata 中的 token 数（按 annotator / mode 分组）"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        for kind, field in (
+            ("prompt", "prompt_token_count"),
+            ("cached", "cached_content_token_count"),
+            ("output", "candidates_token_count"),
+        ):
+            value = getattr(usage, field, 0) or 0
+            if value:
+                GEMINI_TOKENS.inc(value, {**metric_tags, "type": kind})
 
     def _extract_function_calls(self, response) -> list:
         """
@@ -344,7 +587,8 @@ class VertexClient:
             response: GenerateContentResponse
 
         Returns:
-            解析后的 JSON 对象
+            解析后的 JSON 对象；候选没有内容（如 finish_reason 为 SAFETY / MAX_TOKENS）时
+            返回 {"annotations": [], "empty": True}（调用方不应缓存这样的结果）
 
         Raises:
             VertexError: 解析失败
@@ -372,7 +616,7 @@ class VertexClient:
                 self.logger.warning("=" * 80)
 
                 # 返回空的 annotations 数组，而不是抛出错误
-                return {"annotations": []}
+                return {"annotations": [], "empty": True}
 
             text = candidate.content.parts[0].text
             
@@ -3,6 +3,7 @@ Pub/Sub Push Webhook 工具
 
 职责：
 - 解析 Pub/Sub Push 请求
+- 解析 GCS 通知消息体（Push / Pull 模式共用）
 - 验证签名（可选）
 """
 
@@ -44,6 +45,30 @@ def parse_pubsub_push(body: dict) -> PubSubMessage:
         # 解码 data（base64）
         data_b64 = message.get("data", "")
         data_bytes = base64.b64decode(data_b64)
+
+        return parse_notification_data(data_bytes, dict(message.get("attributes", {})))
+
+    except WebhookError:
+        raise
+    except Exception as e:
+        raise WebhookError(f"Failed to parse message: {e}") from e
+
+
+def parse_notification_data(data_bytes: bytes, attributes: Optional[dict] = None) -> PubSubMessage:
+    """
+    解析 GCS 通知的消息体（Push 与 Pull 模式共用）
+
+    Args:
+        data_bytes: 已解码的消息 data（GCS object JSON）
+        attributes: 消息属性
+
+    Returns:
+        PubSubMessage
+
+    Raises:
+        WebhookError: 解析失败
+    """
+    try:
         data = json.loads(data_bytes)
 
         # 提取字段
@@ -65,9 +90,11 @@ def parse_pubsub_push(body: dict) -> PubSubMessage:
             event_time=datetime.fromisoformat(
                 data.get("timeCreated", datetime.now().isoformat()).replace("Z", "+00:00")
             ),
-            attributes=dict(message.get("attributes", {}))
+            attributes=dict(attributes or {})
         )
 
+    except WebhookError:
+        raise
     except json.JSONDecodeError as e:
         raise WebhookError(f"Failed to parse JSON: {e}") from e
     except Exception as e:
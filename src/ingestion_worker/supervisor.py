@@ -0,0 +1,269 @@
+"""
+多进程 Supervisor（一个 Pod 用满所有 CPU 核）
+
+职责：
+- 启动 N 个 worker 进程，每个进程有自己的事件循环、DB 连接池与客户端
+- Push 模式：每个进程用 SO_REUSEPORT 绑定同一端口，由内核分配连接
+- Pull 模式：所有进程消费同一个 Pull 订阅
+- 健康检查：进程退出或心跳超时（事件循环卡死）→ 重启该进程
+- SIGTERM：转发给所有子进程（各自 drain），超时后强制结束
+
+用法：
+    python -m ingestion_worker.supervisor --mode push --processes 4
+    python -m ingestion_worker.supervisor --mode pull
+
+资源拆分：子进程的 Config.per_process() 按 WORKER_PROCESSES 拆分
+DB_POOL_SIZE / MAX_CONCURRENT_VIDEOS / PULL_MAX_* / GEMINI_MAX_CONCURRENCY
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+from ingestion_worker.config import Config
+from ingestion_worker.utils.logging import setup_logging, get_logger
+
+logger = get_logger(__name__)
+
+HEARTBEAT_INTERVAL_SECONDS = 5
+HEARTBEAT_TIMEOUT_SECONDS = 60  # 包含启动时间（连接 DB、初始化客户端）
+MAX_RESTART_BACKOFF_SECONDS = 60
+STABLE_RUN_SECONDS = 60  # 运行超过该时间后，重启退避清零
+
+
+@dataclass
+class WorkerSlot:
+    """一个 worker 进程槽位"""
+    index: int
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    heartbeat: Any = None  # multiprocessing.Value('d')：最近一次心跳的时间戳
+    started_at: float = 0.0
+    restarts: int = 0
+    next_start_at: float = 0.0
+
+
+class WorkerSupervisor:
+    """启动并看护 N 个 worker 进程"""
+
+    def __init__(
+        self,
+        target: Callable[..., None],
+        args: tuple,
+        processes: int,
+        shutdown_timeout: float,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT_SECONDS,
+        context: Optional[multiprocessing.context.BaseContext] = None,
+    ):
+        """
+        初始化 Supervisor
+
+        Args:
+            target: 子进程入口函数，调用方式 target(heartbeat, *args)
+            args: 传给 target 的额外参数
+            processes: 进程数
+            shutdown_timeout: 关闭时等待子进程退出的秒数
+            heartbeat_timeout: 心跳超时秒数
+            context: multiprocessing 上下文（默认 spawn：gRPC 客户端不支持 fork）
+        """
+        self.target = target
+        self.args = args
+        self.shutdown_timeout = shutdown_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.context = context or multiprocessing.get_context("spawn")
+        self.slots = [WorkerSlot(index=i) for i in range(processes)]
+        self._stopping = False
+
+    def run(self) -> None:
+        """启动所有进程并看护，直到收到 SIGTERM / SIGINT"""
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+
+        logger.info(f"🚀 Supervisor 启动 {len(self.slots)} 个 worker 进程")
+        for slot in self.slots:
+            self._start(slot)
+
+        while not self._stopping:
+            self.check_workers()
+            time.sleep(1)
+
+        self.shutdown()
+
+    def check_workers(self) -> None:
+        """检查所有进程，退出或心跳超时的进程按退避时间重启"""
+        now = time.time()
+
+        for slot in self.slots:
+            process = slot.process
+
+            if process is not None and process.is_alive():
+                last_beat = max(slot.started_at, slot.heartbeat.value)
+                if now - last_beat <= self.heartbeat_timeout:
+                    continue
+                logger.error(
+                    f"✗ worker-{slot.index} (pid={process.pid}) 心跳超时 "
+                    f"{now - last_beat:.0f}s，强制重启"
+                )
+                process.kill()
+                process.join()
+
+            if process is not None:
+                # 进程已退出：计算下次启动时间
+                logger.error(
+                    f"✗ worker-{slot.index} (pid={process.pid}) 退出, exitcode={process.exitcode}"
+                )
+                ran_for = now - slot.started_at
+                slot.restarts = 0 if ran_for >= STABLE_RUN_SECONDS else slot.restarts + 1
+                backoff = min(2 ** max(slot.restarts - 1, 0) - 1, MAX_RESTART_BACKOFF_SECONDS)
+                slot.next_start_at = now + backoff
+                slot.process = None
+                if backoff:
+                    logger.warning(f"worker-{slot.index} 频繁崩溃，{backoff}s 后重启")
+
+            if now >= slot.next_start_at:
+                self._start(slot)
+
+    def shutdown(self) -> None:
+        """向所有子进程发送 SIGTERM，等待其 drain，超时后强制结束"""
+        alive = [s.process for s in self.slots if s.process is not None and s.process.is_alive()]
+        logger.info(f"正在关闭 {len(alive)} 个 worker 进程...")
+
+        for process in alive:
+            process.terminate()
+
+        deadline = time.time() + self.shutdown_timeout
+        for process in alive:
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                logger.warning(f"⚠️  worker pid={process.pid} 未在截止时间内退出，强制结束")
+                process.kill()
+                process.join()
+
+        logger.info("✓ Supervisor 已关闭")
+
+    def stats(self) -> list[dict]:
+        """每个槽位的状态（pid、存活、重启次数、距上次心跳秒数）"""
+        now = time.time()
+        return [
+            {
+                "index": slot.index,
+                "pid": slot.process.pid if slot.process else None,
+                "alive": bool(slot.process and slot.process.is_alive()),
+                "restarts": slot.restarts,
+                "heartbeat_age": now - max(slot.started_at, slot.heartbeat.value) if slot.heartbeat else None,
+            }
+            for slot in self.slots
+        ]
+
+    def _start(self, slot: WorkerSlot) -> None:
+        """启动（或重启）一个槽位的进程"""
+        slot.heartbeat = self.context.Value("d", 0.0)
+        slot.process = self.context.Process(
+            target=self.target,
+            args=(slot.heartbeat, *self.args),
+            name=f"ingest-worker-{slot.index}",
+        )
+        slot.started_at = time.time()
+        slot.process.start()
+        logger.info(f"✓ worker-{slot.index} 已启动 (pid={slot.process.pid})")
+
+    def _on_signal(self, signum, frame) -> None:
+        logger.info(f"Supervisor 收到信号 {signal.Signals(signum).name}")
+        self._stopping = True
+
+
+async def _heartbeat(heartbeat) -> None:
+    """定期写入心跳（事件循环卡住时心跳停止，Supervisor 会重启该进程）"""
+    while True:
+        heartbeat.value = time.time()
+        await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+
+
+def _bind_reuseport(host: str, port: int) -> socket.socket:
+    """创建绑定到共享端口的监听 socket（SO_REUSEPORT，内核在进程间分配连接）"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def run_push_worker(heartbeat, host: str, port: int) -> None:
+    """子进程入口：Push 模式（FastAPI + uvicorn）"""
+    import uvicorn
+    from ingestion_worker.__main__ import app
+
+    async def serve():
+        beat = asyncio.create_task(_heartbeat(heartbeat))
+        server = uvicorn.Server(uvicorn.Config(app))
+        try:
+            await server.serve(sockets=[_bind_reuseport(host, port)])
+        finally:
+            beat.cancel()
+
+    asyncio.run(serve())
+
+
+def run_pull_worker(heartbeat) -> None:
+    """子进程入口：Pull 模式"""
+    from ingestion_worker import worker_pull
+
+    async def serve():
+        beat = asyncio.create_task(_heartbeat(heartbeat))
+        try:
+            await worker_pull.main()
+        finally:
+            beat.cancel()
+
+    asyncio.run(serve())
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingestion Worker 多进程 Supervisor")
+    parser.add_argument("--mode", choices=["push", "pull"], default="push")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker 进程数（默认 WORKER_PROCESSES，未设置时为 CPU 核数）")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    setup_logging()
+
+    processes = args.processes or int(os.getenv("WORKER_PROCESSES", "0")) or os.cpu_count() or 1
+
+    # 子进程通过 WORKER_PROCESSES 拆分连接池等资源（spawn 会继承环境变量）
+    os.environ["WORKER_PROCESSES"] = str(processes)
+    config = Config.from_env()
+    config.validate()
+
+    if args.mode == "push":
+        target, target_args = run_push_worker, (args.host, args.port)
+    else:
+        target, target_args = run_pull_worker, ()
+
+    per_process = config.per_process()
+    logger.info(
+        f"模式={args.mode}, 进程数={processes}, "
+        f"每进程 db_pool_size={per_process.db_pool_size}, "
+        f"max_concurrent_videos={per_process.max_concurrent_videos}"
+    )
+
+    supervisor = WorkerSupervisor(
+        target=target,
+        args=target_args,
+        processes=processes,
+        shutdown_timeout=config.shutdown_drain_seconds + 5,
+    )
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
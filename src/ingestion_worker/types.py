@@ -9,6 +9,8 @@
 - Annotation
 - ASRResult
 - TranscodeResult
+- ProcessingStats
+- StageTiming
 """
 
 from dataclasses import dataclass, field
@@ -37,6 +39,7 @@ class Segment:
     lang: str = "en"
     speaker: str | None = None
     meta: dict[str, Any] = field(default_factory=dict)
+    word_timings: Any = None  # domain.word_timings.WordTimings（写入 segment_word_timing，不放进 meta）
 
 
 ## TODO: annotation seems not well-defined
@@ -74,9 +77,10 @@ class TranscodeResult:
 @dataclass
 class AgenticResult:
     """Agentic workflow 返回结果"""
-    annotations: list[Annotation]
-    method: str  # 'gemini_video' | 'gemini_text' | 'rule_fallback'
-    ontology_ver: str  # 'gemini-2.0-20250110'
+    annotations: list[Annotation]  # 流式写入时为空（已由 AnnotationStreamWriter 写入）
+    method: str  # 'gemini_video' | 'gemini_text' | 'gemini_nocache' | 'rule_fallback'
+    ontology_ver: str  # 'gemini-2.0-20250110'（规则标注为 'rule_fallback-v1'）
+    persist_stats: dict[str, Any] = field(default_factory=dict)  # AnnotationStreamWriter.stats()
 
 
 @dataclass
@@ -91,19 +95,52 @@ class IngestJob:
     error_message: str | None = None
     started_at: datetime | None = None
     finished_at: datetime | None = None
+    # 已完成 Stage 的持久化输出（asr_json_uri / transcoder_job_name / hls_path / annotations ...）
+    checkpoint: dict[str, Any] = field(default_factory=dict)
+    # 本次运行中直接从 checkpoint 复用的 Stage
+    resumed_stages: list[str] = field(default_factory=list)
 
 
 @dataclass
 class ProcessingStats:
-    """处理统计信息（用于日志/监控）"""
+    """单个 ingest job 的处理统计（写入 ingest_job_stats，用于定位瓶颈）"""
     video_uid: str
+    object_key: str
+    etag: str
+    status: str  # 'done' | 'error'
     processing_time_seconds: float
-    asr_wall_seconds: float
-    transcoder_wall_seconds: float
-    agentic_wall_seconds: float
-    video_duration_seconds: float
-    segments_count: int
-    occurrences_count: int
-    fine_units_matched: int
-    method: str
-    ontology_ver: str
\ No newline at end of file
+    asr_wall_seconds: float | None = None
+    transcoder_wall_seconds: float | None = None
+    agentic_wall_seconds: float | None = None
+    persist_wall_seconds: float | None = None
+    video_duration_seconds: float = 0.0
+    segments_count: int = 0
+    occurrences_count: int = 0
+    fine_units_matched: int = 0
+    method: str | None = None
+    ontology_ver: str | None = None
+    retry_count: int = 0
+    # 本次实际运行的 Stage 耗时（从 checkpoint 复用的 Stage 不计入，避免拉低分位数）
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    # 本次实际运行的 Stage 内部的重试次数（只记录有重试的 Stage）
+    stage_retries: dict[str, int] = field(default_factory=dict)
+    resumed_stages: list[str] = field(default_factory=list)
+    error_message: str | None = None
+
+
+@dataclass
+class StageTiming:
+    """工作流单个 Stage 的执行时间（用于确认 Stage 之间的重叠）"""
+    name: str
+    depends_on: list[str] = field(default_factory=list)
+    status: str = "pending"  # 'pending' | 'running' | 'done' | 'failed' | 'cancelled'
+    started_at: float | None = None  # Unix 时间戳（秒）
+    finished_at: float | None = None  # Unix 时间戳（秒）
+    retries: int = 0  # Stage 内部的重试次数（ASR / 转码 / Gemini 请求）
+
+    @property
+    def duration_seconds(self) -> float | None:
+        """Stage 耗时（秒），未结束时为 None"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
@@ -0,0 +1,76 @@
+"""
+职责：
+- JSON 序列化 / 反序列化（优先 orjson，未安装时退回标准库 json）
+- 注册 asyncpg 的 json / jsonb 类型编解码器（dict / list 直接作为参数传入，读取时直接得到 dict）
+
+输出：
+- dumps(obj) -> str
+- loads(data) -> Any
+- async register_json_codecs(conn) -> None   # 作为 asyncpg.create_pool(init=...) 使用
+
+注意：
+- 注册后 json / jsonb 参数必须传 Python 对象；传入已序列化的字符串会被当作 JSON 字符串值
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(obj: Any) -> Any:
+    """orjson 不支持的类型（如 Decimal）转为可序列化的值"""
+    if hasattr(obj, "__float__"):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> str:
+    """
+    序列化为 JSON 字符串（orjson 把 NaN / Infinity 输出为 null，Postgres 可以接受）
+
+    Args:
+        obj: 要序列化的对象
+
+    Returns:
+        JSON 字符串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, ensure_ascii=False, default=_default)
+
+
+def loads(data: str | bytes) -> Any:
+    """
+    反序列化 JSON
+
+    Args:
+        data: JSON 字符串或字节
+
+    Returns:
+        解析后的对象
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+async def register_json_codecs(conn) -> None:
+    """
+    为 asyncpg 连接注册 json / jsonb 编解码器（连接池的 init 钩子）
+
+    Args:
+        conn: asyncpg.Connection
+    """
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=dumps,
+            decoder=loads,
+            schema="pg_catalog",
+            format="text",
+        )
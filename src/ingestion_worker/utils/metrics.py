@@ -1,10 +1,246 @@
 """
 职责：
-- 简单的指标记录（暂时只打日志）
+- 进程内指标注册表（Counter / Gauge / Histogram）
+- 导出 Prometheus 文本格式（由 __main__.py 的 /metrics 端点提供）
 
 输出：
-- record_metric(name: str, value: float, tags: dict) -> None
+- counter(name, help) -> Counter          # .inc(value=1, tags=None)
+- gauge(name, help) -> Gauge              # .set(value, tags=None) / .inc() / .dec()
+- histogram(name, help, buckets) -> Histogram  # .observe(value, tags=None) / .time(tags)
+- render_prometheus() -> str
+- record_metric(name, value, tags) -> None  # 兼容旧接口：记录瞬时值（gauge）
 
-未来扩展：
-- 集成 Prometheus/CloudWatch
-"""
\ No newline at end of file
+设计：
+- 热路径只做一次 dict 查找 + 加锁累加（指标可能在 asyncio.to_thread 的线程中记录）
+- 同名指标重复注册返回同一个对象（模块级别定义即可，不需要传递 registry）
+- 每个进程独立计数（supervisor 多进程部署时，/metrics 只返回处理该请求的进程的指标）
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# 秒级延迟的默认分桶（覆盖 DB 毫秒级到 Replicate/Transcoder 分钟级）
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(tags: Optional[dict]) -> LabelKey:
+    """标签 dict → 可哈希的 key（按名称排序）"""
+    if not tags:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in tags.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[tuple[str, str]] = None) -> str:
+    """格式化 Prometheus 标签，如 {stage="asr",le="0.5"}"""
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """指标基类"""
+    type_name = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    type_name = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1.0, tags: Optional[dict] = None) -> None:
+        key = _label_key(tags)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def get(self, tags: Optional[dict] = None) -> float:
+        return self._values.get(_label_key(tags), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """瞬时值（队列深度、处理中数量等）"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: dict[LabelKey, float] = {}
+
+    def set(self, value: float, tags: Optional[dict] = None) -> None:
+        key = _label_key(tags)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, value: float = 1.0, tags: Optional[dict] = None) -> None:
+        key = _label_key(tags)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def dec(self, value: float = 1.0, tags: Optional[dict] = None) -> None:
+        self.inc(-value, tags)
+
+    def get(self, tags: Optional[dict] = None) -> float:
+        return self._values.get(_label_key(tags), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """分桶直方图（用于延迟、轮次等分布）"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # key → [每个桶的计数..., +Inf 计数, sum]
+        self._values: dict[LabelKey, list[float]] = {}
+
+    def observe(self, value: float, tags: Optional[dict] = None) -> None:
+        key = _label_key(tags)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, tags: Optional[dict] = None) -> Iterator[None]:
+        """计时上下文（异常时同样记录耗时）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, tags)
+
+    def count(self, tags: Optional[dict] = None) -> int:
+        state = self._values.get(_label_key(tags))
+        return int(sum(state[:-1])) if state else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} "
+                    f"{_format_value(cumulative)}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表（同名返回同一对象）"""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets)
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 进程级默认注册表
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help: str = "") -> Counter:
+    """获取（或注册）一个 Counter"""
+    return REGISTRY.counter(name, help)
+
+
+def gauge(name: str, help: str = "") -> Gauge:
+    """获取（或注册）一个 Gauge"""
+    return REGISTRY.gauge(name, help)
+
+
+def histogram(name: str, help: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    """获取（或注册）一个 Histogram"""
+    return REGISTRY.histogram(name, help, buckets)
+
+
+def render_prometheus() -> str:
+    """导出默认注册表的 Prometheus 文本"""
+    return REGISTRY.render()
+
+
+def record_metric(name: str, value: float, tags: Optional[dict] = None) -> None:
+    """
+    记录一个瞬时指标值（兼容旧接口，等价于 gauge(name).set）
+
+    Args:
+        name: 指标名称（如 "ingest_queue_depth"）
+        value: 指标值
+        tags: 可选标签
+    """
+    gauge(name).set(value, tags)
@@ -1,9 +1,34 @@
 """
 职责：
 - 提供重试装饰器
+- 按 Stage 统计重试次数（ASR / 转码 / Gemini 的重试循环在服务内部，统计写入当前运行的 Stage）
 
 输出：
 - @retry_async(max_attempts, backoff_seconds, exceptions)
+- count_retries_into(counter) -> None   # StageGraph 在每个 Stage 任务中调用
+- record_retry() -> None                # 每次重试前调用（不在 Stage 中运行时忽略）
 
 基于：tenacity 库（可选）或自己实现
-"""
\ No newline at end of file
+"""
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+# 当前 Stage 的重试计数回调（每个 Stage 是独立的 asyncio 任务，Stage 内创建的子任务继承同一个回调）
+_retry_counter_var: ContextVar[Optional[Callable[[], None]]] = ContextVar("retry_counter", default=None)
+
+
+def count_retries_into(counter: Callable[[], None]) -> None:
+    """
+    把当前任务（及其子任务）中的重试计入 counter
+
+    Args:
+        counter: 每次重试调用一次
+    """
+    _retry_counter_var.set(counter)
+
+
+def record_retry() -> None:
+    """记录一次重试（计入当前运行的 Stage）"""
+    counter = _retry_counter_var.get()
+    if counter is not None:
+        counter()
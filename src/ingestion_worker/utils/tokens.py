@@ -0,0 +1,20 @@
+"""
+职责：
+- 不调用 count_tokens 的 token 数粗略估算（窗口切分、限流器的 TPM 预约共用）
+
+输出：
+- estimate_tokens(text) -> int
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数（英文约 4 个字符一个 token，不需要调用 count_tokens）
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数（至少为 1）
+    """
+    return max(1, len(text) // 4)
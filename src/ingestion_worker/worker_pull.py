@@ -1,113 +1,240 @@
+"""
+Ingestion Worker 入口（Pull 模式）
+
+职责：
+- 从 Pub/Sub Pull 订阅拉取 GCS 通知并处理
+- FlowControl 限制未 ack 的消息数 / 字节数（即同时处理的视频数）
+- 处理期间由客户端库自动续租（最长 max_lease_duration）
+- process_message 成功后才 ack；可重试的 WorkflowError → nack 让 Pub/Sub 重投
+- SIGTERM：新消息直接 nack，处理中的任务 drain 到截止时间后取消（任务释放为 queued）
+
+对外接口：
+- PullWorker(workflow, subscriber, subscription_path, flow_control, drain_seconds)
+- async PullWorker.run()
+- PullWorker.stop()
+
+与 Push 模式（__main__.py）共用 bootstrap.build_workflow 装配
+"""
+
 import asyncio
-import os
-import json
-import logging
-from google.cloud import pubsub_v1
+import signal
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
 from ingestion_worker.config import Config
-from ingestion_worker.infrastructure.database import Database
-from ingestion_worker.infrastructure.gcs import GCSClient
-from ingestion_worker.infrastructure.vertex import VertexClient
-from ingestion_worker.infrastructure.replicate import ReplicateClient
-from ingestion_worker.domain.transcoding import TranscodingService
-from ingestion_worker.domain.asr import ASRService
-from ingestion_worker.domain.agentic.orchestrators import AgenticService
-from ingestion_worker.domain.persistence import PersistenceService
+from ingestion_worker.bootstrap import build_workflow
+from ingestion_worker.infrastructure.http import HttpClient
 from ingestion_worker.application.workflow import IngestVideoWorkflow
-from ingestion_worker.types import PubSubMessage
-from ingestion_worker.utils.logging import get_logger
+from ingestion_worker.infrastructure.webhook import parse_notification_data, WebhookError
+from ingestion_worker.errors import WorkflowError, IdempotencyError
+from ingestion_worker.utils.logging import setup_logging, get_logger
+from ingestion_worker.utils.metrics import gauge
 
 logger = get_logger(__name__)
 
-async def main():
-    config = Config()
-    
-    # Initialize Infrastructure
-    db = Database(config.database_url)
-    await db.connect()
-    
-    gcs = GCSClient(config.project_id)
-    vertex = VertexClient(config.project_id, config.location)
-    replicate = ReplicateClient(config.replicate_api_token)
-    
-    # Initialize Domain Services
-    transcoding_service = TranscodingService(gcs, config)
-    asr_service = ASRService(replicate, gcs, config)
-    agentic_service = AgenticService(vertex, config)
-    persistence_service = PersistenceService(db)
-    
-    # Initialize Workflow
-    workflow = IngestVideoWorkflow(
-        config=config,
-        db=db,
-        gcs=gcs,
-        transcoding_service=transcoding_service,
-        asr_service=asr_service,
-        agentic_service=agentic_service,
-        persistence_service=persistence_service
-    )
-    
-    # Pub/Sub Subscriber
-    subscriber = pubsub_v1.SubscriberClient()
-    subscription_path = subscriber.subscription_path(config.project_id, config.pubsub_subscription_name)
-    
-    logger.info(f"Listening for messages on {subscription_path}...")
+PULL_IN_FLIGHT = gauge("pull_in_flight", "Pulled messages currently being processed")
+
+
+class PullWorker:
+    """Pub/Sub Pull 订阅的消费者"""
+
+    def __init__(
+        self,
+        workflow: IngestVideoWorkflow,
+        subscriber: Any,
+        subscription_path: str,
+        flow_control: Any,
+        drain_seconds: float,
+    ):
+        """
+        初始化 Pull Worker
+
+        Args:
+            workflow: 视频处理工作流
+            subscriber: pubsub_v1.SubscriberClient（测试中可替换为本地替身）
+            subscription_path: 完整订阅路径
+            flow_control: pubsub_v1.types.FlowControl
+            drain_seconds: 关闭时等待处理中任务的最长秒数
+        """
+        self.workflow = workflow
+        self.subscriber = subscriber
+        self.subscription_path = subscription_path
+        self.flow_control = flow_control
+        self.drain_seconds = drain_seconds
+        self.logger = get_logger(__name__)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        """
+        开始拉取消息，直到 stop() 被调用（或订阅流异常结束）
+
+        Raises:
+            订阅流的异常（如订阅不存在、权限不足）
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+
+        streaming_pull_future = self.subscriber.subscribe(
+            self.subscription_path,
+            callback=self._callback,
+            flow_control=self.flow_control,
+        )
+        self.logger.info(f"📥 开始监听订阅: {self.subscription_path}")
+
+        pull_done = asyncio.wrap_future(streaming_pull_future)
+        stop_requested = asyncio.create_task(self._stopping.wait())
 
-    def callback(message):
         try:
-            logger.info(f"Received message: {message.data}")
-            data = json.loads(message.data.decode("utf-8"))
-            
-            # Parse GCS notification
-            # Expected format from GCS notification:
-            # {
-            #   "kind": "storage#object",
-            #   "name": "sitcom_clips/S01E01_scene_01.mp4",
-            #   "bucket": "lingoscaffold-videos-raw",
-            #   ...
-            # }
-            
-            object_name = data.get("name")
-            bucket_name = data.get("bucket")
-            
-            if not object_name or not bucket_name:
-                logger.warning("Invalid message format")
-                message.ack()
-                return
-
-            # Extract video_uid (assuming filename is the UID for now, or generated)
-            # In the smart_split.py, we upload as "sitcom_clips/{clip_name}"
-            # We can use the filename as video_uid for simplicity in this assignment
-            video_uid = os.path.splitext(os.path.basename(object_name))[0]
-            
-            pubsub_msg = PubSubMessage(
-                video_uid=video_uid,
-                object_name=object_name,
-                bucket_name=bucket_name,
-                etag=data.get("etag", "unknown")
-            )
-            
-            # Run workflow in event loop
-            asyncio.run_coroutine_threadsafe(workflow.process_message(pubsub_msg), loop)
-            
+            await asyncio.wait([pull_done, stop_requested], return_when=asyncio.FIRST_COMPLETED)
+
+            if pull_done.done():
+                # 订阅流异常退出：抛出原始异常
+                pull_done.result()
+
+            # 先 drain（订阅流仍在运行，ack/nack 可以正常发送），再关闭订阅流
+            await self._drain()
+
+        finally:
+            stop_requested.cancel()
+            streaming_pull_future.cancel()
+            await asyncio.gather(pull_done, return_exceptions=True)
+            self.logger.info("✓ 订阅已关闭")
+
+    def stop(self) -> None:
+        """请求停止（可作为信号处理函数，需在事件循环线程中调用）"""
+        if self._stopping is not None and not self._stopping.is_set():
+            self.logger.info("收到停止信号，不再接收新消息")
+            self._stopping.set()
+
+    def _callback(self, message: Any) -> None:
+        """订阅回调（在客户端库的线程池中执行，只负责转交给事件循环）"""
+        self._loop.call_soon_threadsafe(self._spawn, message)
+
+    def _spawn(self, message: Any) -> None:
+        """在事件循环中为消息创建处理任务"""
+        if self._stopping.is_set():
+            # 关闭中：立即 nack，让其他副本处理
+            message.nack()
+            return
+
+        task = asyncio.create_task(self._handle(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        PULL_IN_FLIGHT.set(len(self._tasks))
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        PULL_IN_FLIGHT.set(len(self._tasks))
+
+    async def _handle(self, message: Any) -> None:
+        """
+        处理单条消息并决定 ack / nack
+
+        - 解析失败 → ack（毒消息，重投也无法处理）
+        - 成功 / 幂等跳过 → ack
+        - 可重试 WorkflowError / 未预期异常 → nack
+        - 不可重试 WorkflowError → ack（任务已标记 error 并通知）
+        - 被取消（关闭 drain 超时）→ nack
+        """
+        try:
+            pubsub_message = parse_notification_data(message.data, dict(message.attributes or {}))
+        except WebhookError as e:
+            self.logger.error(f"✗ 消息解析失败，丢弃: {e}")
+            message.ack()
+            return
+
+        try:
+            await self.workflow.process_message(pubsub_message)
             message.ack()
+            self.logger.info(f"✓ 视频处理完成: {pubsub_message.video_uid}")
+
+        except IdempotencyError as e:
+            self.logger.info(f"跳过重复任务: {pubsub_message.video_uid} ({e.message})")
+            message.ack()
+
+        except asyncio.CancelledError:
+            message.nack()
+            raise
+
+        except WorkflowError as e:
+            if e.retryable:
+                self.logger.warning(f"可重试错误，nack: {pubsub_message.video_uid}: {e.message}")
+                message.nack()
+            else:
+                self.logger.error(f"✗ 不可重试错误，ack: {pubsub_message.video_uid}: {e.message}")
+                message.ack()
+
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            self.logger.error(f"✗ 视频处理失败，nack: {pubsub_message.video_uid}: {e}", exc_info=True)
             message.nack()
 
-    # Create an event loop for async processing
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    streaming_pull_future = subscriber.subscribe(subscription_path, callback=callback)
-    
+    async def _drain(self) -> None:
+        """等待处理中的任务完成，超时后取消（workflow 会把任务释放为 queued）"""
+        tasks = list(self._tasks)
+        if not tasks:
+            return
+
+        self.logger.info(f"开始 drain: {len(tasks)} 处理中 (截止 {self.drain_seconds:.0f}s)")
+        _, pending = await asyncio.wait(tasks, timeout=self.drain_seconds)
+
+        if pending:
+            self.logger.warning(f"⚠️  drain 超时: {len(pending)} 个任务将被取消并释放")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        else:
+            self.logger.info("✓ 所有任务已完成")
+
+
+async def main():
+    # google-cloud-pubsub 只有 Pull 模式需要
+    from google.cloud import pubsub_v1
+
+    load_dotenv()
+
+    config = Config.from_env()
+    config.validate()
+    config = config.per_process()
+    setup_logging()
+
+    logger.info("🚀 Ingestion Worker（Pull 模式）启动中...")
+
+    http = HttpClient(config)
+    await http.start()
+    workflow = await build_workflow(config, http)
+    subscriber = pubsub_v1.SubscriberClient()
+
+    flow_control = pubsub_v1.types.FlowControl(
+        max_messages=config.pull_max_messages,
+        max_bytes=config.pull_max_bytes,
+        # 处理期间持续续租，直到处理超时（超时后由认领 SQL 回收）
+        max_lease_duration=config.processing_timeout_seconds + config.shutdown_drain_seconds,
+    )
+
+    worker = PullWorker(
+        workflow=workflow,
+        subscriber=subscriber,
+        subscription_path=config.subscription_path,
+        flow_control=flow_control,
+        drain_seconds=config.shutdown_drain_seconds,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
     try:
-        streaming_pull_future.result()
-    except KeyboardInterrupt:
-        streaming_pull_future.cancel()
-        await db.disconnect()
+        await worker.run()
+    finally:
+        subscriber.close()
+        await workflow.db.close()
+        workflow.agentic_service.vertex.close()
+        await http.close()
+
 
 if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        pass
+    asyncio.run(main())
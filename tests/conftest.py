@@ -0,0 +1,107 @@
+import dataclasses
+
+import pytest
+
+from ingestion_worker.config import Config
+from ingestion_worker.domain.agentic.lexicon import FineUnitLexicon
+from ingestion_worker.domain.agentic.mcp_tools import MCPTools
+from ingestion_worker.domain.agentic.orchestrators import AgenticOrchestrator
+
+# 必需字段之外全部使用 Config 的默认值：新增配置项不需要修改测试
+BASE_CONFIG = Config(
+    gcp_project="p",
+    gcp_region="us-central1",
+    raw_bucket="raw",
+    hls_bucket="hls",
+    transcript_bucket="transcripts",
+    subscription_path="projects/p/subscriptions/s",
+    transcoder_template_id="t",
+    replicate_api_token="r",
+    gemini_model="gemini-test",
+    db_url="postgresql://localhost/db",
+    error_webhook_url="https://example.com/hook",
+)
+
+
+class FakeDB:
+    """fine_unit 表：lexicon 快照 / 按 label 查询返回全部行，按 id 查询返回未下线的 id"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.retired = set()
+
+    async def fetch_all(self, query, *args):
+        if "id = ANY" in query:
+            known = {row["id"] for row in self.rows} - self.retired
+            return [{"id": fine_id} for fine_id in args[0] if fine_id in known]
+        return self.rows
+
+
+def fine_unit_row(fine_id, kind, label, pos=None, definition=None):
+    return {
+        "id": fine_id, "kind": kind, "label": label, "lang": "en", "pos": pos,
+        "def": definition or label, "updated_at": None,
+    }
+
+
+def make_segments(texts):
+    return [{"start": float(i), "end": i + 1.0, "text": text} for i, text in enumerate(texts)]
+
+
+def make_mcp(rows):
+    """以 FakeDB(rows) 为 fine_unit 表、带进程内词库的 MCPTools"""
+    db = FakeDB(rows)
+    return MCPTools(db, "gemini-test", lexicon=FineUnitLexicon(db))
+
+
+def make_annotation(segment_index, fine_id, start, end, kind=None):
+    ann = {
+        "segment_index": segment_index, "fine_id": fine_id, "span": {"start": start, "end": end},
+        "rationale": "ok", "visual_comprehensibility": 0.1, "textual_comprehensibility": 0.5,
+    }
+    if kind is not None:
+        ann["kind"] = kind
+    return ann
+
+
+class FakeVertex:
+    """
+    记录调用的 Vertex：call_with_tools / generate_json 都返回 respond(prompt, trace_context)
+
+    calls 记录 (annotator_kind, segment_index)，methods 记录调用的方法名，prompts 记录 prompt
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda prompt, trace_context: {"annotations": []})
+        self.calls = []
+        self.methods = []
+        self.prompts = []
+
+    async def call_with_tools(self, prompt, trace_context, **kwargs):
+        return self._record("call_with_tools", prompt, trace_context)
+
+    async def generate_json(self, prompt, trace_context, **kwargs):
+        return self._record("generate_json", prompt, trace_context)
+
+    def _record(self, method, prompt, trace_context):
+        self.calls.append((trace_context["annotator_kind"], trace_context["segment_index"]))
+        self.methods.append(method)
+        self.prompts.append(prompt)
+        return self.respond(prompt, trace_context)
+
+
+@pytest.fixture
+def filler_and_content_segments():
+    """一个没有可学习内容的 segment + 一个有内容的 segment"""
+    return make_segments(["Hmm.", "We need milk"])
+
+
+@pytest.fixture
+def make_orchestrator():
+    """按 Config 默认值（可覆盖）创建编排器，lark 为 None"""
+
+    def build(vertex, db=None, **overrides):
+        config = dataclasses.replace(BASE_CONFIG, **overrides)
+        return AgenticOrchestrator(vertex, db, lark=None, config=config)
+
+    return build
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from ingestion_worker.application.admission import IngestJobQueue, QueueFullError
+from ingestion_worker.types import PubSubMessage
+
+
+def _message(i):
+    return PubSubMessage(
+        bucket="raw",
+        object_name=f"uploads/clip-{i}.mp4",
+        video_uid=f"video-{i}",
+        etag=f"etag-{i}",
+        generation="1",
+        event_time=datetime.now(timezone.utc),
+    )
+
+
+def test_queue_limits_concurrency_and_rejects_when_backlog_is_full():
+    async def scenario():
+        release = asyncio.Event()
+        running = 0
+        peak = 0
+
+        async def handler(message):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await release.wait()
+            running -= 1
+
+        queue = IngestJobQueue(handler, max_concurrency=2, max_backlog=3)
+        queue.start()
+
+        for i in range(5):
+            queue.submit(_message(i))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        stats = queue.stats()
+        # 2 picked up by workers; 3 remain in the backlog, so the next one is rejected
+        with pytest.raises(QueueFullError):
+            queue.submit(_message(99))
+
+        release.set()
+        await asyncio.wait_for(queue._queue.join(), timeout=1)
+        await queue.stop()
+        return stats, peak
+
+    stats, peak = asyncio.run(scenario())
+
+    assert stats["in_flight"] == 2
+    assert stats["depth"] == 3
+    assert peak == 2
+
+
+def test_failed_job_does_not_stop_the_worker():
+    async def scenario():
+        handled = []
+
+        async def handler(message):
+            handled.append(message.video_uid)
+            if message.video_uid == "video-0":
+                raise RuntimeError("boom")
+
+        queue = IngestJobQueue(handler, max_concurrency=1, max_backlog=5)
+        queue.start()
+        queue.submit(_message(0))
+        queue.submit(_message(1))
+        await asyncio.wait_for(queue._queue.join(), timeout=1)
+        await queue.stop()
+
+        with pytest.raises(QueueFullError):
+            queue.submit(_message(2))
+        return handled
+
+    assert asyncio.run(scenario()) == ["video-0", "video-1"]
+
+
+def test_drain_waits_for_in_flight_then_cancels_at_deadline():
+    async def scenario():
+        cancelled = []
+
+        async def handler(message):
+            try:
+                await asyncio.sleep(0.01 if message.video_uid == "video-0" else 5)
+            except asyncio.CancelledError:
+                cancelled.append(message.video_uid)
+                raise
+
+        queue = IngestJobQueue(handler, max_concurrency=2, max_backlog=5)
+        queue.start()
+        for i in range(3):
+            queue.submit(_message(i))
+            await asyncio.sleep(0)
+
+        leftover = await queue.drain(timeout=0.1)
+
+        with pytest.raises(QueueFullError):
+            queue.submit(_message(9))
+        return cancelled, leftover
+
+    cancelled, leftover = asyncio.run(scenario())
+
+    # video-0 finished within the deadline; video-1 and video-2 (started after video-0) were cancelled
+    assert sorted(cancelled) == ["video-1", "video-2"]
+    assert leftover == []
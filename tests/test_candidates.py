@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+from ingestion_worker.domain.agentic.candidates import CandidateResolver, lemma_variants
+from tests.conftest import FakeDB, FakeVertex, fine_unit_row, make_annotation, make_mcp
+
+ROWS = [
+    fine_unit_row(1, "phrase_sense", "give up", None, "stop trying"),
+    fine_unit_row(2, "word_sense", "run", "v", "move fast on foot"),
+    fine_unit_row(3, "word_sense", "she", "m", "female pronoun"),
+    fine_unit_row(4, "word_sense", "give", "v", "hand over"),
+]
+
+
+def test_lemma_variants_cover_common_inflections():
+    assert "run" in lemma_variants("running")
+    assert "give" in lemma_variants("gave")
+    assert "study" in lemma_variants("studies")
+    assert "do" in lemma_variants("don't")
+    assert lemma_variants("Stopped")[0] == "stopped" and "stop" in lemma_variants("Stopped")
+
+
+def test_resolver_finds_inflected_words_and_phrases_with_spans():
+    resolver = CandidateResolver(make_mcp(ROWS))
+    text = "She gave up running"
+
+    phrases = asyncio.run(resolver.resolve(text, "phrase_sense"))
+    words = asyncio.run(resolver.resolve(text, "word_sense", allowed_pos={"n", "v", "a", "r"}))
+
+    assert [(p["text"], p["lemma"], p["span"]) for p in phrases] == [("gave up", "give up", {"start": 4, "end": 11})]
+    assert [(w["text"], w["lemma"]) for w in words] == [("gave", "give"), ("running", "run")]
+
+
+def _offered_and_unknown(prompt, trace_context):
+    return {"annotations": [make_annotation(0, 1, 4, 11), make_annotation(0, 999, 4, 11)]}
+
+
+def test_injected_mode_single_generation_keeps_only_offered_fine_ids(make_orchestrator):
+    orchestrator = make_orchestrator(FakeVertex(_offered_and_unknown), FakeDB(ROWS), phrase_candidate_mode="injected")
+    segment = {"start": 0.0, "end": 2.0, "text": "She gave up running"}
+
+    anns = asyncio.run(orchestrator._process_segment(
+        None, segment, 0, orchestrator.phrase_annotator, "video-1"
+    ))
+
+    assert orchestrator.vertex.methods == ["generate_json"]  # injected mode must not use function calling
+    assert [a["fine_id"] for a in anns] == [1]
+    assert "fine_id=1: stop trying" in orchestrator.vertex.prompts[0]
+
+
+class CachingVertex(FakeVertex):
+    """创建假缓存，并按 SDK 的规则拒绝请求：带 tools 的缓存不能用于不提供工具的单次生成"""
+
+    def __init__(self, respond=None):
+        super().__init__(respond)
+        self.caches = {}
+
+    async def create_cached_content(self, tools=None, **kwargs):
+        cache = SimpleNamespace(name=f"cache-{len(self.caches)}", tools=tools)
+        self.caches[cache.name] = cache
+        return cache
+
+    async def call_with_tools(self, prompt, trace_context, cached_content=None, **kwargs):
+        assert cached_content is not None and cached_content.tools
+        return await super().call_with_tools(prompt, trace_context)
+
+    async def generate_json(self, prompt, trace_context, cached_content=None, **kwargs):
+        if cached_content is not None and cached_content.tools:
+            raise ValueError("When using cached_content, tools, tool_config, and system_instruction must be None.")
+        return await super().generate_json(prompt, trace_context)
+
+
+def test_injected_mode_uses_a_cache_without_tools(make_orchestrator):
+    def respond(prompt, trace_context):
+        return _offered_and_unknown(prompt, trace_context) if trace_context["annotator_kind"] == "phrase_sense" else {}
+
+    orchestrator = make_orchestrator(
+        CachingVertex(respond), FakeDB(ROWS), phrase_candidate_mode="injected", response_cache_enabled=False
+    )
+    segments = [{"start": 0.0, "end": 2.0, "text": "She gave up running"}]
+
+    annotations, method, _ = asyncio.run(orchestrator.process_video("video-1", None, segments))
+
+    assert method == "gemini_text"
+    assert sorted(bool(cache.tools) for cache in orchestrator.vertex.caches.values()) == [False, True]
+    assert orchestrator.vertex.methods == ["generate_json", "call_with_tools"]  # 短语注入，单词 Function Calling
+    assert [a["fine_id"] for a in annotations] == [1]
@@ -0,0 +1,43 @@
+import asyncio
+
+from ingestion_worker.domain.agentic.annotators.combined import CombinedAnnotator, apply_phrase_precedence
+from tests.conftest import FakeVertex, make_annotation
+
+
+def _ann(kind, fine_id, start, end, idx=0):
+    return make_annotation(idx, fine_id, start, end, kind=kind)
+
+
+def test_words_inside_a_phrase_are_dropped():
+    anns = [
+        _ann("word_sense", 1, 4, 8),      # "gave" inside "gave up"
+        _ann("phrase_sense", 2, 4, 11),   # "gave up"
+        _ann("word_sense", 3, 12, 19),    # "running"
+        _ann("word_sense", 4, 4, 8, idx=1),  # same offsets, other segment
+    ]
+
+    assert [a["fine_id"] for a in apply_phrase_precedence(anns)] == [2, 3, 4]
+
+
+def test_schema_requires_kind():
+    item = CombinedAnnotator().get_output_schema()["properties"]["annotations"]["items"]
+
+    assert item["required"][0] == "kind"
+    assert item["properties"]["kind"]["enum"] == ["phrase_sense", "word_sense"]
+
+
+def _overlapping_and_unknown_kind(prompt, trace_context):
+    return {"annotations": [
+        _ann("phrase_sense", 2, 4, 11), _ann("word_sense", 1, 4, 8), _ann("word_sense", 3, 12, 19),
+        _ann("grammar_rule", 5, 0, 3),
+    ]}
+
+
+def test_combined_mode_makes_one_call_per_segment(make_orchestrator):
+    orchestrator = make_orchestrator(FakeVertex(_overlapping_and_unknown_kind), lexicon_enabled=False)
+    segments = [{"start": 0.0, "end": 2.0, "text": "She gave up running"}]
+
+    anns = asyncio.run(orchestrator._process_segments_concurrent(None, segments, "video-1", annotation_mode="combined"))
+
+    assert orchestrator.vertex.calls == [("combined", 0)]
+    assert [a["fine_id"] for a in anns] == [2, 3]
@@ -0,0 +1,102 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as gcp_exceptions
+
+from ingestion_worker.infrastructure.gemini_limiter import GeminiLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_reserves_ahead_and_settles_actual_usage():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)  # 1 token / second
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(3) == pytest.approx(3.0)  # in debt: wait until refilled
+    clock.now = 3.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+    bucket.settle(-10)  # the request used fewer tokens than estimated
+    assert bucket.reserve(5) == 0.0
+    assert bucket.reserve(1000) > 0  # oversized requests are clamped to the capacity, not blocked forever
+
+
+def test_concurrency_never_exceeds_limit():
+    async def scenario():
+        limiter = GeminiLimiter(max_concurrency=3)
+        running = peak = 0
+
+        async def send():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return SimpleNamespace(usage_metadata=None)
+
+        await asyncio.gather(*(limiter.run(send, 10) for _ in range(12)))
+        return peak, limiter.in_flight
+
+    peak, in_flight = asyncio.run(scenario())
+
+    assert peak == 3
+    assert in_flight == 0
+
+
+def test_resource_exhausted_halves_limit_retries_and_ramps_back_up():
+    async def scenario():
+        limiter = GeminiLimiter(max_concurrency=8, max_retries=3, retry_base_seconds=0.001, retry_max_seconds=0.001)
+        failures = 2
+
+        async def send():
+            nonlocal failures
+            if failures:
+                failures -= 1
+                raise gcp_exceptions.ResourceExhausted("quota")
+            return "ok"
+
+        result = await limiter.run(send, 10)
+        after_throttle = limiter.limit  # second 429 within the cooldown does not halve again
+        for _ in range(40):
+            await limiter.run(send, 10)
+        return result, after_throttle, limiter.limit
+
+    result, after_throttle, recovered = asyncio.run(scenario())
+
+    assert result == "ok"
+    assert after_throttle == pytest.approx(4.0 + 1 / 4.0)
+    assert recovered == 8
+
+
+def test_retries_are_bounded_and_other_errors_are_not_retried():
+    async def scenario():
+        limiter = GeminiLimiter(max_concurrency=2, max_retries=2, retry_base_seconds=0.001, retry_max_seconds=0.001)
+        attempts = {"unavailable": 0, "invalid": 0}
+
+        async def unavailable():
+            attempts["unavailable"] += 1
+            raise gcp_exceptions.ServiceUnavailable("busy")
+
+        async def invalid():
+            attempts["invalid"] += 1
+            raise gcp_exceptions.InvalidArgument("bad request")
+
+        with pytest.raises(gcp_exceptions.ServiceUnavailable):
+            await limiter.run(unavailable, 10)
+        with pytest.raises(gcp_exceptions.InvalidArgument):
+            await limiter.run(invalid, 10)
+        return attempts, limiter.limit, limiter.in_flight
+
+    attempts, limit, in_flight = asyncio.run(scenario())
+
+    assert attempts == {"unavailable": 3, "invalid": 1}
+    assert limit == 2  # 503 is retried but does not shrink the limit
+    assert in_flight == 0
@@ -0,0 +1,44 @@
+import asyncio
+import dataclasses
+
+from aiohttp import web
+
+from ingestion_worker.infrastructure.http import HttpClient
+from ingestion_worker.infrastructure.lark import LarkClient, LarkMessageType
+from tests.conftest import BASE_CONFIG
+
+
+def test_clients_reuse_pooled_connections():
+    received = []
+
+    async def hook(request):
+        received.append(await request.json())
+        return web.json_response({"code": 0})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/hook", hook)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        config = dataclasses.replace(BASE_CONFIG, error_webhook_url=f"http://127.0.0.1:{port}/hook")
+        http = HttpClient(config)
+        await http.start()
+        try:
+            lark = LarkClient(config, http)
+            results = [await lark.send_notification(LarkMessageType.INFO, "t", {"n": i}) for i in range(3)]
+            return results, http.stats()
+        finally:
+            await http.close()
+            await runner.cleanup()
+
+    results, stats = asyncio.run(scenario())
+
+    assert results == [True, True, True]
+    assert len(received) == 3
+    assert stats["requests"] == 3
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
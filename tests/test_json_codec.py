@@ -0,0 +1,13 @@
+from decimal import Decimal
+
+from ingestion_worker.utils import json_codec
+
+
+def test_round_trip_keeps_unicode_and_converts_decimals():
+    meta = {"words": [{"word": "café", "start": 0.5, "end": Decimal("0.75")}], 1: "int key"}
+
+    encoded = json_codec.dumps(meta)
+
+    assert isinstance(encoded, str)
+    assert "café" in encoded
+    assert json_codec.loads(encoded) == {"words": [{"word": "café", "start": 0.5, "end": 0.75}], "1": "int key"}
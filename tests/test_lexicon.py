@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timezone
+
+from ingestion_worker.domain.agentic.lexicon import FineUnitLexicon
+from ingestion_worker.domain.agentic.mcp_tools import MCPTools
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _row(fine_id, kind, label, pos, definition, status="active", updated_at=T0):
+    return {
+        "id": fine_id, "kind": kind, "label": label, "lang": "en", "pos": pos,
+        "def": definition, "status": status, "updated_at": updated_at,
+    }
+
+
+class FakeDB:
+    """Serves the snapshot, then whatever changes are queued; counts round trips."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.changes = []
+        self.fetches = 0
+
+    async def fetch_all(self, query, *args):
+        self.fetches += 1
+        if "status = 'active'" in query:
+            return self.snapshot
+        assert "updated_at >" in query
+        return [row for row in self.changes if row["updated_at"] > args[0]]
+
+    async def fetch_one(self, query, *args):
+        if "external_key = $1" in query:
+            return None
+        return {"id": 9, "label": args[1], "pos": args[3], "def": args[4], "status": "pending"}
+
+
+def test_queries_are_served_from_the_index():
+    db = FakeDB([
+        _row(3, "word_sense", "Get", "v", "obtain"),
+        _row(1, "word_sense", "get", "v", "become"),
+        _row(2, "word_sense", "get", "n", "offspring"),
+        _row(4, "phrase_sense", "give up", None, "stop trying"),
+    ])
+    mcp = MCPTools(db, "gemini-test", lexicon=FineUnitLexicon(db, refresh_seconds=3600))
+
+    async def scenario():
+        verbs = await mcp.query_fine_units("GET", "word_sense", pos="v")
+        any_pos = await mcp.query_fine_units("get", "word_sense")
+        phrase = await mcp.query_fine_units("Give Up", "phrase_sense")
+        missing = await mcp.query_fine_units("run", "word_sense", pos="v")
+        return verbs, any_pos, phrase, missing
+
+    verbs, any_pos, phrase, missing = asyncio.run(scenario())
+
+    assert db.fetches == 1  # only the snapshot load
+    assert [c["fine_id"] for c in verbs.candidates] == [1, 3]
+    assert [c["fine_id"] for c in any_pos.candidates] == [1, 2, 3]
+    assert phrase.candidates == [{"fine_id": 4, "label": "give up", "definition": "stop trying"}]
+    assert not missing.found
+
+
+def test_pending_units_stay_out_of_the_index_until_approved():
+    db = FakeDB([_row(1, "word_sense", "know", "v", "be aware")])
+    lexicon = FineUnitLexicon(db, refresh_seconds=3600)
+    mcp = MCPTools(db, "gemini-test", lexicon=lexicon)
+
+    async def scenario():
+        await mcp.create_fine_unit("piece of cake", "phrase_sense", "N/A", "very easy")
+        pending = await mcp.query_fine_units("piece of cake", "phrase_sense")
+        pending_active = await mcp.active_fine_ids({9})
+
+        later = datetime(2025, 1, 2, tzinfo=timezone.utc)
+        db.changes = [
+            _row(1, "word_sense", "know", "v", "be aware", status="deprecated", updated_at=later),
+            _row(9, "phrase_sense", "piece of cake", None, "very easy", status="active", updated_at=later),
+        ]
+        lexicon.refresh_seconds = 0
+        retired = await mcp.query_fine_units("know", "word_sense")
+        approved = await mcp.query_fine_units("piece of cake", "phrase_sense")
+        return pending, pending_active, retired, approved
+
+    pending, pending_active, retired, approved = asyncio.run(scenario())
+
+    # 与 SQL 查询一致：pending 条目不是候选，审核通过后由增量刷新加入
+    assert not pending.found and pending_active == set()
+    assert not retired.found
+    assert [c["fine_id"] for c in approved.candidates] == [9]
@@ -0,0 +1,35 @@
+from ingestion_worker.utils.metrics import MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    polls = registry.counter("polls_total", "Status polls")
+    depth = registry.gauge("queue_depth", "Queue depth")
+    latency = registry.histogram("call_seconds", "Call latency", buckets=(0.1, 1.0))
+
+    polls.inc(tags={"status": "processing"})
+    polls.inc(2, tags={"status": "processing"})
+    depth.set(3)
+    latency.observe(0.05, {"stage": "asr"})
+    latency.observe(0.5, {"stage": "asr"})
+    latency.observe(5.0, {"stage": "asr"})
+
+    text = registry.render()
+
+    assert "# TYPE polls_total counter" in text
+    assert 'polls_total{status="processing"} 3.0' in text
+    assert "queue_depth 3.0" in text
+    assert 'call_seconds_bucket{stage="asr",le="0.1"} 1.0' in text
+    assert 'call_seconds_bucket{stage="asr",le="1.0"} 2.0' in text
+    assert 'call_seconds_bucket{stage="asr",le="+Inf"} 3.0' in text
+    assert 'call_seconds_count{stage="asr"} 3.0' in text
+    assert 'call_seconds_sum{stage="asr"} 5.55' in text
+
+
+def test_same_name_returns_same_metric():
+    registry = MetricsRegistry()
+
+    assert registry.counter("jobs_total") is registry.counter("jobs_total")
+    with registry.histogram("stage_seconds").time({"stage": "persist"}):
+        pass
+    assert registry.histogram("stage_seconds").count({"stage": "persist"}) == 1
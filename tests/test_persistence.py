@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+from ingestion_worker.domain.persistence import AnnotationStreamWriter, PersistenceService
+
+
+class FakeSegmentConn:
+    """Simulates the segment upsert on a numeric(10,3) t_start: unique (video_id, t_start, text)."""
+
+    def __init__(self, existing=()):
+        self.rows = {}
+        self.next_id = 100
+        self.round_trips = 0
+        self.type_lookups = 0
+        for video_id, t_start, text in existing:
+            self._upsert(video_id, t_start, text, None)
+
+    def _upsert(self, video_id, t_start, text, t_end):
+        key = (video_id, t_start, text)
+        if key not in self.rows:
+            self.rows[key] = {"id": self.next_id, "t_end": t_end}
+            self.next_id += 1
+        else:
+            self.rows[key]["t_end"] = t_end
+        return self.rows[key]["id"]
+
+    async def fetchval(self, query):
+        self.type_lookups += 1
+        assert "pg_attribute" in query
+        return "numeric(10,3)"
+
+    async def fetch(self, query, video_id, starts, ends, texts, langs, metas):
+        self.round_trips += 1
+        assert "t_start::numeric(10,3)" in query and "DISTINCT ON (t_start, text)" in query
+        # 按存储精度合并批内重复（t_end 取最后一次），每个输入行返回对应的 id
+        return [
+            {"ord": i + 1, "id": self._upsert(video_id, round(start, 3), text, end)}
+            for i, (start, end, text) in enumerate(zip(starts, ends, texts))
+        ]
+
+
+def test_bulk_insert_returns_ids_in_input_order_in_one_round_trip():
+    conn = FakeSegmentConn(existing=[(7, 3.5, "Existing line")])
+    segments = [
+        {"start": 0.0, "end": 1.0, "text": "Hello"},
+        {"start": 3.5, "end": 6.0, "text": "Existing line"},
+        {"start": 1.0, "end": 2.0, "text": "World"},
+        {"start": 0.0, "end": 1.5, "text": "Hello"},
+        {"start": 1.0004, "end": 2.0, "text": "World"},  # 存储为 1.000，与第 3 行是同一行
+    ]
+
+    service = PersistenceService(db=None)
+
+    async def scenario():
+        first = await service._insert_segments(conn, 7, segments)
+        again = await service._insert_segments(conn, 7, segments[3:4])
+        return first, again
+
+    ids, again = asyncio.run(scenario())
+
+    assert conn.round_trips == 2 and conn.type_lookups == 1
+    assert ids == [101, 100, 102, 101, 102]
+    assert again == [101]
+    # 批内重复与逐行写入一致：t_end 取最后一次
+    assert conn.rows[(7, 0.0, "Hello")]["t_end"] == 1.5
+    assert conn.rows[(7, 3.5, "Existing line")]["t_end"] == 6.0
+
+
+class FakeOccurrenceConn:
+    """Simulates the fine_unit lookup and the occurrence insert with ON CONFLICT DO NOTHING."""
+
+    def __init__(self, fine_ids, existing=()):
+        self.fine_ids = set(fine_ids)
+        self.occurrences = set(existing)
+        self.round_trips = 0
+
+    async def fetch(self, query, *args):
+        self.round_trips += 1
+        if "semantic.fine_unit" in query:
+            return [{"id": fine_id} for fine_id in args[0] if fine_id in self.fine_ids]
+
+        segment_ids, fine_ids, scores, method, ontology_ver, evidence = args
+        assert all(fine_id in self.fine_ids for fine_id in fine_ids)
+        returned = []
+        for segment_id, fine_id, ev in zip(segment_ids, fine_ids, evidence):
+            row = (segment_id, fine_id, json.dumps(ev["span"], sort_keys=True))
+            if row not in self.occurrences:
+                self.occurrences.add(row)
+                returned.append({"fine_id": fine_id})
+        return returned
+
+
+def test_occurrences_filter_missing_fine_ids_before_one_insert():
+    span = {"start": 0, "end": 5}
+    conn = FakeOccurrenceConn(fine_ids={1, 2}, existing={(10, 2, json.dumps(span, sort_keys=True))})
+    annotations = [
+        {"segment_index": 0, "fine_id": 1, "span": span},
+        {"segment_index": 0, "fine_id": 999, "span": span},
+        {"segment_index": 1, "fine_id": 1, "span": span},
+        {"segment_index": 5, "fine_id": 1, "span": span},
+        {"segment_index": 0, "fine_id": 2, "span": span},
+    ]
+
+    service = PersistenceService(db=None)
+    inserted, skipped, fine_ids = asyncio.run(
+        service._insert_occurrences(conn, [10, 11], annotations, "gemini_text", "v1")
+    )
+
+    assert conn.round_trips == 2
+    assert (inserted, skipped) == (2, 2)
+    assert fine_ids == {1}  # 999 不存在，2 已存在
+
+
+class FakeOccurrenceService:
+    def __init__(self):
+        self.batches = []
+
+    async def save_occurrences(self, segment_ids, annotations, method, ontology_ver):
+        """fine_id 999 不存在于 fine_unit，计入跳过数量"""
+        self.batches.append([a["fine_id"] for a in annotations])
+        inserted = {a["fine_id"] for a in annotations} - {999}
+        return len(inserted), len(annotations) - len(inserted), inserted
+
+
+def test_stream_writer_flushes_by_count_and_time():
+    service = FakeOccurrenceService()
+    progress = []
+
+    async def on_flush(segments):
+        progress.append(segments)
+
+    async def scenario():
+        writer = AnnotationStreamWriter(
+            service, [10, 11, 12, 13], "v1", batch_size=2, flush_interval=0.05, on_flush=on_flush
+        )
+        async with writer:
+            await writer.add(0, [{"fine_id": 1}], "gemini_text")
+            await writer.add(1, [{"fine_id": 2}], "gemini_text")  # 达到数量阈值
+            await writer.add(2, [], "gemini_text")
+            await writer.add(3, [{"fine_id": 3}, {"fine_id": 999}], "gemini_text")
+            await asyncio.sleep(0.15)  # 定时写入
+            assert service.batches == [[1, 2], [3, 999]]
+        return writer.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert (stats["occurrences_inserted"], stats["occurrences_skipped"]) == (3, 1)
+    assert stats["fine_units_matched"] == 3  # 跳过的 999 不计入
+    assert progress == [[0, 1], [0, 1, 2, 3]]
@@ -0,0 +1,49 @@
+import asyncio
+
+from ingestion_worker.domain.agentic.candidates import CandidateResolver
+from ingestion_worker.domain.agentic.prefilter import SegmentPrefilter
+from tests.conftest import FakeDB, FakeVertex, fine_unit_row, make_mcp
+
+ROWS = [
+    fine_unit_row(1, "phrase_sense", "give up"),
+    fine_unit_row(2, "word_sense", "laugh", "v"),
+    fine_unit_row(3, "word_sense", "yeah", "r"),
+    fine_unit_row(4, "word_sense", "milk", "n"),
+    fine_unit_row(5, "word_sense", "give", "v"),
+]
+
+
+def test_fillers_and_non_speech_tags_are_not_content():
+    prefilter = SegmentPrefilter(CandidateResolver(make_mcp(ROWS)), mode="skip", min_hits=1)
+
+    async def routes(texts):
+        return [(await prefilter.assess(text)).route for text in texts]
+
+    assert asyncio.run(routes(["Hmm.", "Yeah, yeah.", "[laughs]", "We need milk", "Don't give up"])) == [
+        "skip", "skip", "skip", "full", "full"
+    ]
+
+
+def test_skip_mode_marks_empty_segments_done_without_calling_gemini(make_orchestrator, filler_and_content_segments):
+    orchestrator = make_orchestrator(FakeVertex(), FakeDB(ROWS), gemini_max_concurrency=1, prefilter_mode="skip")
+    done = []
+
+    async def on_segment_done(idx, anns):
+        done.append((idx, anns))
+
+    asyncio.run(orchestrator._process_segments_concurrent(
+        None, filler_and_content_segments, "video-1", on_segment_done=on_segment_done
+    ))
+
+    assert orchestrator.vertex.calls == [("phrase_sense", 1), ("word_sense", 1)]
+    assert sorted(done) == [(0, []), (1, [])]
+
+
+def test_word_only_mode_drops_the_phrase_call_for_low_content_segments(make_orchestrator, filler_and_content_segments):
+    orchestrator = make_orchestrator(
+        FakeVertex(), FakeDB(ROWS), gemini_max_concurrency=1, prefilter_mode="word_only", prefilter_min_hits=2
+    )
+
+    asyncio.run(orchestrator._process_segments_concurrent(None, filler_and_content_segments, "video-1"))
+
+    assert orchestrator.vertex.calls == [("word_sense", 0), ("word_sense", 1)]
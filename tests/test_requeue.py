@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timezone
+
+from ingestion_worker.application.admission import IngestJobQueue
+from ingestion_worker.application.requeue import QueuedJobPoller
+from ingestion_worker.types import PubSubMessage
+
+
+class FakeJobsDB:
+    """queued ingest_jobs; leasing returns at most LIMIT rows and records the leases."""
+
+    def __init__(self, queued):
+        self.queued = list(queued)
+        self.leases = []
+        self.requeued = []
+
+    async def fetch_all(self, query, limit, lease_seconds):
+        self.leases.append((limit, lease_seconds))
+        picked, self.queued = self.queued[:limit], self.queued[limit:]
+        return [{"object_key": f"uploads/{uid}.mp4", "etag": f"etag-{uid}", "video_uid": uid} for uid in picked]
+
+    async def execute(self, query, object_keys, etags, video_uids):
+        self.requeued.append((object_keys, etags, video_uids))
+
+
+def _poller(db, queue):
+    return QueuedJobPoller(db, queue, raw_bucket="raw", poll_seconds=1, lease_seconds=300)
+
+
+def test_poll_fills_only_the_free_backlog_slots():
+    async def scenario():
+        handled = []
+        release = asyncio.Event()
+
+        async def handler(message):
+            handled.append((message.object_name, message.etag, message.video_uid))
+            await release.wait()
+
+        queue = IngestJobQueue(handler, max_concurrency=1, max_backlog=2)
+        queue.start()
+        db = FakeJobsDB(["video-1", "video-2", "video-3", "video-4"])
+        poller = _poller(db, queue)
+
+        first = await poller.poll_once()
+        await asyncio.sleep(0.01)  # video-1 moves from the backlog to the worker
+        second = await poller.poll_once()
+        release.set()
+        await queue.stop()
+        return first, second, db, handled
+
+    first, second, db, handled = asyncio.run(scenario())
+
+    assert (first, second) == (2, 1)
+    assert db.leases == [(2, 300.0), (1, 300.0)]
+    assert db.queued == ["video-4"]  # left for the next round (or another replica)
+    assert handled[0] == ("uploads/video-1.mp4", "etag-video-1", "video-1")
+
+
+def test_stopped_queue_takes_nothing_and_leftovers_are_written_back():
+    async def scenario():
+        queue = IngestJobQueue(lambda message: asyncio.sleep(0), max_concurrency=1, max_backlog=2)
+        db = FakeJobsDB(["video-1"])
+        poller = _poller(db, queue)
+        message = PubSubMessage(
+            bucket="raw", object_name="uploads/clip.mp4", video_uid="video-9", etag="etag-9",
+            generation="1", event_time=datetime.now(timezone.utc),
+        )
+        return await poller.poll_once(), await poller.requeue([message]), await poller.requeue([]), db
+
+    polled, requeued, nothing, db = asyncio.run(scenario())
+
+    assert (polled, requeued, nothing) == (0, 1, 0)
+    assert db.leases == []
+    assert db.requeued == [(["uploads/clip.mp4"], ["etag-9"], ["video-9"])]
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from ingestion_worker.domain.agentic import response_cache
+from ingestion_worker.domain.agentic.response_cache import ResponseCache
+from tests.conftest import FakeDB, FakeVertex, fine_unit_row, make_annotation as _ann, make_segments
+
+
+def test_key_ignores_case_and_outer_whitespace_and_hits_shift_spans():
+    async def scenario():
+        cache = ResponseCache(max_entries=2)
+        first = {"start": 0.0, "end": 1.0, "text": "Oh my God."}
+        repeat = {"start": 9.0, "end": 10.0, "text": "  oh my god. "}
+        key = ResponseCache.key("gemini-test", "phrase_sense", "v1", first["text"])
+
+        await cache.put(key, first, [_ann(0, 5, 0, 9)], "gemini-test", "phrase_sense")
+        hit = await cache.get(ResponseCache.key("gemini-test", "phrase_sense", "v1", repeat["text"]),
+                              repeat, 7, "phrase_sense")
+        other_version = ResponseCache.key("gemini-test", "phrase_sense", "v2", first["text"])
+        return hit, other_version != key
+
+    hit, versioned = asyncio.run(scenario())
+
+    assert hit == [_ann(7, 5, 2, 11)]
+    assert versioned
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    async def scenario():
+        cache = ResponseCache(max_entries=2)
+        seg = {"text": "x"}
+        for key in ("a", "b"):
+            await cache.put(key, seg, [], "m", "word_sense")
+        await cache.get("a", seg, 0, "word_sense")
+        await cache.put("c", seg, [], "m", "word_sense")
+        return [await cache.get(key, seg, 0, "word_sense") for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [[], None, []]
+
+
+def test_entries_expire_after_max_age_and_persistent_rows_are_pruned(monkeypatch):
+    class PersistentDB:
+        def __init__(self):
+            self.statements = []
+            self.lookups = []
+
+        async def execute(self, query, *args):
+            self.statements.append((query, args))
+            return "DELETE 3" if query == response_cache.PRUNE_SQL else "INSERT 0 1"
+
+        async def fetch_one(self, query, *args):
+            self.lookups.append(args)
+            return None
+
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    db = PersistentDB()
+    cache = ResponseCache(max_entries=2, db=db, max_age_seconds=60)
+    seg = {"text": "x"}
+
+    async def scenario():
+        await cache.put("a", seg, [], "m", "word_sense")
+        await cache.put("b", seg, [], "m", "word_sense")  # 距上次清理不到一小时：不再清理
+        fresh = await cache.get("a", seg, 0, "word_sense")
+        now[0] += 61
+        return fresh, await cache.get("a", seg, 0, "word_sense")
+
+    fresh, expired = asyncio.run(scenario())
+
+    assert (fresh, expired) == ([], None)
+    assert [q for q, _ in db.statements].count(response_cache.PRUNE_SQL) == 1
+    assert db.lookups == [("a", 60)]  # 内存条目过期后查询持久层，同样带上 max age
+
+
+def _what(prompt, trace_context):
+    return {"annotations": [_ann(trace_context["segment_index"], 7, 0, 4)]}
+
+
+def test_repeated_lines_skip_gemini_until_the_fine_unit_is_retired(make_orchestrator):
+    db = FakeDB([fine_unit_row(7, "word_sense", "what", "n")])
+    orchestrator = make_orchestrator(FakeVertex(_what), db, gemini_max_concurrency=1, lexicon_enabled=False)
+    segments = make_segments(["What?", "what?", "What?"])
+
+    async def scenario():
+        first = await orchestrator._process_segments_concurrent(None, segments[:2], "video-1")
+        db.retired = {7}  # fine_unit 7 was retired: the cached answer must not be reused
+        second = await orchestrator._process_segments_concurrent(None, segments[2:], "video-2")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert orchestrator.vertex.calls == [
+        ("phrase_sense", 0), ("word_sense", 0), ("phrase_sense", 0), ("word_sense", 0)
+    ]
+    assert [a["segment_index"] for a in first] == [0, 0, 1, 1]
+    assert len(second) == 2
+
+
+@pytest.mark.parametrize("response", [
+    {"annotations": [], "empty": True},  # 被拦截 / 截断（SAFETY、MAX_TOKENS）
+    {"annotations": [_ann(0, 7, 0, 4), _ann(0, 7, 0, 40)]},  # 第二个 span 越界，被验证丢弃
+])
+def test_blocked_or_partially_invalid_results_are_not_cached(make_orchestrator, response):
+    db = FakeDB([fine_unit_row(7, "word_sense", "what", "n")])
+    orchestrator = make_orchestrator(
+        FakeVertex(lambda prompt, trace_context: response), db, gemini_max_concurrency=1, lexicon_enabled=False
+    )
+    segments = make_segments(["What?", "What?"])
+
+    asyncio.run(orchestrator._process_segments_concurrent(None, segments, "video-1"))
+
+    assert [idx for _, idx in orchestrator.vertex.calls] == [0, 0, 1, 1]
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from ingestion_worker.domain.agentic.candidates import CandidateResolver
+from ingestion_worker.domain.agentic.rule_fallback import RuleBasedAnnotator
+from ingestion_worker.infrastructure.vertex import VertexError
+from tests.conftest import FakeDB, fine_unit_row, make_mcp
+
+ROWS = [
+    fine_unit_row(1, "phrase_sense", "give up"),
+    fine_unit_row(2, "word_sense", "give", "v"),
+    fine_unit_row(3, "word_sense", "run", "n"),
+    fine_unit_row(4, "word_sense", "run", "v"),
+    fine_unit_row(5, "word_sense", "milk", "n"),
+    fine_unit_row(6, "word_sense", "milk", "v"),
+    fine_unit_row(7, "word_sense", "yeah", "r"),
+]
+
+
+def _picks(annotations):
+    return [(ann["kind"], ann["fine_id"], ann["span"]["start"], ann["span"]["end"]) for ann in annotations]
+
+
+def test_phrases_take_precedence_and_senses_follow_the_word_form():
+    annotator = RuleBasedAnnotator(CandidateResolver(make_mcp(ROWS)))
+    text = "Yeah, don't give up running for milk"
+
+    annotations = asyncio.run(annotator.annotate({"start": 0.0, "end": 1.0, "text": text}, 3))
+
+    # give 被短语覆盖；running 推断为动词；milk 取第一义项；yeah 是语气词
+    assert _picks(annotations) == [
+        ("phrase_sense", 1, 12, 19),
+        ("word_sense", 4, 20, 27),
+        ("word_sense", 5, 32, 36),
+    ]
+    assert all(ann["segment_index"] == 3 and ann["visual_comprehensibility"] == 0.0 for ann in annotations)
+
+
+class FailingVertex:
+    def __init__(self):
+        self.calls = 0
+
+    async def create_cached_content(self, **kwargs):
+        self.calls += 1
+        raise VertexError("503 Service Unavailable")
+
+    async def call_with_tools(self, trace_context, **kwargs):
+        raise AssertionError("rule_fallback 不应调用 Gemini")
+
+
+@pytest.fixture
+def rule_orchestrator(make_orchestrator):
+    return lambda **overrides: make_orchestrator(FailingVertex(), FakeDB(ROWS), **overrides)
+
+
+def test_outage_falls_back_to_rule_annotation(rule_orchestrator, filler_and_content_segments):
+    orchestrator = rule_orchestrator(agentic_outage_fallback="rule_fallback")
+    done = []
+
+    async def on_segment_done(idx, anns, method, ontology_ver):
+        done.append((idx, _picks(anns), method))
+        assert ontology_ver == RuleBasedAnnotator.ONTOLOGY_VER
+
+    _, method, ontology_ver = asyncio.run(orchestrator.process_video(
+        "video-1", "gs://bucket/video.mp4", filler_and_content_segments, on_segment_done=on_segment_done
+    ))
+
+    assert (method, ontology_ver) == ("rule_fallback", "rule_fallback-v1")
+    assert orchestrator.vertex.calls == 2  # 多模态、纯文本缓存都尝试过
+    assert done == [(0, [], "rule_fallback"), (1, [("word_sense", 5, 8, 12)], "rule_fallback")]
+
+
+def test_rule_mode_skips_gemini_entirely(rule_orchestrator, filler_and_content_segments):
+    orchestrator = rule_orchestrator(annotation_mode="rule")
+
+    annotations, method, _ = asyncio.run(orchestrator.process_video(
+        "video-1", None, filler_and_content_segments, skip_segments={0}
+    ))
+
+    assert method == "rule_fallback"
+    assert orchestrator.vertex.calls == 0
+    assert _picks(annotations) == [("word_sense", 5, 8, 12)]
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from ingestion_worker.application.stages import StageGraph, StageGraphError
+from ingestion_worker.utils.retry import record_retry
+
+
+def test_stage_starts_as_soon_as_dependencies_finish():
+    """A slow sibling (transcode) must not delay stages that only depend on ASR."""
+
+    async def scenario():
+        graph = StageGraph()
+        graph.add_stage("idempotency", lambda: asyncio.sleep(0, result="job"))
+        graph.add_stage("transcode", lambda idempotency: asyncio.sleep(0.2, result="hls"), ["idempotency"])
+        graph.add_stage("asr", lambda idempotency: asyncio.sleep(0.01, result="asr"), ["idempotency"])
+        graph.add_stage("agentic", lambda asr: asyncio.sleep(0.01, result=asr + "+ann"), ["asr"])
+        graph.add_stage(
+            "finalize",
+            lambda transcode, agentic: asyncio.sleep(0, result=(transcode, agentic)),
+            ["transcode", "agentic"],
+        )
+        results = await graph.run()
+        return graph, results
+
+    graph, results = asyncio.run(scenario())
+    timings = graph.timings
+
+    assert results["finalize"] == ("hls", "asr+ann")
+    assert timings["agentic"].finished_at < timings["transcode"].finished_at
+    assert timings["finalize"].started_at >= timings["transcode"].finished_at
+    assert all(t.status == "done" for t in timings.values())
+
+
+def test_retries_are_counted_per_stage_including_child_tasks():
+    async def asr():
+        record_retry()
+        await asyncio.gather(*(asyncio.create_task(asyncio.sleep(0)) for _ in range(2)))
+
+    async def agentic(asr):
+        async def gemini_call():
+            record_retry()  # e.g. the limiter retrying inside a per-segment task
+
+        await asyncio.gather(gemini_call(), gemini_call())
+
+    async def scenario():
+        graph = StageGraph()
+        graph.add_stage("asr", asr)
+        graph.add_stage("agentic", agentic, ["asr"])
+        graph.add_stage("finalize", lambda agentic: asyncio.sleep(0), ["agentic"])
+        await graph.run()
+        return graph.timings
+
+    timings = asyncio.run(scenario())
+
+    assert {name: t.retries for name, t in timings.items()} == {"asr": 1, "agentic": 2, "finalize": 0}
+    record_retry()  # outside any stage: ignored
+
+
+def test_failure_cancels_remaining_stages_and_raises_root_cause():
+    async def failing_asr(idempotency):
+        await asyncio.sleep(0.01)
+        raise ValueError("asr failed")
+
+    async def scenario():
+        graph = StageGraph()
+        graph.add_stage("idempotency", lambda: asyncio.sleep(0, result="job"))
+        graph.add_stage("transcode", lambda idempotency: asyncio.sleep(5), ["idempotency"])
+        graph.add_stage("asr", failing_asr, ["idempotency"])
+        graph.add_stage("agentic", lambda asr: asyncio.sleep(0), ["asr"])
+        with pytest.raises(ValueError, match="asr failed"):
+            await graph.run()
+        return graph
+
+    graph = asyncio.run(scenario())
+
+    assert graph.timings["asr"].status == "failed"
+    assert graph.timings["transcode"].status == "cancelled"
+    assert graph.timings["agentic"].status == "cancelled"
+
+
+def test_unknown_dependency_is_rejected():
+    graph = StageGraph()
+    with pytest.raises(StageGraphError):
+        graph.add_stage("agentic", lambda asr: asyncio.sleep(0), ["asr"])
@@ -0,0 +1,47 @@
+import dataclasses
+import multiprocessing
+import time
+
+from ingestion_worker.supervisor import WorkerSupervisor
+from tests.conftest import BASE_CONFIG
+
+
+def test_per_process_splits_pod_budgets():
+    config = dataclasses.replace(
+        BASE_CONFIG, db_pool_size=20, max_concurrent_videos=4, gemini_max_concurrency=20, worker_processes=3
+    )
+
+    per_process = config.per_process()
+
+    assert per_process.db_pool_size == 6
+    assert per_process.max_concurrent_videos == 1
+    assert per_process.gemini_max_concurrency == 6
+    assert per_process.db_pool_size * config.worker_processes <= config.db_pool_size
+    assert BASE_CONFIG.per_process().db_pool_size == 10
+
+
+def _exit_immediately(heartbeat):
+    raise SystemExit(3)
+
+
+def test_crashed_worker_is_restarted():
+    supervisor = WorkerSupervisor(
+        target=_exit_immediately,
+        args=(),
+        processes=2,
+        shutdown_timeout=1,
+        context=multiprocessing.get_context("fork"),
+    )
+    for slot in supervisor.slots:
+        supervisor._start(slot)
+    first_pids = [slot.process.pid for slot in supervisor.slots]
+    for slot in supervisor.slots:
+        slot.process.join()
+
+    supervisor.check_workers()
+
+    assert [slot.process.pid for slot in supervisor.slots] != first_pids
+    assert all(slot.restarts == 1 for slot in supervisor.slots)
+
+    time.sleep(0.1)
+    supervisor.shutdown()
@@ -0,0 +1,96 @@
+import asyncio
+import dataclasses
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from google.cloud.aiplatform_v1.types import GenerateContentResponse
+from vertexai.generative_models import GenerativeModel
+
+from ingestion_worker.infrastructure.vertex import VertexClient
+from tests.conftest import BASE_CONFIG
+
+
+@pytest.fixture
+def make_client():
+    """按 BASE_CONFIG 创建 VertexClient，测试结束后关闭 gemini-cache 线程池"""
+    clients = []
+
+    def build(concurrency):
+        clients.append(VertexClient(dataclasses.replace(BASE_CONFIG, gemini_tool_concurrency=concurrency)))
+        return clients[-1]
+
+    yield build
+    for client in clients:
+        client.close()
+
+
+def test_tool_round_runs_calls_concurrently_and_keeps_order(make_client):
+    calls = [SimpleNamespace(name="query_fine_units", args={"lemma": lemma}) for lemma in ["go", "get", "bad", "know"]]
+
+    async def handler(name, args):
+        await asyncio.sleep(0.1)
+        if args["lemma"] == "bad":
+            raise RuntimeError("db down")
+        return {"lemma": args["lemma"], "candidates": [{"fine_id": len(args["lemma"])}]}
+
+    lemmas = {}
+    start = time.perf_counter()
+    parts = asyncio.run(make_client(4)._run_tool_round(calls, handler, lemmas))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.3
+    responses = [part.function_response for part in parts]
+    assert [r.response["result"]["lemma"] for r in (responses[0], responses[1], responses[3])] == ["go", "get", "know"]
+    assert "db down" in responses[2].response["error"]
+    assert lemmas == {2: "go", 3: "get", 4: "know"}
+
+
+def test_tool_round_fan_out_is_bounded(make_client):
+    running = peak = 0
+
+    async def handler(name, args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return {}
+
+    calls = [SimpleNamespace(name="query_fine_units", args={}) for _ in range(6)]
+    asyncio.run(make_client(2)._run_tool_round(calls, handler, {}))
+
+    assert peak == 2
+
+
+class FakePredictionClient:
+    """替代 SDK 的 PredictionServiceAsyncClient：请求参数仍经过 SDK 自己的校验"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def generate_content(self, request):
+        self.requests.append(request)
+        return GenerateContentResponse(candidates=[{
+            "content": {"role": "model", "parts": [{"text": '{"annotations": []}'}]},
+            "finish_reason": "STOP",
+        }])
+
+
+def test_generate_json_with_cached_content_passes_sdk_validation(make_client, monkeypatch, tmp_path):
+    # SDK 拒绝 cached_content 与 tools / tool_config 同时出现在请求中
+    prediction = FakePredictionClient()
+    monkeypatch.setattr(GenerativeModel, "_prediction_async_client", prediction)
+    monkeypatch.chdir(tmp_path)  # _parse_response 会写调试文件
+    cache = SimpleNamespace(
+        name="1", resource_name="projects/p/locations/us-central1/cachedContents/1", model_name="gemini-test"
+    )
+
+    result = asyncio.run(make_client(1).generate_json(
+        cache, "prompt", trace_context={"annotator_kind": "phrase_sense", "candidate_mode": "injected"}
+    ))
+
+    assert result == {"annotations": []}
+    assert prediction.requests[0].cached_content == cache.resource_name
+    assert not prediction.requests[0].tool_config and not prediction.requests[0].tools
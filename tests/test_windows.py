@@ -0,0 +1,63 @@
+import asyncio
+
+from ingestion_worker.domain.agentic.windows import plan_windows
+from tests.conftest import FakeDB, FakeVertex, fine_unit_row, make_annotation, make_segments as _segments
+
+
+def test_windows_respect_segment_count_token_budget_and_gaps():
+    segments = _segments(["Hi there", "Okay", "What?", "x" * 200, "Sure", "Fine", "Go"])
+
+    windows = plan_windows(segments, [0, 1, 2, 3, 4, 6], max_segments=2, max_tokens=20)
+
+    # 3 is too long for a shared window; 5 was already done, so 4 and 6 are not merged
+    assert windows == [[0, 1], [2], [3], [4], [6]]
+
+
+def _respond(prompt, trace_context):
+    if "一次处理" not in prompt:  # single-segment retry
+        return {"annotations": [make_annotation(trace_context["segment_index"], 7, 0, 2)]}
+    return {"annotations": [make_annotation(0, 7, 0, 2), make_annotation(1, 7, 0, 99), make_annotation(9, 7, 0, 1)]}
+
+
+def test_window_call_retries_only_the_segment_that_failed_validation(make_orchestrator):
+    orchestrator = make_orchestrator(
+        FakeVertex(_respond), gemini_max_concurrency=4, lexicon_enabled=False,
+        annotation_window_segments=3, annotation_window_tokens=100,
+    )
+    done = []
+
+    async def on_segment_done(idx, anns):
+        done.append((idx, [(a["segment_index"], a["span"]["end"]) for a in anns]))
+
+    asyncio.run(orchestrator._process_segments_concurrent(
+        None, _segments(["Hi there", "Okay", "What?"]), "video-1", on_segment_done=on_segment_done
+    ))
+
+    assert orchestrator.vertex.calls == [
+        ("phrase_sense", "0-2"), ("phrase_sense", 1), ("word_sense", "0-2"), ("word_sense", 1)
+    ]
+    # segment 1 came from its solo retries; segment 2 had nothing to annotate
+    assert done == [(0, [(0, 2), (0, 2)]), (1, [(1, 2), (1, 2)]), (2, [])]
+
+
+def _give_up(prompt, trace_context):
+    if trace_context["annotator_kind"] != "phrase_sense":
+        return {"annotations": []}
+    return {"annotations": [make_annotation(0, 1, 0, 7)]}
+
+
+def test_injected_window_keeps_cache_hits_when_the_rest_has_no_candidates(make_orchestrator):
+    orchestrator = make_orchestrator(
+        FakeVertex(_give_up), FakeDB([fine_unit_row(1, "phrase_sense", "give up")]), gemini_max_concurrency=1,
+        phrase_candidate_mode="injected", annotation_window_segments=3, annotation_window_tokens=100,
+    )
+
+    async def scenario():
+        await orchestrator._process_segments_concurrent(None, _segments(["Give up!"]), "video-1")
+        return await orchestrator._process_segments_concurrent(None, _segments(["Give up!", "Hmm okay"]), "video-2")
+
+    anns = asyncio.run(scenario())
+
+    # the window is [cache hit, no candidates]: Gemini is not called again and the hit is kept
+    assert orchestrator.vertex.methods.count("generate_json") == 1
+    assert [(a["segment_index"], a["fine_id"]) for a in anns] == [(0, 1)]
@@ -0,0 +1,49 @@
+import asyncio
+
+import numpy as np
+
+from ingestion_worker.domain.persistence import PersistenceService
+from ingestion_worker.domain.word_timings import WordTimings
+
+WORDS = [
+    {"word": "Hello", "start": 0.5, "end": 0.8, "score": 0.97},
+    {"word": "42"},  # WhisperX leaves numbers unaligned
+    {"word": "world", "start": 1.1, "end": 1.6, "score": 0.91},
+]
+
+
+def test_pack_round_trip_and_word_lookup():
+    timings = WordTimings.from_whisperx(WORDS)
+
+    restored = WordTimings.unpack(timings.tokens, *timings.pack())
+
+    assert restored.tokens == ["Hello", "42", "world"]
+    assert restored.starts.dtype == np.float32
+    np.testing.assert_allclose(restored.ends, [0.8, np.nan, 1.6], rtol=1e-6)
+    assert len(timings.pack()[0]) == 12
+    assert restored.word_at(0.6) == 0
+    assert restored.word_at(0.9) is None
+    assert restored.word_at(1.2) == 2
+
+
+class FakeConn:
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, query, *args):
+        self.calls.append(args)
+        return "INSERT 0 1"
+
+
+def test_word_timings_written_once_per_segment():
+    conn = FakeConn()
+    timings = WordTimings.from_whisperx(WORDS)
+    segments = [{"word_timings": timings}, {"word_timings": None}, {"word_timings": timings}]
+
+    written = asyncio.run(PersistenceService(db=None)._insert_word_timings(conn, [5, 6, 5], segments))
+
+    assert written == 1
+    segment_ids, tokens, starts, ends, scores = conn.calls[0]
+    assert segment_ids == [5]
+    assert tokens == [["Hello", "42", "world"]]
+    assert starts == [timings.pack()[0]]
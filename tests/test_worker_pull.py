@@ -0,0 +1,108 @@
+import asyncio
+import concurrent.futures
+import json
+import threading
+
+from ingestion_worker.errors import ASRError, IdempotencyError, WorkflowError
+from ingestion_worker.worker_pull import PullWorker
+
+
+class FakeMessage:
+    def __init__(self, name, data=None):
+        self.data = data if data is not None else json.dumps(
+            {"bucket": "raw", "name": name, "etag": "e1", "generation": "1"}
+        ).encode()
+        self.attributes = {}
+        self.result = None
+
+    def ack(self):
+        self.result = "ack"
+
+    def nack(self):
+        self.result = "nack"
+
+
+class FakeSubscriber:
+    """Local stand-in for SubscriberClient: delivers messages from a separate thread."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.flow_control = None
+        self.future = concurrent.futures.Future()
+
+    def subscribe(self, subscription_path, callback, flow_control):
+        self.flow_control = flow_control
+        threading.Thread(target=lambda: [callback(m) for m in self.messages]).start()
+        return self.future
+
+
+class FakeWorkflow:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+
+    async def process_message(self, message):
+        outcome = self.outcomes[message.object_name]
+        if outcome == "slow":
+            await asyncio.sleep(5)
+        elif isinstance(outcome, Exception):
+            raise outcome
+
+
+def _run(messages, outcomes, drain_seconds=1.0):
+    subscriber = FakeSubscriber(messages)
+    worker = PullWorker(
+        workflow=FakeWorkflow(outcomes),
+        subscriber=subscriber,
+        subscription_path="projects/p/subscriptions/s",
+        flow_control={"max_messages": 2},
+        drain_seconds=drain_seconds,
+    )
+
+    async def scenario():
+        run = asyncio.create_task(worker.run())
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if all(m.result for m in messages if outcomes.get(_name(m)) != "slow"):
+                break
+        await asyncio.sleep(0.02)
+        worker.stop()
+        await run
+
+    asyncio.run(scenario())
+    return subscriber
+
+
+def _name(message):
+    try:
+        return json.loads(message.data)["name"]
+    except ValueError:
+        return None
+
+
+def test_ack_only_after_success_and_nack_retryable_errors():
+    messages = [
+        FakeMessage("uploads/ok.mp4"),
+        FakeMessage("uploads/dup.mp4"),
+        FakeMessage("uploads/asr.mp4"),
+        FakeMessage("uploads/bad.mp4"),
+        FakeMessage(None, data=b"not json"),
+    ]
+    outcomes = {
+        "uploads/ok.mp4": None,
+        "uploads/dup.mp4": IdempotencyError("Task already completed"),
+        "uploads/asr.mp4": ASRError("replicate timeout"),
+        "uploads/bad.mp4": WorkflowError("unsupported codec", retryable=False),
+    }
+
+    subscriber = _run(messages, outcomes)
+
+    assert [m.result for m in messages] == ["ack", "ack", "nack", "ack", "ack"]
+    assert subscriber.flow_control == {"max_messages": 2}
+
+
+def test_stop_nacks_unfinished_work_after_drain_deadline():
+    messages = [FakeMessage("uploads/slow.mp4")]
+
+    _run(messages, {"uploads/slow.mp4": "slow"}, drain_seconds=0.05)
+
+    assert messages[0].result == "nack"
@@ -0,0 +1,297 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from ingestion_worker.application.workflow import IngestVideoWorkflow
+from ingestion_worker.errors import IdempotencyError
+from ingestion_worker.types import ASRResult, PubSubMessage, Segment, TranscodeResult
+from ingestion_worker.utils.retry import record_retry
+
+
+class FakeDB:
+    """Records every statement; returns the given ingest_jobs row for the claim."""
+
+    def __init__(self, job_row):
+        self.job_row = job_row
+        self.statements = []
+        self.checkpoints = []
+
+    async def fetch_one(self, query, *args):
+        self.statements.append(query)
+        return self.job_row
+
+    async def execute(self, query, *args):
+        self.statements.append(query)
+        if "checkpoint" in query and "||" in query:
+            self.checkpoints.append(args[-1])
+        return "UPDATE 1"
+
+
+class FakeLark:
+    async def send_error(self, **kwargs):
+        pass
+
+
+class FakeASR:
+    def __init__(self):
+        self.loaded = []
+        self.runs = []
+
+    async def load_result(self, asr_json_uri, vtt_uri=None):
+        self.loaded.append(asr_json_uri)
+        return ASRResult(
+            segments=[Segment(t_start=0.0, t_end=1.0, text="Hello there")],
+            asr_json_uri=asr_json_uri,
+            vtt_uri=vtt_uri,
+            duration_seconds=1.0,
+        )
+
+    async def run_whisperx(self, video_uid, object_name, **kwargs):
+        self.runs.append(kwargs)
+        raise AssertionError("ASR should have been resumed from the checkpoint")
+
+
+class FakeTranscoding:
+    def __init__(self):
+        self.calls = []
+
+    async def transcode_video(self, video_uid, object_name, **kwargs):
+        self.calls.append(kwargs)
+        record_retry()  # the re-attached job failed once and was resubmitted
+        return TranscodeResult(hls_path="gs://hls/encoded/v/manifest.m3u8", status="success")
+
+
+class FakeAgentic:
+    def __init__(self):
+        self.calls = 0
+        self.skipped = None
+
+    async def process_video(self, segments, on_segment_done=None, skip_segments=None, **kwargs):
+        self.calls += 1
+        self.skipped = skip_segments
+        for idx in range(len(segments)):
+            if idx not in skip_segments:
+                await on_segment_done(idx, [{"segment_index": idx, "fine_id": 42}], "gemini_text")
+        return [], "gemini_text", "gemini-test"
+
+
+class FakePersistence:
+    def __init__(self):
+        self.saved = 0
+        self.occurrence_batches = []
+        self.video_status = None
+        self.stats = []
+
+    async def save_segments(self, video_id, segments):
+        self.saved += 1
+        return list(range(100, 100 + len(segments)))
+
+    async def save_occurrences(self, segment_ids, annotations, method, ontology_ver):
+        self.occurrence_batches.append(annotations)
+        return len(annotations), 0, {a["fine_id"] for a in annotations}
+
+    async def update_video_status(self, **kwargs):
+        self.video_status = kwargs
+
+    async def save_processing_stats(self, stats):
+        self.stats.append(stats)
+
+
+def _message():
+    return PubSubMessage(
+        bucket="raw",
+        object_name="uploads/clip.mp4",
+        video_uid="video-1",
+        etag="etag-1",
+        generation="1",
+        event_time=datetime.now(timezone.utc),
+    )
+
+
+def _workflow(job_row):
+    config = SimpleNamespace(
+        raw_bucket="raw", gemini_model="gemini-test", persist_flush_annotations=200, persist_flush_seconds=5,
+        processing_timeout_seconds=3600
+    )
+    workflow = IngestVideoWorkflow(
+        config=config,
+        db=FakeDB(job_row),
+        gcs=None,
+        lark=FakeLark(),
+        transcoder=None,
+        replicate=None,
+        agentic=FakeAgentic(),
+        persistence=FakePersistence(),
+    )
+    workflow.asr_service = FakeASR()
+    workflow.transcoding_service = FakeTranscoding()
+    return workflow
+
+
+def test_retry_resumes_from_checkpoint():
+    """Finished ASR is reloaded from GCS and the running Transcoder job is re-attached."""
+    job_row = {
+        "object_key": "uploads/clip.mp4",
+        "etag": "etag-1",
+        "video_uid": "video-1",
+        "video_id": 7,
+        "status": "processing",
+        "retry_count": 1,
+        "previous_status": "error",
+        "previous_started_at": None,
+        "checkpoint": {
+            "asr_prediction_id": "pred-1",
+            "asr_json_uri": "gs://transcripts/video-1/asr.json",
+            "vtt_uri": "gs://transcripts/video-1/subs.vtt",
+            "transcoder_job_name": "projects/p/locations/l/jobs/j1",
+        },
+    }
+    workflow = _workflow(job_row)
+
+    timings = asyncio.run(workflow.process_message(_message()))
+
+    assert workflow.asr_service.loaded == ["gs://transcripts/video-1/asr.json"]
+    assert workflow.asr_service.runs == []
+    assert workflow.transcoding_service.calls[0]["resume_job_name"] == "projects/p/locations/l/jobs/j1"
+    assert workflow.agentic_service.calls == 1
+    assert workflow.persistence_service.saved == 1
+    assert workflow.persistence_service.occurrence_batches == [[{"segment_index": 0, "fine_id": 42}]]
+    assert timings["finalize"].status == "done"
+
+    stats = workflow.persistence_service.stats[0]
+    assert stats.occurrences_count == 1
+    assert stats.fine_units_matched == 1
+    assert stats.stage_retries == {"transcode": 1}
+
+
+def test_finished_stages_are_skipped():
+    job_row = {
+        "object_key": "uploads/clip.mp4",
+        "etag": "etag-1",
+        "video_uid": "video-1",
+        "video_id": 7,
+        "status": "processing",
+        "retry_count": 1,
+        "previous_status": "error",
+        "previous_started_at": None,
+        "checkpoint": {
+            "asr_json_uri": "gs://transcripts/video-1/asr.json",
+            "hls_path": "gs://hls/encoded/video-1/manifest.m3u8",
+            "segment_ids": [100],
+            "agentic_method": "gemini_text",
+            "ontology_ver": "gemini-test",
+            "annotation_stats": {"occurrences_inserted": 3, "occurrences_skipped": 0, "fine_units_matched": 2},
+        },
+    }
+    workflow = _workflow(job_row)
+
+    asyncio.run(workflow.process_message(_message()))
+
+    assert workflow.transcoding_service.calls == []
+    assert workflow.agentic_service.calls == 0
+    assert workflow.persistence_service.saved == 0
+    assert workflow.persistence_service.video_status["hls_path"] == "gs://hls/encoded/video-1/manifest.m3u8"
+
+    stats = workflow.persistence_service.stats[0]
+    assert stats.status == "done"
+    assert stats.retry_count == 1
+    assert stats.segments_count == 1
+    assert stats.occurrences_count == 3
+    assert sorted(stats.resumed_stages) == ["agentic", "asr", "segments", "transcode"]
+    # resumed stages are left out of the latency samples
+    assert set(stats.stage_seconds) == {"idempotency", "finalize"}
+    assert stats.stage_retries == {}
+
+
+def test_job_claimed_elsewhere_is_skipped_without_marking_error():
+    job_row = {
+        "object_key": None,
+        "etag": None,
+        "video_uid": None,
+        "video_id": None,
+        "status": None,
+        "retry_count": None,
+        "checkpoint": None,
+        "previous_status": "processing",
+        "previous_started_at": datetime.now(timezone.utc),
+    }
+    workflow = _workflow(job_row)
+
+    with pytest.raises(IdempotencyError):
+        asyncio.run(workflow.process_message(_message()))
+
+    # only the claim statement ran; the other worker's job was left alone
+    assert len(workflow.db.statements) == 1
+
+
+def test_cancelled_workflow_releases_job_as_queued():
+    job_row = {
+        "object_key": "uploads/clip.mp4",
+        "etag": "etag-1",
+        "video_uid": "video-1",
+        "video_id": 7,
+        "status": "processing",
+        "retry_count": 0,
+        "previous_status": None,
+        "previous_started_at": None,
+        "checkpoint": {"asr_json_uri": "gs://transcripts/video-1/asr.json"},
+    }
+    workflow = _workflow(job_row)
+
+    class SlowTranscoding:
+        async def transcode_video(self, video_uid, object_name, **kwargs):
+            await asyncio.sleep(5)
+
+    workflow.transcoding_service = SlowTranscoding()
+
+    async def scenario():
+        task = asyncio.create_task(workflow.process_message(_message()))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert "status = 'queued'" in workflow.db.statements[-1]
+
+
+def test_agentic_streams_occurrences_and_resumes_after_flushed_segments():
+    job_row = {
+        "object_key": "uploads/clip.mp4",
+        "etag": "etag-1",
+        "video_uid": "video-1",
+        "video_id": 7,
+        "status": "processing",
+        "retry_count": 1,
+        "previous_status": "error",
+        "previous_started_at": None,
+        "checkpoint": {
+            "asr_json_uri": "gs://transcripts/video-1/asr.json",
+            "hls_path": "gs://hls/encoded/video-1/manifest.m3u8",
+            "segment_ids": [100, 101, 102],
+            "annotated_segments": [0, 2],
+        },
+    }
+    workflow = _workflow(job_row)
+
+    async def load_three(asr_json_uri, vtt_uri=None):
+        return ASRResult(
+            segments=[Segment(t_start=float(i), t_end=i + 1.0, text=f"line {i}") for i in range(3)],
+            asr_json_uri=asr_json_uri,
+            vtt_uri=vtt_uri,
+            duration_seconds=3.0,
+        )
+
+    workflow.asr_service.load_result = load_three
+    workflow.config.persist_flush_annotations = 1
+
+    asyncio.run(workflow.process_message(_message()))
+
+    # segments were not rewritten and only the unfinished segment was annotated
+    assert workflow.persistence_service.saved == 0
+    assert workflow.agentic_service.skipped == {0, 2}
+    assert workflow.persistence_service.occurrence_batches == [[{"segment_index": 1, "fine_id": 42}]]
+    assert {"annotated_segments": [0, 1, 2]} in workflow.db.checkpoints